@@ -1,197 +1,810 @@
 import streamlit as st
-import yaml
 import os
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import uuid
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+import streamlit.components.v1 as components
+
+import datastore
+import stats
+import outbox
+import booking
+import attachments
+import uistate
+import watcher
+import sessions
+import audit
+import tenants
+import memprofile
+import dataformat
+import workqueue
+import submissions
+import templates
+from markup import render_markdown
+from records import Inquiry, Review, Column, Reply, AnswerTemplate, date_to_timestamp, now_timestamp, format_timestamp, thread_filename
 
 # 보안 참고사항:
 # 이 구현은 개발/데모 목적입니다. 프로덕션 환경에서는:
 # - 비밀번호 해싱 (bcrypt, argon2 등) 구현
 # - 마크다운 콘텐츠 sanitization (unsafe_allow_html 사용 시 XSS 위험)
+#   → 사용자 작성 본문은 저장 시 render_markdown()으로 sanitize된 HTML을 함께 저장합니다
 # - 환경 변수를 통한 민감 정보 관리
 # - HTTPS 사용 필수
 
 # 페이지 설정
-st.set_page_config(
-    page_title="블루힐 한의원",
-    page_icon="🏥",
-    layout="wide"
-)
+def configure_page(tenant=None):
+    """페이지 제목/아이콘/레이아웃을 설정합니다. 다른 st 명령보다 먼저 호출해야 합니다."""
+    st.set_page_config(
+        page_title=clinic_name(tenant),
+        page_icon="🏥",
+        layout="wide"
+    )
+
+# 지점 선택
+def clinic_name(tenant=None):
+    """화면에 표시할 지점 이름 (tenants.yaml에 name이 없으면 기본 이름)"""
+    tenant = tenant or tenants.current()
+    return tenant.name or "블루힐 한의원"
+
+def select_tenant():
+    """URL 파라미터(?clinic=) 또는 접속 호스트로 이번 실행의 지점을 정하고 활성화합니다.
+
+    같은 세션에서 다른 지점으로 옮겨 가면 이전 지점의 로그인 상태를 비우고, 옮겨 간 지점의
+    세션 쿠키로 다시 복원합니다.
+    """
+    context = getattr(st, 'context', None)
+    headers = getattr(context, 'headers', None) or {}
+    tenant = tenants.registry.resolve(
+        host=headers.get('Host'),
+        param=st.query_params.get(tenants.TENANT_PARAM)
+    )
+    tenants.activate(tenant)
+    previous = st.session_state.get('tenant_id')
+    if previous != tenant.id:
+        if previous is not None:
+            for key, default in SESSION_DEFAULTS.items():
+                st.session_state[key] = default
+            st.session_state.session_restore_checked = False
+        st.session_state.tenant_id = tenant.id
+    return tenant
+
+def public_content_dir():
+    """현재 지점의 공개 콘텐츠 디렉토리"""
+    return os.path.join(datastore.content_dir(), 'public')
 
 # 사용자 데이터 로드
-@st.cache_resource
 def load_users():
-    """users.yaml 파일에서 사용자 정보를 로드합니다."""
+    """users.yaml 파일에서 사용자 정보를 로드합니다.
+
+    파싱 결과는 프로세스 전체가 공유하며, 파일이 바뀌었을 때만 다시 읽습니다.
+    """
     try:
-        with open('users.yaml', 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-            return data.get('users', {})
+        data = datastore.files.get(datastore.users_file(), dataformat.safe_load)
+        return (data or {}).get('users', {})
     except FileNotFoundError:
         st.error("users.yaml 파일을 찾을 수 없습니다.")
         return {}
 
 # 데이터 로드 함수들
+@memprofile.profiled('load_data')
 def load_data(filename):
-    """YAML 파일에서 데이터를 로드합니다."""
+    """YAML 파일에서 데이터를 로드합니다.
+
+    문의글/후기/칼럼 파일은 records 모듈의 레코드 객체 목록으로 변환하여 반환합니다.
+    파싱 결과는 datastore에 캐시되어 파일이 바뀌었을 때만 다시 읽습니다.
+    """
     try:
-        filepath = f'data/{filename}'
-        if not os.path.exists(filepath):
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-            # inquiries, reviews, columns 키에서 데이터 추출
-            key = filename.replace('.yaml', '')
-            return data.get(key, []) if data else []
+        records, invalid = datastore.store.load(filename)
+        if invalid:
+            st.warning(f"{filename}: 형식이 올바르지 않은 항목 {invalid}건은 표시하지 않습니다. (파일에는 그대로 남아 있습니다)")
+        return records
     except Exception as e:
         st.error(f"데이터 로드 중 오류 발생: {str(e)}")
         return []
 
+def query_data(filename, start_ts=None, end_ts=None):
+    """작성일시가 [start_ts, end_ts) 구간인 레코드를 최신순으로 반환합니다.
+
+    작성일시 인덱스를 이진 탐색하므로 구간 밖의 레코드는 살펴보지 않습니다.
+    """
+    try:
+        return datastore.store.query(filename, start_ts, end_ts)[::-1]
+    except Exception as e:
+        st.error(f"데이터 로드 중 오류 발생: {str(e)}")
+        return []
+
+def query_group(filename, field, value, start_ts=None, end_ts=None):
+    """field 값이 value이고 작성일시가 [start_ts, end_ts) 구간인 레코드를 최신순으로 반환합니다.
+
+    값별 작성일시 인덱스를 사용하므로 다른 값의 레코드는 살펴보지 않습니다.
+    """
+    try:
+        index = datastore.store.group(filename, field).get(value)
+        return index.range(start_ts, end_ts)[::-1] if index else []
+    except Exception as e:
+        st.error(f"데이터 로드 중 오류 발생: {str(e)}")
+        return []
+
+@memprofile.profiled('save_data')
 def save_data(filename, data):
     """데이터를 YAML 파일에 저장합니다."""
     try:
-        filepath = f'data/{filename}'
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        key = filename.replace('.yaml', '')
-        with open(filepath, 'w', encoding='utf-8') as f:
-            yaml.dump({key: data}, f, allow_unicode=True, default_flow_style=False)
+        datastore.store.save(filename, data)
         return True
     except Exception as e:
         st.error(f"데이터 저장 중 오류 발생: {str(e)}")
         return False
 
+# 중복 제출 방지
+def get_submission_tokens():
+    """현재 지점의 제출 토큰 저장소를 반환합니다. 모든 서버 프로세스가 같은 토큰 파일을 공유합니다."""
+    return submissions.tokens.instance_for()
+
+def issue_form_token(form_key):
+    """폼 렌더링 시 제출 토큰을 발급합니다. 제출 전까지는 같은 토큰을 유지합니다."""
+    key = f"form_token_{form_key}"
+    if key not in st.session_state:
+        st.session_state[key] = str(uuid.uuid4())
+    return st.session_state[key]
+
+def rotate_form_token(form_key):
+    """제출이 처리된 폼에 새 토큰을 발급합니다."""
+    st.session_state[f"form_token_{form_key}"] = str(uuid.uuid4())
+
+def append_record(filename, record, token):
+    """제출 토큰을 확인한 뒤 레코드를 파일에 추가합니다.
+
+    이미 처리된 토큰이면 파일을 읽거나 쓰지 않고 None을 반환합니다.
+    """
+    tokens = get_submission_tokens()
+    if not tokens.claim(token):
+        return None
+    with datastore.store.locked(filename):
+        records = load_data(filename)
+        records.append(record)
+        saved = save_data(filename, records)
+    if saved:
+        updater = STATS_UPDATERS.get(filename)
+        if updater:
+            update_stats(lambda current: updater(current, record))
+        if filename == 'inquiries.yaml':
+            update_work_queue(lambda queue: queue.enqueue(record.id, record.created_ts))
+        return True
+    tokens.release(token)
+    return False
+
+# 통계 집계 갱신
+# 파일별로 새 레코드를 집계에 반영하는 함수
+STATS_UPDATERS = {
+    'inquiries.yaml': lambda current, record: current.add_inquiry(record.created_ts, record.is_private),
+    'reviews.yaml': lambda current, record: current.add_review(record.created_ts, record.category, record.rating)
+}
+
+def update_stats(apply):
+    """저장이 끝난 변경을 대시보드 집계에 반영합니다.
+
+    집계는 데이터에서 다시 계산할 수 있으므로, 갱신에 실패하면 집계 파일을 지워
+    다음 조회 시 다시 계산하게 하고 저장 자체는 성공으로 처리합니다.
+    """
+    try:
+        stats.store.update(apply)
+    except Exception:
+        try:
+            stats.store.reset()
+        except OSError:
+            pass
+
+# 관리자 작업 대기열
+def queue_entry(inquiry):
+    """답변이 필요한 문의글의 대기열 (기준 시각, 우선순위)를 반환합니다. 필요 없으면 None을 반환합니다."""
+    if not inquiry.answered:
+        return inquiry.created_ts, workqueue.DEFAULT_PRIORITY
+    if awaiting_follow_up(inquiry):
+        # 답변 후 작성자가 다시 답글을 단 문의는 답글 시각부터 긴급 기한을 적용합니다
+        return inquiry.last_activity_ts or inquiry.created_ts, 'high'
+    return None
+
+def sync_work_queue():
+    """문의글 데이터로 작업 대기열을 다시 맞추고 (추가한 수, 뺀 수)를 반환합니다."""
+    entries = []
+    for inquiry in load_data('inquiries.yaml'):
+        entry = queue_entry(inquiry)
+        if entry is not None:
+            entries.append((inquiry.id, inquiry.created_ts) + entry)
+    return workqueue.engine.sync(entries)
+
+def update_work_queue(apply):
+    """저장이 끝난 변경을 작업 대기열에 반영합니다.
+
+    대기열 로그가 아직 없으면 문의글 데이터로 채우며, 이때 방금 저장한 변경도 포함됩니다.
+    대기열은 데이터로 다시 맞출 수 있으므로 갱신에 실패해도 저장 자체는 성공으로 처리합니다.
+    """
+    try:
+        if workqueue.engine.exists():
+            apply(workqueue.engine)
+        else:
+            sync_work_queue()
+    except Exception as e:
+        st.warning(f"작업 대기열 갱신 중 오류 발생: {str(e)}")
+
+def find_inquiry(inquiry_id, created_ts):
+    """작성일시 인덱스에서 문의글을 찾습니다 (전체 목록을 살펴보지 않습니다)."""
+    for inquiry in datastore.store.query('inquiries.yaml', created_ts, created_ts + 1):
+        if inquiry.id == inquiry_id:
+            return inquiry
+    return None
+
+# 요청 제한 (토큰 버킷)
+def _rate_limit_from_env(name, default_rate, default_burst):
+    """환경 변수 BLUHILL_<NAME>_RATE / BLUHILL_<NAME>_BURST로 제한값을 덮어씁니다."""
+    rate = float(os.environ.get(f'BLUHILL_{name}_RATE', default_rate))
+    burst = float(os.environ.get(f'BLUHILL_{name}_BURST', default_burst))
+    return rate, burst
+
+# (초당 충전 토큰 수, 최대 버킷 크기)
+RATE_LIMITS = {
+    'write': {
+        'per_user': _rate_limit_from_env('WRITE_PER_USER', 0.1, 3),
+        'global': _rate_limit_from_env('WRITE_GLOBAL', 5, 20)
+    },
+    'login': {
+        'per_user': _rate_limit_from_env('LOGIN_PER_USER', 0.2, 5),
+        'global': _rate_limit_from_env('LOGIN_GLOBAL', 10, 50)
+    }
+}
+# 사용자별 버킷을 보관할 최대 개수
+RATE_LIMIT_MAX_KEYS = 10000
+
+class TokenBucket:
+    """초당 rate개씩 충전되고 최대 capacity개까지 쌓이는 토큰 버킷입니다."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def consume(self, amount=1):
+        """토큰을 소비할 수 있으면 소비하고 True를 반환합니다."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def refund(self, amount=1):
+        """소비한 토큰을 되돌립니다."""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimiter:
+    """사용자별 버킷과 전역 버킷으로 요청 빈도를 제한합니다."""
+
+    def __init__(self, per_user, global_limit, max_keys=RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.per_user = per_user
+        self.max_keys = max_keys
+        self.clock = clock
+        self._global = TokenBucket(*global_limit, clock=clock)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = {'per_user': 0, 'global': 0}
+
+    def allow(self, key):
+        """key(사용자명)의 요청을 허용하면 True, 제한에 걸리면 False를 반환합니다."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(*self.per_user, clock=self.clock)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+            # 사용자별 제한을 먼저 확인해야 한 사용자가 전역 토큰을 소진하지 못합니다
+            if not bucket.consume():
+                self.rejected['per_user'] += 1
+                return False
+            if not self._global.consume():
+                bucket.refund()
+                self.rejected['global'] += 1
+                return False
+            self.allowed += 1
+            return True
+
+    def stats(self):
+        """허용/거부 카운터를 반환합니다."""
+        with self._lock:
+            return {
+                'allowed': self.allowed,
+                'rejected_per_user': self.rejected['per_user'],
+                'rejected_global': self.rejected['global'],
+                'tracked_keys': len(self._buckets)
+            }
+
+@st.cache_resource
+def get_rate_limiters(tenant_id):
+    """지점의 요청 제한기를 반환합니다. 프로세스 안의 세션이 공유하며, 한도는 지점마다 따로 셉니다."""
+    return {
+        scope: RateLimiter(limits['per_user'], limits['global'])
+        for scope, limits in RATE_LIMITS.items()
+    }
+
+def check_rate_limit(scope, key):
+    """현재 지점의 scope('write', 'login')에서 key의 요청이 허용되는지 확인합니다.
+
+    한 지점에 요청이 몰려도 다른 지점의 전역 한도와 사용자별 버킷에는 영향이 없습니다.
+    """
+    return get_rate_limiters(tenants.current().id)[scope].allow(key)
+
+def get_rate_limit_stats():
+    """현재 지점의 scope별 요청 제한 카운터를 반환합니다."""
+    return {scope: limiter.stats() for scope, limiter in get_rate_limiters(tenants.current().id).items()}
+
+# 알림 메일
+# 새 문의 알림을 받을 관리자 주소 (설정하지 않으면 새 문의 알림을 보내지 않습니다)
+ADMIN_NOTIFY_EMAIL = os.environ.get('BLUHILL_ADMIN_EMAIL')
+
+@st.cache_resource
+def get_outbox_worker(tenant_id):
+    """지점의 알림 메일 발송 워커를 프로세스당 한 번 시작합니다.
+
+    워커 스레드에는 현재 지점이 없으므로 아웃박스 위치를 시작할 때의 지점 디렉토리로 고정합니다.
+    """
+    worker = outbox.OutboxWorker(
+        outbox.Outbox(datastore.data_path(outbox.OUTBOX_DIRNAME)),
+        outbox.SMTPSender(**outbox.smtp_settings_from_env())
+    )
+    worker.start()
+    return worker
+
+def enqueue_notification(to, subject, body):
+    """알림 메일을 아웃박스에 추가합니다. 실제 발송은 백그라운드 워커가 담당합니다."""
+    if not to:
+        return
+    try:
+        outbox.Outbox().enqueue(to, subject, body)
+    except Exception as e:
+        st.warning(f"알림 메일 예약 중 오류 발생: {str(e)}")
+
+def notify_new_inquiry(inquiry):
+    """관리자에게 새 문의 알림을 보냅니다."""
+    privacy = "비공개" if inquiry.is_private else "공개"
+    enqueue_notification(
+        ADMIN_NOTIFY_EMAIL,
+        f"[{clinic_name()}] 새 문의: {inquiry.title}",
+        f"{inquiry.author_name}({inquiry.author})님이 {privacy} 문의를 등록했습니다.\n\n"
+        f"제목: {inquiry.title}\n작성일: {inquiry.created_at}\n\n{inquiry.content}"
+    )
+
+def notify_answer(inquiry):
+    """문의 작성자에게 답변 등록 알림을 보냅니다. 이메일이 등록되지 않은 사용자는 건너뜁니다."""
+    user = load_users().get(inquiry.author) or {}
+    enqueue_notification(
+        user.get('email'),
+        f"[{clinic_name()}] 문의에 답변이 등록되었습니다: {inquiry.title}",
+        f"{inquiry.author_name}님, 문의하신 내용에 답변이 등록되었습니다.\n\n"
+        f"제목: {inquiry.title}\n\n답변:\n{templates.answer_text(inquiry)}"
+    )
+
+def notify_reply(inquiry, reply):
+    """답글 알림을 보냅니다. 관리자 답글은 문의 작성자에게, 작성자 답글은 관리자에게 보냅니다."""
+    if reply.author_role == 'admin':
+        to = (load_users().get(inquiry.author) or {}).get('email')
+        subject = f"[{clinic_name()}] 문의에 새 답글이 등록되었습니다: {inquiry.title}"
+    else:
+        to = ADMIN_NOTIFY_EMAIL
+        subject = f"[{clinic_name()}] 문의 추가 답글: {inquiry.title}"
+    enqueue_notification(
+        to, subject,
+        f"{reply.author_name}({reply.author})님이 답글을 등록했습니다.\n\n"
+        f"제목: {inquiry.title}\n\n{reply.content}"
+    )
+
+# 첨부 사진
+def save_attachments(files):
+    """업로드된 파일을 첨부 저장소에 저장하고 해시 목록을 반환합니다. 실패하면 None을 반환합니다."""
+    if len(files) > attachments.MAX_ATTACHMENTS:
+        st.error(f"사진은 최대 {attachments.MAX_ATTACHMENTS}장까지 첨부할 수 있습니다.")
+        return None
+    digests = []
+    for uploaded in files:
+        try:
+            digest = attachments.store.store(uploaded)
+        except attachments.AttachmentError as e:
+            st.error(f"{uploaded.name}: {str(e)}")
+            return None
+        except Exception as e:
+            st.error(f"첨부 파일 저장 중 오류 발생: {str(e)}")
+            return None
+        if digest not in digests:
+            digests.append(digest)
+    return digests
+
+def show_attachments(record):
+    """레코드에 첨부된 사진을 축소 이미지로 표시합니다."""
+    if not record.attachments:
+        return
+    columns = st.columns(min(len(record.attachments), 3))
+    for i, digest in enumerate(record.attachments):
+        try:
+            columns[i % len(columns)].image(attachments.store.thumbnail_path(digest))
+        except Exception:
+            columns[i % len(columns)].caption("🖼️ 사진을 불러올 수 없습니다.")
+
+# 사용자 마크다운 표시
+def show_rendered(record, field='content'):
+    """저장된 렌더링 결과를 표시합니다. 이전 데이터는 그 자리에서 렌더링합니다."""
+    rendered = getattr(record, f'{field}_html', None)
+    if rendered is None:
+        rendered = render_markdown(getattr(record, field, None))
+    st.markdown(rendered, unsafe_allow_html=True)
+
 # 세션 상태 초기화
-if 'logged_in' not in st.session_state:
-    st.session_state.logged_in = False
-if 'username' not in st.session_state:
-    st.session_state.username = None
-if 'role' not in st.session_state:
-    st.session_state.role = None
-if 'user_name' not in st.session_state:
-    st.session_state.user_name = None
+SESSION_DEFAULTS = {
+    'logged_in': False,
+    'username': None,
+    'role': None,
+    'user_name': None
+}
+
+def init_session_state():
+    """로그인 관련 세션 상태의 기본값을 설정합니다."""
+    for key, default in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = default
+
+def session_cookies():
+    """요청 쿠키를 반환합니다. 쿠키를 읽을 수 없는 이전 Streamlit 버전이면 None을 반환합니다."""
+    context = getattr(st, 'context', None)
+    return getattr(context, 'cookies', None)
+
+def restore_session():
+    """세션의 첫 실행에서 쿠키의 서명된 세션 토큰으로 로그인 상태를 복원합니다.
+
+    토큰은 비밀 키만으로 검증하므로 재접속이 어느 서버 프로세스로 가더라도 복원됩니다.
+    로그아웃한 뒤에도 연결 시점의 쿠키가 남아 있으므로 세션당 한 번만 확인합니다.
+    사용자가 삭제되었거나 역할이 바뀐 토큰은 받아들이지 않습니다.
+    """
+    if st.session_state.get('session_restore_checked'):
+        return False
+    st.session_state.session_restore_checked = True
+    if st.session_state.logged_in:
+        return False
+    token = (session_cookies() or {}).get(sessions.cookie_name())
+    if not token:
+        return False
+    try:
+        claims = sessions.get_signer().verify(token)
+    except sessions.SessionTokenError:
+        claims = None
+    user = load_users().get(claims['sub']) if claims else None
+    if not user or user['role'] != claims.get('role'):
+        st.session_state.pending_session_cookie = ''
+        return False
+    st.session_state.logged_in = True
+    st.session_state.username = claims['sub']
+    st.session_state.role = user['role']
+    st.session_state.user_name = user['name']
+    return True
+
+def flush_session_cookie():
+    """login()/logout()이 남긴 세션 쿠키 변경을 브라우저에 반영합니다."""
+    pending = st.session_state.get('pending_session_cookie')
+    if pending is None:
+        return
+    if session_cookies() is None:
+        # 다시 읽을 수 없는 쿠키는 저장하지 않습니다 (세션이 끝나면 다시 로그인)
+        st.session_state.pending_session_cookie = None
+        return
+    script = sessions.cookie_script(pending or None)
+    if hasattr(st, 'iframe'):
+        st.iframe(script, height=1)
+    else:
+        # st.iframe이 없는 이전 Streamlit 버전
+        components.html(script, height=0)
+    st.session_state.pending_session_cookie = None
 
 def login(username, password):
-    """사용자 로그인을 처리합니다."""
+    """사용자 로그인을 처리하고 다음 실행에서 저장할 세션 토큰을 발급합니다."""
     users = load_users()
     if username in users and users[username]['password'] == password:
         st.session_state.logged_in = True
         st.session_state.username = username
         st.session_state.role = users[username]['role']
         st.session_state.user_name = users[username]['name']
+        st.session_state.pending_session_cookie = sessions.get_signer().issue(
+            username, users[username]['role'], users[username]['name']
+        )
         return True
     return False
 
 def logout():
-    """사용자 로그아웃을 처리합니다."""
+    """사용자 로그아웃을 처리하고 세션 쿠키를 지웁니다."""
     st.session_state.logged_in = False
     st.session_state.username = None
     st.session_state.role = None
     st.session_state.user_name = None
+    st.session_state.pending_session_cookie = ''
 
 def load_markdown_file(filepath):
-    """마크다운 파일을 읽어 반환합니다."""
+    """마크다운 파일을 읽어 반환합니다. 내용은 파일이 바뀔 때까지 캐시됩니다."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return f.read()
+        return datastore.files.get(filepath, datastore.read_text)
     except FileNotFoundError:
         return f"⚠️ 파일을 찾을 수 없습니다: {filepath}"
     except Exception as e:
         return f"⚠️ 파일을 읽는 중 오류가 발생했습니다: {str(e)}"
 
-def display_public_content(category, subcategory):
-    """공개 콘텐츠를 표시합니다."""
-    # 파일명 매핑
-    file_mapping = {
-        "한의원": {
-            "의료진": "01_의료진.md",
-            "위치및진료시간": "02_위치및진료시간.md",
-            "칼럼": "03_칼럼.md"
-        },
-        "진료과목": {
-            "통증치료": "04_통증치료.md",
-            "추나요법": "05_추나요법.md",
-            "녹용한약": "06_녹용한약.md",
-            "공진단": "07_공진단.md"
-        }
+# 공개 콘텐츠 파일명 매핑
+PUBLIC_CONTENT_FILES = {
+    "한의원": {
+        "의료진": "01_의료진.md",
+        "위치및진료시간": "02_위치및진료시간.md",
+        "칼럼": "03_칼럼.md"
+    },
+    "진료과목": {
+        "통증치료": "04_통증치료.md",
+        "추나요법": "05_추나요법.md",
+        "녹용한약": "06_녹용한약.md",
+        "공진단": "07_공진단.md"
     }
+}
+
+def display_public_content(category, subcategory, prefetched=None):
+    """공개 콘텐츠를 표시합니다.
+
+    prefetched에 미리 읽어 둔 마크다운(파일 경로 → 내용)이 있으면 파일을 다시 읽지 않습니다.
+    """
+    file_mapping = PUBLIC_CONTENT_FILES
 
     filename = file_mapping.get(category, {}).get(subcategory)
     if not filename:
         st.error("콘텐츠를 찾을 수 없습니다.")
         return
 
-    filepath = os.path.join('content/public', filename)
+    filepath = os.path.join(public_content_dir(), filename)
 
     # 경로 순회 공격 방지
     if '..' in filename or os.path.sep in filename:
         st.error("⚠️ 잘못된 파일명입니다.")
         return
 
-    if not os.path.abspath(filepath).startswith(os.path.abspath('content/public')):
+    if not os.path.abspath(filepath).startswith(os.path.abspath(public_content_dir())):
         st.error("⚠️ 잘못된 파일 경로입니다.")
         return
 
-    content = load_markdown_file(filepath)
+    if prefetched and filepath in prefetched:
+        content = prefetched[filepath]
+    else:
+        content = load_markdown_file(filepath)
 
     # 칼럼 페이지인 경우 저장된 칼럼 목록도 표시
     if subcategory == "칼럼":
         st.markdown(content)
         st.divider()
 
-        columns_data = load_data('columns.yaml')
+        columns_data = query_data('columns.yaml')
         if columns_data:
             st.subheader("📰 작성된 칼럼")
-            for col in sorted(columns_data, key=lambda x: x['created_at'], reverse=True):
-                with st.expander(f"📝 {col['title']} - {col['created_at'][:10]}"):
-                    st.markdown(f"**작성자**: {col['author']}")
-                    st.markdown(f"**작성일**: {col['created_at']}")
+            for col in columns_data:
+                with st.expander(f"📝 {col.title} - {col.created_date}"):
+                    st.markdown(f"**작성자**: {col.author}")
+                    st.markdown(f"**작성일**: {col.created_at}")
                     st.divider()
-                    st.markdown(col['content'])
+                    show_rendered(col)
         else:
             st.info("아직 작성된 칼럼이 없습니다.")
     else:
         st.markdown(content)
 
+# 작성일 기간 필터
+DATE_RANGE_PRESETS = ["전체 기간", "오늘", "이번 주", "이번 달", "지난달", "직접 선택"]
+
+def resolve_date_range(preset, today, custom=()):
+    """기간 선택값을 [시작일, 종료일) 날짜 구간으로 변환합니다. 전체 기간은 (None, None)입니다."""
+    if preset == "오늘":
+        return today, today + timedelta(days=1)
+    if preset == "이번 주":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=7)
+    if preset == "이번 달":
+        start = today.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    if preset == "지난달":
+        end = today.replace(day=1)
+        return (end - timedelta(days=1)).replace(day=1), end
+    if preset == "직접 선택" and custom:
+        if isinstance(custom, date):
+            custom = (custom,)
+        return custom[0], custom[-1] + timedelta(days=1)
+    return None, None
+
+def show_date_range_filter(key):
+    """작성일 기간 필터를 표시하고 (start_ts, end_ts)를 반환합니다."""
+    preset = st.selectbox("작성일", DATE_RANGE_PRESETS, key=f"{key}_date_preset")
+    custom = ()
+    if preset == "직접 선택":
+        custom = st.date_input("기간", value=(), key=f"{key}_date_range")
+    start, end = resolve_date_range(preset, date.today(), custom)
+    if start is None:
+        return None, None
+    return date_to_timestamp(start), date_to_timestamp(end)
+
 def show_inquiry_form():
     """문의글 작성 폼을 표시합니다."""
     st.subheader("💬 문의글 작성")
 
+    token = issue_form_token("inquiry_form")
     with st.form("inquiry_form"):
         title = st.text_input("제목", max_chars=100)
         content = st.text_area("내용", height=200)
         is_private = st.checkbox("비공개 문의 (작성자와 관리자만 볼 수 있습니다)")
+        photos = st.file_uploader(
+            "사진 첨부", type=attachments.ALLOWED_EXTENSIONS, accept_multiple_files=True
+        )
 
         submitted = st.form_submit_button("문의글 등록", use_container_width=True)
 
         if submitted:
             if not title or not content:
                 st.error("제목과 내용을 모두 입력해주세요.")
+            elif token in get_submission_tokens():
+                # 이미 처리된 제출은 요청 제한에 세지 않습니다
+                rotate_form_token("inquiry_form")
+                st.info("이미 등록된 문의글입니다.")
+            elif not check_rate_limit('write', st.session_state.username):
+                st.error("등록 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
             else:
-                inquiries = load_data('inquiries.yaml')
-                new_inquiry = {
-                    'id': str(uuid.uuid4()),
-                    'author': st.session_state.username,
-                    'author_name': st.session_state.user_name,
-                    'title': title,
-                    'content': content,
-                    'is_private': is_private,
-                    'answered': False,
-                    'answer': None,
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                inquiries.append(new_inquiry)
-                if save_data('inquiries.yaml', inquiries):
-                    st.success("문의글이 등록되었습니다!")
-                    st.rerun()
+                photo_refs = save_attachments(photos or [])
+                if photo_refs is not None:
+                    new_inquiry = Inquiry(
+                        id=token,
+                        author=st.session_state.username,
+                        author_name=st.session_state.user_name,
+                        title=title,
+                        content=content,
+                        content_html=render_markdown(content),
+                        is_private=is_private,
+                        answered=False,
+                        answer=None,
+                        attachments=photo_refs or None
+                    )
+                    result = append_record('inquiries.yaml', new_inquiry, token)
+                    if result is None:
+                        rotate_form_token("inquiry_form")
+                        st.info("이미 등록된 문의글입니다.")
+                    elif result:
+                        rotate_form_token("inquiry_form")
+                        notify_new_inquiry(new_inquiry)
+                        st.success("문의글이 등록되었습니다!")
+                        st.rerun()
+
+# 답글 스레드
+def lazy_expander(label, key):
+    """열림 여부를 알 수 있는 expander를 만들고 (expander, 열림 여부)를 반환합니다.
+
+    열고 닫을 때 다시 실행되므로 닫혀 있는 동안에는 스레드를 읽지 않습니다. 열림 상태를
+    알려주지 않는 이전 Streamlit에서는 expander 안의 '답글 보기' 체크박스로 대신합니다.
+    """
+    try:
+        expander = st.expander(label, key=key, on_change="rerun")
+        return expander, bool(expander.open)
+    except TypeError:
+        expander = st.expander(label)
+        return expander, expander.checkbox("답글 보기", key=key)
+
+def awaiting_follow_up(inquiry):
+    """답변 이후 작성자가 마지막으로 답글을 단 문의글인지 여부"""
+    return bool(inquiry.reply_count) and inquiry.last_reply_by == inquiry.author
+
+def thread_badge(inquiry):
+    """목록 제목에 붙일 답글 수와 최근 활동 시각 (스레드 파일은 읽지 않습니다)"""
+    if not inquiry.reply_count:
+        return ""
+    last_ts = inquiry.last_activity_ts or inquiry.answered_ts or inquiry.created_ts
+    return f" | 💬 {inquiry.reply_count} · {format_timestamp(last_ts)[:16]}"
+
+def post_reply(inquiry, content, token):
+    """답글을 스레드 파일에 추가하고 부모 문의글의 답글 수/최근 활동을 갱신합니다.
+
+    append_record()와 같이 이미 처리된 토큰이면 None을, 저장에 실패하면 False를 반환합니다.
+    """
+    reply = Reply(
+        id=token,
+        inquiry_id=inquiry.id,
+        author=st.session_state.username,
+        author_name=st.session_state.user_name,
+        author_role=st.session_state.role,
+        content=content,
+        content_html=render_markdown(content)
+    )
+    filename = thread_filename(inquiry.id)
+    result = append_record(filename, reply, token)
+    if not result:
+        return result
+    reply_count = len(load_data(filename))
+    answered = follow_up = None
+    with datastore.store.locked('inquiries.yaml'):
+        all_inquiries = load_data('inquiries.yaml')
+        for item in all_inquiries:
+            if item.id == inquiry.id:
+                item.reply_count = reply_count
+                item.last_activity_ts = reply.created_ts
+                item.last_reply_by = reply.author
+                if item.answered:
+                    answered, follow_up = item, queue_entry(item)
+                break
+        saved = save_data('inquiries.yaml', all_inquiries)
+    if saved and answered is not None:
+        # 답변 후 작성자의 답글은 다시 대기열에 넣고, 관리자의 답글은 대기열에서 뺍니다
+        if follow_up is None:
+            update_work_queue(lambda queue: queue.complete(answered.id))
+        else:
+            update_work_queue(lambda queue: queue.enqueue(answered.id, answered.created_ts, *follow_up))
+    if reply.author_role == 'admin':
+        audit_admin_change('reply', filename, inquiry.id, after=reply)
+    notify_reply(inquiry, reply)
+    return True
+
+def show_thread(inquiry, ui, prefix):
+    """문의글의 답글 스레드를 읽어 표시하고, 작성자와 관리자에게 답글 입력란을 보여줍니다."""
+    replies = load_data(thread_filename(inquiry.id))
+    st.markdown(f"**💬 답글 {len(replies)}개**")
+    for reply in replies:
+        badge = "🏥" if reply.author_role == 'admin' else "👤"
+        st.markdown(f"{badge} **{reply.author_name}** · {reply.created_at}")
+        show_rendered(reply)
+
+    if st.session_state.role != 'admin' and inquiry.author != st.session_state.username:
+        return
+    token = ui.get(f'{prefix}_token', inquiry.id)
+    if token is None:
+        token = str(uuid.uuid4())
+        ui.set(f'{prefix}_token', inquiry.id, token)
+    content = st.text_area("답글 작성", key=ui.key(f'{prefix}_text', inquiry.id), height=100)
+    if st.button("답글 등록", key=ui.key(f'{prefix}_submit', inquiry.id)):
+        if not content:
+            st.error("답글 내용을 입력해주세요.")
+        elif token in get_submission_tokens():
+            # 이미 처리된 제출은 요청 제한에 세지 않습니다
+            ui.set(f'{prefix}_token', inquiry.id, str(uuid.uuid4()))
+            st.info("이미 등록된 답글입니다.")
+        elif not check_rate_limit('write', st.session_state.username):
+            st.error("등록 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+        else:
+            result = post_reply(inquiry, content, token)
+            if result is None:
+                ui.set(f'{prefix}_token', inquiry.id, str(uuid.uuid4()))
+                st.info("이미 등록된 답글입니다.")
+            elif result:
+                ui.set(f'{prefix}_token', inquiry.id, str(uuid.uuid4()))
+                st.success("답글이 등록되었습니다!")
+                st.rerun()
 
 def show_inquiry_list():
     """문의글 목록을 표시합니다."""
     st.subheader("💬 문의글 목록")
 
-    inquiries = load_data('inquiries.yaml')
+    # 답글 스레드의 열림 상태/입력 키는 이번에 표시한 문의글의 것만 남깁니다
+    ui = uistate.RecordUIState(st.session_state, 'inquiry_list')
+    start_ts, end_ts = show_date_range_filter("inquiry_list")
+    inquiries = query_data('inquiries.yaml', start_ts, end_ts)
 
     if not inquiries:
-        st.info("아직 작성된 문의글이 없습니다.")
+        if start_ts is None:
+            st.info("아직 작성된 문의글이 없습니다.")
+        else:
+            st.info("선택한 기간에 작성된 문의글이 없습니다.")
+        ui.evict_stale()
         return
 
     # 사용자별 필터링
@@ -199,74 +812,450 @@ def show_inquiry_list():
         # 일반 사용자: 공개 글 + 본인이 작성한 비공개 글만 표시
         inquiries = [
             inq for inq in inquiries
-            if not inq['is_private'] or inq['author'] == st.session_state.username
+            if not inq.is_private or inq.author == st.session_state.username
         ]
 
-    for inq in sorted(inquiries, key=lambda x: x['created_at'], reverse=True):
-        privacy_badge = "🔒 비공개" if inq['is_private'] else "🌐 공개"
-        answer_badge = "✅ 답변완료" if inq['answered'] else "⏳ 대기중"
+    for inq in inquiries:
+        privacy_badge = "🔒 비공개" if inq.is_private else "🌐 공개"
+        answer_badge = "✅ 답변완료" if inq.answered else "⏳ 대기중"
 
-        with st.expander(f"{privacy_badge} {answer_badge} | {inq['title']} - {inq['author_name']} ({inq['created_at'][:10]})"):
-            st.markdown(f"**작성자**: {inq['author_name']}")
-            st.markdown(f"**작성일**: {inq['created_at']}")
+        expander, opened = lazy_expander(
+            f"{privacy_badge} {answer_badge} | {inq.title} - {inq.author_name} ({inq.created_date}){thread_badge(inq)}",
+            ui.key('inquiry_thread', inq.id)
+        )
+        with expander:
+            st.markdown(f"**작성자**: {inq.author_name}")
+            st.markdown(f"**작성일**: {inq.created_at}")
             st.markdown(f"**공개여부**: {privacy_badge}")
             st.divider()
             st.markdown("**문의 내용:**")
-            st.write(inq['content'])
+            show_rendered(inq)
+            show_attachments(inq)
 
-            if inq['answered']:
+            if inq.answered:
                 st.divider()
                 st.markdown("**답변:**")
-                st.info(inq['answer'])
+                st.info(templates.answer_text(inq))
+
+            # 스레드는 펼친 문의글만 읽습니다
+            if opened:
+                st.divider()
+                show_thread(inq, ui, 'inquiry_reply')
+
+    ui.evict_stale()
+
+# 후기의 진료과목과 별점
+REVIEW_CATEGORIES = list(PUBLIC_CONTENT_FILES["진료과목"])
+NO_CATEGORY = "선택 안 함"
+RATING_OPTIONS = [5, 4, 3, 2, 1]
+# 진료과목 페이지에 표시할 최근 후기 수
+CATEGORY_REVIEWS_SHOWN = 5
+
+def format_rating(rating):
+    """별점을 ★☆로 표시합니다."""
+    return "★" * rating + "☆" * (5 - rating)
+
+def show_review(review):
+    """후기 하나를 펼침 항목으로 표시합니다."""
+    mark = format_rating(review.rating) if review.rating else "⭐"
+    label = f"{mark} {review.title} - {review.author_name} ({review.created_date})"
+    if review.category:
+        label = f"[{review.category}] {label}"
+    with st.expander(label):
+        st.markdown(f"**작성자**: {review.author_name}")
+        st.markdown(f"**작성일**: {review.created_at}")
+        if review.category:
+            st.markdown(f"**진료과목**: {review.category}")
+        if review.rating:
+            st.markdown(f"**별점**: {format_rating(review.rating)} ({review.rating}점)")
+        st.divider()
+        show_rendered(review)
+        show_attachments(review)
 
 def show_review_form():
     """후기 작성 폼을 표시합니다."""
     st.subheader("⭐ 후기 작성")
 
+    token = issue_form_token("review_form")
     with st.form("review_form"):
+        category = st.selectbox("진료과목", [NO_CATEGORY] + REVIEW_CATEGORIES)
+        rating = st.radio("별점", RATING_OPTIONS, format_func=format_rating, horizontal=True)
         title = st.text_input("제목", max_chars=100)
         content = st.text_area("내용", height=200)
+        photos = st.file_uploader(
+            "사진 첨부", type=attachments.ALLOWED_EXTENSIONS, accept_multiple_files=True
+        )
 
         submitted = st.form_submit_button("후기 등록", use_container_width=True)
 
         if submitted:
             if not title or not content:
                 st.error("제목과 내용을 모두 입력해주세요.")
+            elif token in get_submission_tokens():
+                # 이미 처리된 제출은 요청 제한에 세지 않습니다
+                rotate_form_token("review_form")
+                st.info("이미 등록된 후기입니다.")
+            elif not check_rate_limit('write', st.session_state.username):
+                st.error("등록 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
             else:
-                reviews = load_data('reviews.yaml')
-                new_review = {
-                    'id': str(uuid.uuid4()),
-                    'author': st.session_state.username,
-                    'author_name': st.session_state.user_name,
-                    'title': title,
-                    'content': content,
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                reviews.append(new_review)
-                if save_data('reviews.yaml', reviews):
-                    st.success("후기가 등록되었습니다!")
-                    st.rerun()
+                photo_refs = save_attachments(photos or [])
+                if photo_refs is not None:
+                    new_review = Review(
+                        id=token,
+                        author=st.session_state.username,
+                        author_name=st.session_state.user_name,
+                        title=title,
+                        content=content,
+                        content_html=render_markdown(content),
+                        attachments=photo_refs or None,
+                        category=None if category == NO_CATEGORY else category,
+                        rating=rating
+                    )
+                    result = append_record('reviews.yaml', new_review, token)
+                    if result is None:
+                        rotate_form_token("review_form")
+                        st.info("이미 등록된 후기입니다.")
+                    elif result:
+                        rotate_form_token("review_form")
+                        st.success("후기가 등록되었습니다!")
+                        st.rerun()
 
 def show_review_list():
     """후기 목록을 표시합니다."""
     st.subheader("⭐ 치료 후기")
 
-    reviews = load_data('reviews.yaml')
+    category = st.selectbox("진료과목", ["전체"] + REVIEW_CATEGORIES, key="review_list_category")
+    start_ts, end_ts = show_date_range_filter("review_list")
+    if category == "전체":
+        reviews = query_data('reviews.yaml', start_ts, end_ts)
+    else:
+        reviews = query_group('reviews.yaml', 'category', category, start_ts, end_ts)
 
     if not reviews:
-        st.info("아직 작성된 후기가 없습니다.")
+        if start_ts is None and category == "전체":
+            st.info("아직 작성된 후기가 없습니다.")
+        else:
+            st.info("선택한 조건에 맞는 후기가 없습니다.")
         return
 
-    for review in sorted(reviews, key=lambda x: x['created_at'], reverse=True):
-        with st.expander(f"⭐ {review['title']} - {review['author_name']} ({review['created_at'][:10]})"):
-            st.markdown(f"**작성자**: {review['author_name']}")
-            st.markdown(f"**작성일**: {review['created_at']}")
-            st.divider()
-            st.markdown(review['content'])
+    for review in reviews:
+        show_review(review)
+
+def show_category_reviews(category):
+    """진료과목 페이지에 후기 수, 평균 별점과 최근 후기를 표시합니다.
+
+    후기 수와 평균은 통계 집계에서, 후기는 진료과목별 인덱스에서 읽으므로 전체 후기를 살펴보지 않습니다.
+    """
+    st.divider()
+    st.subheader("⭐ 치료 후기")
+
+    try:
+        count, average, rated = stats.store.get().rating_summary(category)
+    except Exception as e:
+        st.error(f"후기 집계 로드 중 오류 발생: {str(e)}")
+        return
+
+    if not count:
+        st.info("아직 이 진료과목의 후기가 없습니다.")
+        return
+    if average is None:
+        st.markdown(f"후기 {count}건")
+    else:
+        st.markdown(f"**{format_rating(round(average))} {average:.1f}** / 5 (별점 {rated}건, 후기 {count}건)")
+
+    for review in query_group('reviews.yaml', 'category', category)[:CATEGORY_REVIEWS_SHOWN]:
+        show_review(review)
+
+# 감사 로그
+AUDIT_ACTION_LABELS = {
+    'answer': "답변 등록",
+    'edit_answer': "답변 수정",
+    'create_column': "칼럼 등록",
+    'delete_column': "칼럼 삭제",
+    'create_template': "답변 템플릿 등록",
+    'retire_template': "답변 템플릿 보관",
+    'reply': "답글 등록"
+}
+
+def audit_admin_change(action, dataset, record_id, before=None, after=None):
+    """관리자 변경을 감사 로그에 남깁니다. 파일 기록은 백그라운드에서 합니다."""
+    try:
+        audit.trail.record(
+            st.session_state.username, st.session_state.user_name,
+            action, dataset, record_id, before, after
+        )
+    except Exception as e:
+        st.warning(f"감사 로그 기록 중 오류 발생: {str(e)}")
+
+def show_audit_history(record_id):
+    """레코드의 변경 이력을 표시합니다."""
+    try:
+        events = audit.trail.history(record_id)
+    except Exception as e:
+        st.error(f"변경 이력 로드 중 오류 발생: {str(e)}")
+        return
+    if not events:
+        st.caption("변경 이력이 없습니다.")
+        return
+    for event in reversed(events):
+        label = AUDIT_ACTION_LABELS.get(event['action'], event['action'])
+        st.markdown(f"**{event['at']}** {label} - {event['actor_name']} ({event['actor']})")
+        st.json({'이전': event['before'], '이후': event['after']}, expanded=False)
+
+def save_answer(inquiry_id, answer, template_id=None, variables=None):
+    """문의글에 답변을 저장하고 감사 로그, 통계 집계, 알림, 작업 대기열에 반영합니다. 저장했으면 True를 반환합니다.
+
+    템플릿 답변은 answer 없이 템플릿 ID와 직접 입력한 변수만 저장합니다.
+    """
+    newly_answered = answered = before = None
+    with datastore.store.locked('inquiries.yaml'):
+        all_inquiries = load_data('inquiries.yaml')
+        for i, item in enumerate(all_inquiries):
+            if item.id == inquiry_id:
+                before = item.to_dict()
+                # 다른 관리자가 먼저 답변한 경우 답변일시와 집계는 그대로 둡니다
+                if not item.answered:
+                    all_inquiries[i].answered_ts = now_timestamp()
+                    newly_answered = all_inquiries[i]
+                all_inquiries[i].answered = True
+                all_inquiries[i].answer = answer
+                all_inquiries[i].answer_template = template_id
+                all_inquiries[i].answer_vars = variables or None
+                answered = all_inquiries[i]
+                break
+        saved = save_data('inquiries.yaml', all_inquiries)
+    if not saved:
+        return False
+    if answered is not None:
+        audit_admin_change('answer', 'inquiries.yaml', inquiry_id, before, answered)
+    if newly_answered is not None:
+        update_stats(lambda current: current.add_answer(
+            newly_answered.created_ts, newly_answered.answered_ts
+        ))
+        notify_answer(newly_answered)
+    update_work_queue(lambda queue: queue.complete(inquiry_id))
+    return True
+
+def show_template_picker(inquiry, ui, prefix):
+    """답변 템플릿을 이름 접두어로 찾아 고르고 변수를 입력받습니다.
+
+    (템플릿, 변수)를 반환하며, 템플릿이 없거나 고르지 않았으면 None을 반환합니다.
+    """
+    if not templates.library.search('', limit=1):
+        return None
+    query = st.text_input(
+        "템플릿 검색", key=ui.key(f'{prefix}_template_query', inquiry.id),
+        placeholder="템플릿 이름 앞부분 (예: 진료, 공진단)"
+    )
+    matches = {template.id: template for template in templates.library.search(query)}
+    if not matches:
+        st.caption("일치하는 템플릿이 없습니다.")
+        return None
+    choice = st.selectbox(
+        "템플릿", [None] + list(matches),
+        format_func=lambda template_id: "직접 작성" if template_id is None else matches[template_id].name,
+        key=ui.key(f'{prefix}_template', inquiry.id)
+    )
+    template = matches.get(choice)
+    if template is None:
+        return None
+    values = {
+        name: st.text_input(name, key=ui.key(f'{prefix}_var_{name}', inquiry.id)).strip()
+        for name in templates.input_variables(template.body)
+    }
+    st.info(templates.render(template.body, values, inquiry))
+    return template, values
+
+def show_answer_form(inquiry, ui, answer_key, submit_key, label):
+    """답변 입력란을 표시합니다. 템플릿을 고르면 답변 작성란 대신 템플릿 변수 입력란을 표시합니다."""
+    picked = show_template_picker(inquiry, ui, answer_key)
+    answer = None
+    if picked is None:
+        answer = st.text_area(label, key=ui.key(answer_key, inquiry.id), height=150)
+    if st.button("답변 등록", key=ui.key(submit_key, inquiry.id), use_container_width=True):
+        saved = False
+        if picked is not None:
+            template, values = picked
+            missing = [name for name, value in values.items() if not value]
+            if missing:
+                st.error(f"템플릿 변수를 입력해주세요: {', '.join(missing)}")
+            else:
+                saved = save_answer(inquiry.id, None, template.id, values)
+        elif not answer:
+            st.error("답변 내용을 입력해주세요.")
+        else:
+            saved = save_answer(inquiry.id, answer)
+        if saved:
+            st.success("답변이 등록되었습니다!")
+            st.rerun()
+
+def retire_template(template_id):
+    """템플릿을 보관하고 감사 로그에 남깁니다. 저장했으면 True를 반환합니다."""
+    retired = before = None
+    with datastore.store.locked(templates.TEMPLATES_FILENAME):
+        all_templates = load_data(templates.TEMPLATES_FILENAME)
+        for item in all_templates:
+            if item.id == template_id:
+                # 목록의 레코드는 캐시와 같은 객체이므로 바꾸기 전에 복사해 둡니다
+                before = item.to_dict()
+                item.retired = True
+                retired = item
+        saved = save_data(templates.TEMPLATES_FILENAME, all_templates)
+    if not saved:
+        return False
+    if retired is not None:
+        audit_admin_change('retire_template', templates.TEMPLATES_FILENAME, template_id,
+                           before=before, after=retired)
+    return True
+
+def show_answer_templates():
+    """답변 템플릿 추가/보관 화면을 표시합니다."""
+    token = issue_form_token("template_form")
+    with st.form("template_form"):
+        name = st.text_input("템플릿 이름", max_chars=50, placeholder="예: 진료시간 안내")
+        body = st.text_area(
+            "템플릿 본문", height=150,
+            help="{변수} 형식으로 답변할 때 채울 부분을 넣을 수 있습니다. {작성자}, {문의제목}은 문의글에서 채웁니다."
+        )
+        submitted = st.form_submit_button("템플릿 추가", use_container_width=True)
+
+        if submitted:
+            name = name.strip()
+            if not name or not body.strip():
+                st.error("이름과 본문을 모두 입력해주세요.")
+            elif any(template.name == name for template in templates.library.search(name, limit=None)):
+                st.error("같은 이름의 템플릿이 있습니다. 먼저 기존 템플릿을 보관해주세요.")
+            else:
+                new_template = AnswerTemplate(id=token, name=name, body=body, author=st.session_state.username)
+                result = append_record(templates.TEMPLATES_FILENAME, new_template, token)
+                if result is None:
+                    rotate_form_token("template_form")
+                    st.info("이미 등록된 템플릿입니다.")
+                elif result:
+                    audit_admin_change('create_template', templates.TEMPLATES_FILENAME, new_template.id,
+                                       after=new_template)
+                    rotate_form_token("template_form")
+                    st.success("템플릿이 등록되었습니다!")
+                    st.rerun()
+
+    # 템플릿은 이미 답변에 쓰였을 수 있으므로 고치거나 지우지 않고 보관합니다
+    for template in templates.library.active():
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"**{template.name}**")
+            st.caption(template.body)
+        with col2:
+            if st.button("보관", key=f"retire_template_{template.id}"):
+                if retire_template(template.id):
+                    st.rerun()
+
+def format_due(due_ts, now_ts):
+    """처리 기한과 남은(지난) 시간을 표시합니다."""
+    remaining = due_ts - now_ts
+    if remaining < 0:
+        return f"{format_timestamp(due_ts)[:16]} (⚠️ {stats.format_duration(-remaining)} 지남)"
+    return f"{format_timestamp(due_ts)[:16]} ({stats.format_duration(remaining)} 남음)"
+
+def show_work_queue(ui):
+    """관리자 작업 대기열: 처리 기한이 가장 이른 문의글을 가져가 답변합니다.
+
+    가져간 문의글은 맡긴 시간 동안 다른 관리자에게 배정되지 않으며, 답변하면 대기열에서 빠집니다.
+    """
+    st.markdown("#### 📥 작업 대기열")
+    queue = workqueue.engine
+    username = st.session_state.username
+    try:
+        if not queue.exists():
+            sync_work_queue()
+        held = queue.held_by(username)
+        waiting, claimed = queue.counts()
+    except Exception as e:
+        st.error(f"작업 대기열 로드 중 오류 발생: {str(e)}")
+        return
+    st.caption(f"대기 {waiting}건 · 처리 중 {claimed}건 · 맡긴 시간 {queue.lease_seconds // 60}분")
+
+    if held is None:
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("다음 문의 가져오기", key="queue_claim", use_container_width=True):
+                if queue.claim(username, st.session_state.user_name) is None:
+                    st.info("대기 중인 문의글이 없습니다.")
+                else:
+                    st.rerun()
+        with col2:
+            # 가져오기/스냅샷 복원 등으로 문의글 데이터를 직접 바꾼 뒤 사용합니다
+            if st.button("대기열 다시 맞추기", key="queue_sync", use_container_width=True):
+                added, removed = sync_work_queue()
+                st.success(f"대기열을 맞췄습니다 (추가 {added}건, 제외 {removed}건)")
+        return
+
+    item, lease = held
+    inquiry = find_inquiry(item['id'], item['created'])
+    if inquiry is None or queue_entry(inquiry) is None:
+        # 삭제되었거나 다른 경로로 답변된 문의글
+        queue.complete(item['id'])
+        st.rerun()
+        return
+
+    st.markdown(f"**{inquiry.title}** - {inquiry.author_name} ({inquiry.author}) · {inquiry.created_at}")
+    st.markdown(
+        f"**처리 기한**: {format_due(item['due'], now_timestamp())} · "
+        f"**맡긴 시간**: {format_timestamp(int(lease['until']))[11:16]}까지"
+    )
+    priorities = list(workqueue.PRIORITY_SLA)
+    priority = st.selectbox(
+        "우선순위", priorities, index=priorities.index(item['priority']),
+        format_func=lambda p: workqueue.PRIORITY_LABELS[p], key=ui.key('queue_priority', inquiry.id)
+    )
+    if priority != item['priority']:
+        queue.set_priority(inquiry.id, priority)
+        st.rerun()
+    show_rendered(inquiry)
+    show_attachments(inquiry)
+
+    if inquiry.answered:
+        # 답변 후 작성자가 답글을 단 문의: 답글로 응대하면 대기열에서 빠집니다
+        st.markdown("**답변:**")
+        st.info(templates.answer_text(inquiry))
+        show_thread(inquiry, ui, 'queue_reply')
+    else:
+        show_answer_form(inquiry, ui, 'queue_answer', 'queue_submit', "답변")
+    if st.button("대기열로 돌려보내기", key=ui.key('queue_release', inquiry.id)):
+        queue.release(inquiry.id, username)
+        st.rerun()
 
 def show_admin_inquiry_management():
     """관리자 문의글 관리 페이지를 표시합니다."""
     st.subheader("🔧 문의글 관리")
+    # 문의글별 세션 키는 이번에 표시한 문의글의 것만 남깁니다
+    ui = uistate.RecordUIState(st.session_state, 'admin_inquiry')
+
+    with st.expander("🚦 요청 제한 현황"):
+        for scope, counters in get_rate_limit_stats().items():
+            st.markdown(
+                f"**{scope}**: 허용 {counters['allowed']} / "
+                f"사용자별 거부 {counters['rejected_per_user']} / "
+                f"전역 거부 {counters['rejected_global']}"
+            )
+
+    with st.expander("📚 답변 템플릿"):
+        show_answer_templates()
+
+    with st.expander("📜 변경 이력 조회"):
+        record_id = st.text_input("문의글/칼럼 ID", key="audit_record_id")
+        if record_id:
+            show_audit_history(record_id.strip())
+
+    with st.expander("🧠 세션 상태"):
+        # 접힌 expander의 내용도 재실행마다 실행되므로, 세션 상태 전체를 직렬화하는 크기 계산은 요청할 때만 합니다
+        if st.button("크기 계산", key="session_footprint"):
+            key_count, total_bytes, sizes = uistate.session_footprint(st.session_state)
+            st.markdown(f"**키 {key_count}개 / 약 {total_bytes / 1024:.1f}KB**")
+            for key, size in sizes[:10]:
+                st.caption(f"{key}: {size}B")
+
+    show_work_queue(ui)
+    st.divider()
 
     # 필터
     filter_option = st.radio(
@@ -274,79 +1263,110 @@ def show_admin_inquiry_management():
         ["전체", "답변 대기", "답변 완료"],
         horizontal=True
     )
+    start_ts, end_ts = show_date_range_filter("admin_inquiry")
 
-    inquiries = load_data('inquiries.yaml')
+    inquiries = query_data('inquiries.yaml', start_ts, end_ts)
 
     if not inquiries:
-        st.info("아직 작성된 문의글이 없습니다.")
+        if start_ts is None:
+            st.info("아직 작성된 문의글이 없습니다.")
+        else:
+            st.info("선택한 기간에 작성된 문의글이 없습니다.")
+        ui.evict_stale()
         return
 
-    # 필터링
+    # 필터링 (답변 후 작성자가 답글을 단 문의글은 다시 답변 대기로 봅니다)
     if filter_option == "답변 대기":
-        inquiries = [inq for inq in inquiries if not inq['answered']]
+        inquiries = [inq for inq in inquiries if not inq.answered or awaiting_follow_up(inq)]
     elif filter_option == "답변 완료":
-        inquiries = [inq for inq in inquiries if inq['answered']]
-
-    for idx, inq in enumerate(sorted(inquiries, key=lambda x: x['created_at'], reverse=True)):
-        privacy_badge = "🔒 비공개" if inq['is_private'] else "🌐 공개"
-        answer_badge = "✅ 답변완료" if inq['answered'] else "⏳ 대기중"
+        inquiries = [inq for inq in inquiries if inq.answered and not awaiting_follow_up(inq)]
 
-        with st.expander(f"{privacy_badge} {answer_badge} | {inq['title']} - {inq['author_name']} ({inq['created_at'][:10]})"):
-            st.markdown(f"**작성자**: {inq['author_name']} ({inq['author']})")
-            st.markdown(f"**작성일**: {inq['created_at']}")
+    try:
+        leases = workqueue.engine.leases()
+    except Exception:
+        leases = {}
+
+    for idx, inq in enumerate(inquiries):
+        privacy_badge = "🔒 비공개" if inq.is_private else "🌐 공개"
+        answer_badge = "✅ 답변완료" if inq.answered else "⏳ 대기중"
+        if inq.answered and awaiting_follow_up(inq):
+            answer_badge = "💬 답글 대기"
+        lease = leases.get(inq.id)
+        if lease is not None:
+            # 다른 관리자가 대기열에서 가져가 처리 중인 문의글
+            answer_badge += f" · 🙋 {lease['admin_name']}"
+
+        expander, opened = lazy_expander(
+            f"{privacy_badge} {answer_badge} | {inq.title} - {inq.author_name} ({inq.created_date}){thread_badge(inq)}",
+            ui.key('thread', inq.id)
+        )
+        with expander:
+            st.markdown(f"**작성자**: {inq.author_name} ({inq.author})")
+            st.markdown(f"**작성일**: {inq.created_at}")
             st.markdown(f"**공개여부**: {privacy_badge}")
             st.divider()
             st.markdown("**문의 내용:**")
-            st.write(inq['content'])
+            show_rendered(inq)
+            show_attachments(inq)
 
             st.divider()
 
+            if st.checkbox("변경 이력 보기", key=ui.key('history', inq.id)):
+                show_audit_history(inq.id)
+
             # 답변 폼
-            if inq['answered']:
+            if inq.answered:
                 st.markdown("**답변:**")
-                st.info(inq['answer'])
-                if st.button("답변 수정", key=f"edit_{inq['id']}"):
-                    st.session_state[f"editing_{inq['id']}"] = True
+                st.info(templates.answer_text(inq))
+                if st.button("답변 수정", key=ui.key('edit', inq.id)):
+                    ui.set('editing', inq.id, True)
                     st.rerun()
 
-                if st.session_state.get(f"editing_{inq['id']}", False):
-                    new_answer = st.text_area("답변 수정", value=inq['answer'], key=f"answer_edit_{inq['id']}")
+                if ui.get('editing', inq.id, False):
+                    new_answer = st.text_area(
+                        "답변 수정", value=templates.answer_text(inq), key=ui.key('answer_edit', inq.id)
+                    )
                     col1, col2 = st.columns(2)
                     with col1:
-                        if st.button("수정 완료", key=f"save_edit_{inq['id']}", use_container_width=True):
-                            all_inquiries = load_data('inquiries.yaml')
-                            for i, item in enumerate(all_inquiries):
-                                if item['id'] == inq['id']:
-                                    all_inquiries[i]['answer'] = new_answer
-                                    break
-                            if save_data('inquiries.yaml', all_inquiries):
-                                st.session_state[f"editing_{inq['id']}"] = False
+                        if st.button("수정 완료", key=ui.key('save_edit', inq.id), use_container_width=True):
+                            edited = before = None
+                            with datastore.store.locked('inquiries.yaml'):
+                                all_inquiries = load_data('inquiries.yaml')
+                                for i, item in enumerate(all_inquiries):
+                                    if item.id == inq.id:
+                                        before = item.to_dict()
+                                        # 고친 템플릿 답변은 직접 작성한 답변으로 저장합니다
+                                        all_inquiries[i].answer = new_answer
+                                        all_inquiries[i].answer_template = None
+                                        all_inquiries[i].answer_vars = None
+                                        edited = all_inquiries[i]
+                                        break
+                                saved = save_data('inquiries.yaml', all_inquiries)
+                            if saved:
+                                if edited is not None:
+                                    audit_admin_change('edit_answer', 'inquiries.yaml', inq.id, before, edited)
+                                ui.set('editing', inq.id, False)
                                 st.success("답변이 수정되었습니다!")
                                 st.rerun()
                     with col2:
-                        if st.button("취소", key=f"cancel_edit_{inq['id']}", use_container_width=True):
-                            st.session_state[f"editing_{inq['id']}"] = False
+                        if st.button("취소", key=ui.key('cancel_edit', inq.id), use_container_width=True):
+                            ui.set('editing', inq.id, False)
                             st.rerun()
             else:
-                answer = st.text_area("답변 작성", key=f"answer_{inq['id']}", height=150)
-                if st.button("답변 등록", key=f"submit_{inq['id']}", use_container_width=True):
-                    if answer:
-                        all_inquiries = load_data('inquiries.yaml')
-                        for i, item in enumerate(all_inquiries):
-                            if item['id'] == inq['id']:
-                                all_inquiries[i]['answered'] = True
-                                all_inquiries[i]['answer'] = answer
-                                break
-                        if save_data('inquiries.yaml', all_inquiries):
-                            st.success("답변이 등록되었습니다!")
-                            st.rerun()
-                    else:
-                        st.error("답변 내용을 입력해주세요.")
+                show_answer_form(inq, ui, 'answer', 'submit', "답변 작성")
+
+            # 스레드는 펼친 문의글만 읽습니다
+            if opened:
+                st.divider()
+                show_thread(inq, ui, 'reply')
+
+    ui.evict_stale()
 
 def show_admin_column_form():
     """관리자 칼럼 작성 폼을 표시합니다."""
     st.subheader("📝 칼럼 작성")
 
+    token = issue_form_token("column_form")
     with st.form("column_form"):
         title = st.text_input("제목", max_chars=100)
         content = st.text_area("내용", height=400)
@@ -357,43 +1377,277 @@ def show_admin_column_form():
             if not title or not content:
                 st.error("제목과 내용을 모두 입력해주세요.")
             else:
-                columns = load_data('columns.yaml')
-                new_column = {
-                    'id': str(uuid.uuid4()),
-                    'author': st.session_state.user_name,
-                    'title': title,
-                    'content': content,
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                columns.append(new_column)
-                if save_data('columns.yaml', columns):
+                new_column = Column(
+                    id=token,
+                    author=st.session_state.user_name,
+                    title=title,
+                    content=content,
+                    content_html=render_markdown(content)
+                )
+                result = append_record('columns.yaml', new_column, token)
+                if result is None:
+                    rotate_form_token("column_form")
+                    st.info("이미 등록된 칼럼입니다.")
+                elif result:
+                    audit_admin_change('create_column', 'columns.yaml', new_column.id, after=new_column)
+                    rotate_form_token("column_form")
                     st.success("칼럼이 등록되었습니다!")
                     st.rerun()
 
     # 기존 칼럼 목록
     st.divider()
     st.subheader("📰 작성된 칼럼 목록")
-    columns = load_data('columns.yaml')
+    columns = query_data('columns.yaml')
 
     if columns:
-        for col in sorted(columns, key=lambda x: x['created_at'], reverse=True):
-            with st.expander(f"📝 {col['title']} - {col['created_at'][:10]}"):
-                st.markdown(f"**작성자**: {col['author']}")
-                st.markdown(f"**작성일**: {col['created_at']}")
+        for col in columns:
+            with st.expander(f"📝 {col.title} - {col.created_date}"):
+                st.markdown(f"**작성자**: {col.author}")
+                st.markdown(f"**작성일**: {col.created_at}")
                 st.divider()
-                st.markdown(col['content'])
-
-                if st.button("삭제", key=f"delete_col_{col['id']}"):
-                    all_columns = load_data('columns.yaml')
-                    all_columns = [c for c in all_columns if c['id'] != col['id']]
-                    if save_data('columns.yaml', all_columns):
+                show_rendered(col)
+
+                if st.button("삭제", key=f"delete_col_{col.id}"):
+                    with datastore.store.locked('columns.yaml'):
+                        all_columns = load_data('columns.yaml')
+                        deleted = [c for c in all_columns if c.id == col.id]
+                        all_columns = [c for c in all_columns if c.id != col.id]
+                        saved = save_data('columns.yaml', all_columns)
+                    if saved:
+                        for c in deleted:
+                            audit_admin_change('delete_column', 'columns.yaml', c.id, before=c)
                         st.success("칼럼이 삭제되었습니다!")
                         st.rerun()
     else:
         st.info("아직 작성된 칼럼이 없습니다.")
 
+def show_booking():
+    """진료 예약 화면을 표시합니다. 관리자는 날짜별 예약 현황을 함께 봅니다."""
+    st.subheader("📅 진료 예약")
+    engine = booking.engine
+
+    practitioner = st.selectbox("원장 선택", engine.practitioners, key="booking_practitioner")
+    day = st.date_input(
+        "희망 날짜",
+        value=date.today(),
+        min_value=date.today(),
+        max_value=date.today() + timedelta(days=booking.BOOKING_HORIZON_DAYS),
+        key="booking_day"
+    )
+
+    # 오늘(또는 그사이 지나간 날짜)이면 현재 시각 이후, 그 밖의 날짜는 그날 0시부터 빈 슬롯을 찾습니다
+    now = datetime.now()
+    start = max(now, datetime.combine(day, datetime.min.time()))
+    try:
+        candidates = engine.next_free_slots(practitioner, 10, now=start)
+    except Exception as e:
+        st.error(f"예약 현황 로드 중 오류 발생: {str(e)}")
+        return
+
+    if not candidates:
+        st.info("예약 가능한 시간이 없습니다.")
+    else:
+        choice = st.radio(
+            "예약 가능한 시간",
+            candidates,
+            format_func=lambda c: f"{c[0].isoformat()} ({'월화수목금토일'[c[0].weekday()]}) {c[1]}",
+            key="booking_slot"
+        )
+        if st.button("예약하기", key="booking_submit"):
+            if not check_rate_limit('write', st.session_state.username):
+                st.error("요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+            else:
+                try:
+                    engine.book(
+                        practitioner, choice[0], choice[1],
+                        st.session_state.username, st.session_state.user_name
+                    )
+                    st.success(f"{choice[0].isoformat()} {choice[1]} {practitioner} 진료가 예약되었습니다.")
+                    st.rerun()
+                except booking.BookingError as e:
+                    st.error(str(e))
+
+    st.divider()
+    st.markdown("**내 예약**")
+    my_bookings = engine.bookings_for_user(st.session_state.username)
+    if not my_bookings:
+        st.info("예정된 예약이 없습니다.")
+    for item in my_bookings:
+        col1, col2 = st.columns([4, 1])
+        col1.write(f"{item['date']} {item['slot']} · {item['practitioner']}")
+        if col2.button("취소", key=f"cancel_booking_{item['id']}"):
+            if engine.cancel(item['id'], st.session_state.username):
+                st.success("예약이 취소되었습니다.")
+            st.rerun()
+
+    if st.session_state.role == 'admin':
+        st.divider()
+        st.markdown(f"**{day.isoformat()} 예약 현황**")
+        day_bookings = engine.bookings_for_day(day)
+        if not day_bookings:
+            st.info("예약이 없습니다.")
+        for item in day_bookings:
+            st.write(f"{item['slot']} · {item['practitioner']} · {item['user_name']}({item['username']})")
+
+def show_admin_dashboard():
+    """관리자 통계 대시보드를 표시합니다."""
+    st.subheader("📊 통계")
+
+    try:
+        current = stats.store.get()
+    except Exception as e:
+        st.error(f"통계 로드 중 오류 발생: {str(e)}")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("전체 문의", current.total_inquiries)
+    col2.metric("답변 대기", current.pending)
+    col3.metric("전체 후기", current.reviews)
+    private_ratio = current.private / current.total_inquiries * 100 if current.total_inquiries else 0
+    col4.metric("비공개 문의 비율", f"{private_ratio:.0f}%")
+
+    col1, col2 = st.columns(2)
+    col1.metric("답변 소요 시간 (중앙값)", stats.format_duration(current.latency_percentile(50)))
+    col2.metric("답변 소요 시간 (p95)", stats.format_duration(current.latency_percentile(95)))
+    st.caption("답변 소요 시간은 구간 상한값으로 표시되며, 답변일시가 기록되기 전의 답변은 제외됩니다.")
+
+    st.divider()
+    days = st.radio("기간", [7, 30, 90], index=1, horizontal=True,
+                    format_func=lambda d: f"최근 {d}일", key="dashboard_days")
+    series = current.daily_series(date.today(), days)
+    day_labels = [row[0] for row in series]
+
+    st.markdown("**일별 문의/후기**")
+    st.line_chart({
+        '날짜': day_labels,
+        '문의': [row[1] for row in series],
+        '후기': [row[2] for row in series]
+    }, x='날짜')
+
+    st.markdown("**답변 대기 건수 추이**")
+    st.area_chart({
+        '날짜': day_labels,
+        '답변 대기': [row[3] for row in series]
+    }, x='날짜')
+
+    st.markdown("**공개/비공개 문의**")
+    st.bar_chart({
+        '구분': ['공개', '비공개'],
+        '건수': [current.public, current.private]
+    }, x='구분')
+
+    if memprofile.ENABLED:
+        st.divider()
+        show_memory_profile()
+
+# 재실행 시 데이터 미리 읽기
+PREFETCH_WORKERS = 8
+
+@st.cache_resource
+def get_prefetch_pool():
+    """데이터/콘텐츠를 동시에 읽는 데 사용하는 프로세스 공용 스레드 풀"""
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='prefetch')
+
+def plan_prefetch(session):
+    """이번 실행에서 표시될 탭이 읽을 데이터를 (키, 함수, 인자) 목록으로 반환합니다.
+
+    Streamlit은 선택되지 않은 탭도 모두 실행하므로 역할별로 보이는 탭 전체를 기준으로 합니다.
+    """
+    clinic_menu = session.get('clinic_menu', "의료진")
+    treatment_menu = session.get('treatment_menu', "통증치료")
+    plan = []
+    for category, subcategory in (("한의원", clinic_menu), ("진료과목", treatment_menu)):
+        filename = PUBLIC_CONTENT_FILES.get(category, {}).get(subcategory)
+        if filename:
+            filepath = os.path.join(public_content_dir(), filename)
+            plan.append((filepath, load_markdown_file, (filepath,)))
+
+    filenames = ['inquiries.yaml', 'reviews.yaml']
+    if clinic_menu == "칼럼":
+        filenames.append('columns.yaml')
+    for filename in filenames:
+        plan.append((filename, datastore.store.index, (filename,)))
+
+    if session.get('logged_in'):
+        plan.append(('bookings', booking.engine.refresh, ()))
+    if session.get('role') == 'admin':
+        plan.append(('stats', stats.store.get, ()))
+    return plan
+
+def prefetch_rerun():
+    """plan_prefetch()의 읽기를 스레드 풀에서 동시에 실행하고 결과를 {키: 결과}로 반환합니다.
+
+    데이터 파일은 datastore 캐시에 올라가므로 이후 show_* 함수의 조회는 캐시에서 끝납니다.
+    실패한 항목은 결과에서 빠지며, 해당 화면이 평소처럼 직접 읽으면서 오류를 표시합니다.
+    풀 스레드에서도 현재 지점의 파일을 읽도록 작업마다 현재 컨텍스트를 복사해 넘깁니다.
+    """
+    pool = get_prefetch_pool()
+    futures = {
+        key: pool.submit(contextvars.copy_context().run, fn, *args)
+        for key, fn, args in plan_prefetch(st.session_state)
+    }
+    wait(futures.values())
+    return {
+        key: future.result() for key, future in futures.items()
+        if future.exception() is None
+    }
+
+# 메모리 프로파일 (BLUHILL_MEMPROFILE=1일 때만)
+def memory_gauges():
+    """재실행마다 메모리 프로파일에 함께 기록할 세션 상태/캐시 크기 지표를 반환합니다."""
+    stores = [store.cache_info() for store in datastore.store.instances().values()]
+    return {
+        'session_state_keys': len(st.session_state),
+        'cached_files': sum(info['files'] for info in stores),
+        'cached_records': sum(info['records'] for info in stores),
+        'file_locks': sum(info['file_locks'] for info in stores),
+        'content_files': sum(cache.cache_info()['files'] for cache in datastore.files.instances().values()),
+        'rate_limit_keys': sum(s['tracked_keys'] for s in get_rate_limit_stats().values()),
+        'submission_tokens': len(get_submission_tokens())
+    }
+
+def show_memory_profile():
+    """메모리 프로파일 요약과 보고서 내려받기를 표시합니다."""
+    profiler = memprofile.profiler
+    report = profiler.report()
+    st.subheader("🧠 메모리 프로파일")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("추적 중인 메모리", memprofile.format_size(report['traced']))
+    col2.metric("RSS", memprofile.format_size(report['rss']))
+    col3.metric("기록한 재실행", report['reruns'])
+
+    growth = report['growth_since_baseline']
+    if growth:
+        st.markdown("**기준점 이후 늘어난 할당 (소스 줄별)**")
+        st.dataframe([
+            {'위치': f"{row['file']}:{row['line']}", '코드': row['code'],
+             '증가': memprofile.format_size(row['size_diff']), '객체 수': row['count_diff']}
+            for row in growth
+        ], use_container_width=True)
+    else:
+        st.info("기준점 이후 늘어난 할당이 없거나 아직 비교할 스냅샷이 없습니다.")
+
+    col1, col2, col3 = st.columns(3)
+    col1.download_button("보고서 (텍스트)", profiler.export_text(), file_name="memprofile.txt",
+                         mime="text/plain", key="memprofile_text")
+    col2.download_button("보고서 (JSON)", profiler.export_json(), file_name="memprofile.json",
+                         mime="application/json", key="memprofile_json")
+    if col3.button("기준점 다시 잡기", key="memprofile_reset"):
+        profiler.reset_baseline()
+        st.rerun()
+
 # 메인 애플리케이션
+@memprofile.profiled('rerun', rerun=True, gauges=memory_gauges)
 def main():
+    tenant = select_tenant()
+    configure_page(tenant)
+    init_session_state()
+    watcher.start_once()
+    restore_session()
+    flush_session_cookie()
+    get_outbox_worker(tenant.id)
+    prefetched = prefetch_rerun()
+
     # 사이드바 - 로그인/로그아웃
     with st.sidebar:
         st.title("🔐 인증")
@@ -404,7 +1658,9 @@ def main():
             password = st.text_input("비밀번호", type="password", key="login_password")
 
             if st.button("로그인", use_container_width=True):
-                if login(username, password):
+                if not check_rate_limit('login', username):
+                    st.error("로그인 시도가 너무 많습니다. 잠시 후 다시 시도해주세요.")
+                elif login(username, password):
                     st.success(f"환영합니다, {st.session_state.user_name}님!")
                     st.rerun()
                 else:
@@ -431,13 +1687,13 @@ def main():
             """)
 
     # 메인 콘텐츠 영역
-    st.title("🏥 블루힐 한의원")
+    st.title(f"🏥 {clinic_name(tenant)}")
 
     # 메뉴 탭 생성
-    tabs = ["🏥 한의원", "💊 진료과목", "💬 문의하기", "⭐ 치료후기"]
+    tabs = ["🏥 한의원", "💊 진료과목", "💬 문의하기", "⭐ 치료후기", "📅 진료예약"]
 
     if st.session_state.role == 'admin':
-        tabs.extend(["🔧 문의글 관리", "📝 칼럼 작성"])
+        tabs.extend(["🔧 문의글 관리", "📝 칼럼 작성", "📊 통계"])
 
     selected_tabs = st.tabs(tabs)
 
@@ -451,7 +1707,7 @@ def main():
             key="clinic_menu"
         )
         st.divider()
-        display_public_content("한의원", subcategory)
+        display_public_content("한의원", subcategory, prefetched)
 
     # 진료과목 탭
     with selected_tabs[1]:
@@ -463,7 +1719,8 @@ def main():
             key="treatment_menu"
         )
         st.divider()
-        display_public_content("진료과목", subcategory)
+        display_public_content("진료과목", subcategory, prefetched)
+        show_category_reviews(subcategory)
 
     # 문의하기 탭
     with selected_tabs[2]:
@@ -489,13 +1746,23 @@ def main():
             st.warning("로그인 후 후기 작성이 가능합니다.")
             show_review_list()  # 후기는 비로그인 상태에서도 볼 수 있음
 
+    # 진료예약 탭
+    with selected_tabs[4]:
+        if st.session_state.logged_in:
+            show_booking()
+        else:
+            st.warning("로그인 후 예약이 가능합니다.")
+
     # 관리자 전용 탭들
     if st.session_state.role == 'admin':
-        with selected_tabs[4]:
+        with selected_tabs[5]:
             show_admin_inquiry_management()
 
-        with selected_tabs[5]:
+        with selected_tabs[6]:
             show_admin_column_form()
 
+        with selected_tabs[7]:
+            show_admin_dashboard()
+
 if __name__ == "__main__":
     main()
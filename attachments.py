@@ -0,0 +1,137 @@
+"""
+첨부 사진 저장소
+
+- 업로드 파일을 고정 크기 청크로 나누어 임시 파일에 쓰면서 SHA-256을 계산하고,
+  내용 해시를 경로로 하는 위치(data/attachments/objects/ab/abcdef...)로 옮깁니다
+- 같은 내용의 파일은 한 번만 저장됩니다
+- 목록 화면용 축소 이미지는 처음 요청될 때 한 번 만들어 thumbs/에 캐시합니다
+- 레코드에는 해시만 저장하므로 목록 표시 시 원본 이미지를 읽지 않습니다
+"""
+import os
+import re
+import uuid
+import hashlib
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+import datastore
+
+ATTACHMENT_DIRNAME = 'attachments'
+CHUNK_SIZE = 64 * 1024
+# 첨부 파일 한 개의 최대 크기 (바이트)
+MAX_ATTACHMENT_BYTES = 10 * 1024 * 1024
+# 한 글에 첨부할 수 있는 최대 파일 수
+MAX_ATTACHMENTS = 5
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+# 업로드 위젯에서 허용하는 확장자
+ALLOWED_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'webp']
+# 축소 이미지의 최대 가로/세로 크기 (픽셀)
+THUMBNAIL_SIZE = 320
+
+_HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class AttachmentError(Exception):
+    """첨부 파일을 저장할 수 없을 때 발생합니다."""
+
+
+class AttachmentStore:
+    """내용 해시로 주소를 매기는 첨부 파일 저장소"""
+
+    def __init__(self, root=None):
+        self.root = root
+
+    def _dir(self, *parts):
+        root = self.root or datastore.data_path(ATTACHMENT_DIRNAME)
+        path = os.path.join(root, *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _check_hash(digest):
+        # 레코드에서 읽은 값이 경로로 쓰이므로 형식을 엄격히 확인합니다
+        if not isinstance(digest, str) or not _HASH_PATTERN.match(digest):
+            raise AttachmentError(f"잘못된 첨부 파일 참조입니다: {digest!r}")
+
+    def object_path(self, digest):
+        """원본 파일 경로"""
+        self._check_hash(digest)
+        return os.path.join(self._dir('objects', digest[:2]), digest)
+
+    def thumbnail_path(self, digest, size=THUMBNAIL_SIZE):
+        """축소 이미지 경로 (없으면 만든 뒤 반환합니다)"""
+        self._check_hash(digest)
+        path = os.path.join(self._dir('thumbs', digest[:2]), f"{digest}_{size}.jpg")
+        if os.path.exists(path):
+            return path
+        source = self.object_path(digest)
+        if not os.path.exists(source):
+            raise AttachmentError("첨부 파일을 찾을 수 없습니다.")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with Image.open(source) as image:
+                # JPEG는 디코딩 단계에서 미리 축소하여 원본 해상도 전체를 풀지 않습니다
+                image.draft('RGB', (size, size))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((size, size))
+                if image.mode != 'RGB':
+                    background = Image.new('RGB', image.size, (255, 255, 255))
+                    rgba = image.convert('RGBA')
+                    background.paste(rgba, mask=rgba.getchannel('A'))
+                    image = background
+                image.save(tmp_path, 'JPEG', quality=85)
+            # 여러 세션이 동시에 만들어도 완성된 파일만 보이도록 이름을 바꿔 넣습니다
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def store(self, fileobj, chunk_size=CHUNK_SIZE):
+        """파일 객체를 청크 단위로 저장하고 내용 해시(16진수 SHA-256)를 반환합니다.
+
+        Raises:
+            AttachmentError: 크기 제한을 넘거나 지원하지 않는 이미지인 경우
+        """
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self._dir('tmp'), f"{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                while True:
+                    chunk = fileobj.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > MAX_ATTACHMENT_BYTES:
+                        raise AttachmentError(
+                            f"첨부 파일은 {MAX_ATTACHMENT_BYTES // (1024 * 1024)}MB 이하만 가능합니다."
+                        )
+                    digest.update(chunk)
+                    f.write(chunk)
+            hexdigest = digest.hexdigest()
+            path = self.object_path(hexdigest)
+            if os.path.exists(path):
+                # 이미 저장된 내용
+                return hexdigest
+            self._verify_image(tmp_path)
+            os.replace(tmp_path, path)
+            return hexdigest
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _verify_image(path):
+        try:
+            with Image.open(path) as image:
+                image_format = image.format
+                image.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+            raise AttachmentError("이미지 파일만 첨부할 수 있습니다.")
+        if image_format not in ALLOWED_FORMATS:
+            raise AttachmentError(f"지원하지 않는 이미지 형식입니다: {image_format}")
+
+
+# 프로세스 전체에서 공유하는 첨부 파일 저장소
+store = AttachmentStore()
@@ -0,0 +1,243 @@
+"""
+관리자 변경 감사 로그
+
+답변 등록/수정, 칼럼 등록/삭제 등 관리자의 변경을 누가, 언제, 어떤 레코드를, 어떻게
+바꾸었는지(변경 전/후) 추가 전용 로그에 남깁니다.
+
+- 요청 처리 중에는 이벤트를 큐에 넣기만 하고, 백그라운드 스레드가 파일에 씁니다
+- 로그는 JSON Lines 세그먼트 파일(audit-000001.log, ...)로, 크기가 한도를 넘으면 다음 세그먼트로
+  넘어갑니다. 이미 쓴 내용은 고치거나 지우지 않습니다
+- 레코드 ID별 인덱스 파일에 (세그먼트, 위치, 길이)를 추가하므로, 레코드의 변경 이력은 로그 전체를
+  읽지 않고 해당 줄만 읽어 찾습니다
+- 로그를 먼저 디스크에 기록한 뒤 인덱스를 추가하므로 인덱스가 없는 줄을 가리키는 일은 없습니다.
+  인덱스를 추가하기 전에 중단된 경우 rebuild_index()로 다시 만들 수 있습니다
+
+디렉토리 구조 (data/audit/):
+- audit-NNNNNN.log   로그 세그먼트
+- index/ab/<해시>.idx  레코드 ID별 인덱스 (한 줄에 "세그먼트 위치 길이")
+"""
+import os
+import json
+import queue
+import atexit
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+import datastore
+import tenants
+from records import Record, format_timestamp, now_timestamp
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+AUDIT_DIRNAME = 'audit'
+# 세그먼트 최대 크기 (바이트)
+SEGMENT_MAX_BYTES = int(os.environ.get('BLUHILL_AUDIT_SEGMENT_BYTES', str(4 * 1024 * 1024)))
+SEGMENT_PREFIX = 'audit-'
+SEGMENT_SUFFIX = '.log'
+
+
+def changed_fields(before, after):
+    """두 dict에서 값이 다른 필드만 남긴 (변경 전, 변경 후)를 반환합니다."""
+    keys = [key for key in list(before) + [k for k in after if k not in before]
+            if before.get(key) != after.get(key)]
+    return {key: before.get(key) for key in keys}, {key: after.get(key) for key in keys}
+
+
+def _as_dict(value):
+    return value.to_dict() if isinstance(value, Record) else value
+
+
+def segment_name(number):
+    return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+class AuditLog:
+    """감사 로그 세그먼트와 레코드 ID 인덱스를 관리합니다."""
+
+    def __init__(self, root=None, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self._root = root
+        self.segment_max_bytes = segment_max_bytes
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        # 같은 프로세스의 여러 스레드가 write()를 동시에 호출하는 경우 (flock은 프로세스 간 잠금)
+        self._write_lock = threading.Lock()
+
+    @property
+    def root(self):
+        return self._root or datastore.data_path(AUDIT_DIRNAME)
+
+    # 기록
+
+    def record(self, actor, actor_name, action, dataset, record_id, before=None, after=None):
+        """변경 이벤트를 큐에 넣고 반환합니다. 파일에는 백그라운드 스레드가 씁니다.
+
+        before/after는 레코드 또는 dict이며, 둘 다 있으면 값이 바뀐 필드만 남깁니다.
+        """
+        before, after = _as_dict(before), _as_dict(after)
+        if before is not None and after is not None:
+            before, after = changed_fields(before, after)
+        event = {
+            'at': format_timestamp(now_timestamp()),
+            'actor': actor,
+            'actor_name': actor_name,
+            'action': action,
+            'dataset': dataset,
+            'record_id': record_id,
+            'before': before,
+            'after': after
+        }
+        self._queue.put(event)
+        self._ensure_writer()
+        return event
+
+    def _ensure_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._writer.start()
+                # 종료 직전에 큐에 남은 이벤트도 기록합니다
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            events = [self._queue.get()]
+            while True:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.write(events)
+            except Exception:
+                logger.exception("감사 로그 기록 중 오류 발생 (%d건)", len(events))
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+
+    def flush(self):
+        """큐에 있는 이벤트가 모두 기록될 때까지 기다립니다."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _segments(self):
+        """세그먼트 번호 목록 (오름차순)"""
+        if not os.path.isdir(self.root):
+            return []
+        numbers = []
+        for name in os.listdir(self.root):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _index_path(self, record_id):
+        digest = hashlib.sha256(str(record_id).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, 'index', digest[:2], f"{digest}.idx")
+
+    def _append_index(self, entries):
+        by_record = {}
+        for record_id, number, offset, length in entries:
+            by_record.setdefault(record_id, []).append(f"{number} {offset} {length}\n")
+        for record_id, lines in by_record.items():
+            path = self._index_path(record_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='ascii') as f:
+                f.write(''.join(lines))
+
+    @contextmanager
+    def _locked(self):
+        """세그먼트와 인덱스를 쓰는 동안 다른 스레드/프로세스를 막습니다."""
+        os.makedirs(self.root, exist_ok=True)
+        with self._write_lock, open(os.path.join(self.root, '.lock'), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def write(self, events):
+        """이벤트를 현재 세그먼트에 추가하고 인덱스를 갱신합니다."""
+        with self._locked():
+            numbers = self._segments()
+            number = numbers[-1] if numbers else 1
+            entries = []
+            f = open(os.path.join(self.root, segment_name(number)), 'ab')
+            try:
+                for event in events:
+                    line = (json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8')
+                    if f.tell() > 0 and f.tell() + len(line) > self.segment_max_bytes:
+                        f.flush()
+                        os.fsync(f.fileno())
+                        f.close()
+                        number += 1
+                        f = open(os.path.join(self.root, segment_name(number)), 'ab')
+                    entries.append((event['record_id'], number, f.tell(), len(line)))
+                    f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                f.close()
+            self._append_index(entries)
+
+    # 조회
+
+    def history(self, record_id):
+        """레코드의 변경 이벤트 목록을 기록된 순서대로 반환합니다."""
+        path = self._index_path(record_id)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='ascii') as f:
+            # 끝이 잘린 줄(추가 도중 중단)은 건너뜁니다
+            entries = [tuple(int(part) for part in line.split()) for line in f if line.endswith('\n')]
+        events = []
+        handles = {}
+        try:
+            for number, offset, length in entries:
+                if number not in handles:
+                    handles[number] = open(os.path.join(self.root, segment_name(number)), 'rb')
+                segment = handles[number]
+                segment.seek(offset)
+                event = json.loads(segment.read(length))
+                # 해시가 같은 다른 레코드 ID의 항목은 건너뜁니다
+                if event.get('record_id') == record_id:
+                    events.append(event)
+        finally:
+            for segment in handles.values():
+                segment.close()
+        return events
+
+    def rebuild_index(self):
+        """세그먼트 전체를 읽어 인덱스를 다시 만들고 이벤트 수를 반환합니다."""
+        index_dir = os.path.join(self.root, 'index')
+        with self._locked():
+            entries = []
+            for number in self._segments():
+                with open(os.path.join(self.root, segment_name(number)), 'rb') as f:
+                    offset = 0
+                    for line in f:
+                        if line.endswith(b'\n'):
+                            entries.append((json.loads(line)['record_id'], number, offset, len(line)))
+                        offset += len(line)
+            if os.path.isdir(index_dir):
+                for root, _, filenames in os.walk(index_dir):
+                    for name in filenames:
+                        os.remove(os.path.join(root, name))
+            self._append_index(entries)
+        return len(entries)
+
+
+# 프로세스 전체에서 공유하는 지점별 감사 로그
+# 백그라운드 스레드에는 현재 지점이 없으므로 만들 때의 지점 디렉토리로 위치를 고정합니다
+trail = tenants.TenantLocal(lambda: AuditLog(root=datastore.data_path(AUDIT_DIRNAME)))
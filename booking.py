@@ -0,0 +1,307 @@
+"""
+진료 예약 엔진
+
+- 진료 시간(CLINIC_HOURS)으로부터 요일별 예약 슬롯을 만듭니다
+- 원장/날짜별로 예약된 슬롯을 정수 비트맵으로 보관하여, 빈 슬롯 조회는 예약 건수와
+  관계없이 날짜당 비트 연산 몇 번으로 끝납니다
+- 예약/취소는 data/bookings.jsonl에 한 줄씩 추가하는 이벤트 로그로 저장하며,
+  파일 잠금 안에서 "다른 프로세스가 추가한 줄 반영 → 빈 슬롯 확인 → 기록" 순서로
+  처리하므로 여러 세션이 동시에 같은 슬롯을 예약할 수 없습니다
+"""
+import os
+import json
+import uuid
+import threading
+from datetime import datetime, date, time, timedelta
+
+import datastore
+import tenants
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+BOOKINGS_FILENAME = 'bookings.jsonl'
+SLOT_MINUTES = 30
+# 예약 가능한 기간 (오늘부터 며칠 뒤까지)
+BOOKING_HORIZON_DAYS = 60
+
+# 원장 목록 (content/public/01_의료진.md), 지점마다 tenants.yaml의 practitioners로 바꿀 수 있습니다
+PRACTITIONERS = ["김한의 원장", "이한의 원장"]
+
+# 요일별 진료 시간 (content/public/02_위치및진료시간.md), 월요일=0
+# 지점마다 tenants.yaml의 hours로 바꿀 수 있습니다
+# 점심시간은 구간을 나누어 표현합니다
+_WEEKDAY_HOURS = [("09:00", "12:30"), ("14:00", "18:00")]
+CLINIC_HOURS = {
+    0: _WEEKDAY_HOURS,
+    1: _WEEKDAY_HOURS,
+    2: _WEEKDAY_HOURS,
+    3: _WEEKDAY_HOURS,
+    4: _WEEKDAY_HOURS,
+    5: [("09:00", "14:00")],
+    6: []
+}
+
+
+class BookingError(Exception):
+    """예약을 처리할 수 없을 때 발생합니다."""
+
+
+class SlotUnavailableError(BookingError):
+    """이미 예약되었거나 진료 시간이 아닌 슬롯을 예약하려 할 때 발생합니다."""
+
+
+def _parse_time(value):
+    hour, minute = value.split(':')
+    return time(int(hour), int(minute))
+
+
+def build_day_slots(periods, slot_minutes=SLOT_MINUTES):
+    """진료 구간 목록으로부터 하루의 슬롯 시작 시각(HH:MM) 목록을 만듭니다."""
+    slots = []
+    for start, end in periods:
+        current = datetime.combine(date.min, _parse_time(start))
+        end_at = datetime.combine(date.min, _parse_time(end))
+        while current + timedelta(minutes=slot_minutes) <= end_at:
+            slots.append(current.strftime('%H:%M'))
+            current += timedelta(minutes=slot_minutes)
+    return slots
+
+
+def _bits(mask):
+    """mask에서 1인 비트 위치를 낮은 순서대로 반환합니다."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class _FileLock:
+    """프로세스 간 배타 잠금 (fcntl이 없으면 아무것도 하지 않음)"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+
+class BookingEngine:
+    """예약 슬롯 생성, 빈 슬롯 조회, 예약/취소를 담당합니다."""
+
+    def __init__(self, path=None, hours=None, practitioners=None, slot_minutes=SLOT_MINUTES):
+        self.path = path
+        self.practitioners = list(practitioners or PRACTITIONERS)
+        self.slot_minutes = slot_minutes
+        hours = CLINIC_HOURS if hours is None else hours
+        # 요일별 슬롯 목록, 슬롯 시각 → 비트 위치, 진료 중인 슬롯 전체 비트맵
+        self.weekday_slots = {wd: build_day_slots(hours.get(wd, []), slot_minutes) for wd in range(7)}
+        self.weekday_positions = {
+            wd: {label: i for i, label in enumerate(slots)} for wd, slots in self.weekday_slots.items()
+        }
+        self.weekday_open_mask = {wd: (1 << len(slots)) - 1 for wd, slots in self.weekday_slots.items()}
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        # (원장, 날짜) → 예약된 슬롯 비트맵
+        self._booked = {}
+        # 예약 ID → 예약 정보
+        self._bookings = {}
+        # 사용자명 → 예약 ID 집합, 날짜 → 예약 ID 집합
+        self._by_user = {}
+        self._by_day = {}
+        self._offset = 0
+        self._loaded_path = None
+
+    def _path(self):
+        return self.path or datastore.data_path(BOOKINGS_FILENAME)
+
+    # 이벤트 로그
+    def _apply(self, event):
+        if event.get('op') == 'book':
+            day = date.fromisoformat(event['date'])
+            position = self.weekday_positions[day.weekday()].get(event['slot'])
+            if position is None:
+                return
+            key = (event['practitioner'], day)
+            self._booked[key] = self._booked.get(key, 0) | (1 << position)
+            self._bookings[event['id']] = event
+            self._by_user.setdefault(event['username'], set()).add(event['id'])
+            self._by_day.setdefault(day, set()).add(event['id'])
+        elif event.get('op') == 'cancel':
+            booking = self._bookings.pop(event['id'], None)
+            if booking is None:
+                return
+            day = date.fromisoformat(booking['date'])
+            position = self.weekday_positions[day.weekday()][booking['slot']]
+            key = (booking['practitioner'], day)
+            self._booked[key] = self._booked.get(key, 0) & ~(1 << position)
+            self._by_user.get(booking['username'], set()).discard(booking['id'])
+            self._by_day.get(day, set()).discard(booking['id'])
+
+    def _refresh(self):
+        """마지막으로 읽은 위치 이후에 추가된 이벤트를 반영합니다."""
+        path = self._path()
+        if os.path.abspath(path) != self._loaded_path:
+            self._reset()
+            self._loaded_path = os.path.abspath(path)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        # 아직 다 쓰이지 않은 마지막 줄은 다음에 읽습니다
+        complete = data[:data.rfind(b'\n') + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+        self._offset += len(complete)
+
+    def _commit(self, event, check):
+        """파일 잠금 안에서 다른 프로세스가 추가한 이벤트를 반영한 뒤, check()가 참이면 이벤트를 기록합니다.
+
+        Returns:
+            기록했으면 True, check()가 거짓이면 False
+        """
+        path = self._path()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._lock, open(path, 'ab') as f, _FileLock(f):
+            self._refresh()
+            if not check():
+                return False
+            f.write((json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            self._apply(event)
+            self._offset = f.tell()
+            return True
+
+    # 조회
+    def refresh(self):
+        """다른 프로세스가 추가한 예약/취소를 반영합니다."""
+        with self._lock:
+            self._refresh()
+
+    def day_slots(self, day):
+        """날짜의 슬롯 시작 시각 목록"""
+        return self.weekday_slots[day.weekday()]
+
+    def _free_mask(self, practitioner, day, after=None):
+        if after is not None and day < after.date():
+            # 지난 날짜에는 빈 슬롯이 없습니다
+            return 0
+        wd = day.weekday()
+        mask = self.weekday_open_mask[wd] & ~self._booked.get((practitioner, day), 0)
+        if after is not None and after.date() == day:
+            # 이미 지난 슬롯 제외
+            slots = self.weekday_slots[wd]
+            passed = sum(1 for label in slots if datetime.combine(day, _parse_time(label)) <= after)
+            mask &= ~((1 << passed) - 1)
+        return mask
+
+    def free_slots(self, practitioner, day, now=None):
+        """날짜의 빈 슬롯 시각 목록 (now 이전의 슬롯 제외)"""
+        now = now or datetime.now()
+        with self._lock:
+            self._refresh()
+            slots = self.weekday_slots[day.weekday()]
+            return [slots[i] for i in _bits(self._free_mask(practitioner, day, now))]
+
+    def next_free_slots(self, practitioner, count, now=None, horizon_days=BOOKING_HORIZON_DAYS):
+        """now 이후 가장 빠른 빈 슬롯 count개를 (날짜, 시각) 목록으로 반환합니다.
+
+        날짜마다 비트맵 연산만 하므로 누적 예약 수와 관계없이 조회 기간에 비례합니다.
+        """
+        now = now or datetime.now()
+        result = []
+        with self._lock:
+            self._refresh()
+            for offset in range(horizon_days + 1):
+                day = now.date() + timedelta(days=offset)
+                mask = self._free_mask(practitioner, day, now)
+                slots = self.weekday_slots[day.weekday()]
+                for i in _bits(mask):
+                    result.append((day, slots[i]))
+                    if len(result) >= count:
+                        return result
+        return result
+
+    def bookings_for_user(self, username, now=None):
+        """사용자의 예약 목록 (예정된 예약만, 시간순)"""
+        now = now or datetime.now()
+        with self._lock:
+            self._refresh()
+            bookings = [self._bookings[i] for i in self._by_user.get(username, ())]
+        upcoming = [
+            b for b in bookings
+            if datetime.combine(date.fromisoformat(b['date']), _parse_time(b['slot'])) > now
+        ]
+        return sorted(upcoming, key=lambda b: (b['date'], b['slot']))
+
+    def bookings_for_day(self, day):
+        """날짜의 전체 예약 목록 (원장, 시각순)"""
+        with self._lock:
+            self._refresh()
+            bookings = [self._bookings[i] for i in self._by_day.get(day, ())]
+        return sorted(bookings, key=lambda b: (b['practitioner'], b['slot']))
+
+    # 변경
+    def book(self, practitioner, day, slot, username, user_name, now=None):
+        """슬롯을 예약하고 예약 정보를 반환합니다.
+
+        Raises:
+            SlotUnavailableError: 진료 시간이 아니거나, 지난 날짜/시각이거나, 이미 예약된 슬롯
+        """
+        now = now or datetime.now()
+        if practitioner not in self.practitioners:
+            raise BookingError(f"알 수 없는 원장입니다: {practitioner}")
+        position = self.weekday_positions[day.weekday()].get(slot)
+        if position is None:
+            raise SlotUnavailableError("진료 시간이 아닙니다.")
+        if day < now.date():
+            raise SlotUnavailableError("지난 날짜는 예약할 수 없습니다.")
+        if day > now.date() + timedelta(days=BOOKING_HORIZON_DAYS):
+            raise SlotUnavailableError(f"{BOOKING_HORIZON_DAYS}일 이내의 날짜만 예약할 수 있습니다.")
+        event = {
+            'op': 'book',
+            'id': str(uuid.uuid4()),
+            'practitioner': practitioner,
+            'date': day.isoformat(),
+            'slot': slot,
+            'username': username,
+            'user_name': user_name,
+            'created_at': now.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if not self._commit(event, lambda: self._free_mask(practitioner, day, now) >> position & 1):
+            raise SlotUnavailableError("이미 예약되었거나 지난 시간입니다.")
+        return event
+
+    def cancel(self, booking_id, username=None):
+        """예약을 취소합니다. username을 주면 본인 예약만 취소할 수 있습니다."""
+        def check():
+            booking = self._bookings.get(booking_id)
+            return booking is not None and (username is None or booking['username'] == username)
+
+        return self._commit({'op': 'cancel', 'id': booking_id}, check)
+
+
+def _tenant_engine():
+    """현재 지점의 원장 목록과 진료 시간(tenants.yaml, 없으면 기본값)으로 예약 엔진을 만듭니다."""
+    tenant = tenants.current()
+    return BookingEngine(hours=tenant.hours, practitioners=tenant.practitioners)
+
+
+# 프로세스 전체에서 공유하는 지점별 예약 엔진
+engine = tenants.TenantLocal(_tenant_engine)
@@ -0,0 +1,218 @@
+"""
+데이터 파일 직렬화 (YAML / 바이너리)
+
+- YAML은 libyaml C 바인딩(CSafeLoader/CSafeDumper)이 있으면 사용하고, 없으면 순수 Python
+  SafeLoader/SafeDumper를 사용합니다. libyaml의 출력이 순수 Python과 다를 수 있는 레코드(이스케이프가
+  필요한 문자열)는 순수 Python으로 쓰므로, 어느 쪽이든 저장되는 내용은 같습니다
+- 바이너리 형식(선택): marshal로 직렬화해 zlib로 압축한 형식입니다. YAML보다 파싱이 수백 배 빠르고
+  파일도 작습니다. 파일 앞의 매직 바이트로 구분하므로 파일 이름(inquiries.yaml 등)은 그대로 두며,
+  읽을 때는 설정과 관계없이 두 형식을 모두 인식합니다
+- BLUHILL_DATA_FORMAT=binary이면 데이터 파일(data/)을 바이너리로 저장합니다. 기본값은 yaml이며,
+  설정을 바꾸면 각 파일은 다음에 저장될 때 새 형식으로 바뀝니다. marshal로 쓸 수 없는 값(손으로 편집한
+  YAML의 스키마 밖 필드에서 읽힌 일시 등)이 있는 파일은 값이 바뀌지 않도록 YAML로 씁니다
+- YAML의 키는 yaml.dump 기본값과 같이 정렬하여 쓰므로, 이전 버전이 쓴 파일을 다시 저장해도 내용이 바뀌지 않습니다
+- marshal 형식은 Python 버전에 따라 바뀔 수 있고 손상되거나 조작된 입력에 안전하지 않으므로,
+  data/는 신뢰할 수 있는 위치여야 하며 장기 보관이나 다른 도구와 주고받을 때는 YAML로 변환합니다
+
+사용법:
+    python dataformat.py show data/inquiries.yaml              # 형식과 관계없이 YAML로 출력
+    python dataformat.py convert --to yaml                     # 현재 지점의 데이터 파일을 모두 YAML로
+    python dataformat.py convert --to binary data/inquiries.yaml
+"""
+import os
+import re
+import sys
+import zlib
+import marshal
+import argparse
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+    LIBYAML = True
+except ImportError:  # pragma: no cover - libyaml 없이 빌드된 PyYAML
+    from yaml import SafeLoader as Loader, SafeDumper as Dumper
+    LIBYAML = False
+
+FORMATS = ('yaml', 'binary')
+DATA_FORMAT = os.environ.get('BLUHILL_DATA_FORMAT', 'yaml')
+# 텍스트 도구가 바이너리로 알아보도록 PNG와 같은 방식으로 시작합니다
+MAGIC = b'\x89BLH\r\n\x1a\n'
+BINARY_VERSION = 1
+MARSHAL_VERSION = 4
+
+
+class DataFormatError(ValueError):
+    """알 수 없는 형식이거나 바이너리 파일을 읽을 수 없는 경우"""
+    pass
+
+
+# YAML
+
+YAML_OPTIONS = {'allow_unicode': True, 'default_flow_style': False}
+_SIMPLE_KEY = re.compile(r'^[a-z_]+$')
+
+
+def safe_load(stream):
+    """yaml.safe_load와 같으며, C 바인딩이 있으면 사용합니다."""
+    return yaml.load(stream, Loader=Loader)
+
+
+def _dump_text(data):
+    if Dumper is not yaml.SafeDumper:
+        text = yaml.dump(data, Dumper=Dumper, **YAML_OPTIONS)
+        # libyaml은 BMP 밖의 문자(이모지 등)를 이스케이프하고 큰따옴표 문자열의 줄바꿈 위치가 달라
+        # 순수 Python과 출력이 다를 수 있습니다. 역슬래시가 있으면 순수 Python으로 다시 씁니다
+        if '\\' not in text:
+            return text
+    return yaml.dump(data, Dumper=yaml.SafeDumper, **YAML_OPTIONS)
+
+
+def dump(data, stream=None):
+    """데이터 파일 설정(유니코드, 블록 형식, 키 정렬)으로 YAML을 씁니다.
+
+    C 바인딩 여부와 관계없이 순수 Python SafeDumper와 같은 텍스트를 씁니다. {키: 목록} 형태의
+    데이터 파일은 레코드마다 따로 변환하여, 순수 Python으로 다시 써야 하는 레코드만 느린 경로를 탑니다.
+    stream이 없으면 텍스트를 반환합니다.
+    """
+    if isinstance(data, dict) and len(data) == 1:
+        (key, items), = data.items()
+        if isinstance(key, str) and _SIMPLE_KEY.match(key) and isinstance(items, list) and items:
+            text = f"{key}:\n" + ''.join(_dump_text([item]) for item in items)
+        else:
+            text = _dump_text(data)
+    else:
+        text = _dump_text(data)
+    if stream is None:
+        return text
+    stream.write(text)
+
+
+# 바이너리
+
+def encode_binary(data):
+    """데이터를 바이너리 형식 바이트로 변환합니다."""
+    try:
+        payload = marshal.dumps(data, MARSHAL_VERSION)
+    except ValueError as e:
+        raise DataFormatError(f"바이너리 형식으로 저장할 수 없는 값입니다: {e}")
+    return MAGIC + bytes([BINARY_VERSION]) + zlib.compress(payload, 1)
+
+
+def decode_binary(blob):
+    """바이너리 형식 바이트(매직 바이트 포함)를 데이터로 변환합니다."""
+    if not blob.startswith(MAGIC):
+        raise DataFormatError("바이너리 데이터 파일이 아닙니다")
+    version = blob[len(MAGIC):len(MAGIC) + 1]
+    if version != bytes([BINARY_VERSION]):
+        raise DataFormatError(f"지원하지 않는 바이너리 형식 버전입니다: {version!r}")
+    try:
+        data = marshal.loads(zlib.decompress(blob[len(MAGIC) + 1:]))
+    except (zlib.error, ValueError, EOFError, TypeError) as e:
+        raise DataFormatError(f"바이너리 데이터 파일이 손상되었습니다: {e}")
+    if not isinstance(data, dict):
+        raise DataFormatError("바이너리 데이터 파일의 최상위 값은 dict여야 합니다")
+    return data
+
+
+def is_binary(f):
+    """바이너리 모드로 연 파일이 바이너리 형식인지 확인합니다. 읽은 위치는 되돌립니다."""
+    position = f.tell()
+    head = f.read(len(MAGIC))
+    f.seek(position)
+    return head == MAGIC
+
+
+# 파일
+
+def load_file(f):
+    """바이너리 모드로 연 데이터 파일을 형식을 판별해 읽습니다."""
+    if is_binary(f):
+        return decode_binary(f.read())
+    return safe_load(f)
+
+
+def dump_file(data, f, fmt=None):
+    """데이터를 바이너리 모드로 연 파일에 fmt(기본값 BLUHILL_DATA_FORMAT) 형식으로 쓰고, 쓴 형식을 반환합니다.
+
+    바이너리로 쓸 수 없는 값이 있으면 YAML로 씁니다.
+    """
+    fmt = fmt or DATA_FORMAT
+    if fmt not in FORMATS:
+        raise DataFormatError(f"알 수 없는 데이터 형식입니다: {fmt} (가능한 값: {', '.join(FORMATS)})")
+    if fmt == 'binary':
+        try:
+            f.write(encode_binary(data))
+            return fmt
+        except DataFormatError:
+            fmt = 'yaml'
+    f.write(dump(data).encode('utf-8'))
+    return fmt
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return load_file(f)
+
+
+def convert_file(path, fmt):
+    """파일을 fmt 형식으로 바꿔 씁니다. 이미 그 형식이면 False를 반환합니다."""
+    with open(path, 'rb') as f:
+        if is_binary(f) == (fmt == 'binary'):
+            return False
+        data = load_file(f)
+    tmp_path = f"{path}.{os.getpid()}.convert.tmp"
+    try:
+        with open(tmp_path, 'wb') as out:
+            if dump_file(data, out, fmt) != fmt:
+                raise DataFormatError(f"{path}에는 {fmt} 형식으로 쓸 수 없는 값이 있습니다")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def data_files():
+    """현재 지점의 데이터 파일 경로 목록 (답글 스레드 포함)"""
+    import datastore
+    from records import RECORD_TYPES, CHILD_RECORD_TYPES
+
+    paths = [datastore.data_path(filename) for filename in RECORD_TYPES]
+    for dirname in CHILD_RECORD_TYPES:
+        directory = datastore.data_path(dirname)
+        if os.path.isdir(directory):
+            paths.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                         if name.endswith('.yaml'))
+    return [path for path in paths if os.path.exists(path)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="데이터 파일 형식 확인/변환")
+    commands = parser.add_subparsers(dest='command', required=True)
+    show = commands.add_parser('show', help="데이터 파일을 YAML로 출력")
+    show.add_argument('path')
+    convert = commands.add_parser('convert', help="데이터 파일을 제자리에서 변환")
+    convert.add_argument('--to', choices=FORMATS, required=True, dest='fmt')
+    convert.add_argument('paths', nargs='*', help="변환할 파일 (기본값: 현재 지점의 모든 데이터 파일)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'show':
+            dump(read_file(args.path), sys.stdout)
+        else:
+            for path in args.paths or data_files():
+                changed = convert_file(path, args.fmt)
+                print(f"{path}: {'변환함' if changed else '이미 ' + args.fmt}")
+    except (OSError, yaml.YAMLError, DataFormatError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
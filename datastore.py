@@ -0,0 +1,382 @@
+"""
+데이터 파일 캐시와 작성일시 인덱스
+
+모듈 수준에서 프로세스 전체가 공유하므로 Streamlit 재실행(rerun) 사이에도 유지됩니다.
+파일의 수정 시각/크기가 바뀌면 다음 조회 시 다시 읽습니다.
+
+파일 위치와 캐시는 지점(tenants.py)마다 따로이며, 캐시는 지점별 한도를 넘으면 가장 오래
+사용하지 않은 파일부터 버립니다.
+
+파일을 읽고 고쳐 쓰는 쪽(앱의 등록/답변, 가져오기 등)은 locked()로 <파일>.lock을 잡아
+다른 스레드/프로세스의 쓰기와 겹치지 않게 합니다.
+
+스키마 검증에 실패한 항목은 목록에서 빼지만 원래 값을 보관해 두었다가 저장할 때 그대로 다시 씁니다.
+손으로 고친 파일의 오타 하나 때문에 다음 저장에서 데이터가 사라지지 않게 하기 위함입니다.
+"""
+import os
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+import tenants
+import dataformat
+from records import Record, load_records, record_type_for, record_key
+
+# 지점 디렉토리 기준 데이터 디렉토리, 사용자 정보 파일, 마크다운 콘텐츠 디렉토리
+DATA_DIR = 'data'
+USERS_FILE = 'users.yaml'
+CONTENT_DIR = 'content'
+# 지점별 캐시 한도: 데이터 파일 캐시는 레코드 수, 사용자 정보/콘텐츠 캐시는 파일 수
+CACHE_MAX_RECORDS = int(os.environ.get('BLUHILL_CACHE_MAX_RECORDS', '200000'))
+CACHE_MAX_FILES = int(os.environ.get('BLUHILL_CACHE_MAX_FILES', '512'))
+
+
+def data_dir():
+    """현재 지점의 데이터 디렉토리"""
+    return tenants.current().path(DATA_DIR)
+
+
+def users_file():
+    """현재 지점의 사용자 정보 파일"""
+    return tenants.current().path(USERS_FILE)
+
+
+def content_dir():
+    """현재 지점의 마크다운 콘텐츠 디렉토리"""
+    return tenants.current().path(CONTENT_DIR)
+
+
+def data_path(filename):
+    """현재 지점의 데이터 파일 경로를 반환합니다."""
+    return os.path.join(data_dir(), filename)
+
+
+def _signature(filepath):
+    """파일 변경 여부 판단에 사용하는 (수정 시각, 크기)를 반환합니다."""
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class TimestampIndex:
+    """작성일시 순으로 정렬된 레코드 목록과 이진 탐색용 타임스탬프 배열입니다."""
+
+    def __init__(self, records):
+        self.records = sorted(records, key=lambda r: r.created_ts)
+        self.timestamps = [r.created_ts for r in self.records]
+
+    def range(self, start_ts=None, end_ts=None):
+        """start_ts 이상 end_ts 미만인 레코드를 작성일시 오름차순으로 반환합니다."""
+        lo = 0 if start_ts is None else bisect_left(self.timestamps, start_ts)
+        hi = len(self.timestamps) if end_ts is None else bisect_left(self.timestamps, end_ts)
+        return self.records[lo:hi]
+
+    def __len__(self):
+        return len(self.records)
+
+
+class _WriteLock:
+    """파일 쓰기 잠금: 스레드 간 RLock과 프로세스 간 <파일>.lock 잠금
+
+    같은 스레드에서 다시 잡을 수 있으며, 프로세스 간 잠금은 가장 바깥에서만 잡고 풉니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, 'ab')
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+
+class _CachedFile:
+    """파일 하나의 캐시 항목"""
+    __slots__ = ('signature', 'items', 'rejected', 'index', 'groups')
+
+    def __init__(self, signature, items, rejected=()):
+        self.signature = signature
+        self.items = items
+        # 검증에 실패한 항목 (파일의 원래 값)
+        self.rejected = list(rejected)
+        self.index = None
+        # 필드 이름 → {값: 작성일시 인덱스}
+        self.groups = {}
+
+
+class DataStore:
+    """데이터 파일을 읽고 쓰며, 파싱 결과와 작성일시 인덱스를 캐시합니다.
+
+    캐시한 레코드 수가 max_records를 넘으면 가장 오래 사용하지 않은 파일부터 버립니다.
+    """
+
+    def __init__(self, max_records=CACHE_MAX_RECORDS):
+        self._files = OrderedDict()
+        self.max_records = max_records
+        self._records = 0
+        # False이면 캐시된 파일의 변경 여부를 확인하지 않습니다 (변경 감시기가 무효화를 대신 전달할 때)
+        self.verify = True
+        # 파일별 잠금: 같은 파일을 두 번 파싱하지 않으면서 서로 다른 파일은 동시에 읽을 수 있습니다
+        self._file_locks = {}
+        # 파일별 쓰기 잠금
+        self._write_locks = {}
+        self._lock = threading.RLock()
+
+    def _file_lock(self, cache_key):
+        with self._lock:
+            lock = self._file_locks.get(cache_key)
+            if lock is None:
+                lock = self._file_locks[cache_key] = threading.RLock()
+            return lock
+
+    def _write_lock(self, cache_key):
+        with self._lock:
+            lock = self._write_locks.get(cache_key)
+            if lock is None:
+                lock = self._write_locks[cache_key] = _WriteLock(f"{cache_key}.lock")
+            return lock
+
+    @contextmanager
+    def locked(self, filename):
+        """파일을 읽고 고쳐 쓰는 동안 다른 스레드/프로세스의 쓰기를 막습니다.
+
+        잠금을 잡은 뒤에는 다른 프로세스가 그 사이에 바꾼 내용을 읽도록, 변경 감시 설정(verify)과
+        관계없이 캐시가 파일과 같은지 확인합니다.
+        """
+        cache_key = os.path.abspath(data_path(filename))
+        with self._write_lock(cache_key):
+            with self._file_lock(cache_key):
+                cached = self._cached(cache_key)
+                if cached is not None and (not os.path.exists(cache_key) or
+                                           cached.signature != _signature(cache_key)):
+                    self._forget(cache_key)
+            yield
+
+    def _cached(self, cache_key):
+        with self._lock:
+            cached = self._files.get(cache_key)
+            if cached is not None:
+                self._files.move_to_end(cache_key)
+            return cached
+
+    def _remember(self, cache_key, cached):
+        with self._lock:
+            self._forget(cache_key)
+            self._files[cache_key] = cached
+            self._records += len(cached.items)
+            # 방금 넣은 파일은 한도를 넘더라도 남깁니다
+            while self._records > self.max_records and len(self._files) > 1:
+                _, evicted = self._files.popitem(last=False)
+                self._records -= len(evicted.items)
+
+    def _forget(self, cache_key):
+        with self._lock:
+            evicted = self._files.pop(cache_key, None)
+            if evicted is not None:
+                self._records -= len(evicted.items)
+
+    def _load(self, filename):
+        filepath = data_path(filename)
+        cache_key = os.path.abspath(filepath)
+        with self._file_lock(cache_key):
+            cached = self._cached(cache_key)
+            if not self.verify and cached is not None:
+                return cached
+            if not os.path.exists(filepath):
+                self._forget(cache_key)
+                return None
+            signature = _signature(filepath)
+            if cached is not None and cached.signature == signature:
+                return cached
+
+            # YAML과 바이너리 형식을 자동으로 구분합니다
+            with open(filepath, 'rb') as f:
+                data = dataformat.load_file(f)
+            # inquiries, reviews, columns, replies 키에서 데이터 추출
+            items = data.get(record_key(filename), []) if data else []
+            rejected = []
+            record_type = record_type_for(filename)
+            if record_type is not None:
+                items, _ = load_records(record_type, items, rejected)
+            cached = _CachedFile(signature, items, rejected)
+            self._remember(cache_key, cached)
+            return cached
+
+    def load(self, filename):
+        """파일의 항목 목록(복사본)과 검증에 실패한 항목 수를 반환합니다."""
+        cached = self._load(filename)
+        if cached is None:
+            return [], 0
+        return list(cached.items), len(cached.rejected)
+
+    def save(self, filename, items):
+        """항목 목록을 파일에 저장하고 캐시를 갱신합니다.
+
+        파일에 검증에 실패한 항목이 있었으면 목록 뒤에 원래 값 그대로 함께 씁니다.
+        """
+        filepath = data_path(filename)
+        cache_key = os.path.abspath(filepath)
+        key = record_key(filename)
+        data = [item.to_dict() if isinstance(item, Record) else item for item in items]
+        # 다른 프로세스가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 쓴 뒤 바꿔 넣습니다
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self.locked(filename), self._file_lock(cache_key):
+            try:
+                current = self._load(filename)
+                rejected = current.rejected if current is not None else []
+                os.makedirs(os.path.dirname(filepath), exist_ok=True)
+                with open(tmp_path, 'wb') as f:
+                    dataformat.dump_file({key: data + rejected}, f)
+                os.replace(tmp_path, filepath)
+                self._remember(cache_key, _CachedFile(_signature(filepath), list(items), rejected))
+            except Exception:
+                # 저장에 실패하면 호출자가 변경한 객체가 캐시에 남지 않도록 버립니다
+                self._forget(cache_key)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def index(self, filename):
+        """파일의 작성일시 인덱스를 반환합니다. 파일이 바뀐 경우에만 다시 만듭니다."""
+        filepath = data_path(filename)
+        with self._file_lock(os.path.abspath(filepath)):
+            cached = self._load(filename)
+            if cached is None:
+                return TimestampIndex([])
+            if cached.index is None:
+                cached.index = TimestampIndex(cached.items)
+            return cached.index
+
+    def group(self, filename, field):
+        """레코드를 field 값별로 나눈 {값: 작성일시 인덱스}를 반환합니다.
+
+        값이 없는(None) 레코드는 제외합니다. index()와 마찬가지로 파일이 바뀐 경우에만 다시 만듭니다.
+        """
+        filepath = data_path(filename)
+        with self._file_lock(os.path.abspath(filepath)):
+            cached = self._load(filename)
+            if cached is None:
+                return {}
+            groups = cached.groups.get(field)
+            if groups is None:
+                members = {}
+                for item in cached.items:
+                    value = getattr(item, field, None)
+                    if value is not None:
+                        members.setdefault(value, []).append(item)
+                groups = cached.groups[field] = {value: TimestampIndex(items) for value, items in members.items()}
+            return groups
+
+    def query(self, filename, start_ts=None, end_ts=None):
+        """작성일시가 [start_ts, end_ts) 구간인 레코드를 오름차순으로 반환합니다."""
+        return self.index(filename).range(start_ts, end_ts)
+
+    def cache_info(self):
+        """캐시한 파일 수, 레코드 수, 파일별 잠금 수를 반환합니다."""
+        with self._lock:
+            return {'files': len(self._files), 'records': self._records, 'file_locks': len(self._file_locks)}
+
+    def invalidate(self, filename=None):
+        """캐시를 비웁니다. filename이 없으면 전체를 비웁니다."""
+        if filename is None:
+            with self._lock:
+                self._files.clear()
+                self._records = 0
+        else:
+            cache_key = os.path.abspath(data_path(filename))
+            with self._file_lock(cache_key):
+                self._forget(cache_key)
+
+
+class FileCache:
+    """데이터 디렉토리 밖의 파일(users.yaml, 마크다운 콘텐츠)의 파싱 결과를 캐시합니다.
+
+    파일의 수정 시각/크기가 바뀌면 다음 조회 시 다시 읽습니다. 캐시한 파일 수가 max_files를
+    넘으면 가장 오래 사용하지 않은 파일부터 버립니다.
+    """
+
+    def __init__(self, max_files=CACHE_MAX_FILES):
+        self._files = OrderedDict()
+        self.max_files = max_files
+        # False이면 캐시된 파일의 변경 여부를 확인하지 않습니다 (변경 감시기가 무효화를 대신 전달할 때)
+        self.verify = True
+        # 파싱 중에 무효화된 경우 이전 내용을 캐시에 넣지 않기 위한 세대 번호
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    def get(self, filepath, parse):
+        """파일을 parse(파일 객체)로 읽은 결과를 반환합니다. 파일이 없으면 FileNotFoundError가 발생합니다."""
+        cache_key = os.path.abspath(filepath)
+        with self._lock:
+            cached = self._files.get(cache_key)
+            if cached is not None:
+                self._files.move_to_end(cache_key)
+            generation = self._generation
+        if cached is not None and not self.verify:
+            return cached[1]
+        signature = _signature(filepath)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with open(filepath, 'r', encoding='utf-8') as f:
+            value = parse(f)
+        with self._lock:
+            if generation == self._generation:
+                self._files[cache_key] = (signature, value)
+                self._files.move_to_end(cache_key)
+                while len(self._files) > self.max_files:
+                    self._files.popitem(last=False)
+        return value
+
+    def cache_info(self):
+        """캐시한 파일 수를 반환합니다."""
+        with self._lock:
+            return {'files': len(self._files)}
+
+    def invalidate(self, filepath=None):
+        """캐시를 비웁니다. filepath가 없으면 전체를 비웁니다."""
+        with self._lock:
+            self._generation += 1
+            if filepath is None:
+                self._files.clear()
+            else:
+                self._files.pop(os.path.abspath(filepath), None)
+
+
+def read_text(f):
+    """FileCache.get()에 넘기는 텍스트 파서"""
+    return f.read()
+
+
+# 프로세스 전체에서 공유하는 지점별 저장소
+store = tenants.TenantLocal(DataStore)
+# 프로세스 전체에서 공유하는 지점별 사용자 정보/콘텐츠 캐시
+files = tenants.TenantLocal(FileCache)
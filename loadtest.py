@@ -0,0 +1,490 @@
+"""
+동시 세션 부하 테스트
+
+브라우저 없이 Streamlit의 AppTest로 앱 스크립트(app.py)를 실제로 실행하여, N개의 세션이 동시에
+익명 둘러보기, 로그인 후 문의/후기 작성, 관리자 답변을 정해진 비율(mix)로 반복하게 하고 다음을 보고합니다.
+
+- 처리량(초당 시나리오 수)과 단계별 재실행 지연 시간 백분위수(p50/p90/p99)
+- 유실된 갱신: 오류 없이 등록된 문의/후기/답변 중 데이터 파일에 남지 않은 것의 수
+- 파일 검사: 데이터 파일 파싱/스키마 검증, 중복 ID, 남은 임시 파일, 통계 집계와 데이터의 일치 여부
+
+AppTest는 프로세스 전역 상태를 사용하므로 세션마다 별도 프로세스에서 실행합니다. 모든 세션이
+같은 작업 디렉토리의 data/를 함께 쓰므로, 여러 서버 프로세스가 data/를 공유하는 배포(README의
+"여러 프로세스 실행")에서의 저장 경합을 재현합니다. 지연 시간에는 AppTest의 요소 변환 시간이 포함됩니다.
+
+작업 디렉토리를 지정하지 않으면 임시 디렉토리에 users.yaml과 content/를 복사해 빈 data/로 시작합니다.
+요청 제한은 부하를 막지 않도록 크게 풀어 두며, --keep-rate-limits로 기본값을 유지할 수 있습니다.
+
+사용법:
+    python loadtest.py --sessions 8 --duration 60
+    python loadtest.py --sessions 16 --mix browse=50,inquiry=25,review=15,answer=10 --json result.json
+    python loadtest.py --workdir /tmp/bluhill-load --seed 200   # 문의 200건을 미리 넣고 시작
+"""
+import os
+import sys
+import json
+import time
+import queue
+import random
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+from collections import Counter, defaultdict
+
+import yaml
+
+import dataformat
+from records import Inquiry, RECORD_TYPES, CHILD_RECORD_TYPES, load_records, record_key
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(APP_DIR, 'app.py')
+# 시나리오별 기본 비율
+DEFAULT_MIX = {'browse': 60, 'inquiry': 20, 'review': 10, 'answer': 10}
+# AppTest 한 번 실행의 제한 시간 (초)
+RUN_TIMEOUT = 60
+# 요청 제한을 풀 때 사용하는 값 (초당 충전/버킷 크기)
+UNLIMITED_RATE = '1000000'
+
+
+class ScenarioError(Exception):
+    """시나리오를 계속할 수 없는 경우 (앱 예외, 로그인 실패 등)"""
+    pass
+
+
+def parse_mix(text):
+    """'browse=60,inquiry=20' 형식의 비율을 {시나리오: 가중치}로 변환합니다."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in SCENARIOS:
+            raise ValueError(f"알 수 없는 시나리오입니다: {name} (사용 가능: {', '.join(SCENARIOS)})")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"{name}의 비율은 숫자여야 합니다: {weight}")
+        if mix[name] < 0:
+            raise ValueError(f"{name}의 비율은 0 이상이어야 합니다")
+    if not any(mix.values()):
+        raise ValueError("비율의 합이 0입니다")
+    return mix
+
+
+def percentile(sorted_values, percent):
+    """정렬된 값 목록의 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+# 시뮬레이션 세션
+
+class SimulatedSession:
+    """AppTest 하나로 브라우저 세션 하나를 흉내 내며, 재실행마다 지연 시간을 기록합니다."""
+
+    def __init__(self, samples, app_script=APP_SCRIPT, timeout=RUN_TIMEOUT):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(app_script, default_timeout=timeout)
+        self.samples = samples
+
+    def step(self, name, action=None):
+        """action(기본값: 재실행)을 실행하고 (단계 이름, 소요 시간, 성공 여부)를 기록합니다.
+
+        앱 예외가 나면 ScenarioError를, st.error가 표시되면 False를 반환합니다.
+        """
+        started = time.perf_counter()
+        (action or self.at.run)()
+        elapsed = time.perf_counter() - started
+        if self.at.exception:
+            self.samples.append((name, elapsed, False))
+            raise ScenarioError(f"{name}: {self.at.exception[0].message}")
+        ok = not self.at.error
+        self.samples.append((name, elapsed, ok))
+        return ok
+
+    def button(self, label):
+        for button in self.at.button:
+            if button.label == label:
+                return button
+        raise ScenarioError(f"'{label}' 버튼이 없습니다")
+
+    def fill(self, label, value, widget='text_input'):
+        """라벨이 같은 입력란을 모두 채웁니다 (문의/후기 폼이 같은 라벨을 사용)."""
+        for element in getattr(self.at, widget):
+            if element.label == label:
+                element.input(value)
+
+    def login(self, username, password):
+        self.at.text_input(key='login_username').input(username)
+        self.at.text_input(key='login_password').input(password)
+        self.step('login', lambda: self.button("로그인").click().run())
+        if not self.at.session_state['logged_in']:
+            raise ScenarioError(f"{username} 로그인 실패")
+
+
+def scenario_browse(session, ctx):
+    """익명 방문자가 한의원/진료과목 메뉴를 둘러봅니다."""
+    session.step('browse.open')
+    for key in ('clinic_menu', 'treatment_menu'):
+        radio = session.at.radio(key=key)
+        option = ctx.rng.choice([o for o in radio.options if o != radio.value])
+        session.step('browse.menu', lambda: radio.set_value(option).run())
+
+
+def _post(session, ctx, kind, button_label):
+    session.step(f'{kind}.open')
+    username, password = ctx.rng.choice(ctx.patients)
+    session.login(username, password)
+    title = f"부하 테스트 {ctx.session_id}-{ctx.next_number()}"
+    session.fill("제목", title)
+    session.fill("내용", f"{kind} 본문 {title}", widget='text_area')
+    if session.step(f'{kind}.submit', lambda: session.button(button_label).click().run()):
+        ctx.submitted[kind].append(title)
+
+
+def scenario_inquiry(session, ctx):
+    """환자가 로그인해 문의글을 등록합니다."""
+    _post(session, ctx, 'inquiry', "문의글 등록")
+
+
+def scenario_review(session, ctx):
+    """환자가 로그인해 후기를 등록합니다."""
+    _post(session, ctx, 'review', "후기 등록")
+
+
+def scenario_answer(session, ctx):
+    """관리자가 로그인해 답변 대기 중인 문의글 하나에 답변합니다."""
+    session.step('answer.open')
+    username, password = ctx.rng.choice(ctx.admins)
+    session.login(username, password)
+    pending = [
+        element.key[len('answer_'):] for element in session.at.text_area
+        if element.key and element.key.startswith('answer_') and not element.key.startswith('answer_edit_')
+    ]
+    if not pending:
+        ctx.skipped['answer'] += 1
+        return
+    inquiry_id = ctx.rng.choice(pending)
+    session.at.text_area(key=f'answer_{inquiry_id}').input(f"답변 {ctx.session_id}-{ctx.next_number()}")
+    if session.step('answer.submit', lambda: session.at.button(key=f'submit_{inquiry_id}').click().run()):
+        ctx.submitted['answer'].append(inquiry_id)
+
+
+SCENARIOS = {
+    'browse': scenario_browse,
+    'inquiry': scenario_inquiry,
+    'review': scenario_review,
+    'answer': scenario_answer,
+}
+
+
+class SessionContext:
+    """세션 프로세스 하나의 난수, 계정, 제출 기록"""
+
+    def __init__(self, session_id, users, seed=None):
+        self.session_id = session_id
+        self.rng = random.Random(seed)
+        self.patients = [(name, str(u['password'])) for name, u in users.items() if u.get('role') != 'admin']
+        self.admins = [(name, str(u['password'])) for name, u in users.items() if u.get('role') == 'admin']
+        self.submitted = {'inquiry': [], 'review': [], 'answer': []}
+        self.skipped = Counter()
+        self._number = 0
+
+    def next_number(self):
+        self._number += 1
+        return self._number
+
+
+def run_session(config, session_id, barrier=None, results=None):
+    """세션 하나를 실행하고 결과 dict를 반환합니다 (results 큐가 있으면 큐에도 넣습니다).
+
+    config: workdir, mix, duration(초) 또는 iterations, seed
+    """
+    os.chdir(config['workdir'])
+    with open('users.yaml', 'r', encoding='utf-8') as f:
+        users = (yaml.safe_load(f) or {}).get('users', {})
+    seed = config.get('seed')
+    ctx = SessionContext(session_id, users, None if seed is None else seed + session_id)
+    names, weights = zip(*config['mix'].items())
+    samples, errors = [], []
+    scenarios = Counter()
+
+    # 모듈 import와 첫 실행 비용은 측정에서 빼고, 모든 세션이 같은 시각에 시작합니다
+    SimulatedSession([]).at.run()
+    if barrier is not None:
+        barrier.wait()
+    started = time.perf_counter()
+    deadline = started + config['duration'] if config.get('duration') else None
+    while True:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if config.get('iterations') is not None and sum(scenarios.values()) >= config['iterations']:
+            break
+        name = ctx.rng.choices(names, weights)[0]
+        try:
+            SCENARIOS[name](SimulatedSession(samples), ctx)
+        except Exception as e:
+            errors.append(f"{name}: {type(e).__name__}: {e}")
+        scenarios[name] += 1
+    result = {
+        'session_id': session_id,
+        'elapsed': time.perf_counter() - started,
+        'scenarios': dict(scenarios),
+        'samples': samples,
+        'errors': errors,
+        'submitted': ctx.submitted,
+        'skipped': dict(ctx.skipped),
+    }
+    if results is not None:
+        results.put(result)
+    return result
+
+
+# 결과 검사
+
+def _load_items(path, key):
+    return (dataformat.read_file(path) or {}).get(key) or []
+
+
+def check_files(data_dir):
+    """데이터 파일을 검사하고 ({파일: 레코드 수}, 문제 목록, {파일: 레코드 목록})을 반환합니다."""
+    import stats
+
+    paths = [(filename, RECORD_TYPES[filename]) for filename in RECORD_TYPES]
+    for dirname, record_type in CHILD_RECORD_TYPES.items():
+        child_dir = os.path.join(data_dir, dirname)
+        if os.path.isdir(child_dir):
+            paths.extend(
+                (f"{dirname}/{name}", record_type) for name in sorted(os.listdir(child_dir)) if name.endswith('.yaml')
+            )
+    counts, problems, loaded = {}, [], {}
+    for filename, record_type in paths:
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            continue
+        try:
+            items = _load_items(path, record_key(filename))
+        except (yaml.YAMLError, dataformat.DataFormatError) as e:
+            problems.append(f"{filename}: 파싱 실패 ({type(e).__name__})")
+            continue
+        records, invalid = load_records(record_type, items)
+        if invalid:
+            problems.append(f"{filename}: 스키마 검증 실패 {invalid}건")
+        duplicates = [i for i, c in Counter(r.id for r in records).items() if c > 1]
+        if duplicates:
+            problems.append(f"{filename}: 중복 ID {len(duplicates)}개")
+        counts[filename] = len(records)
+        loaded[filename] = records
+    for root, _, filenames in os.walk(data_dir):
+        leftovers = [name for name in filenames if name.endswith('.tmp')]
+        if leftovers:
+            problems.append(f"{os.path.relpath(root, data_dir)}: 남은 임시 파일 {len(leftovers)}개")
+    stats_path = os.path.join(data_dir, stats.STATS_FILENAME)
+    if os.path.exists(stats_path):
+        with open(stats_path, 'r', encoding='utf-8') as f:
+            current = stats.DashboardStats.from_dict(yaml.safe_load(f))
+        rebuilt = stats.DashboardStats.rebuild(loaded.get('inquiries.yaml', []), loaded.get('reviews.yaml', []))
+        if current is None:
+            problems.append(f"{stats.STATS_FILENAME}: 읽을 수 없음")
+        elif current.to_dict() != rebuilt.to_dict():
+            problems.append(f"{stats.STATS_FILENAME}: 데이터와 집계가 다름")
+    return counts, problems, loaded
+
+
+def find_lost_updates(loaded, submitted):
+    """등록에 성공한 문의/후기/답변 중 파일에 없는 수와 두 번 이상 저장된 수를 반환합니다."""
+    titles = {
+        'inquiry': Counter(r.title for r in loaded.get('inquiries.yaml', [])),
+        'review': Counter(r.title for r in loaded.get('reviews.yaml', [])),
+    }
+    lost, duplicated = {}, {}
+    for kind in ('inquiry', 'review'):
+        lost[kind] = sum(1 for title in submitted[kind] if titles[kind][title] == 0)
+        duplicated[kind] = sum(1 for title in set(submitted[kind]) if titles[kind][title] > 1)
+    answered = {r.id for r in loaded.get('inquiries.yaml', []) if r.answered}
+    lost['answer'] = len(set(submitted['answer']) - answered)
+    return lost, duplicated
+
+
+def summarize(results, elapsed=None):
+    """세션 결과를 모아 처리량과 단계별 지연 시간(ms) 통계를 반환합니다."""
+    by_step = defaultdict(list)
+    failures = Counter()
+    scenarios = Counter()
+    submitted = {'inquiry': [], 'review': [], 'answer': []}
+    errors = []
+    skipped = Counter()
+    for result in results:
+        for name, seconds, ok in result['samples']:
+            by_step[name].append(seconds * 1000)
+            if not ok:
+                failures[name] += 1
+        scenarios.update(result['scenarios'])
+        skipped.update(result['skipped'])
+        errors.extend(result['errors'])
+        for kind, items in result['submitted'].items():
+            submitted[kind].extend(items)
+    if elapsed is None:
+        elapsed = max((result['elapsed'] for result in results), default=0)
+    steps = {}
+    for name, values in sorted(by_step.items()):
+        values.sort()
+        steps[name] = {
+            'count': len(values),
+            'failed': failures[name],
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p99': percentile(values, 99),
+            'max': values[-1],
+        }
+    total = sum(scenarios.values())
+    return {
+        'sessions': len(results),
+        'elapsed': elapsed,
+        'scenarios': dict(scenarios),
+        'throughput': total / elapsed if elapsed else 0.0,
+        'steps': steps,
+        'errors': errors,
+        'skipped': dict(skipped),
+        'submitted': submitted,
+    }
+
+
+def format_report(summary, counts, problems, lost, duplicated):
+    lines = [
+        f"동시 세션 {summary['sessions']}개, {summary['elapsed']:.1f}초, "
+        f"시나리오 {sum(summary['scenarios'].values())}회 ({summary['throughput']:.2f}회/초)",
+        "  " + ", ".join(f"{name} {count}" for name, count in sorted(summary['scenarios'].items())),
+        "",
+        f"  {'단계':<16}{'횟수':>6}{'실패':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'최대':>9}  (ms)",
+    ]
+    for name, step in summary['steps'].items():
+        lines.append(
+            f"  {name:<16}{step['count']:>6}{step['failed']:>6}"
+            f"{step['p50']:>9.1f}{step['p90']:>9.1f}{step['p99']:>9.1f}{step['max']:>9.1f}"
+        )
+    lines.append("")
+    lines.append(
+        "유실된 갱신: " + ", ".join(f"{kind} {lost[kind]}/{len(summary['submitted'][kind])}" for kind in lost)
+    )
+    if any(duplicated.values()):
+        lines.append("중복 저장: " + ", ".join(f"{kind} {count}" for kind, count in duplicated.items()))
+    if summary['skipped']:
+        lines.append("건너뜀: " + ", ".join(f"{kind} {count}" for kind, count in summary['skipped'].items()))
+    lines.append("파일 검사: " + ("이상 없음" if not problems else f"문제 {len(problems)}개"))
+    lines.extend(f"  - {problem}" for problem in problems)
+    lines.append("  " + ", ".join(f"{filename} {count}건" for filename, count in counts.items() if '/' not in filename))
+    if summary['errors']:
+        lines.append(f"시나리오 오류 {len(summary['errors'])}건:")
+        for error, count in Counter(summary['errors']).most_common(5):
+            lines.append(f"  - {error} ({count}회)")
+    return "\n".join(lines)
+
+
+# 실행
+
+def prepare_workdir(workdir, seed_inquiries=0):
+    """작업 디렉토리에 users.yaml, content/, data/를 준비합니다. 이미 있는 파일은 그대로 둡니다."""
+    os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+    if not os.path.exists(os.path.join(workdir, 'users.yaml')):
+        shutil.copy(os.path.join(APP_DIR, 'users.yaml'), workdir)
+    if not os.path.exists(os.path.join(workdir, 'content')):
+        shutil.copytree(os.path.join(APP_DIR, 'content'), os.path.join(workdir, 'content'))
+    if seed_inquiries:
+        path = os.path.join(workdir, 'data', 'inquiries.yaml')
+        items = _load_items(path, 'inquiries') if os.path.exists(path) else []
+        items.extend(Inquiry(
+            id=f"seed-{i}", author='user1', author_name='User One', title=f"미리 넣은 문의 {i}",
+            content="내용", is_private=False, answered=False, answer=None
+        ).to_dict() for i in range(seed_inquiries))
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.dump({'inquiries': items}, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+
+
+def configure_env(keep_rate_limits=False):
+    """세션 프로세스가 물려받을 환경 변수를 설정합니다."""
+    os.environ.setdefault('BLUHILL_SESSION_SECRET', 'loadtest')
+    if not keep_rate_limits:
+        for name in ('WRITE_PER_USER', 'WRITE_GLOBAL', 'LOGIN_PER_USER', 'LOGIN_GLOBAL'):
+            os.environ[f'BLUHILL_{name}_RATE'] = UNLIMITED_RATE
+            os.environ[f'BLUHILL_{name}_BURST'] = UNLIMITED_RATE
+
+
+def run_load(config, sessions):
+    """세션 프로세스들을 동시에 실행하고 결과 목록을 반환합니다."""
+    mp = multiprocessing.get_context('spawn')
+    results = mp.Queue()
+    barrier = mp.Barrier(sessions)
+    processes = [
+        mp.Process(target=run_session, args=(config, session_id, barrier, results), daemon=True)
+        for session_id in range(sessions)
+    ]
+    for process in processes:
+        process.start()
+    collected = []
+    # 큐를 먼저 비워야 큰 결과를 넣는 프로세스가 끝날 수 있습니다
+    while len(collected) < sessions:
+        try:
+            collected.append(results.get(timeout=1))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break
+    for process in processes:
+        process.join()
+    return collected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="동시 세션 부하 테스트")
+    parser.add_argument('--sessions', type=int, default=4, help="동시 세션 수 (기본값 4)")
+    parser.add_argument('--duration', type=float, default=30, help="실행 시간(초, 기본값 30)")
+    parser.add_argument('--iterations', type=int, help="세션별 시나리오 횟수 (지정하면 실행 시간 대신 사용)")
+    parser.add_argument('--mix', default=','.join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help="시나리오 비율 (기본값 %(default)s)")
+    parser.add_argument('--workdir', help="작업 디렉토리 (기본값: 임시 디렉토리, 실행 후 삭제)")
+    parser.add_argument('--seed', type=int, default=0, help="미리 넣을 답변 대기 문의글 수")
+    parser.add_argument('--random-seed', type=int, help="시나리오 선택 난수 시드")
+    parser.add_argument('--keep-rate-limits', action='store_true', help="요청 제한 기본값 유지")
+    parser.add_argument('--json', dest='json_path', help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.sessions < 1:
+        parser.error("--sessions는 1 이상이어야 합니다")
+
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix='bluhill-load-')
+    prepare_workdir(workdir, args.seed)
+    configure_env(args.keep_rate_limits)
+    config = {
+        'workdir': workdir,
+        'mix': mix,
+        'duration': None if args.iterations is not None else args.duration,
+        'iterations': args.iterations,
+        'seed': args.random_seed,
+    }
+    try:
+        print(f"작업 디렉토리: {workdir}", flush=True)
+        results = run_load(config, args.sessions)
+        if len(results) < args.sessions:
+            print(f"경고: 세션 {args.sessions - len(results)}개가 결과 없이 종료되었습니다", file=sys.stderr)
+        summary = summarize(results)
+        counts, problems, loaded = check_files(os.path.join(workdir, 'data'))
+        lost, duplicated = find_lost_updates(loaded, summary['submitted'])
+        print(format_report(summary, counts, problems, lost, duplicated))
+        if args.json_path:
+            report = dict(summary, submitted={k: len(v) for k, v in summary['submitted'].items()},
+                          files=counts, problems=problems, lost=lost, duplicated=duplicated)
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if problems or any(lost.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+사용자 마크다운 렌더링
+
+문의글/후기/칼럼/답글 본문은 저장할 때 한 번 렌더링하여 원문 옆 `<필드>_html`에 저장하고,
+화면에는 저장된 HTML을 그대로(unsafe_allow_html) 표시합니다. 따라서 `<필드>_html`에는 이 모듈이
+정리한 HTML만 들어가야 하며, 앱 밖에서 들어온 레코드(가져오기 등)는 render_fields()로 다시 렌더링합니다.
+"""
+import html
+from html.parser import HTMLParser
+
+import markdown
+
+# 렌더링 결과에 허용되는 태그와 속성 (그 외 태그는 제거하고 텍스트만 남깁니다)
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'em', 'b', 'i', 'del', 'code', 'pre', 'blockquote',
+    'ul', 'ol', 'li', 'a', 'img',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td'
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title'},
+    'th': {'align'},
+    'td': {'align'},
+    'code': {'class'}
+}
+URL_ATTRIBUTES = {'href', 'src'}
+SAFE_URL_SCHEMES = ('http', 'https', 'mailto')
+# 내용까지 통째로 제거할 태그
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template'}
+VOID_TAGS = {'br', 'hr', 'img'}
+
+
+def _is_safe_url(url):
+    """링크/이미지 URL이 허용된 스킴(또는 상대 경로)인지 확인합니다."""
+    # 제어 문자/공백을 이용한 스킴 우회 차단 (예: "java\tscript:")
+    normalized = ''.join(ch for ch in url if ch.isprintable() and not ch.isspace())
+    scheme, sep, _ = normalized.partition(':')
+    if not sep or '/' in scheme or '?' in scheme or '#' in scheme:
+        return True
+    return scheme.lower() in SAFE_URL_SCHEMES
+
+
+class _HTMLSanitizer(HTMLParser):
+    """허용 목록 기반으로 HTML을 정리하는 파서입니다."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.open_tags = []
+        self.drop_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth += 1
+            return
+        if self.drop_depth or tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set())
+        rendered = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not _is_safe_url(value):
+                continue
+            rendered.append(f' {name}="{html.escape(value, quote=True)}"')
+        self.parts.append(f"<{tag}{''.join(rendered)}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        # 자기 닫힘 태그(<script/>)는 제거할 내용이 없으므로 내용 제거 구간을 열지 않습니다
+        if tag in DROP_CONTENT_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag in self.open_tags and tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth = max(0, self.drop_depth - 1)
+            return
+        if self.drop_depth or tag not in self.open_tags:
+            return
+        # 닫히지 않은 하위 태그까지 함께 닫아 구조를 유지합니다
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.parts.append(f"</{current}>")
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.drop_depth:
+            self.parts.append(html.escape(data, quote=False))
+
+    def get_html(self):
+        self.close()
+        while self.open_tags:
+            self.parts.append(f"</{self.open_tags.pop()}>")
+        return ''.join(self.parts)
+
+
+def sanitize_html(raw_html):
+    """허용되지 않은 태그, 속성, URL 스킴을 제거한 HTML을 반환합니다."""
+    sanitizer = _HTMLSanitizer()
+    sanitizer.feed(raw_html)
+    return sanitizer.get_html()
+
+
+def render_markdown(text):
+    """사용자 마크다운을 안전한 HTML로 렌더링합니다.
+
+    저장 시점에 한 번만 호출하고, 결과는 원문 옆 `<필드>_html` 키에 저장합니다.
+    """
+    if not text:
+        return ''
+    rendered = markdown.markdown(text, extensions=['tables', 'fenced_code', 'sane_lists'])
+    return sanitize_html(rendered)
+
+
+def render_fields(record):
+    """레코드의 `<필드>_html`을 모두 원문 필드에서 다시 렌더링합니다. 원문이 없으면 비웁니다."""
+    for name, _, _, _ in record.SCHEMA:
+        if name.endswith('_html'):
+            source = getattr(record, name[:-len('_html')], None)
+            setattr(record, name, None if source is None else render_markdown(source))
+    return record
@@ -0,0 +1,272 @@
+"""
+메모리 할당 프로파일링
+
+서버 프로세스의 메모리 사용량이 시간이 지나며 늘어나는 원인을 찾기 위해 tracemalloc으로 재실행(rerun)이
+끝날 때마다 할당 스냅샷을 찍고, 직전 스냅샷 및 처음 스냅샷과 비교하여 늘어난 메모리를 소스 줄 단위로
+보여 줍니다. load_data/save_data 호출은 호출마다 추적 중인 메모리의 증감만 기록합니다(스냅샷보다 훨씬 가볍습니다).
+재실행마다 세션 상태 키 수, 캐시한 파일/레코드 수 같은 지표도 함께 기록합니다.
+
+- BLUHILL_MEMPROFILE=1일 때만 켜집니다. 꺼져 있으면 profiled()가 원래 함수를 그대로 반환하므로
+  추가 비용이 없습니다
+- 켜져 있는 동안에는 모든 할당을 추적하므로 느려지고 메모리도 더 사용합니다. 원인을 찾는 동안에만 사용합니다
+- 추적 중인 메모리는 프로세스 전체의 값이므로 여러 세션이 동시에 실행되면 호출별 증감에 다른 세션의
+  할당이 섞입니다. 한 호출의 정확한 값보다 누적 경향을 보는 용도입니다
+- 관리자 통계 탭에서 보고서(텍스트/JSON)를 내려받을 수 있습니다
+"""
+import os
+import time
+import json
+import threading
+import linecache
+import tracemalloc
+from collections import deque
+from functools import wraps
+
+ENABLED = os.environ.get('BLUHILL_MEMPROFILE', '0') == '1'
+# 할당마다 기록할 호출 스택 깊이 (1이면 할당한 줄만, 늘리면 호출 경로별로 묶을 수 있습니다)
+FRAMES = int(os.environ.get('BLUHILL_MEMPROFILE_FRAMES', '1'))
+# 몇 번째 재실행마다 스냅샷을 찍을지 (스냅샷은 추적 중인 할당 수에 비례해 시간이 걸립니다)
+SNAPSHOT_INTERVAL = int(os.environ.get('BLUHILL_MEMPROFILE_INTERVAL', '1'))
+# 보고서에 표시할 소스 줄 수
+TOP_LINES = int(os.environ.get('BLUHILL_MEMPROFILE_TOP', '20'))
+# 보관할 재실행 기록 수
+HISTORY = 500
+
+# 프로파일러 자신(보고서의 소스 줄 조회 포함)과 import 과정의 할당은 제외합니다
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def current_rss():
+    """프로세스의 현재 RSS(바이트)를 반환합니다. 알 수 없으면 None을 반환합니다."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def format_size(size):
+    """바이트 수를 읽기 쉬운 단위로 표시합니다 (부호 포함 가능)."""
+    if size is None:
+        return "-"
+    value = float(size)
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(value) < 1024:
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def _line_stats(diff, limit):
+    """StatisticDiff 목록에서 늘어난 항목을 dict 목록으로 변환합니다."""
+    rows = []
+    for stat in diff:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        rows.append({
+            'file': frame.filename,
+            'line': frame.lineno,
+            'code': linecache.getline(frame.filename, frame.lineno).strip(),
+            'size_diff': stat.size_diff,
+            'count_diff': stat.count_diff,
+            'size': stat.size,
+            'traceback': [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+        })
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+class AllocationProfiler:
+    """재실행/데이터 호출 단위로 할당을 기록하고 스냅샷을 비교합니다."""
+
+    def __init__(self, frames=FRAMES, snapshot_interval=SNAPSHOT_INTERVAL, top=TOP_LINES, history=HISTORY):
+        self.frames = frames
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.top = top
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._timeline = deque(maxlen=history)
+        self._reruns = 0
+        self._baseline = None
+        self._latest = None
+        self._last_diff = []
+        self.started_at = None
+
+    @property
+    def running(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """추적을 시작합니다. 이미 추적 중이면 그대로 둡니다."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            if self.started_at is None:
+                self.started_at = time.time()
+
+    def stop(self):
+        """추적을 멈추고 기록을 비웁니다."""
+        with self._lock:
+            tracemalloc.stop()
+            self._calls.clear()
+            self._timeline.clear()
+            self._reruns = 0
+            self._baseline = self._latest = None
+            self._last_diff = []
+            self.started_at = None
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    # 기록
+
+    def record_call(self, label, size_diff):
+        """데이터 호출 한 번의 추적 메모리 증감을 누적합니다."""
+        with self._lock:
+            calls = self._calls.setdefault(label, {'calls': 0, 'size_diff': 0, 'max_diff': 0})
+            calls['calls'] += 1
+            calls['size_diff'] += size_diff
+            calls['max_diff'] = max(calls['max_diff'], size_diff)
+
+    def record_rerun(self, label, size_diff, gauges=None):
+        """재실행 한 번을 기록하고, 간격이 되면 스냅샷을 찍어 직전 스냅샷과 비교합니다."""
+        with self._lock:
+            self._reruns += 1
+            take = self._baseline is None or self._reruns % self.snapshot_interval == 0
+        snapshot = self._snapshot() if take else None
+        traced, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            if snapshot is not None:
+                if self._baseline is None:
+                    self._baseline = snapshot
+                else:
+                    self._last_diff = _line_stats(snapshot.compare_to(self._latest, 'lineno'), self.top)
+                self._latest = snapshot
+            self._timeline.append({
+                'at': time.time(),
+                'label': label,
+                'size_diff': size_diff,
+                'traced': traced,
+                'peak': peak,
+                'rss': current_rss(),
+                'gauges': dict(gauges or {}),
+            })
+
+    def reset_baseline(self):
+        """다음 재실행의 스냅샷을 새 기준점으로 삼습니다."""
+        with self._lock:
+            self._baseline = self._latest = None
+            self._last_diff = []
+            self._reruns = 0
+
+    # 조회
+
+    def growth(self, key_type='lineno', limit=None):
+        """처음(기준점) 스냅샷 이후 늘어난 메모리를 소스 줄(또는 호출 경로)별로 반환합니다."""
+        with self._lock:
+            baseline, latest = self._baseline, self._latest
+        if baseline is None or latest is None or baseline is latest:
+            return []
+        return _line_stats(latest.compare_to(baseline, key_type), limit or self.top)
+
+    def report(self):
+        """보고서 dict (JSON으로 내보낼 수 있는 값만 사용)"""
+        growth = self.growth()
+        traced, peak = tracemalloc.get_traced_memory() if self.running else (0, 0)
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'reruns': self._reruns,
+                'traced': traced,
+                'peak': peak,
+                'rss': current_rss(),
+                'growth_since_baseline': growth,
+                'last_rerun_diff': list(self._last_diff),
+                'calls': {label: dict(calls) for label, calls in sorted(self._calls.items())},
+                'timeline': list(self._timeline),
+            }
+
+    def export_json(self):
+        return json.dumps(self.report(), ensure_ascii=False, indent=2)
+
+    def export_text(self):
+        """사람이 읽는 텍스트 보고서"""
+        report = self.report()
+        lines = [
+            "메모리 할당 프로파일",
+            f"재실행 {report['reruns']}회, 추적 중 {format_size(report['traced'])} "
+            f"(최대 {format_size(report['peak'])}), RSS {format_size(report['rss'])}",
+        ]
+        timeline = report['timeline']
+        if len(timeline) >= 2:
+            first, last = timeline[0], timeline[-1]
+            lines.append(f"기록 구간 동안 추적 메모리 {format_size(last['traced'] - first['traced'])}")
+            for name in sorted(last['gauges']):
+                if name in first['gauges']:
+                    lines.append(f"  {name}: {first['gauges'][name]} -> {last['gauges'][name]}")
+        for title, rows in (("기준점 이후 늘어난 할당", report['growth_since_baseline']),
+                            ("직전 스냅샷 이후 늘어난 할당", report['last_rerun_diff'])):
+            lines.extend(["", title])
+            if not rows:
+                lines.append("  (없음)")
+            for row in rows:
+                lines.append(f"  +{format_size(row['size_diff'])} ({row['count_diff']:+d}개) "
+                             f"{row['file']}:{row['line']}")
+                if row['code']:
+                    lines.append(f"      {row['code']}")
+        lines.extend(["", "호출별 추적 메모리 증감 (누적/최대)"])
+        for label, calls in report['calls'].items():
+            lines.append(f"  {label}: {calls['calls']}회, {format_size(calls['size_diff'])} / "
+                         f"{format_size(calls['max_diff'])}")
+        return "\n".join(lines)
+
+
+# 프로세스 전체에서 공유하는 프로파일러 (메모리는 프로세스 단위이므로 지점별로 나누지 않습니다)
+profiler = AllocationProfiler()
+
+
+def _label(name, args):
+    if args and isinstance(args[0], str):
+        return f"{name}({args[0]})"
+    return name
+
+
+def profiled(name, rerun=False, gauges=None):
+    """함수 호출 전후의 추적 메모리 증감을 기록하는 데코레이터
+
+    rerun=True이면 재실행 전체로 기록하여 스냅샷을 찍고, gauges()가 반환한 지표를 함께 남깁니다.
+    첫 번째 인자가 문자열(파일 이름)이면 이름에 붙여 따로 집계합니다.
+    BLUHILL_MEMPROFILE이 꺼져 있으면 함수를 그대로 반환합니다.
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler.start()
+            before = tracemalloc.get_traced_memory()[0]
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                # st.rerun() 등 흐름 제어 예외로 끝난 경우도 기록합니다
+                size_diff = tracemalloc.get_traced_memory()[0] - before
+                if rerun:
+                    try:
+                        values = gauges() if gauges else None
+                    except Exception:
+                        values = None
+                    profiler.record_rerun(name, size_diff, values)
+                else:
+                    profiler.record_call(_label(name, args), size_diff)
+        return wrapper
+    return decorate
@@ -0,0 +1,273 @@
+"""
+알림 메일 아웃박스
+
+문의 등록/답변 등록 핸들러는 메일을 직접 보내지 않고 아웃박스에 메시지 파일 하나를
+쓰기만 합니다 (O(1)). 백그라운드 워커가 발송 시각이 된 메시지를 모아 SMTP 연결 하나로
+일괄 발송하고, 실패한 메시지는 지수 백오프로 재시도합니다.
+
+디렉토리 구조 (data/outbox/):
+- pending/  발송 대기
+- sending/  워커가 가져가 발송 중 (이름 변경으로 가져가므로 여러 프로세스가 동시에 돌아도 중복 발송하지 않음)
+- failed/   최대 재시도 횟수를 넘긴 메시지와, 헤더가 잘못되는 등 재시도해도 보낼 수 없는 메시지
+"""
+import os
+import json
+import time
+import uuid
+import itertools
+import smtplib
+import logging
+import threading
+from email.message import EmailMessage
+
+import datastore
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DIRNAME = 'outbox'
+# 재시도 설정: 첫 재시도는 BACKOFF_BASE초 후, 이후 두 배씩 늘어나며 BACKOFF_MAX초를 넘지 않습니다
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+# 같은 시각에 추가된 메시지의 순서를 지키기 위한 프로세스 내 일련번호
+_sequence = itertools.count()
+# sending/에 이 시간(초) 이상 남아 있는 메시지는 중단된 워커의 것으로 보고 되돌립니다
+STALE_SENDING_SECONDS = 600
+# 워커가 중단된 발송 메시지를 되돌리는 확인 주기(초)
+RECOVER_INTERVAL = 60
+
+
+class InvalidMessageError(Exception):
+    """메시지 자체가 잘못되어 재시도해도 보낼 수 없을 때 발생합니다."""
+
+
+def smtp_settings_from_env():
+    """환경 변수에서 SMTP 설정을 읽습니다. 기본값은 로컬 디버깅 SMTP 서버입니다."""
+    return {
+        'host': os.environ.get('BLUHILL_SMTP_HOST', 'localhost'),
+        'port': int(os.environ.get('BLUHILL_SMTP_PORT', '1025')),
+        'sender': os.environ.get('BLUHILL_SMTP_FROM', 'noreply@bluhill-clinic.com'),
+        'username': os.environ.get('BLUHILL_SMTP_USERNAME'),
+        'password': os.environ.get('BLUHILL_SMTP_PASSWORD'),
+        'starttls': os.environ.get('BLUHILL_SMTP_STARTTLS', '') == '1'
+    }
+
+
+class Outbox:
+    """파일 기반 메시지 큐"""
+
+    def __init__(self, root=None):
+        self.root = root
+
+    def _dir(self, state):
+        root = self.root or datastore.data_path(OUTBOX_DIRNAME)
+        path = os.path.join(root, state)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _write(self, path, message):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(message, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def enqueue(self, to, subject, body):
+        """메시지를 발송 대기열에 추가하고 메시지 ID를 반환합니다."""
+        now = time.time()
+        message_id = str(uuid.uuid4())
+        message = {
+            'id': message_id,
+            'to': to,
+            'subject': subject,
+            'body': body,
+            'created_at': now,
+            'attempts': 0,
+            'next_attempt_at': now,
+            'last_error': None
+        }
+        # 파일명이 작성 시각 순으로 정렬되도록 시각과 일련번호를 앞에 붙입니다
+        filename = f"{int(now * 1000):015d}-{next(_sequence) % 10 ** 9:09d}-{message_id}.json"
+        self._write(os.path.join(self._dir('pending'), filename), message)
+        return message_id
+
+    def claim_due(self, limit, now=None):
+        """발송 시각이 된 메시지를 최대 limit개 가져옵니다.
+
+        Returns:
+            [(sending/ 경로, 메시지)] 목록
+        """
+        now = time.time() if now is None else now
+        pending_dir = self._dir('pending')
+        sending_dir = self._dir('sending')
+        claimed = []
+        for filename in sorted(os.listdir(pending_dir)):
+            if len(claimed) >= limit:
+                break
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(pending_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    message = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if message.get('next_attempt_at', 0) > now:
+                continue
+            target = os.path.join(sending_dir, filename)
+            try:
+                os.rename(path, target)
+            except OSError:
+                # 다른 워커가 먼저 가져감
+                continue
+            # 가져간 시각을 기록해 recover_stale()이 발송 중인 메시지를 되돌리지 않게 합니다
+            os.utime(target)
+            claimed.append((target, message))
+        return claimed
+
+    def complete(self, path):
+        """발송에 성공한 메시지를 삭제합니다."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def retry(self, path, message, error, now=None):
+        """발송에 실패한 메시지를 백오프 후 재시도하도록 되돌립니다. 한도를 넘으면 failed/로 옮깁니다."""
+        now = time.time() if now is None else now
+        message['attempts'] += 1
+        message['last_error'] = str(error)
+        filename = os.path.basename(path)
+        if message['attempts'] >= MAX_ATTEMPTS:
+            self._write(os.path.join(self._dir('failed'), filename), message)
+        else:
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (message['attempts'] - 1))
+            message['next_attempt_at'] = now + delay
+            self._write(os.path.join(self._dir('pending'), filename), message)
+        self.complete(path)
+
+    def fail(self, path, message, error):
+        """재시도해도 보낼 수 없는 메시지를 바로 failed/로 옮깁니다."""
+        message['attempts'] += 1
+        message['last_error'] = str(error)
+        self._write(os.path.join(self._dir('failed'), os.path.basename(path)), message)
+        self.complete(path)
+
+    def recover_stale(self, now=None):
+        """중단된 워커가 남긴 sending/ 메시지를 pending/으로 되돌립니다."""
+        now = time.time() if now is None else now
+        sending_dir = self._dir('sending')
+        pending_dir = self._dir('pending')
+        for filename in os.listdir(sending_dir):
+            path = os.path.join(sending_dir, filename)
+            try:
+                if now - os.path.getmtime(path) >= STALE_SENDING_SECONDS:
+                    os.rename(path, os.path.join(pending_dir, filename))
+            except OSError:
+                continue
+
+    def counts(self):
+        """상태별 메시지 수를 반환합니다."""
+        return {
+            state: sum(1 for name in os.listdir(self._dir(state)) if name.endswith('.json'))
+            for state in ('pending', 'sending', 'failed')
+        }
+
+
+class SMTPSender:
+    """SMTP 연결 하나로 메시지 묶음을 발송합니다."""
+
+    def __init__(self, host, port, sender, username=None, password=None, starttls=False, timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send_batch(self, messages):
+        """메시지 목록을 발송하고 메시지별 오류 목록(성공 시 None)을 반환합니다.
+
+        메시지를 만들거나 보내다 SMTP/네트워크 오류가 아닌 예외가 나면 그 메시지만
+        InvalidMessageError로 표시하고 나머지는 계속 보냅니다.
+        서버에 연결하지 못하면 예외를 그대로 발생시킵니다.
+        """
+        errors = []
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            for message in messages:
+                try:
+                    email = EmailMessage()
+                    email['From'] = self.sender
+                    email['To'] = message['to']
+                    email['Subject'] = message['subject']
+                    email.set_content(message['body'])
+                    smtp.send_message(email)
+                    errors.append(None)
+                except (smtplib.SMTPException, OSError) as e:
+                    errors.append(e)
+                except Exception as e:
+                    # 헤더에 줄바꿈이 들어 있는 등 메시지 자체의 문제
+                    errors.append(InvalidMessageError(f"{type(e).__name__}: {e}"))
+        return errors
+
+
+class OutboxWorker(threading.Thread):
+    """아웃박스를 주기적으로 확인하여 메시지를 일괄 발송하는 백그라운드 스레드"""
+
+    def __init__(self, outbox, sender, batch_size=20, interval=5.0, recover_interval=RECOVER_INTERVAL):
+        super().__init__(name='outbox-worker', daemon=True)
+        self.outbox = outbox
+        self.sender = sender
+        self.batch_size = batch_size
+        self.interval = interval
+        self.recover_interval = recover_interval
+        self._stop_event = threading.Event()
+        self.sent = 0
+        self.failed = 0
+
+    def run_once(self):
+        """발송 시각이 된 메시지 한 묶음을 처리하고 처리한 메시지 수를 반환합니다."""
+        claimed = self.outbox.claim_due(self.batch_size)
+        if not claimed:
+            return 0
+        try:
+            errors = self.sender.send_batch([message for _, message in claimed])
+        except Exception as e:
+            # 연결 실패 등 묶음 전체 실패
+            errors = [e] * len(claimed)
+        for (path, message), error in zip(claimed, errors):
+            if error is None:
+                self.outbox.complete(path)
+                self.sent += 1
+            elif isinstance(error, InvalidMessageError):
+                logger.error("알림 메일을 보낼 수 없어 failed/로 옮깁니다 (%s): %s", message['id'], error)
+                self.outbox.fail(path, message, error)
+                self.failed += 1
+            else:
+                logger.warning("알림 메일 발송 실패 (%s): %s", message['id'], error)
+                self.outbox.retry(path, message, error)
+                self.failed += 1
+        return len(claimed)
+
+    def run(self):
+        next_recover = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                # 시작할 때뿐 아니라 주기적으로, 발송 도중 중단된 메시지를 되돌립니다
+                if time.monotonic() >= next_recover:
+                    self.outbox.recover_stale()
+                    next_recover = time.monotonic() + self.recover_interval
+                processed = self.run_once()
+            except Exception:
+                logger.exception("아웃박스 처리 중 오류 발생")
+                processed = 0
+            # 묶음이 가득 찼으면 쉬지 않고 다음 묶음을 처리합니다
+            if processed < self.batch_size:
+                self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,314 @@
+"""
+문의글, 후기, 칼럼 레코드 타입
+
+YAML에서 읽은 dict를 로드 시점에 한 번만 검증하여 __slots__ 기반 객체로 변환합니다.
+- 작성일시는 정수 타임스탬프(created_ts)로 한 번만 파싱합니다
+- 작성자 ID/이름처럼 반복되는 문자열은 intern하여 같은 객체를 공유합니다
+- 스키마에 없는 필드는 extra에 보관하여 저장 시 그대로 다시 기록합니다
+"""
+import os
+import re
+import sys
+import hashlib
+import calendar
+from datetime import datetime, timezone
+
+# YAML에 저장되는 작성일시 형식
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class RecordValidationError(ValueError):
+    """레코드가 스키마와 맞지 않을 때 발생합니다."""
+
+
+def parse_timestamp(value):
+    """작성일시 문자열(또는 YAML이 변환한 datetime)을 정수 타임스탬프로 변환합니다.
+
+    작성일시는 시간대 정보 없이 저장되므로, 벽시계 시각을 그대로 UTC로 간주해 변환합니다.
+    """
+    if isinstance(value, bool):
+        raise RecordValidationError(f"잘못된 작성일시입니다: {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return calendar.timegm(value.timetuple())
+    if isinstance(value, str):
+        try:
+            return calendar.timegm(datetime.strptime(value, TIMESTAMP_FORMAT).timetuple())
+        except ValueError:
+            pass
+    raise RecordValidationError(f"잘못된 작성일시입니다: {value!r}")
+
+
+def format_timestamp(ts):
+    """정수 타임스탬프를 작성일시 문자열로 변환합니다."""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def date_to_timestamp(day):
+    """날짜의 0시 0분을 작성일시 타임스탬프로 변환합니다."""
+    return calendar.timegm(day.timetuple())
+
+
+def now_timestamp():
+    """현재 시각을 작성일시 타임스탬프로 반환합니다."""
+    return calendar.timegm(datetime.now().timetuple())
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record:
+    """레코드 타입의 공통 기반 클래스입니다.
+
+    하위 클래스는 SCHEMA에 (필드명, 타입, 필수 여부, 기본값)을 순서대로 정의합니다.
+    작성일시는 모든 레코드에 공통이므로 SCHEMA 대신 created_ts 슬롯으로 관리합니다.
+    그 밖의 선택적 일시 필드는 TIMESTAMP_FIELDS에 (속성명, YAML 키)로 정의하며,
+    created_ts와 마찬가지로 메모리에서는 정수 타임스탬프로 보관하고, 값이 없으면 저장하지 않습니다.
+    OMIT_EMPTY의 선택 필드는 값이 없거나(None) 기본값과 같으면 저장하지 않습니다. 읽을 때 기본값으로
+    채워지므로, 나중에 추가된 필드 때문에 기존 레코드의 저장 내용이 바뀌지 않습니다.
+    """
+    __slots__ = ('created_ts', 'extra')
+    SCHEMA = ()
+    TIMESTAMP_FIELDS = ()
+    INTERNED = ()
+    OMIT_EMPTY = ()
+
+    def __init__(self, created_ts=None, extra=None, **fields):
+        for name, _, required, default in self.SCHEMA:
+            value = fields.pop(name, default)
+            if name in self.INTERNED:
+                value = _intern(value)
+            setattr(self, name, value)
+        for name, _ in self.TIMESTAMP_FIELDS:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"알 수 없는 필드입니다: {', '.join(fields)}")
+        self.created_ts = now_timestamp() if created_ts is None else created_ts
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """YAML dict를 검증하여 레코드로 변환합니다."""
+        if not isinstance(data, dict):
+            raise RecordValidationError(f"레코드는 dict여야 합니다: {type(data).__name__}")
+        fields = {}
+        for name, field_type, required, default in cls.SCHEMA:
+            if name not in data or data[name] is None:
+                if required:
+                    raise RecordValidationError(f"필수 필드가 없습니다: {name}")
+                fields[name] = default
+                continue
+            value = data[name]
+            if field_type is str and isinstance(value, (int, float)) and not isinstance(value, bool):
+                # 손으로 편집한 YAML에서 숫자로 읽힌 ID 등
+                value = str(value)
+            if not isinstance(value, field_type):
+                raise RecordValidationError(
+                    f"{name} 필드의 타입이 올바르지 않습니다: {type(value).__name__}"
+                )
+            fields[name] = value
+        for name, key in cls.TIMESTAMP_FIELDS:
+            value = data.get(key)
+            fields[name] = None if value is None else parse_timestamp(value)
+        if 'created_at' not in data:
+            raise RecordValidationError("필수 필드가 없습니다: created_at")
+        known = {name for name, _, _, _ in cls.SCHEMA}
+        known.update(key for _, key in cls.TIMESTAMP_FIELDS)
+        known.add('created_at')
+        extra = {k: v for k, v in data.items() if k not in known}
+        return cls(created_ts=parse_timestamp(data['created_at']), extra=extra, **fields)
+
+    def to_dict(self):
+        """YAML 저장용 dict로 변환합니다."""
+        data = {}
+        for name, _, _, default in self.SCHEMA:
+            value = getattr(self, name)
+            if name in self.OMIT_EMPTY and (value is None or value == default):
+                continue
+            data[name] = value
+        for name, key in self.TIMESTAMP_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[key] = format_timestamp(value)
+        data['created_at'] = self.created_at
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def created_at(self):
+        """작성일시 문자열 (YYYY-MM-DD HH:MM:SS)"""
+        return format_timestamp(self.created_ts)
+
+    @property
+    def created_date(self):
+        """작성일 문자열 (YYYY-MM-DD)"""
+        return self.created_at[:10]
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r}, created_at={self.created_at!r})"
+
+
+class Inquiry(Record):
+    """문의글"""
+    __slots__ = (
+        'id', 'author', 'author_name', 'title', 'content', 'content_html',
+        'is_private', 'answered', 'answer', 'answer_template', 'answer_vars', 'attachments',
+        'reply_count', 'last_reply_by', 'answered_ts', 'last_activity_ts'
+    )
+    SCHEMA = (
+        ('id', str, True, None),
+        ('author', str, True, None),
+        ('author_name', str, True, None),
+        ('title', str, True, None),
+        ('content', str, True, None),
+        ('content_html', str, False, None),
+        ('is_private', bool, False, False),
+        ('answered', bool, False, False),
+        ('answer', str, False, None),
+        # 템플릿 답변은 answer 대신 템플릿 ID와 직접 채운 변수만 저장합니다 (templates.py)
+        ('answer_template', str, False, None),
+        ('answer_vars', dict, False, None),
+        ('attachments', list, False, None),
+        # 답글 스레드 요약: 목록 화면은 스레드 파일을 읽지 않고 이 값만 표시합니다
+        ('reply_count', int, False, 0),
+        ('last_reply_by', str, False, None),
+    )
+    TIMESTAMP_FIELDS = (
+        ('answered_ts', 'answered_at'),
+        ('last_activity_ts', 'last_activity_at'),
+    )
+    INTERNED = ('author', 'author_name', 'last_reply_by', 'answer_template')
+    OMIT_EMPTY = ('content_html', 'answer_template', 'answer_vars', 'attachments', 'reply_count', 'last_reply_by')
+
+
+class Review(Record):
+    """치료 후기"""
+    __slots__ = ('id', 'author', 'author_name', 'title', 'content', 'content_html', 'attachments',
+                 'category', 'rating')
+    SCHEMA = (
+        ('id', str, True, None),
+        ('author', str, True, None),
+        ('author_name', str, True, None),
+        ('title', str, True, None),
+        ('content', str, True, None),
+        ('content_html', str, False, None),
+        ('attachments', list, False, None),
+        # 진료과목 (PUBLIC_CONTENT_FILES["진료과목"]의 이름)과 별점(1~5). 이전 후기에는 없습니다
+        ('category', str, False, None),
+        ('rating', int, False, None),
+    )
+    INTERNED = ('author', 'author_name', 'category')
+    OMIT_EMPTY = ('content_html', 'attachments', 'category', 'rating')
+
+
+class Column(Record):
+    """칼럼 (author에는 작성한 관리자의 이름이 저장됩니다)"""
+    __slots__ = ('id', 'author', 'title', 'content', 'content_html')
+    SCHEMA = (
+        ('id', str, True, None),
+        ('author', str, True, None),
+        ('title', str, True, None),
+        ('content', str, True, None),
+        ('content_html', str, False, None),
+    )
+    INTERNED = ('author',)
+    OMIT_EMPTY = ('content_html',)
+
+
+class Reply(Record):
+    """문의글의 답글 (문의글별 스레드 파일에 저장됩니다)"""
+    __slots__ = ('id', 'inquiry_id', 'author', 'author_name', 'author_role', 'content', 'content_html')
+    SCHEMA = (
+        ('id', str, True, None),
+        ('inquiry_id', str, True, None),
+        ('author', str, True, None),
+        ('author_name', str, True, None),
+        ('author_role', str, False, None),
+        ('content', str, True, None),
+        ('content_html', str, False, None),
+    )
+    INTERNED = ('author', 'author_name', 'author_role')
+    OMIT_EMPTY = ('content_html', 'author_role')
+
+
+class AnswerTemplate(Record):
+    """관리자 답변 템플릿 (본문의 {이름}은 답변할 때 채우는 변수입니다)"""
+    __slots__ = ('id', 'name', 'body', 'author', 'retired')
+    SCHEMA = (
+        ('id', str, True, None),
+        ('name', str, True, None),
+        ('body', str, True, None),
+        ('author', str, True, None),
+        # 보관한 템플릿은 검색되지 않지만 이미 이 템플릿으로 저장된 답변을 표시할 때 사용됩니다
+        ('retired', bool, False, False),
+    )
+    INTERNED = ('author',)
+
+
+# 데이터 파일별 레코드 타입
+RECORD_TYPES = {
+    'inquiries.yaml': Inquiry,
+    'reviews.yaml': Review,
+    'columns.yaml': Column,
+    'answer_templates.yaml': AnswerTemplate,
+}
+
+# 부모 레코드별로 파일을 나누어 저장하는 하위 레코드 (data/ 아래 디렉토리 이름 → 타입)
+REPLIES_DIRNAME = 'replies'
+CHILD_RECORD_TYPES = {
+    REPLIES_DIRNAME: Reply,
+}
+
+_SAFE_ID = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+
+def thread_filename(inquiry_id):
+    """문의글 답글 스레드의 데이터 파일 이름 (replies/<문의글 ID>.yaml)
+
+    파일 이름에 쓸 수 없는 ID는 해시로 바꿉니다.
+    """
+    name = inquiry_id if _SAFE_ID.match(inquiry_id) else hashlib.sha256(inquiry_id.encode('utf-8')).hexdigest()
+    return f"{REPLIES_DIRNAME}/{name}.yaml"
+
+
+def record_type_for(filename):
+    """데이터 파일 이름의 레코드 타입을 반환합니다. 레코드 파일이 아니면 None을 반환합니다."""
+    if filename in RECORD_TYPES:
+        return RECORD_TYPES[filename]
+    return CHILD_RECORD_TYPES.get(os.path.dirname(filename))
+
+
+def record_key(filename):
+    """데이터 파일의 최상위 키 (inquiries.yaml → inquiries, replies/<ID>.yaml → replies)"""
+    directory = os.path.dirname(filename)
+    if directory in CHILD_RECORD_TYPES:
+        return directory
+    return filename.replace('.yaml', '')
+
+
+def load_records(record_type, items, rejected=None):
+    """dict 목록을 레코드 목록으로 변환합니다.
+
+    rejected 목록을 넘기면 검증에 실패한 항목을 원래 값 그대로 모읍니다.
+
+    Returns:
+        (레코드 목록, 검증에 실패한 항목 수)
+    """
+    records = []
+    invalid = 0
+    for item in items or []:
+        try:
+            records.append(record_type.from_dict(item))
+        except RecordValidationError:
+            invalid += 1
+            if rejected is not None:
+                rejected.append(item)
+    return records, invalid
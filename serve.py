@@ -0,0 +1,128 @@
+"""
+서버 시작 스크립트
+
+데이터 파일, users.yaml, 마크다운 콘텐츠, 통계 집계, 예약 로그를 프로세스 공용 캐시에
+미리 읽어 둔 뒤 같은 프로세스에서 Streamlit 서버를 시작합니다. 배포 직후 첫 방문자가
+파싱 비용을 치르지 않도록 하며, 단계별 소요 시간을 출력합니다. 지점(tenants.yaml)이 여러 개면
+지점마다 미리 읽습니다.
+
+사용법:
+    python serve.py [streamlit run 옵션...]    # 예: python serve.py --server.port 8502
+    python serve.py --warmup-only              # 미리 읽기만 하고 소요 시간 출력
+"""
+import os
+import sys
+import time
+
+import dataformat
+import datastore
+import stats
+import booking
+import tenants
+import watcher
+from records import RECORD_TYPES
+
+APP_SCRIPT = 'app.py'
+
+
+def warm_data():
+    """문의글/후기/칼럼을 파싱하고 작성일시 인덱스를 만듭니다."""
+    total = 0
+    for filename in RECORD_TYPES:
+        total += len(datastore.store.index(filename))
+    return f"레코드 {total}건"
+
+
+def warm_users():
+    """users.yaml을 읽습니다."""
+    data = datastore.files.get(datastore.users_file(), dataformat.safe_load)
+    return f"사용자 {len((data or {}).get('users', {}))}명"
+
+
+def warm_content():
+    """content/ 아래의 마크다운 파일을 모두 읽습니다."""
+    count = 0
+    for root, _, filenames in os.walk(datastore.content_dir()):
+        for filename in sorted(filenames):
+            if filename.endswith('.md'):
+                datastore.files.get(os.path.join(root, filename), datastore.read_text)
+                count += 1
+    return f"마크다운 {count}개"
+
+
+def warm_stats():
+    """통계 집계를 읽습니다 (없으면 다시 계산)."""
+    current = stats.store.get()
+    return f"문의 {current.total_inquiries}건 집계"
+
+
+def warm_bookings():
+    """예약 로그를 읽어 빈 슬롯 인덱스를 만듭니다."""
+    booking.engine.refresh()
+    return "예약 로그 반영"
+
+
+# (단계 이름, 함수) - 통계 집계는 데이터 파일 캐시를 사용하므로 데이터 파일 다음에 실행합니다
+WARMUP_PHASES = [
+    ("데이터 파일", warm_data),
+    ("사용자 정보", warm_users),
+    ("마크다운 콘텐츠", warm_content),
+    ("통계 집계", warm_stats),
+    ("예약 현황", warm_bookings),
+]
+
+
+def warm_up(phases=None, clock=time.perf_counter):
+    """단계별로 캐시를 채우고 (단계 이름, 소요 시간(초), 결과 또는 오류 메시지, 성공 여부) 목록을 반환합니다.
+
+    한 단계가 실패해도 서버는 시작할 수 있으므로 나머지 단계를 계속 실행합니다.
+    """
+    results = []
+    for name, phase in (WARMUP_PHASES if phases is None else phases):
+        started = clock()
+        try:
+            detail, ok = phase(), True
+        except Exception as e:
+            detail, ok = f"{type(e).__name__}: {e}", False
+        results.append((name, clock() - started, detail, ok))
+    return results
+
+
+def format_report(results):
+    """warm_up() 결과를 출력용 문자열로 만듭니다."""
+    width = max((len(name) for name, _, _, _ in results), default=0)
+    lines = ["미리 읽기 결과:"]
+    for name, seconds, detail, ok in results:
+        mark = "✓" if ok else "✗"
+        lines.append(f"  {mark} {name:<{width}}  {seconds * 1000:8.1f} ms  {detail}")
+    total = sum(seconds for _, seconds, _, _ in results)
+    lines.append(f"  합계 {total * 1000:.1f} ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    warmup_only = '--warmup-only' in argv
+    if warmup_only:
+        argv.remove('--warmup-only')
+
+    if not warmup_only:
+        # 미리 읽은 캐시가 감시 시작 시 비워지지 않도록 감시를 먼저 시작합니다
+        watcher.start_once()
+    for tenant in tenants.registry.tenants():
+        with tenants.activated(tenant):
+            report = format_report(warm_up())
+        if tenant.id != tenants.DEFAULT_TENANT_ID:
+            report = f"[{tenant.id}] {report}"
+        print(report, flush=True)
+    if warmup_only:
+        return 0
+
+    # 같은 프로세스에서 서버를 시작해야 미리 채운 모듈 캐시를 앱이 그대로 사용합니다
+    from streamlit.web import cli
+    sys.argv = ['streamlit', 'run', APP_SCRIPT] + argv
+    return cli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
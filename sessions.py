@@ -0,0 +1,163 @@
+"""
+서명된 세션 토큰
+
+로그인 상태를 HMAC-SHA256으로 서명한 토큰에 담아 브라우저 쿠키에 저장합니다.
+토큰은 서버에 저장하지 않고 비밀 키만으로 검증하므로, 로드 밸런서가 재접속을 다른
+서버 프로세스(레플리카)로 보내거나 서버가 재시작되어도 세션을 O(1)로 복원할 수 있습니다.
+
+- 모든 레플리카가 같은 비밀 키를 사용해야 합니다 (BLUHILL_SESSION_SECRET)
+- 환경 변수가 없으면 data/session_secret을 만들어 사용합니다 (같은 data/를 공유하는 프로세스끼리만 유효)
+- 키를 교체할 때는 BLUHILL_SESSION_SECRET="새 키,이전 키"로 지정하면 이전 키로 서명된 토큰도
+  만료될 때까지 검증됩니다 (서명에는 첫 번째 키를 사용)
+- 토큰은 만료 시각까지 유효하며 서버에서 개별적으로 폐기할 수 없습니다. 로그아웃은 쿠키를 지웁니다
+- 토큰에는 지점 ID(tid)가 들어 있어 다른 지점에서는 받아들이지 않으며, 쿠키 이름도 지점마다 다릅니다
+"""
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+
+import datastore
+import tenants
+
+# 세션 토큰을 저장하는 쿠키 이름
+SESSION_COOKIE = 'bluhill_session'
+# 토큰 유효 기간 (초)
+SESSION_TTL = int(os.environ.get('BLUHILL_SESSION_TTL', str(7 * 24 * 3600)))
+# 환경 변수가 없을 때 비밀 키를 저장하는 파일 (data/ 아래)
+SECRET_FILENAME = 'session_secret'
+
+
+class SessionTokenError(ValueError):
+    """토큰 형식이 잘못되었거나 서명이 맞지 않거나 만료된 경우"""
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class SessionSigner:
+    """세션 토큰을 발급하고 검증합니다.
+
+    토큰 형식은 base64url(JSON 클레임).base64url(HMAC-SHA256 서명)이며, 클레임에는
+    사용자명(sub), 역할(role), 이름(name), 발급/만료 시각(iat/exp)을 담습니다.
+    """
+
+    def __init__(self, keys, ttl=SESSION_TTL, clock=time.time, tenant_id=None):
+        """keys는 비밀 키 하나 또는 목록입니다. 첫 번째 키로 서명하고 모든 키로 검증합니다.
+
+        tenant_id를 지정하면 토큰에 지점 ID를 넣고, 검증 시 같은 지점의 토큰만 받아들입니다
+        (지점 ID가 없는 이전 토큰은 기본 지점의 것으로 봅니다).
+        """
+        if isinstance(keys, (str, bytes)):
+            keys = [keys]
+        self._keys = [k.encode('utf-8') if isinstance(k, str) else k for k in keys if k]
+        if not self._keys:
+            raise ValueError("세션 비밀 키가 비어 있습니다")
+        self.ttl = ttl
+        self.clock = clock
+        self.tenant_id = tenant_id
+
+    def _sign(self, key, payload):
+        return hmac.new(key, payload.encode('ascii'), hashlib.sha256).digest()
+
+    def issue(self, username, role, name):
+        """사용자의 세션 토큰을 발급합니다."""
+        now = int(self.clock())
+        claims = {'sub': username, 'role': role, 'name': name, 'iat': now, 'exp': now + self.ttl}
+        if self.tenant_id is not None:
+            claims['tid'] = self.tenant_id
+        payload = _b64encode(json.dumps(claims, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        return f"{payload}.{_b64encode(self._sign(self._keys[0], payload))}"
+
+    def verify(self, token):
+        """토큰을 검증하고 클레임 dict를 반환합니다. 유효하지 않으면 SessionTokenError를 발생시킵니다."""
+        if not isinstance(token, str) or token.count('.') != 1:
+            raise SessionTokenError("토큰 형식이 잘못되었습니다")
+        payload, signature = token.split('.')
+        try:
+            signature = _b64decode(signature)
+            payload.encode('ascii')
+        except (ValueError, UnicodeEncodeError):
+            raise SessionTokenError("토큰 형식이 잘못되었습니다")
+        if not any(hmac.compare_digest(self._sign(key, payload), signature) for key in self._keys):
+            raise SessionTokenError("서명이 올바르지 않습니다")
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            raise SessionTokenError("토큰 내용을 읽을 수 없습니다")
+        if not isinstance(claims, dict) or not isinstance(claims.get('sub'), str):
+            raise SessionTokenError("토큰 내용이 올바르지 않습니다")
+        if not isinstance(claims.get('exp'), int) or claims['exp'] <= self.clock():
+            raise SessionTokenError("만료된 토큰입니다")
+        if self.tenant_id is not None and claims.get('tid', tenants.DEFAULT_TENANT_ID) != self.tenant_id:
+            raise SessionTokenError("다른 지점의 토큰입니다")
+        return claims
+
+
+def load_secrets():
+    """서명 키 목록을 반환합니다. 환경 변수가 없으면 data/session_secret을 읽거나 만듭니다."""
+    configured = os.environ.get('BLUHILL_SESSION_SECRET', '')
+    keys = [key.strip() for key in configured.split(',') if key.strip()]
+    if keys:
+        return keys
+    path = datastore.data_path(SECRET_FILENAME)
+    os.makedirs(datastore.data_dir(), exist_ok=True)
+    try:
+        # 여러 프로세스가 동시에 시작해도 한 프로세스만 키를 만듭니다
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(secrets.token_urlsafe(32))
+            f.flush()
+            os.fsync(f.fileno())
+    # 다른 프로세스가 방금 만든 파일이면 내용이 쓰일 때까지 잠시 기다립니다
+    for _ in range(50):
+        with open(path, 'r', encoding='utf-8') as f:
+            secret = f.read().strip()
+        if secret:
+            return [secret]
+        time.sleep(0.01)
+    raise RuntimeError(f"세션 비밀 키 파일이 비어 있습니다: {path}")
+
+
+# 프로세스 공용 지점별 서명기 (지점에서 처음 사용할 때 비밀 키를 읽습니다)
+_signers = tenants.TenantLocal(lambda: SessionSigner(load_secrets(), tenant_id=tenants.current().id))
+
+
+def get_signer():
+    """현재 지점의 SessionSigner를 반환합니다."""
+    return _signers.instance_for()
+
+
+def cookie_name():
+    """현재 지점의 세션 쿠키 이름 (기본 지점은 SESSION_COOKIE)"""
+    tenant = tenants.current()
+    if tenant.id == tenants.DEFAULT_TENANT_ID:
+        return SESSION_COOKIE
+    return f"{SESSION_COOKIE}_{tenant.id}"
+
+
+def cookie_script(token, max_age=SESSION_TTL):
+    """세션 쿠키를 설정하는 스크립트를 반환합니다. token이 None이면 쿠키를 지웁니다.
+
+    Streamlit에는 응답 쿠키를 설정하는 API가 없으므로 컴포넌트 iframe에서 상위 문서의
+    쿠키를 설정합니다. 토큰은 base64url 문자와 '.'로만 이루어져 있어 그대로 넣을 수 있습니다.
+    """
+    value, age = (token, max_age) if token else ('', 0)
+    return (
+        "<script>"
+        "const secure = window.parent.location.protocol === 'https:' ? '; Secure' : '';"
+        f"window.parent.document.cookie = '{cookie_name()}={value}; Max-Age={age}; Path=/; SameSite=Strict' + secure;"
+        "</script>"
+    )
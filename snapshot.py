@@ -0,0 +1,413 @@
+"""
+데이터 스냅샷 (증분 백업)
+
+문의글/후기/칼럼 데이터 파일과 users.yaml의 특정 시점 상태를 저장하고 복원합니다.
+
+- 일관성: 데이터 파일은 임시 파일에 쓴 뒤 바꿔 넣으므로, 모든 파일을 연 뒤 각 경로가 여전히
+  연 파일을 가리키는지 확인하면 그 순간의 상태를 읽을 수 있습니다. 쓰는 쪽을 멈추지 않으며,
+  그 사이에 바뀐 파일이 있으면 다시 엽니다
+- 증분/중복 제거: 레코드마다 내용 해시로 압축 객체를 저장하므로 이전 스냅샷에 있던 레코드는
+  다시 저장하지 않습니다. 레코드 해시 목록은 내용에 따라 경계를 정하는 묶음(chunk)으로 나누어
+  저장하므로, 레코드를 추가/삭제해도 바뀐 묶음만 새로 저장합니다
+- 이전 스냅샷 이후 바뀌지 않은 파일(같은 inode, 크기, 수정 시각)은 읽지 않습니다
+- 복원은 저장된 YAML 조각을 이어 붙이며, 현재 내용이 스냅샷과 같은 파일은 건너뜁니다. 데이터 파일은
+  앱과 같은 쓰기 잠금(datastore.store.locked) 안에서 바꿔 넣고 캐시를 비우므로 동시에 저장된 내용과 섞이지 않습니다
+- 바이너리 형식(dataformat.py)의 데이터 파일도 레코드 단위로 저장하며, 복원하면 YAML로 씁니다
+- 답글 스레드 파일(data/replies/)은 파일 수가 많아 함께 열어 두지 않고 파일마다 일관되게 읽습니다.
+  그 사이에 추가된 답글은 부모 문의글의 답글 수와 맞지 않을 수 있습니다
+
+저장 위치 (BLUHILL_SNAPSHOT_DIR, 기본값 snapshots/, 기본 지점 외의 지점은 그 아래 tenants/<지점 ID>/):
+    objects/ab/<sha256>       zlib로 압축한 레코드/묶음/파일 객체
+    manifests/<스냅샷 ID>.json  파일별 해시, 묶음 목록 (파일은 데이터 디렉토리 기준 상대 경로로 기록하므로
+                                작업 디렉토리와 관계없이 복원됩니다. users.yaml은 ../users.yaml)
+
+사용법 (지점은 BLUHILL_TENANT 환경 변수로 고릅니다):
+    python snapshot.py create
+    python snapshot.py list
+    python snapshot.py restore <스냅샷 ID>
+"""
+import os
+import sys
+import json
+import zlib
+import hashlib
+import secrets
+import argparse
+from datetime import datetime
+
+import datastore
+import stats
+import tenants
+import transfer
+import workqueue
+from records import RECORD_TYPES, CHILD_RECORD_TYPES, record_type_for
+
+SNAPSHOT_DIR = os.environ.get('BLUHILL_SNAPSHOT_DIR', 'snapshots')
+# 레코드 해시 묶음의 평균 크기: 해시가 이 수로 나누어떨어지는 레코드 뒤에서 묶음을 끊습니다
+CHUNK_AVERAGE = 64
+# 파일을 여는 도중 바뀐 경우 다시 시도하는 횟수
+OPEN_ATTEMPTS = 5
+READ_SIZE = 1 << 20
+# manifest 형식 버전 (1: 파일을 작업 디렉토리 기준 경로로 기록, 2: 데이터 디렉토리 기준)
+MANIFEST_VERSION = 2
+
+
+class SnapshotError(Exception):
+    """스냅샷을 만들거나 복원할 수 없는 경우"""
+    pass
+
+
+class _FileChanged(Exception):
+    """읽는 도중 파일이 바뀐 경우 (다시 시도)"""
+    pass
+
+
+def snapshot_files():
+    """스냅샷 대상 (경로, 최상위 키) 목록. 최상위 키가 None이면 파일 전체를 저장합니다."""
+    files = [(datastore.data_path(filename), filename[:-len('.yaml')]) for filename in RECORD_TYPES]
+    files.append((datastore.users_file(), None))
+    return files
+
+
+def child_files():
+    """부모 레코드별로 나뉜 하위 레코드 파일(답글 스레드)의 (경로, 최상위 키) 목록"""
+    files = []
+    for dirname in CHILD_RECORD_TYPES:
+        directory = datastore.data_path(dirname)
+        if os.path.isdir(directory):
+            files.extend(
+                (os.path.join(directory, name), dirname) for name in sorted(os.listdir(directory))
+                if name.endswith('.yaml')
+            )
+    return files
+
+
+def entry_name(path):
+    """파일 경로를 manifest에 기록하는 데이터 디렉토리 기준 상대 경로로 바꿉니다."""
+    return os.path.relpath(path, datastore.data_dir()).replace(os.sep, '/')
+
+
+def entry_path(name):
+    """manifest의 상대 경로를 현재 지점의 데이터 디렉토리 기준 파일 경로로 바꿉니다."""
+    return os.path.normpath(os.path.join(datastore.data_dir(), *name.split('/')))
+
+
+def _signature(stat):
+    return [stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_digest(f):
+    h = hashlib.sha256()
+    for block in iter(lambda: f.read(READ_SIZE), b''):
+        h.update(block)
+    return h.hexdigest()
+
+
+def _record_key(item):
+    # YAML이 변환한 datetime과 같은 모양의 문자열이 같은 키가 되지 않도록 repr을 사용합니다
+    return json.dumps(item, sort_keys=True, ensure_ascii=False, default=repr).encode('utf-8')
+
+
+def _open_consistent(files):
+    """모든 파일을 열고, 모두 여전히 현재 파일인 순간이 있었던 경우에만 {경로: 파일 또는 None}을 반환합니다."""
+    for _ in range(OPEN_ATTEMPTS):
+        handles = {}
+        for path, _ in files:
+            try:
+                handles[path] = open(path, 'rb')
+            except FileNotFoundError:
+                handles[path] = None
+        if all(_is_current(path, f) for path, f in handles.items()):
+            return handles
+        _close_all(handles)
+    raise SnapshotError("데이터 파일이 계속 바뀌고 있어 일관된 스냅샷을 만들 수 없습니다")
+
+
+def _is_current(path, f):
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return f is None
+    return f is not None and _signature(current) == _signature(os.fstat(f.fileno()))
+
+
+def _close_all(handles):
+    for f in handles.values():
+        if f is not None:
+            f.close()
+
+
+class SnapshotStore:
+    """스냅샷 객체와 목록(manifest)을 저장합니다."""
+
+    def __init__(self, root=None):
+        if root is None:
+            tenant = tenants.current()
+            root = SNAPSHOT_DIR
+            if tenant.id != tenants.DEFAULT_TENANT_ID:
+                root = os.path.join(SNAPSHOT_DIR, 'tenants', tenant.id)
+        self.root = root
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.manifests_dir = os.path.join(self.root, 'manifests')
+
+    # 객체
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def has(self, digest):
+        return os.path.exists(self._object_path(digest))
+
+    def put(self, digest, data):
+        """객체를 압축하여 저장하고 저장한 바이트 수를 반환합니다. 이미 있으면 0을 반환합니다."""
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, 6)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return len(compressed)
+
+    def get(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    # 스냅샷 목록
+
+    def list(self):
+        """스냅샷 ID 목록을 오래된 순으로 반환합니다."""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        return sorted(name[:-len('.json')] for name in os.listdir(self.manifests_dir) if name.endswith('.json'))
+
+    def load(self, snapshot_id):
+        path = os.path.join(self.manifests_dir, f"{snapshot_id}.json")
+        if not os.path.exists(path):
+            raise SnapshotError(f"스냅샷을 찾을 수 없습니다: {snapshot_id}")
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version', 1) < MANIFEST_VERSION:
+            # 이전 형식은 작업 디렉토리 기준 경로이므로 데이터 디렉토리 기준으로 바꿉니다
+            manifest['files'] = {entry_name(path): entry for path, entry in manifest['files'].items()}
+            manifest['version'] = MANIFEST_VERSION
+        return manifest
+
+    def latest(self):
+        ids = self.list()
+        return self.load(ids[-1]) if ids else None
+
+    def _save_manifest(self, manifest):
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        path = os.path.join(self.manifests_dir, f"{manifest['id']}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    # 만들기
+
+    def _store_records(self, f, key, summary):
+        """레코드를 하나씩 저장하고 (레코드 수, 묶음 해시 목록)을 반환합니다."""
+        count = 0
+        chunks = []
+        chunk = []
+
+        def flush():
+            data = '\n'.join(chunk).encode('ascii')
+            digest = _digest(data)
+            summary['stored_bytes'] += self.put(digest, data)
+            chunks.append(digest)
+            chunk.clear()
+
+        for item in transfer.iter_file_items(f, key):
+            digest = _digest(_record_key(item))
+            if not self.has(digest):
+                summary['stored_bytes'] += self.put(digest, transfer.dump_item(item).encode('utf-8'))
+                summary['new_records'] += 1
+            chunk.append(digest)
+            count += 1
+            if int(digest[:8], 16) % CHUNK_AVERAGE == 0:
+                flush()
+        if chunk:
+            flush()
+        return count, chunks
+
+    def _snapshot_file(self, path, key, f, previous, summary):
+        if f is None:
+            return {'digest': None}
+        signature = _signature(os.fstat(f.fileno()))
+        if previous and previous.get('signature') == signature:
+            return previous
+        digest = _file_digest(f)
+        if previous and previous.get('digest') == digest:
+            return dict(previous, signature=signature)
+        summary['changed_files'].append(path)
+        f.seek(0)
+        entry = {'digest': digest, 'signature': signature}
+        if key is None:
+            data = f.read()
+            summary['stored_bytes'] += self.put(_digest(data), data)
+            entry['object'] = _digest(data)
+        else:
+            entry['key'] = key
+            entry['records'], entry['chunks'] = self._store_records(f, key, summary)
+        # 제자리에서 고쳐 쓰는 편집기 등으로 읽는 도중 바뀌었으면 처음부터 다시 읽습니다
+        if _signature(os.fstat(f.fileno())) != signature or not _is_current(path, f):
+            raise _FileChanged(path)
+        return entry
+
+    def _snapshot_group(self, files, previous_files):
+        """파일들을 같은 순간의 상태로 저장하고 ({경로: 항목}, 요약)을 반환합니다."""
+        for _ in range(OPEN_ATTEMPTS):
+            summary = {'changed_files': [], 'new_records': 0, 'stored_bytes': 0}
+            handles = _open_consistent(files)
+            try:
+                entries = {
+                    entry_name(path): self._snapshot_file(
+                        path, key, handles[path], previous_files.get(entry_name(path)), summary
+                    )
+                    for path, key in files
+                }
+                return entries, summary
+            except _FileChanged:
+                continue
+            finally:
+                _close_all(handles)
+        raise SnapshotError("데이터 파일이 계속 바뀌고 있어 일관된 스냅샷을 만들 수 없습니다")
+
+    def create(self, now=None):
+        """현재 데이터의 스냅샷을 만들고 manifest(dict)를 반환합니다."""
+        now = now or datetime.now()
+        previous = self.latest()
+        previous_files = previous['files'] if previous else {}
+        entries, summary = self._snapshot_group(snapshot_files(), previous_files)
+        for child in child_files():
+            child_entries, child_summary = self._snapshot_group([child], previous_files)
+            entries.update(child_entries)
+            summary['changed_files'].extend(child_summary['changed_files'])
+            summary['new_records'] += child_summary['new_records']
+            summary['stored_bytes'] += child_summary['stored_bytes']
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'id': f"{now.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}",
+            'created_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'parent': previous['id'] if previous else None,
+            'files': entries,
+            'summary': summary
+        }
+        self._save_manifest(manifest)
+        return manifest
+
+    # 복원
+
+    def _write_file(self, path, entry):
+        tmp_path = f"{path}.{os.getpid()}.restore.tmp"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(tmp_path, 'wb') as out:
+                if 'object' in entry:
+                    out.write(self.get(entry['object']))
+                elif not entry['chunks']:
+                    out.write(f"{entry['key']}: []\n".encode('utf-8'))
+                else:
+                    out.write(f"{entry['key']}:\n".encode('utf-8'))
+                    for chunk in entry['chunks']:
+                        for digest in self.get(chunk).decode('ascii').split('\n'):
+                            out.write(self.get(digest))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _restore_file(self, path, entry):
+        """파일을 스냅샷의 내용으로 바꿉니다. 이미 같으면 False를 반환합니다."""
+        current = None
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                current = _file_digest(f)
+        if current == entry['digest']:
+            return False
+        if entry['digest'] is None:
+            os.remove(path)
+        else:
+            self._write_file(path, entry)
+        return True
+
+    def _restore_entry(self, name, entry):
+        path = entry_path(name)
+        if record_type_for(name) is None:
+            # users.yaml은 앱이 쓰지 않으므로 잠금 없이 바꾸고 파일 캐시만 비웁니다
+            return self._restore_file(path, entry)
+        # 앱의 저장과 겹치지 않도록 같은 잠금 안에서 바꾸고 캐시를 비웁니다
+        with datastore.store.locked(name):
+            changed = self._restore_file(path, entry)
+            if changed:
+                datastore.store.invalidate(name)
+        return changed
+
+    def restore(self, snapshot_id):
+        """스냅샷 시점의 데이터로 되돌리고 바꾼 파일 경로 목록을 반환합니다."""
+        manifest = self.load(snapshot_id)
+        restored = []
+        for name, entry in manifest['files'].items():
+            if self._restore_entry(name, entry):
+                restored.append(entry_path(name))
+        # 스냅샷 이후에 생긴 답글 스레드 파일은 지웁니다
+        for path, _ in child_files():
+            name = entry_name(path)
+            if name not in manifest['files'] and self._restore_entry(name, {'digest': None}):
+                restored.append(path)
+        if restored:
+            datastore.files.invalidate()
+            # 집계와 작업 대기열은 다음 사용 시 복원한 데이터로 다시 만듭니다
+            stats.store.reset()
+            workqueue.engine.reset()
+        return restored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="데이터 스냅샷 만들기/복원")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('create', help="스냅샷 만들기")
+    commands.add_parser('list', help="스냅샷 목록")
+    restore = commands.add_parser('restore', help="스냅샷으로 복원")
+    restore.add_argument('snapshot_id')
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore()
+    try:
+        if args.command == 'create':
+            manifest = store.create()
+            summary = manifest['summary']
+            print(f"스냅샷 {manifest['id']}: 바뀐 파일 {len(summary['changed_files'])}개, "
+                  f"새 레코드 {summary['new_records']}건, 저장 {summary['stored_bytes']:,} bytes")
+        elif args.command == 'list':
+            for snapshot_id in store.list():
+                manifest = store.load(snapshot_id)
+                records = sum(entry.get('records', 0) for entry in manifest['files'].values())
+                print(f"{snapshot_id}  {manifest['created_at']}  레코드 {records}건")
+        else:
+            restored = store.restore(args.snapshot_id)
+            print(f"복원한 파일: {', '.join(restored) if restored else '없음 (현재 데이터와 같음)'}")
+    except (SnapshotError, OSError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""
+관리자 통계 대시보드용 집계
+
+문의글/후기가 저장될 때마다 일별 건수, 답변 대기 건수, 답변 소요 시간 분포, 진료과목별 후기 별점 분포 등을
+카운터로 갱신하여 data/stats.yaml에 저장합니다. 대시보드는 전체 데이터를 다시 읽지 않고
+이 카운터만 읽으며, 기간별 추이는 요청한 날짜만 찾아 읽으므로 누적 데이터 양과 거의 관계없이 표시됩니다.
+진료과목 페이지의 후기 수와 평균 별점도 같은 카운터에서 읽습니다.
+
+집계 파일은 임시 파일에 쓴 뒤 바꿔 넣고, 갱신(읽고 고쳐 쓰기)은 stats.yaml.lock 파일 잠금 안에서
+하므로 여러 서버 프로세스가 함께 갱신해도 잘린 파일을 읽거나 다른 프로세스의 갱신을 잃지 않습니다.
+"""
+import os
+import math
+import threading
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from datetime import timedelta
+
+import dataformat
+import datastore
+import tenants
+from records import format_timestamp
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+STATS_FILENAME = 'stats.yaml'
+# 저장 형식이 바뀌면 올려서 기존 집계를 다시 계산하게 합니다
+STATS_VERSION = 2
+
+# 후기 별점 범위
+RATINGS = range(1, 6)
+
+# 답변 소요 시간 히스토그램 구간 상한 (초): 1분부터 1.5배씩, 약 40일까지
+LATENCY_BUCKETS = [60 * 1.5 ** i for i in range(28)]
+
+
+def day_of(ts):
+    """타임스탬프의 날짜 문자열 (YYYY-MM-DD)"""
+    return format_timestamp(ts)[:10]
+
+
+def format_duration(seconds):
+    """초 단위 시간을 읽기 쉬운 문자열로 변환합니다."""
+    if seconds is None:
+        return "-"
+    if math.isinf(seconds):
+        return f"{format_duration(LATENCY_BUCKETS[-1])} 초과"
+    if seconds < 3600:
+        return f"{max(1, round(seconds / 60))}분"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f}시간"
+    return f"{seconds / 86400:.1f}일"
+
+
+class DashboardStats:
+    """대시보드 카운터 묶음"""
+
+    def __init__(self):
+        self.inquiries_by_day = {}
+        self.reviews_by_day = {}
+        # 날짜별 그날 마지막 변경 시점의 답변 대기 건수와, 이전 값을 이진 탐색하기 위한 정렬된 날짜 목록
+        self.pending_by_day = {}
+        self._pending_days = []
+        self.pending = 0
+        self.private = 0
+        self.public = 0
+        self.reviews = 0
+        self.answered = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        # 진료과목별 후기 수와 별점 분포 ([1점 후기 수, ..., 5점 후기 수])
+        self.review_categories = {}
+        self.rating_histograms = {}
+
+    # 갱신
+    def add_inquiry(self, created_ts, is_private):
+        """새 문의글을 반영합니다."""
+        day = day_of(created_ts)
+        self.inquiries_by_day[day] = self.inquiries_by_day.get(day, 0) + 1
+        if is_private:
+            self.private += 1
+        else:
+            self.public += 1
+        self.pending += 1
+        self._set_pending(day)
+
+    def _set_pending(self, day):
+        if day not in self.pending_by_day:
+            insort(self._pending_days, day)
+        self.pending_by_day[day] = self.pending
+
+    def add_review(self, created_ts, category=None, rating=None):
+        """새 후기를 반영합니다. 진료과목이 없는 후기는 진료과목별 집계에서 제외합니다."""
+        day = day_of(created_ts)
+        self.reviews_by_day[day] = self.reviews_by_day.get(day, 0) + 1
+        self.reviews += 1
+        if not category:
+            return
+        self.review_categories[category] = self.review_categories.get(category, 0) + 1
+        if isinstance(rating, int) and rating in RATINGS:
+            histogram = self.rating_histograms.setdefault(category, [0] * len(RATINGS))
+            histogram[rating - RATINGS[0]] += 1
+
+    def add_answer(self, created_ts, answered_ts):
+        """문의글 답변 등록을 반영합니다. 답변일시를 모르는 이전 데이터는 소요 시간에서 제외합니다."""
+        self.pending = max(0, self.pending - 1)
+        self.answered += 1
+        if answered_ts is None:
+            self._set_pending(day_of(created_ts))
+            return
+        self._set_pending(day_of(answered_ts))
+        latency = max(0, answered_ts - created_ts)
+        self.latency_histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    # 조회
+    @property
+    def total_inquiries(self):
+        return self.private + self.public
+
+    def latency_percentile(self, percent):
+        """답변 소요 시간의 백분위수 (히스토그램 구간 상한, 초).
+
+        데이터가 없으면 None을, 마지막 구간을 넘는 경우 math.inf를 반환합니다.
+        """
+        total = sum(self.latency_histogram)
+        if not total:
+            return None
+        rank = max(1, -(-total * percent // 100))
+        seen = 0
+        for i, count in enumerate(self.latency_histogram):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else math.inf
+        return math.inf
+
+    def rating_summary(self, category):
+        """진료과목의 (후기 수, 평균 별점, 별점을 남긴 후기 수)를 반환합니다. 별점이 없으면 평균은 None입니다."""
+        histogram = self.rating_histograms.get(category, ())
+        rated = sum(histogram)
+        average = sum(rating * count for rating, count in zip(RATINGS, histogram)) / rated if rated else None
+        return self.review_categories.get(category, 0), average, rated
+
+    def daily_series(self, end_day, days):
+        """end_day까지 최근 days일의 날짜별 (문의, 후기, 답변 대기) 건수 목록을 반환합니다."""
+        start_day = end_day - timedelta(days=days - 1)
+        start_key = start_day.isoformat()
+        # 구간 이전 마지막 값부터 이어서 답변 대기 건수를 채웁니다
+        position = bisect_left(self._pending_days, start_key)
+        pending = self.pending_by_day[self._pending_days[position - 1]] if position else 0
+        series = []
+        for offset in range(days):
+            key = (start_day + timedelta(days=offset)).isoformat()
+            pending = self.pending_by_day.get(key, pending)
+            series.append((
+                key,
+                self.inquiries_by_day.get(key, 0),
+                self.reviews_by_day.get(key, 0),
+                pending
+            ))
+        return series
+
+    # 직렬화
+    def to_dict(self):
+        return {
+            'version': STATS_VERSION,
+            'inquiries_by_day': self.inquiries_by_day,
+            'reviews_by_day': self.reviews_by_day,
+            'pending_by_day': self.pending_by_day,
+            'pending': self.pending,
+            'private': self.private,
+            'public': self.public,
+            'reviews': self.reviews,
+            'answered': self.answered,
+            'latency_histogram': self.latency_histogram,
+            'review_categories': self.review_categories,
+            'rating_histograms': self.rating_histograms
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """저장된 집계를 읽습니다. 형식이 맞지 않으면 None을 반환합니다."""
+        if not isinstance(data, dict) or data.get('version') != STATS_VERSION:
+            return None
+        stats = cls()
+        try:
+            for name in ('inquiries_by_day', 'reviews_by_day', 'pending_by_day'):
+                setattr(stats, name, {str(k): int(v) for k, v in data[name].items()})
+            for name in ('pending', 'private', 'public', 'reviews', 'answered'):
+                setattr(stats, name, int(data[name]))
+            histogram = [int(v) for v in data['latency_histogram']]
+            stats.review_categories = {str(k): int(v) for k, v in data['review_categories'].items()}
+            stats.rating_histograms = {str(k): [int(c) for c in v] for k, v in data['rating_histograms'].items()}
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
+        if len(histogram) != len(stats.latency_histogram):
+            return None
+        if any(len(v) != len(RATINGS) for v in stats.rating_histograms.values()):
+            return None
+        stats.latency_histogram = histogram
+        stats._pending_days = sorted(stats.pending_by_day)
+        return stats
+
+    @classmethod
+    def rebuild(cls, inquiries, reviews):
+        """전체 데이터로부터 집계를 다시 계산합니다 (집계 파일이 없거나 손상된 경우)."""
+        stats = cls()
+        events = []
+        for inq in inquiries:
+            events.append((inq.created_ts, 0, inq))
+            if inq.answered:
+                # 답변일시를 모르는 이전 데이터는 작성 시점에 답변된 것으로 간주합니다
+                events.append((inq.answered_ts or inq.created_ts, 1, inq))
+        for ts, kind, inq in sorted(events, key=lambda e: (e[0], e[1])):
+            if kind == 0:
+                stats.add_inquiry(inq.created_ts, inq.is_private)
+            else:
+                stats.add_answer(inq.created_ts, inq.answered_ts)
+        for review in reviews:
+            stats.add_review(review.created_ts, review.category, review.rating)
+        return stats
+
+
+class _FileLock:
+    """프로세스 간 배타 잠금 (fcntl이 없으면 아무것도 하지 않음)"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+
+class StatsStore:
+    """집계 파일을 캐시하고 갱신합니다."""
+
+    def __init__(self):
+        self._cached = None
+        self._signature = None
+        # False이면 캐시된 집계 파일의 변경 여부를 확인하지 않습니다 (변경 감시기가 무효화를 대신 전달할 때)
+        self.verify = True
+        self._lock = threading.RLock()
+
+    def _path(self):
+        return datastore.data_path(STATS_FILENAME)
+
+    def get(self):
+        """현재 집계를 반환합니다. 파일이 없거나 손상되었으면 전체 데이터로 다시 계산합니다."""
+        return self._get()[0]
+
+    @contextmanager
+    def _locked(self):
+        """집계 파일을 읽고 고쳐 쓰는 동안 다른 스레드/프로세스의 갱신을 막습니다."""
+        filepath = self._path()
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with self._lock, open(f"{filepath}.lock", 'ab') as lock_file, _FileLock(lock_file):
+            yield
+
+    def _get(self, verify=False):
+        """(집계, 다시 계산했는지 여부)를 반환합니다. verify이면 캐시가 파일과 같은지 항상 확인합니다."""
+        with self._lock:
+            if not (verify or self.verify) and self._cached is not None:
+                return self._cached, False
+            filepath = self._path()
+            signature = None
+            if os.path.exists(filepath):
+                stat = os.stat(filepath)
+                signature = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+                if self._cached is not None and signature == self._signature:
+                    return self._cached, False
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    stats = DashboardStats.from_dict(dataformat.safe_load(f))
+                if stats is not None:
+                    self._cached, self._signature = stats, signature
+                    return stats, False
+            inquiries, _ = datastore.store.load('inquiries.yaml')
+            reviews, _ = datastore.store.load('reviews.yaml')
+            stats = DashboardStats.rebuild(inquiries, reviews)
+            self._save(stats)
+            return stats, True
+
+    def _save(self, stats):
+        filepath = self._path()
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        # 다른 프로세스가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 쓴 뒤 바꿔 넣습니다
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                dataformat.dump(stats.to_dict(), f)
+            os.replace(tmp_path, filepath)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        stat = os.stat(filepath)
+        self._cached = stats
+        self._signature = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+
+    def update(self, apply):
+        """저장이 끝난 변경을 apply(stats)로 집계에 반영합니다.
+
+        집계를 다시 계산한 경우에는 그 변경이 이미 포함되어 있으므로 apply를 건너뜁니다.
+        잠금을 잡은 뒤 파일을 다시 확인하므로 다른 프로세스가 먼저 반영한 갱신 위에 더합니다.
+        """
+        with self._locked():
+            stats, rebuilt = self._get(verify=True)
+            if not rebuilt:
+                apply(stats)
+                self._save(stats)
+
+    def invalidate(self):
+        """메모리의 집계를 버려 다음 조회 시 파일에서 다시 읽게 합니다."""
+        with self._lock:
+            self._cached = None
+            self._signature = None
+
+    def reset(self):
+        """집계 파일을 지워 다음 조회 시 다시 계산하게 합니다."""
+        with self._locked():
+            self._cached = None
+            self._signature = None
+            filepath = self._path()
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+
+# 프로세스 전체에서 공유하는 지점별 집계 저장소
+store = tenants.TenantLocal(StatsStore)
@@ -0,0 +1,174 @@
+"""
+제출 토큰 저장소 (중복 제출 방지)
+
+폼마다 발급한 제출 토큰을 처리할 때 등록해 두어, 더블 클릭이나 재연결로 같은 제출이 다시
+들어와도 한 번만 저장합니다.
+
+- 토큰은 지점 데이터 디렉토리의 submission_tokens.jsonl에 한 줄씩 추가하며, 등록은 <파일>.lock
+  파일 잠금 안에서 다른 프로세스가 추가한 줄을 먼저 반영한 뒤 하므로, 재전송된 제출이 다른 서버
+  프로세스로 가더라도 중복으로 알아봅니다
+- 최근 maxsize개만 유지하며, 로그가 maxsize의 2배를 넘으면 남은 토큰만 다시 씁니다
+- path 없이 만든 저장소는 이 프로세스 안에서만 토큰을 보관합니다 (테스트 등)
+"""
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import datastore
+import tenants
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+TOKENS_FILENAME = 'submission_tokens.jsonl'
+# 최근 처리한 제출 토큰을 보관할 최대 개수 (초과 시 가장 오래된 토큰부터 제거)
+RECENT_TOKEN_LIMIT = 4096
+
+
+class _FileLock:
+    """프로세스 간 배타 잠금 (fcntl이 없으면 아무것도 하지 않음)"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+
+class RecentTokenStore:
+    """최근 처리한 제출 토큰을 크기 제한과 함께 보관합니다.
+
+    path가 있으면 같은 파일을 쓰는 모든 프로세스가 토큰을 공유합니다.
+    """
+
+    def __init__(self, maxsize=RECENT_TOKEN_LIMIT, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._tokens = OrderedDict()
+        self._lines = 0
+        self._offset = 0
+        self._loaded = None
+
+    def _apply(self, op, token):
+        if op == 'claim':
+            self._tokens[token] = None
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+        elif op == 'release':
+            self._tokens.pop(token, None)
+
+    def _refresh(self):
+        """마지막으로 읽은 위치 이후에 추가된 토큰을 반영합니다. 로그가 다시 쓰였으면 처음부터 읽습니다."""
+        if self.path is None:
+            return
+        if not os.path.exists(self.path):
+            if self._loaded is not None:
+                self._reset()
+            return
+        with open(self.path, 'rb') as f:
+            # 다시 쓴 로그는 첫 줄이 달라지므로 inode가 재사용되어도 구분됩니다
+            stat = os.fstat(f.fileno())
+            loaded = (os.path.abspath(self.path), stat.st_ino, f.readline(256))
+            if loaded != self._loaded or stat.st_size < self._offset:
+                self._reset()
+                self._loaded = loaded
+            f.seek(self._offset)
+            data = f.read()
+        # 아직 다 쓰이지 않은 마지막 줄은 다음에 읽습니다
+        complete = data[:data.rfind(b'\n') + 1]
+        for line in complete.splitlines():
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+                self._apply(event.get('op'), event['token'])
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            self._lines += 1
+        self._offset += len(complete)
+
+    @contextmanager
+    def _transaction(self):
+        """파일 잠금 안에서 다른 프로세스가 등록한 토큰을 반영합니다."""
+        with self._lock:
+            if self.path is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(f"{self.path}.lock", 'ab') as lock_file, _FileLock(lock_file):
+                self._refresh()
+                yield
+
+    def _record(self, op, token):
+        if self.path is None:
+            self._apply(op, token)
+            return
+        with open(self.path, 'ab') as f:
+            f.write((json.dumps({'op': op, 'token': token}) + '\n').encode('utf-8'))
+            f.flush()
+        self._refresh()
+        if self._lines > 2 * self.maxsize:
+            self._compact()
+
+    def _compact(self):
+        """남은 토큰만 남도록 로그를 다시 씁니다."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                # 첫 줄로 다시 쓴 로그임을 다른 프로세스가 알아보게 합니다
+                f.write((json.dumps({'op': 'compacted', 'token': None, 'at': time.time()}) + '\n').encode('utf-8'))
+                for token in self._tokens:
+                    f.write((json.dumps({'op': 'claim', 'token': token}) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._reset()
+        self._refresh()
+
+    def claim(self, token):
+        """처음 보는 토큰이면 등록 후 True를, 이미 처리된 토큰이면 False를 반환합니다."""
+        with self._transaction():
+            if token in self._tokens:
+                return False
+            self._record('claim', token)
+            return True
+
+    def release(self, token):
+        """저장에 실패한 토큰을 다시 사용할 수 있도록 해제합니다."""
+        with self._transaction():
+            if token in self._tokens:
+                self._record('release', token)
+
+    def __contains__(self, token):
+        with self._lock:
+            self._refresh()
+            return token in self._tokens
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._tokens)
+
+
+# 프로세스 전체에서 공유하는 지점별 제출 토큰 저장소
+tokens = tenants.TenantLocal(lambda: RecentTokenStore(path=datastore.data_path(TOKENS_FILENAME)))
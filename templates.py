@@ -0,0 +1,136 @@
+"""
+관리자 답변 템플릿
+
+진료시간, 위치, 가격 문의처럼 반복되는 답변을 템플릿으로 저장해 두고 답변할 때 골라 씁니다.
+
+- 템플릿 본문의 {이름}은 답변할 때 채우는 변수입니다. {작성자}, {문의제목}은 문의글에서 채웁니다
+- 템플릿으로 답변한 문의글에는 답변 본문 대신 템플릿 ID와 직접 입력한 변수만 저장하고, 표시할 때 본문을 만듭니다
+- 이미 답변에 쓰였을 수 있으므로 템플릿은 고치지 않습니다. 새 템플릿을 추가하고 이전 템플릿은 보관(retired)하며,
+  보관한 템플릿은 검색되지 않지만 그 템플릿으로 저장된 답변을 표시할 때 계속 사용됩니다
+- 템플릿 이름과 이름의 각 단어를 트라이에 넣어 두어 입력한 접두어로 템플릿을 바로 찾습니다.
+  트라이는 템플릿 파일이 바뀔 때만 다시 만듭니다
+"""
+import re
+import threading
+from itertools import islice
+
+import datastore
+import tenants
+
+TEMPLATES_FILENAME = 'answer_templates.yaml'
+# 검색 결과로 보여줄 최대 템플릿 수
+SUGGESTIONS = 10
+
+_VARIABLE = re.compile(r'\{([^{}\s]{1,30})\}')
+
+# 문의글에서 채우는 변수 (답변에 저장하지 않고 표시할 때 채웁니다)
+AUTO_VARIABLES = {
+    '작성자': lambda inquiry: inquiry.author_name,
+    '문의제목': lambda inquiry: inquiry.title,
+}
+
+
+def variables(body):
+    """본문의 변수 이름 목록 (처음 나온 순서, 중복 제외)"""
+    return list(dict.fromkeys(_VARIABLE.findall(body)))
+
+
+def input_variables(body):
+    """답변할 때 직접 입력해야 하는 변수 이름 목록"""
+    return [name for name in variables(body) if name not in AUTO_VARIABLES]
+
+
+def render(body, values=None, inquiry=None):
+    """본문의 변수를 채웁니다. 값이 없는 변수는 {이름} 그대로 둡니다."""
+    def fill(match):
+        name = match.group(1)
+        if name in AUTO_VARIABLES and inquiry is not None:
+            return AUTO_VARIABLES[name](inquiry)
+        value = (values or {}).get(name)
+        return match.group(0) if value is None else str(value)
+    return _VARIABLE.sub(fill, body)
+
+
+class PrefixIndex:
+    """문자열 키의 접두어 검색용 트라이
+
+    노드마다 그 아래에 있는 값을 추가한 순서대로 모아 두므로, 검색은 템플릿 수와 관계없이
+    접두어 길이와 반환할 값의 수에 비례합니다. 대소문자는 구분하지 않습니다.
+    """
+
+    def __init__(self):
+        # 노드: (자식 노드 dict, 값 → None dict)
+        self._root = ({}, {})
+
+    def add(self, key, value):
+        node = self._root
+        node[1][value] = None
+        for char in key.lower():
+            node = node[0].setdefault(char, ({}, {}))
+            node[1][value] = None
+
+    def search(self, prefix, limit=None):
+        """prefix로 시작하는 키의 값 목록 (추가한 순서)"""
+        node = self._root
+        for char in prefix.lower():
+            node = node[0].get(char)
+            if node is None:
+                return []
+        if limit is None:
+            return list(node[1])
+        return list(islice(node[1], limit))
+
+
+class TemplateLibrary:
+    """템플릿 목록과 검색 트라이 (템플릿 파일이 바뀐 경우에만 다시 만듭니다)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 트라이를 만들 때 사용한 작성일시 인덱스: datastore는 파일이 바뀔 때만 새 인덱스를 만듭니다
+        self._source = None
+        self._by_id = {}
+        self._index = PrefixIndex()
+
+    def _current(self):
+        source = datastore.store.index(TEMPLATES_FILENAME)
+        with self._lock:
+            if source is not self._source:
+                active = sorted((t for t in source.records if not t.retired), key=lambda t: t.name)
+                index = PrefixIndex()
+                for template in active:
+                    index.add(template.name, template.id)
+                    # 이름 중간의 단어로도 찾을 수 있게 합니다 ("공진단 가격" → "가격")
+                    for word in template.name.split()[1:]:
+                        index.add(word, template.id)
+                self._by_id = {t.id: t for t in source.records}
+                self._index = index
+                self._source = source
+            return self._by_id, self._index
+
+    def get(self, template_id):
+        """ID의 템플릿 (보관한 템플릿 포함, 없으면 None)"""
+        by_id, _ = self._current()
+        return by_id.get(template_id)
+
+    def search(self, prefix, limit=SUGGESTIONS):
+        """이름이나 이름의 단어가 prefix로 시작하는 보관하지 않은 템플릿 목록 (이름순)"""
+        by_id, index = self._current()
+        return [by_id[template_id] for template_id in index.search(prefix.strip(), limit)]
+
+    def active(self):
+        """보관하지 않은 템플릿 전체 (이름순)"""
+        return self.search('', limit=None)
+
+
+def answer_text(inquiry):
+    """문의글의 답변 본문을 반환합니다. 템플릿 답변은 템플릿과 저장된 변수로 만듭니다."""
+    if inquiry.answer_template is None:
+        return inquiry.answer
+    template = library.get(inquiry.answer_template)
+    if template is None:
+        return "⚠️ 답변 템플릿을 찾을 수 없습니다."
+    return render(template.body, inquiry.answer_vars, inquiry)
+
+
+# 프로세스 전체에서 공유하는 지점별 템플릿 목록
+library = tenants.TenantLocal(TemplateLibrary)
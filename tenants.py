@@ -0,0 +1,260 @@
+"""
+지점(테넌트)별 데이터 분리
+
+한 배포에서 여러 지점을 운영할 때 지점마다 데이터(data/), 콘텐츠(content/), 사용자 정보(users.yaml)를
+따로 두고, 프로세스 공용 캐시도 지점마다 따로 만듭니다. 한 지점에 요청이 몰려도 다른 지점의 캐시가
+밀려나지 않습니다.
+
+- 지점 목록은 tenants.yaml에 정의합니다. 파일이 없으면 작업 디렉토리의 data/, content/, users.yaml을
+  쓰는 기본 지점(default) 하나만 있습니다
+- 요청의 지점은 URL 파라미터(?clinic=<지점 ID>) 또는 접속 호스트 이름으로 정하며, 어느 쪽에도
+  해당하지 않으면 기본 지점입니다
+- 현재 지점은 contextvars로 관리하므로 다른 스레드에서 실행할 작업은 contextvars.copy_context()로 넘깁니다
+- 명령행 도구(transfer.py, snapshot.py 등)는 BLUHILL_TENANT 환경 변수로 지점을 고릅니다
+- tenants.yaml을 바꾸면 서버를 다시 시작해야 합니다
+
+tenants.yaml 예:
+    tenants:
+      gangnam:
+        name: 블루힐 한의원 강남점
+        hosts: [gangnam.bluhill.example]
+      # root를 지정하지 않으면 tenants/<지점 ID>/ 아래에 data/, content/, users.yaml을 둡니다
+      jamsil:
+        name: 블루힐 한의원 잠실점
+        root: /srv/bluhill/jamsil
+        # 지정하지 않으면 booking.py의 PRACTITIONERS, CLINIC_HOURS를 씁니다 (적지 않은 요일은 휴진, 월요일=0)
+        practitioners: [박한의 원장]
+        hours:
+          0: [["09:00", "13:00"], ["14:00", "19:00"]]
+          5: [["09:00", "13:00"]]
+"""
+import os
+import re
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import yaml
+
+# 지점 목록 파일과, root를 지정하지 않은 지점의 디렉토리가 놓이는 위치
+TENANTS_FILE = os.environ.get('BLUHILL_TENANTS_FILE', 'tenants.yaml')
+TENANTS_DIR = os.environ.get('BLUHILL_TENANTS_DIR', 'tenants')
+# 기존 배치(작업 디렉토리)를 그대로 쓰는 지점
+DEFAULT_TENANT_ID = 'default'
+# 지점을 고르는 URL 파라미터 이름
+TENANT_PARAM = 'clinic'
+
+_VALID_ID = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+_VALID_TIME = re.compile(r'^([01][0-9]|2[0-3]):[0-5][0-9]$')
+
+
+class TenantError(ValueError):
+    """지점 설정이 잘못되었거나 없는 지점을 고른 경우"""
+    pass
+
+
+class Tenant:
+    """지점 하나의 ID, 표시 이름, 파일 위치(root), 호스트 이름 목록, 원장 목록과 진료 시간
+
+    practitioners/hours가 None이면 booking.py의 기본값을 씁니다.
+    """
+    __slots__ = ('id', 'name', 'root', 'hosts', 'practitioners', 'hours')
+
+    def __init__(self, tenant_id, root='', name=None, hosts=(), practitioners=None, hours=None):
+        self.id = tenant_id
+        self.root = root
+        self.name = name
+        self.hosts = tuple(host.lower() for host in hosts)
+        self.practitioners = practitioners
+        self.hours = hours
+
+    def path(self, *parts):
+        """지점 디렉토리 기준 경로 (기본 지점은 작업 디렉토리 기준 상대 경로)"""
+        return os.path.join(self.root, *parts)
+
+    def __repr__(self):
+        return f"Tenant({self.id!r}, root={self.root!r})"
+
+
+def _parse_practitioners(tenant_id, value):
+    if value is None:
+        return None
+    if not isinstance(value, list) or not value or not all(isinstance(name, str) for name in value):
+        raise TenantError(f"{tenant_id} 지점의 practitioners는 원장 이름 목록이어야 합니다")
+    return list(value)
+
+
+def _parse_hours(tenant_id, value):
+    """{요일(월요일=0): [[시작, 끝], ...]} 형식의 진료 시간을 booking.CLINIC_HOURS 형식으로 바꿉니다."""
+    if value is None:
+        return None
+    error = TenantError(f"{tenant_id} 지점의 hours는 요일(0~6)별 [\"HH:MM\", \"HH:MM\"] 구간 목록이어야 합니다")
+    if not isinstance(value, dict):
+        raise error
+    hours = {}
+    for weekday, periods in value.items():
+        if weekday not in range(7) or not isinstance(periods, list):
+            raise error
+        hours[weekday] = []
+        for period in periods or []:
+            if (not isinstance(period, list) or len(period) != 2
+                    or not all(isinstance(t, str) and _VALID_TIME.match(t) for t in period)
+                    or period[0] >= period[1]):
+                raise error
+            hours[weekday].append(tuple(period))
+    return hours
+
+
+class TenantRegistry:
+    """tenants.yaml의 지점 목록을 읽고 요청의 지점을 정합니다."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._tenants = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        path = self.path or TENANTS_FILE
+        config = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                config = (yaml.safe_load(f) or {}).get('tenants') or {}
+        if not isinstance(config, dict):
+            raise TenantError(f"{path}의 tenants는 지점 ID를 키로 하는 매핑이어야 합니다")
+        tenants = {DEFAULT_TENANT_ID: Tenant(DEFAULT_TENANT_ID)}
+        for tenant_id, settings in config.items():
+            tenant_id = str(tenant_id)
+            settings = settings or {}
+            if not _VALID_ID.match(tenant_id):
+                raise TenantError(f"지점 ID는 영문 소문자, 숫자, '-', '_'만 사용할 수 있습니다: {tenant_id}")
+            default_root = '' if tenant_id == DEFAULT_TENANT_ID else os.path.join(TENANTS_DIR, tenant_id)
+            tenants[tenant_id] = Tenant(
+                tenant_id,
+                root=settings.get('root', default_root),
+                name=settings.get('name'),
+                hosts=settings.get('hosts') or (),
+                practitioners=_parse_practitioners(tenant_id, settings.get('practitioners')),
+                hours=_parse_hours(tenant_id, settings.get('hours'))
+            )
+        hosts = {}
+        for tenant in tenants.values():
+            for host in tenant.hosts:
+                if hosts.setdefault(host, tenant.id) != tenant.id:
+                    raise TenantError(f"호스트 {host}가 여러 지점에 지정되어 있습니다")
+        return tenants
+
+    def _all(self):
+        with self._lock:
+            if self._tenants is None:
+                self._tenants = self._load()
+            return self._tenants
+
+    def tenants(self):
+        """모든 지점 목록 (기본 지점 포함)"""
+        return list(self._all().values())
+
+    def get(self, tenant_id):
+        """ID의 지점을 반환합니다. 없으면 None을 반환합니다."""
+        return self._all().get(tenant_id)
+
+    def resolve(self, host=None, param=None):
+        """URL 파라미터, 호스트 이름 순으로 지점을 찾고, 없으면 기본 지점을 반환합니다."""
+        tenants = self._all()
+        if param and param in tenants:
+            return tenants[param]
+        if host:
+            host = host.split(':')[0].lower()
+            for tenant in tenants.values():
+                if host in tenant.hosts:
+                    return tenant
+        return tenants[DEFAULT_TENANT_ID]
+
+    def reload(self):
+        """다음 조회 시 tenants.yaml을 다시 읽게 합니다."""
+        with self._lock:
+            self._tenants = None
+
+
+# 프로세스 전체에서 공유하는 지점 목록
+registry = TenantRegistry()
+
+_current = contextvars.ContextVar('bluhill_tenant', default=None)
+
+
+def current():
+    """현재 지점을 반환합니다. 정하지 않았으면 BLUHILL_TENANT(기본값 default) 지점입니다."""
+    tenant = _current.get()
+    if tenant is not None:
+        return tenant
+    tenant_id = os.environ.get('BLUHILL_TENANT', DEFAULT_TENANT_ID)
+    tenant = registry.get(tenant_id)
+    if tenant is None:
+        raise TenantError(f"등록되지 않은 지점입니다: {tenant_id}")
+    return tenant
+
+
+def activate(tenant):
+    """현재 컨텍스트(Streamlit 실행 스레드 등)의 지점을 정합니다."""
+    _current.set(tenant)
+
+
+@contextmanager
+def activated(tenant):
+    """블록 안에서만 지점을 바꿉니다."""
+    token = _current.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current.reset(token)
+
+
+class TenantLocal:
+    """지점마다 따로 만드는 객체(캐시 등)의 프록시
+
+    속성 조회는 현재 지점의 객체로 전달하며, 객체는 그 지점에서 처음 사용할 때 factory()로
+    만듭니다(factory는 해당 지점이 활성화된 상태에서 호출됩니다). 속성 설정/삭제는 이미 만든
+    모든 지점의 객체와 이후에 만들 객체에 적용합니다 (변경 감시기가 모든 캐시의 verify를
+    바꾸는 경우 등).
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instances', {})
+        object.__setattr__(self, '_overrides', {})
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def instance_for(self, tenant=None):
+        """지점(기본값: 현재 지점)의 객체를 반환합니다."""
+        tenant = tenant or current()
+        with self._lock:
+            instance = self._instances.get(tenant.id)
+            if instance is None:
+                with activated(tenant):
+                    instance = self._factory()
+                for name, value in self._overrides.items():
+                    setattr(instance, name, value)
+                self._instances[tenant.id] = instance
+            return instance
+
+    def instances(self):
+        """지금까지 만든 {지점 ID: 객체}"""
+        with self._lock:
+            return dict(self._instances)
+
+    def __getattr__(self, name):
+        return getattr(self.instance_for(), name)
+
+    def __setattr__(self, name, value):
+        with self._lock:
+            self._overrides[name] = value
+            for instance in self._instances.values():
+                setattr(instance, name, value)
+
+    def __delattr__(self, name):
+        with self._lock:
+            self._overrides.pop(name, None)
+            for instance in self._instances.values():
+                try:
+                    delattr(instance, name)
+                except AttributeError:
+                    pass
@@ -88,3 +88,19 @@ def mock_session_state():
             self.user_name = None
 
     return SessionState()
+
+
+@pytest.fixture
+def temp_data_dir(tmp_path, monkeypatch):
+    """임시 작업 디렉토리에 data/ 디렉토리를 만들고 그 위치에서 테스트를 실행"""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    monkeypatch.chdir(tmp_path)
+    return data_dir
+
+
+@pytest.fixture(autouse=True)
+def session_secret(monkeypatch):
+    """세션 토큰 서명에 고정 비밀 키를 사용 (작업 디렉토리에 키 파일을 만들지 않도록)"""
+    monkeypatch.setenv('BLUHILL_SESSION_SECRET', 'test-session-secret')
+    return 'test-session-secret'
@@ -0,0 +1,185 @@
+"""
+첨부 사진 저장소 테스트
+"""
+import pytest
+import sys
+import os
+import io
+import hashlib
+
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_image(size=(1200, 800), color=(200, 30, 30), fmt='JPEG', mode='RGB'):
+    """테스트용 이미지 바이트를 만듭니다."""
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class _CountingReader(io.BytesIO):
+    """read() 호출 크기를 기록하는 파일 객체"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super().read(size)
+
+
+class TestStore:
+    """업로드 저장 테스트"""
+
+    def test_store_returns_content_hash(self, temp_data_dir):
+        """저장된 파일의 경로가 내용의 SHA-256 해시로 정해지는지 확인"""
+        from attachments import AttachmentStore
+
+        data = make_image()
+        store = AttachmentStore()
+        digest = store.store(io.BytesIO(data))
+
+        assert digest == hashlib.sha256(data).hexdigest()
+        path = store.object_path(digest)
+        assert os.path.abspath(path) == str(temp_data_dir / "attachments" / "objects" / digest[:2] / digest)
+        with open(path, 'rb') as f:
+            assert f.read() == data
+
+    def test_store_reads_in_chunks(self, temp_data_dir):
+        """업로드 파일을 한 번에 읽지 않고 청크 단위로 읽는지 확인"""
+        from attachments import AttachmentStore
+
+        reader = _CountingReader(make_image(size=(2000, 2000), fmt='PNG'))
+        AttachmentStore().store(reader, chunk_size=1024)
+
+        assert reader.read_sizes
+        assert all(size == 1024 for size in reader.read_sizes)
+
+    def test_identical_files_deduplicated(self, temp_data_dir):
+        """같은 내용의 파일은 한 번만 저장되는지 확인"""
+        from attachments import AttachmentStore
+
+        data = make_image()
+        store = AttachmentStore()
+
+        first = store.store(io.BytesIO(data))
+        second = store.store(io.BytesIO(data))
+
+        assert first == second
+        objects = [
+            name for _, _, files in os.walk(temp_data_dir / "attachments" / "objects") for name in files
+        ]
+        assert objects == [first]
+        # 임시 파일이 남지 않아야 함
+        assert os.listdir(temp_data_dir / "attachments" / "tmp") == []
+
+    def test_non_image_rejected(self, temp_data_dir):
+        """이미지가 아닌 파일은 거부되고 저장되지 않는지 확인"""
+        from attachments import AttachmentStore, AttachmentError
+
+        store = AttachmentStore()
+
+        with pytest.raises(AttachmentError):
+            store.store(io.BytesIO(b"<script>alert(1)</script>"))
+        assert not any(files for _, _, files in os.walk(temp_data_dir / "attachments" / "objects"))
+        assert os.listdir(temp_data_dir / "attachments" / "tmp") == []
+
+    def test_size_limit(self, temp_data_dir, monkeypatch):
+        """크기 제한을 넘는 파일은 거부되는지 확인"""
+        import attachments
+
+        monkeypatch.setattr(attachments, 'MAX_ATTACHMENT_BYTES', 100)
+
+        with pytest.raises(attachments.AttachmentError):
+            attachments.AttachmentStore().store(io.BytesIO(make_image()))
+        assert os.listdir(temp_data_dir / "attachments" / "tmp") == []
+
+    def test_invalid_reference_rejected(self, temp_data_dir):
+        """해시 형식이 아닌 참조로 경로를 만들 수 없는지 확인"""
+        from attachments import AttachmentStore, AttachmentError
+
+        store = AttachmentStore()
+
+        with pytest.raises(AttachmentError):
+            store.object_path("../../users.yaml")
+        with pytest.raises(AttachmentError):
+            store.thumbnail_path("abc")
+
+
+class TestThumbnail:
+    """축소 이미지 테스트"""
+
+    def test_thumbnail_downscaled(self, temp_data_dir):
+        """축소 이미지가 최대 크기 이하로 비율을 유지하여 만들어지는지 확인"""
+        from attachments import AttachmentStore, THUMBNAIL_SIZE
+
+        store = AttachmentStore()
+        digest = store.store(io.BytesIO(make_image(size=(1200, 800))))
+
+        with Image.open(store.thumbnail_path(digest)) as thumb:
+            assert thumb.format == 'JPEG'
+            assert thumb.size == (THUMBNAIL_SIZE, THUMBNAIL_SIZE * 800 // 1200)
+
+    def test_thumbnail_cached(self, temp_data_dir, mocker):
+        """축소 이미지는 한 번만 만들어지고 이후에는 캐시를 사용하는지 확인"""
+        import attachments
+
+        store = attachments.AttachmentStore()
+        digest = store.store(io.BytesIO(make_image()))
+        first = store.thumbnail_path(digest)
+
+        spy = mocker.spy(attachments.Image, 'open')
+        second = store.thumbnail_path(digest)
+
+        assert first == second
+        spy.assert_not_called()
+
+    def test_transparent_png_thumbnail(self, temp_data_dir):
+        """투명 배경 PNG도 JPEG 축소 이미지로 변환되는지 확인"""
+        from attachments import AttachmentStore
+
+        store = AttachmentStore()
+        digest = store.store(io.BytesIO(make_image(fmt='PNG', mode='RGBA', color=(0, 0, 255, 0))))
+
+        with Image.open(store.thumbnail_path(digest)) as thumb:
+            assert thumb.mode == 'RGB'
+            assert thumb.getpixel((0, 0)) == pytest.approx((255, 255, 255), abs=2)
+
+
+class TestRecordReferences:
+    """레코드의 첨부 파일 참조 테스트"""
+
+    def test_review_round_trip(self):
+        """후기 레코드가 첨부 해시 목록을 저장/복원하는지 확인"""
+        from records import Review
+
+        review = Review.from_dict({
+            'id': 'r1',
+            'author': 'user1',
+            'author_name': '홍길동',
+            'title': '후기',
+            'content': '내용',
+            'attachments': ['a' * 64],
+            'created_at': '2024-05-06 10:00:00'
+        })
+
+        assert review.attachments == ['a' * 64]
+        assert review.to_dict()['attachments'] == ['a' * 64]
+
+    def test_legacy_record_without_attachments(self):
+        """첨부 필드가 없는 이전 데이터도 그대로 로드되는지 확인"""
+        from records import Inquiry
+
+        inquiry = Inquiry.from_dict({
+            'id': 'q1',
+            'author': 'user1',
+            'author_name': '홍길동',
+            'title': '문의',
+            'content': '내용',
+            'created_at': '2024-05-06 10:00:00'
+        })
+
+        assert inquiry.attachments is None
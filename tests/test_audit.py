@@ -0,0 +1,169 @@
+"""
+관리자 변경 감사 로그 테스트
+"""
+import pytest
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_inquiry(answer=None):
+    from records import Inquiry
+
+    return Inquiry.from_dict({
+        'id': 'inq-1',
+        'author': 'user1',
+        'author_name': '사용자',
+        'title': '문의',
+        'content': '내용',
+        'answered': answer is not None,
+        'answer': answer,
+        'created_at': '2024-05-06 10:00:00'
+    })
+
+
+@pytest.fixture
+def trail(tmp_path):
+    from audit import AuditLog
+
+    log = AuditLog(root=str(tmp_path / 'audit'))
+    yield log
+    log.flush()
+
+
+class TestRecord:
+    """기록 테스트"""
+
+    def test_history_of_edit(self, trail):
+        """답변 수정 이벤트에 바뀐 필드의 변경 전/후가 남는지 확인"""
+        trail.record('admin', '관리자', 'edit_answer', 'inquiries.yaml', 'inq-1',
+                     make_inquiry("첫 답변"), make_inquiry("고친 답변"))
+        trail.flush()
+
+        events = trail.history('inq-1')
+
+        assert len(events) == 1
+        assert events[0]['actor'] == 'admin'
+        assert events[0]['before'] == {'answer': "첫 답변"}
+        assert events[0]['after'] == {'answer': "고친 답변"}
+
+    def test_delete_keeps_whole_record(self, trail):
+        """삭제 이벤트에는 지운 레코드 전체가 남는지 확인"""
+        trail.record('admin', '관리자', 'delete_column', 'columns.yaml', 'inq-1', before=make_inquiry())
+        trail.flush()
+
+        event = trail.history('inq-1')[0]
+
+        assert event['before']['content'] == '내용'
+        assert event['after'] is None
+
+    def test_record_does_not_wait_for_disk(self, trail, mocker):
+        """기록 요청은 파일 쓰기를 기다리지 않는지 확인"""
+        release = threading.Event()
+        written = threading.Event()
+        real_write = trail.write
+
+        def slow_write(events):
+            release.wait(5)
+            real_write(events)
+            written.set()
+
+        mocker.patch.object(trail, 'write', side_effect=slow_write)
+
+        trail.record('admin', '관리자', 'answer', 'inquiries.yaml', 'inq-1', after=make_inquiry("답변"))
+
+        assert not written.is_set()
+        release.set()
+        trail.flush()
+        assert len(trail.history('inq-1')) == 1
+
+    def test_concurrent_records(self, trail):
+        """여러 스레드가 동시에 기록해도 모든 이벤트가 한 번씩 남는지 확인"""
+        def worker(n):
+            for i in range(25):
+                trail.record('admin', '관리자', 'answer', 'inquiries.yaml', f'rec-{i % 5}', after={'n': n, 'i': i})
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        trail.flush()
+
+        assert sum(len(trail.history(f'rec-{i}')) for i in range(5)) == 100
+
+
+class TestSegments:
+    """세그먼트 교체와 인덱스 테스트"""
+
+    def test_rotation_keeps_history(self, tmp_path):
+        """세그먼트가 교체되어도 이전 세그먼트는 그대로 두고 이력을 모두 찾는지 확인"""
+        from audit import AuditLog
+
+        trail = AuditLog(root=str(tmp_path / 'audit'), segment_max_bytes=600)
+        trail.write([{
+            'at': '2024-05-06 10:00:00', 'actor': 'admin', 'actor_name': '관리자', 'action': 'answer',
+            'dataset': 'inquiries.yaml', 'record_id': f'rec-{i % 3}', 'before': None, 'after': {'i': i}
+        } for i in range(30)])
+        first = (tmp_path / 'audit' / 'audit-000001.log').read_bytes()
+
+        trail.write([{
+            'at': '2024-05-06 11:00:00', 'actor': 'admin', 'actor_name': '관리자', 'action': 'edit_answer',
+            'dataset': 'inquiries.yaml', 'record_id': 'rec-0', 'before': None, 'after': {'i': 30}
+        }])
+
+        assert len(trail._segments()) > 1
+        assert (tmp_path / 'audit' / 'audit-000001.log').read_bytes() == first
+        assert [e['after']['i'] for e in trail.history('rec-0')] == list(range(0, 30, 3)) + [30]
+
+    def test_lookup_reads_only_record_lines(self, trail, mocker):
+        """이력 조회가 로그 전체가 아닌 해당 레코드의 줄만 읽는지 확인"""
+        import audit
+
+        trail.write([{'record_id': f'other-{i}', 'after': {'i': i}} for i in range(200)])
+        trail.write([{'record_id': 'target', 'after': {'i': 1}}, {'record_id': 'target', 'after': {'i': 2}}])
+        spy = mocker.spy(audit.json, 'loads')
+
+        events = trail.history('target')
+
+        assert [e['after']['i'] for e in events] == [1, 2]
+        assert spy.call_count == 2
+
+    def test_truncated_index_line_ignored(self, trail):
+        """추가 도중 중단되어 끝이 잘린 인덱스 줄은 건너뛰는지 확인"""
+        trail.write([{'record_id': 'rec', 'after': {'i': 1}}])
+        with open(trail._index_path('rec'), 'a', encoding='ascii') as f:
+            f.write("1 99")
+
+        assert len(trail.history('rec')) == 1
+
+    def test_rebuild_index(self, trail):
+        """인덱스를 잃어도 세그먼트로부터 다시 만들 수 있는지 확인"""
+        import shutil
+
+        trail.write([{'record_id': f'rec-{i % 2}', 'after': {'i': i}} for i in range(6)])
+        shutil.rmtree(os.path.join(trail.root, 'index'))
+        assert trail.history('rec-1') == []
+
+        assert trail.rebuild_index() == 6
+        assert [e['after']['i'] for e in trail.history('rec-1')] == [1, 3, 5]
+
+
+class TestAppAudit:
+    """앱의 감사 로그 기록 테스트"""
+
+    def test_records_current_admin(self, mocker, mock_session_state):
+        """로그인한 관리자를 변경자로 기록하는지 확인"""
+        import app
+
+        mock_session_state.username = 'admin'
+        mock_session_state.user_name = '관리자'
+        mocker.patch('app.st.session_state', mock_session_state)
+        record = mocker.patch('app.audit.trail.record')
+
+        app.audit_admin_change('delete_column', 'columns.yaml', 'col-1', before={'id': 'col-1'})
+
+        record.assert_called_once_with('admin', '관리자', 'delete_column', 'columns.yaml', 'col-1',
+                                       {'id': 'col-1'}, None)
@@ -132,36 +132,46 @@ class TestLogout:
 class TestLoadUsers:
     """사용자 데이터 로딩 테스트"""
 
-    def test_load_users_success(self, mocker, temp_users_yaml, sample_users):
+    def test_load_users_success(self, monkeypatch, temp_users_yaml, sample_users):
         """users.yaml 파일 정상 로드"""
         import app
 
-        # open 함수를 모킹하여 임시 파일 사용
-        original_open = open
+        # 임시 users.yaml이 있는 디렉토리에서 실행
+        monkeypatch.chdir(temp_users_yaml.parent)
 
-        def mock_open(file, *args, **kwargs):
-            if 'users.yaml' in str(file):
-                return original_open(temp_users_yaml, *args, **kwargs)
-            return original_open(file, *args, **kwargs)
-
-        mocker.patch('builtins.open', side_effect=mock_open)
-
-        # st.cache_resource 데코레이터를 우회하기 위해 함수 직접 호출
-        users = app.load_users.__wrapped__()
+        users = app.load_users()
 
         assert users == sample_users
         assert 'testuser' in users
         assert users['testuser']['role'] == 'user'
 
-    def test_load_users_file_not_found(self, mocker):
+    def test_load_users_cached_until_changed(self, mocker, monkeypatch, temp_users_yaml, sample_users):
+        """파일이 바뀌지 않으면 다시 파싱하지 않고, 바뀌면 다시 읽음"""
+        import app
+        import yaml
+
+        monkeypatch.chdir(temp_users_yaml.parent)
+        app.load_users()
+        spy = mocker.spy(app.dataformat, 'safe_load')
+
+        app.load_users()
+        assert spy.call_count == 0
+
+        sample_users['newuser'] = {'password': 'newpass', 'role': 'user', 'name': 'New User'}
+        with open(temp_users_yaml, 'w', encoding='utf-8') as f:
+            yaml.dump({'users': sample_users}, f)
+
+        assert 'newuser' in app.load_users()
+
+    def test_load_users_file_not_found(self, mocker, monkeypatch, tmp_path):
         """users.yaml 파일이 없을 때"""
         import app
 
-        # 파일이 없는 경우를 시뮬레이션
-        mocker.patch('builtins.open', side_effect=FileNotFoundError)
+        # users.yaml이 없는 디렉토리에서 실행
+        monkeypatch.chdir(tmp_path)
         mock_error = mocker.patch('app.st.error')
 
-        users = app.load_users.__wrapped__()
+        users = app.load_users()
 
         assert users == {}
         mock_error.assert_called_once()
@@ -0,0 +1,218 @@
+"""
+진료 예약 엔진 테스트
+"""
+import pytest
+import sys
+import os
+import threading
+from datetime import datetime, date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 2024-05-06은 월요일
+MONDAY = date(2024, 5, 6)
+NOW = datetime(2024, 5, 6, 8, 0)
+
+
+class TestSlotGeneration:
+    """진료 시간으로부터 슬롯 생성 테스트"""
+
+    def test_weekday_slots_skip_lunch(self):
+        """평일은 점심시간(12:30~14:00)을 제외하고 30분 단위로 슬롯이 생성되는지 확인"""
+        from booking import BookingEngine
+
+        slots = BookingEngine().day_slots(MONDAY)
+
+        assert slots[0] == "09:00"
+        assert slots[-1] == "17:30"
+        assert "12:00" in slots
+        assert "12:30" not in slots
+        assert "13:30" not in slots
+        assert "14:00" in slots
+        assert len(slots) == 15
+
+    def test_saturday_and_sunday(self):
+        """토요일은 09:00~14:00, 일요일은 휴진인지 확인"""
+        from booking import BookingEngine
+
+        engine = BookingEngine()
+
+        assert engine.day_slots(date(2024, 5, 11)) == [
+            "09:00", "09:30", "10:00", "10:30", "11:00",
+            "11:30", "12:00", "12:30", "13:00", "13:30"
+        ]
+        assert engine.day_slots(date(2024, 5, 12)) == []
+
+
+class TestBooking:
+    """예약/취소 테스트"""
+
+    def test_book_removes_slot_from_free_slots(self, temp_data_dir):
+        """예약한 슬롯이 빈 슬롯 목록에서 빠지는지 확인"""
+        from booking import BookingEngine
+
+        engine = BookingEngine()
+        engine.book("김한의 원장", MONDAY, "09:00", "user1", "홍길동", now=NOW)
+
+        free = engine.free_slots("김한의 원장", MONDAY, now=NOW)
+        assert "09:00" not in free
+        assert "09:30" in free
+        # 다른 원장의 슬롯에는 영향이 없어야 함
+        assert "09:00" in engine.free_slots("이한의 원장", MONDAY, now=NOW)
+
+    def test_double_booking_rejected(self, temp_data_dir):
+        """이미 예약된 슬롯을 다시 예약하면 예외가 발생하는지 확인"""
+        from booking import BookingEngine, SlotUnavailableError
+
+        engine = BookingEngine()
+        engine.book("김한의 원장", MONDAY, "10:00", "user1", "홍길동", now=NOW)
+
+        with pytest.raises(SlotUnavailableError):
+            engine.book("김한의 원장", MONDAY, "10:00", "user2", "김철수", now=NOW)
+
+    def test_invalid_slot_rejected(self, temp_data_dir):
+        """진료 시간이 아니거나 지난 슬롯, 알 수 없는 원장은 예약할 수 없는지 확인"""
+        from booking import BookingEngine, BookingError, SlotUnavailableError
+
+        engine = BookingEngine()
+
+        with pytest.raises(SlotUnavailableError):
+            engine.book("김한의 원장", MONDAY, "13:00", "user1", "홍길동", now=NOW)
+        with pytest.raises(SlotUnavailableError):
+            engine.book("김한의 원장", date(2024, 5, 12), "10:00", "user1", "홍길동", now=NOW)
+        with pytest.raises(SlotUnavailableError):
+            engine.book("김한의 원장", MONDAY, "09:00", "user1", "홍길동", now=datetime(2024, 5, 6, 9, 10))
+        with pytest.raises(BookingError):
+            engine.book("박한의 원장", MONDAY, "09:00", "user1", "홍길동", now=NOW)
+
+    def test_past_date_rejected(self, temp_data_dir):
+        """지난 날짜는 예약할 수 없고 빈 슬롯으로도 표시되지 않는지 확인"""
+        from booking import BookingEngine, SlotUnavailableError
+
+        engine = BookingEngine()
+        next_week = datetime(2024, 5, 13, 8, 0)
+
+        with pytest.raises(SlotUnavailableError):
+            engine.book("김한의 원장", MONDAY, "10:00", "user1", "홍길동", now=next_week)
+        assert engine.free_slots("김한의 원장", MONDAY, now=next_week) == []
+        assert engine.bookings_for_day(MONDAY) == []
+
+    def test_cancel_frees_slot(self, temp_data_dir):
+        """예약을 취소하면 슬롯이 다시 비고, 다른 사용자는 취소할 수 없는지 확인"""
+        from booking import BookingEngine
+
+        engine = BookingEngine()
+        item = engine.book("김한의 원장", MONDAY, "11:00", "user1", "홍길동", now=NOW)
+
+        assert engine.cancel(item['id'], "user2") is False
+        assert "11:00" not in engine.free_slots("김한의 원장", MONDAY, now=NOW)
+
+        assert engine.cancel(item['id'], "user1") is True
+        assert "11:00" in engine.free_slots("김한의 원장", MONDAY, now=NOW)
+        assert engine.bookings_for_day(MONDAY) == []
+        assert engine.bookings_for_user("user1", now=NOW) == []
+        # 이미 취소된 예약은 다시 취소할 수 없음
+        assert engine.cancel(item['id'], "user1") is False
+
+
+class TestNextFreeSlots:
+    """가장 빠른 빈 슬롯 조회 테스트"""
+
+    def test_skips_past_and_booked_slots(self, temp_data_dir):
+        """지난 슬롯과 예약된 슬롯을 건너뛰는지 확인"""
+        from booking import BookingEngine
+
+        engine = BookingEngine()
+        engine.book("김한의 원장", MONDAY, "10:00", "user1", "홍길동", now=NOW)
+
+        result = engine.next_free_slots("김한의 원장", 3, now=datetime(2024, 5, 6, 9, 15))
+
+        assert result == [(MONDAY, "09:30"), (MONDAY, "10:30"), (MONDAY, "11:00")]
+
+    def test_spans_days_and_skips_sunday(self, temp_data_dir):
+        """토요일 진료 종료 후에는 일요일을 건너뛰고 월요일 슬롯을 반환하는지 확인"""
+        from booking import BookingEngine
+
+        engine = BookingEngine()
+
+        result = engine.next_free_slots("이한의 원장", 2, now=datetime(2024, 5, 11, 15, 0))
+
+        assert result == [(date(2024, 5, 13), "09:00"), (date(2024, 5, 13), "09:30")]
+
+    def test_fully_booked_day(self, temp_data_dir):
+        """하루가 모두 예약되면 다음 진료일로 넘어가는지 확인"""
+        from booking import BookingEngine
+
+        engine = BookingEngine()
+        for slot in engine.day_slots(MONDAY):
+            engine.book("김한의 원장", MONDAY, slot, "user1", "홍길동", now=NOW)
+
+        assert engine.free_slots("김한의 원장", MONDAY, now=NOW) == []
+        assert engine.next_free_slots("김한의 원장", 1, now=NOW) == [(date(2024, 5, 7), "09:00")]
+
+
+class TestPersistence:
+    """이벤트 로그 저장 및 다른 프로세스와의 공유 테스트"""
+
+    def test_new_engine_replays_log(self, temp_data_dir):
+        """새 엔진이 이벤트 로그로부터 예약/취소 상태를 복원하는지 확인"""
+        from booking import BookingEngine
+
+        first = BookingEngine()
+        kept = first.book("김한의 원장", MONDAY, "09:00", "user1", "홍길동", now=NOW)
+        cancelled = first.book("김한의 원장", MONDAY, "09:30", "user1", "홍길동", now=NOW)
+        first.cancel(cancelled['id'])
+
+        second = BookingEngine()
+
+        assert [b['id'] for b in second.bookings_for_user("user1", now=NOW)] == [kept['id']]
+        assert "09:30" in second.free_slots("김한의 원장", MONDAY, now=NOW)
+        assert (temp_data_dir / "bookings.jsonl").exists()
+
+    def test_sees_bookings_from_other_engine(self, temp_data_dir):
+        """다른 엔진(다른 프로세스)이 추가한 예약을 반영하여 중복 예약을 막는지 확인"""
+        from booking import BookingEngine, SlotUnavailableError
+
+        first = BookingEngine()
+        second = BookingEngine()
+        # second가 먼저 로그를 읽어 둔 상태
+        assert "14:00" in second.free_slots("이한의 원장", MONDAY, now=NOW)
+
+        first.book("이한의 원장", MONDAY, "14:00", "user1", "홍길동", now=NOW)
+
+        with pytest.raises(SlotUnavailableError):
+            second.book("이한의 원장", MONDAY, "14:00", "user2", "김철수", now=NOW)
+
+    def test_partial_line_is_ignored(self, temp_data_dir):
+        """쓰는 중인 마지막 줄은 완성될 때까지 반영하지 않는지 확인"""
+        from booking import BookingEngine
+
+        engine = BookingEngine()
+        engine.book("김한의 원장", MONDAY, "09:00", "user1", "홍길동", now=NOW)
+        with open(temp_data_dir / "bookings.jsonl", 'a', encoding='utf-8') as f:
+            f.write('{"op": "book", "id": "x", "practitioner": "김한의 원장", ')
+
+        assert "09:30" in BookingEngine().free_slots("김한의 원장", MONDAY, now=NOW)
+
+    def test_concurrent_booking_single_winner(self, temp_data_dir):
+        """여러 스레드/엔진이 같은 슬롯을 동시에 예약해도 한 건만 성공하는지 확인"""
+        from booking import BookingEngine, SlotUnavailableError
+
+        engines = [BookingEngine() for _ in range(8)]
+        results = []
+
+        def attempt(engine, i):
+            try:
+                engine.book("김한의 원장", MONDAY, "15:00", f"user{i}", "사용자", now=NOW)
+                results.append(True)
+            except SlotUnavailableError:
+                results.append(False)
+
+        threads = [threading.Thread(target=attempt, args=(e, i)) for i, e in enumerate(engines)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results.count(True) == 1
+        assert len(BookingEngine().bookings_for_day(MONDAY)) == 1
@@ -0,0 +1,175 @@
+"""
+데이터 파일 직렬화(YAML C 바인딩, 바이너리 형식) 테스트
+"""
+import pytest
+import sys
+import os
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_inquiry(inquiry_id, content='내용'):
+    from records import Inquiry
+
+    return Inquiry(id=inquiry_id, author='user1', author_name='User One', title='문의', content=content,
+                   is_private=False, answered=False, answer=None, created_ts=1714953600)
+
+
+# libyaml과 순수 Python의 출력이 갈리기 쉬운 문자열 (이모지, 역슬래시, 제어 문자가 든 긴 줄 등)
+TRICKY_CONTENTS = [
+    "평범한 한글 내용입니다\n둘째 줄",
+    "이모지 😀 포함",
+    "C:\\Users\\환자\\사진.jpg",
+    "제어\x01문자와 긴 줄 " + "가나다 word " * 20,
+    "따옴표 \"인용\"과 'single'",
+    "  앞 공백과 끝 공백  \n다음 줄 ",
+    "",
+]
+
+
+class TestYAML:
+    """YAML 읽기/쓰기 테스트"""
+
+    def test_output_matches_pure_python(self):
+        """C 바인딩을 쓰더라도 순수 Python SafeDumper와 같은 텍스트를 쓰는지 확인"""
+        import dataformat
+
+        items = [make_inquiry(f"i{n}", content).to_dict() for n, content in enumerate(TRICKY_CONTENTS)]
+        data = {'inquiries': items}
+        expected = yaml.dump(data, Dumper=yaml.SafeDumper, allow_unicode=True, default_flow_style=False)
+
+        assert dataformat.dump(data) == expected
+        assert dataformat.dump({'inquiries': []}) == "inquiries: []\n"
+        assert dataformat.safe_load(expected) == data
+
+    def test_fallback_without_libyaml(self, mocker):
+        """libyaml이 없을 때(순수 Python 대체)도 같은 텍스트를 쓰는지 확인"""
+        import dataformat
+
+        data = {'reviews': [make_inquiry('a', "이모지 😀").to_dict()]}
+        expected = dataformat.dump(data)
+        mocker.patch('dataformat.Loader', yaml.SafeLoader)
+        mocker.patch('dataformat.Dumper', yaml.SafeDumper)
+
+        assert dataformat.dump(data) == expected
+        assert dataformat.safe_load(expected) == data
+
+
+    def test_existing_file_unchanged_on_save(self, temp_data_dir):
+        """이전 버전이 yaml.dump 기본 설정으로 쓴 파일을 읽어 다시 저장해도 내용이 같은지 확인"""
+        import datastore
+
+        items = [{
+            'id': 'a', 'author': 'user1', 'author_name': 'User One', 'title': '문의', 'content': '내용',
+            'is_private': False, 'answered': True, 'answer': '답변', 'created_at': '2024-05-06 10:00:00'
+        }]
+        path = temp_data_dir / "inquiries.yaml"
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.dump({'inquiries': items}, f, allow_unicode=True, default_flow_style=False)
+        original = path.read_bytes()
+
+        store = datastore.DataStore()
+        store.save('inquiries.yaml', store.load('inquiries.yaml')[0])
+
+        assert path.read_bytes() == original
+
+
+class TestBinary:
+    """바이너리 형식 테스트"""
+
+    def test_store_detects_format(self, temp_data_dir, mocker):
+        """바이너리로 저장한 파일을 자동으로 인식해 읽고, 설정을 바꾸면 YAML로 다시 쓰는지 확인"""
+        import datastore
+        import dataformat
+
+        mocker.patch('dataformat.DATA_FORMAT', 'binary')
+        store = datastore.DataStore()
+        records = [make_inquiry(f"i{n}", content) for n, content in enumerate(TRICKY_CONTENTS)]
+        store.save('inquiries.yaml', records)
+
+        raw = (temp_data_dir / "inquiries.yaml").read_bytes()
+        assert raw.startswith(dataformat.MAGIC)
+        assert datastore.DataStore().load('inquiries.yaml') == (records, 0)
+
+        mocker.patch('dataformat.DATA_FORMAT', 'yaml')
+        store.save('inquiries.yaml', records)
+        assert yaml.safe_load((temp_data_dir / "inquiries.yaml").read_text(encoding='utf-8'))['inquiries'][1][
+            'content'] == "이모지 😀 포함"
+        assert datastore.DataStore().load('inquiries.yaml') == (records, 0)
+
+    def test_unmarshallable_value_saved_as_yaml(self, temp_data_dir, mocker):
+        """marshal로 쓸 수 없는 값(YAML에서 읽힌 일시)이 있으면 저장에 실패하지 않고 YAML로 쓰는지 확인"""
+        import datastore
+        import dataformat
+        from datetime import datetime
+
+        mocker.patch('dataformat.DATA_FORMAT', 'binary')
+        record = make_inquiry('a')
+        record.extra = {'checked_at': datetime(2024, 5, 6, 10, 0)}
+        store = datastore.DataStore()
+        store.save('inquiries.yaml', [record])
+
+        path = str(temp_data_dir / "inquiries.yaml")
+        assert not (temp_data_dir / "inquiries.yaml").read_bytes().startswith(dataformat.MAGIC)
+        assert datastore.DataStore().load('inquiries.yaml') == ([record], 0)
+        with pytest.raises(dataformat.DataFormatError):
+            dataformat.convert_file(path, 'binary')
+        assert datastore.DataStore().load('inquiries.yaml') == ([record], 0)
+
+    @pytest.mark.parametrize('damage', [
+        lambda blob: blob[:-10],
+        lambda blob: blob[:8] + b'\x09' + blob[9:],
+    ])
+    def test_damaged_file(self, damage):
+        """잘린 파일이나 모르는 버전은 DataFormatError인지 확인"""
+        import dataformat
+
+        blob = dataformat.encode_binary({'reviews': [make_inquiry('a').to_dict()]})
+
+        with pytest.raises(dataformat.DataFormatError):
+            dataformat.decode_binary(damage(blob))
+
+    def test_convert_and_show(self, temp_data_dir, capsys):
+        """바이너리로 변환했다가 YAML로 되돌리면 원래 파일과 같은지 확인"""
+        import datastore
+        import dataformat
+
+        datastore.DataStore().save('inquiries.yaml', [make_inquiry('a', "이모지 😀"), make_inquiry('b')])
+        path = str(temp_data_dir / "inquiries.yaml")
+        original = (temp_data_dir / "inquiries.yaml").read_bytes()
+
+        assert dataformat.main(['convert', '--to', 'binary']) == 0
+        assert (temp_data_dir / "inquiries.yaml").read_bytes().startswith(dataformat.MAGIC)
+        capsys.readouterr()
+        assert dataformat.main(['show', path]) == 0
+        assert capsys.readouterr().out.encode('utf-8') == original
+
+        assert dataformat.convert_file(path, 'yaml') is True
+        assert dataformat.convert_file(path, 'yaml') is False
+        assert (temp_data_dir / "inquiries.yaml").read_bytes() == original
+
+    def test_transfer_and_snapshot(self, temp_data_dir, tmp_path, mocker):
+        """내보내기와 스냅샷이 바이너리 데이터 파일의 레코드를 읽는지 확인"""
+        import io
+        import json
+        import datastore
+        import snapshot
+        import transfer
+
+        mocker.patch('dataformat.DATA_FORMAT', 'binary')
+        datastore.store.invalidate()
+        datastore.store.save('inquiries.yaml', [make_inquiry('a'), make_inquiry('b')])
+
+        out = io.StringIO()
+        transfer.export_records('inquiries', out)
+        assert [json.loads(line)['id'] for line in out.getvalue().splitlines()] == ['a', 'b']
+
+        snapshots = snapshot.SnapshotStore(str(tmp_path / "snapshots"))
+        manifest = snapshots.create()
+        datastore.store.save('inquiries.yaml', [])
+        snapshots.restore(manifest['id'])
+
+        # 복원한 파일은 YAML로 씁니다
+        assert [r.id for r in datastore.store.load('inquiries.yaml')[0]] == ['a', 'b']
+        assert (temp_data_dir / "inquiries.yaml").read_text(encoding='utf-8').startswith("inquiries:\n")
@@ -0,0 +1,269 @@
+"""
+데이터 캐시 및 작성일시 인덱스 테스트
+"""
+import pytest
+import sys
+import os
+import yaml
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_review(review_id, created_at, category=None):
+    """테스트용 후기 레코드"""
+    import records
+
+    return records.Review.from_dict({
+        'id': review_id,
+        'author': 'user1',
+        'author_name': 'User One',
+        'title': f'후기 {review_id}',
+        'content': '내용',
+        'category': category,
+        'created_at': created_at
+    })
+
+
+@pytest.fixture
+def store(temp_data_dir):
+    """임시 data/ 디렉토리를 사용하는 새 저장소"""
+    import datastore
+
+    return datastore.DataStore()
+
+
+class TestTimestampIndex:
+    """작성일시 인덱스 테스트"""
+
+    def test_sorted_by_created(self):
+        """작성일시 오름차순 정렬"""
+        import datastore
+
+        index = datastore.TimestampIndex([
+            make_review('b', '2024-02-01 00:00:00'),
+            make_review('a', '2024-01-01 00:00:00'),
+        ])
+
+        assert [r.id for r in index.range()] == ['a', 'b']
+
+    def test_half_open_range(self):
+        """시작 시각은 포함, 종료 시각은 제외"""
+        import datastore
+        import records
+
+        index = datastore.TimestampIndex([
+            make_review('a', '2024-01-01 00:00:00'),
+            make_review('b', '2024-01-02 00:00:00'),
+            make_review('c', '2024-01-03 00:00:00'),
+        ])
+
+        result = index.range(
+            records.parse_timestamp('2024-01-02 00:00:00'),
+            records.parse_timestamp('2024-01-03 00:00:00')
+        )
+        assert [r.id for r in result] == ['b']
+
+    def test_open_ended_range(self):
+        """한쪽 경계만 지정"""
+        import datastore
+        import records
+
+        index = datastore.TimestampIndex([
+            make_review('a', '2024-01-01 00:00:00'),
+            make_review('b', '2024-01-02 00:00:00'),
+        ])
+        boundary = records.parse_timestamp('2024-01-02 00:00:00')
+
+        assert [r.id for r in index.range(start_ts=boundary)] == ['b']
+        assert [r.id for r in index.range(end_ts=boundary)] == ['a']
+
+
+class TestDataStoreCache:
+    """파일 캐시 테스트"""
+
+    def test_missing_file(self, store):
+        """파일이 없으면 빈 목록"""
+        assert store.load('reviews.yaml') == ([], 0)
+
+    def test_unchanged_file_not_reparsed(self, mocker, store):
+        """파일이 바뀌지 않았으면 다시 파싱하지 않음"""
+        import datastore
+
+        store.save('reviews.yaml', [make_review('a', '2024-01-01 00:00:00')])
+        store.invalidate()
+        spy = mocker.spy(datastore.dataformat, 'load_file')
+
+        store.load('reviews.yaml')
+        store.load('reviews.yaml')
+        store.query('reviews.yaml')
+
+        assert spy.call_count == 1
+
+    def test_external_change_reloaded(self, store, temp_data_dir):
+        """다른 프로세스가 파일을 바꾸면 다시 읽음"""
+        store.save('reviews.yaml', [make_review('a', '2024-01-01 00:00:00')])
+
+        with open(temp_data_dir / 'reviews.yaml', 'w', encoding='utf-8') as f:
+            yaml.dump({'reviews': [
+                make_review('a', '2024-01-01 00:00:00').to_dict(),
+                make_review('b', '2024-01-02 00:00:00').to_dict(),
+            ]}, f, allow_unicode=True)
+
+        records, _ = store.load('reviews.yaml')
+        assert [r.id for r in records] == ['a', 'b']
+
+    def test_load_returns_copy(self, store):
+        """반환된 목록을 수정해도 캐시는 바뀌지 않음"""
+        store.save('reviews.yaml', [make_review('a', '2024-01-01 00:00:00')])
+
+        records, _ = store.load('reviews.yaml')
+        records.append(make_review('b', '2024-01-02 00:00:00'))
+
+        assert len(store.load('reviews.yaml')[0]) == 1
+
+    def test_index_rebuilt_after_save(self, store):
+        """저장 후에는 새 인덱스 사용"""
+        store.save('reviews.yaml', [make_review('a', '2024-01-01 00:00:00')])
+        assert len(store.query('reviews.yaml')) == 1
+
+        records, _ = store.load('reviews.yaml')
+        records.append(make_review('b', '2024-01-02 00:00:00'))
+        store.save('reviews.yaml', records)
+
+        assert [r.id for r in store.query('reviews.yaml')] == ['a', 'b']
+
+    def test_group_index(self, store):
+        """필드 값별 인덱스는 값이 없는 레코드를 빼고, 저장 후 다시 만듦"""
+        store.save('reviews.yaml', [
+            make_review('a', '2024-01-02 00:00:00', '추나요법'),
+            make_review('b', '2024-01-01 00:00:00', '추나요법'),
+            make_review('c', '2024-01-03 00:00:00'),
+        ])
+        groups = store.group('reviews.yaml', 'category')
+        assert list(groups) == ['추나요법']
+        assert [r.id for r in groups['추나요법'].range()] == ['b', 'a']
+        assert store.group('reviews.yaml', 'category') is groups
+
+        records, _ = store.load('reviews.yaml')
+        store.save('reviews.yaml', records + [make_review('d', '2024-01-04 00:00:00', '공진단')])
+
+        assert sorted(store.group('reviews.yaml', 'category')) == ['공진단', '추나요법']
+
+    def test_concurrent_loads_parse_once(self, mocker, store):
+        """여러 스레드가 같은 파일을 동시에 읽어도 한 번만 파싱함"""
+        import threading
+        import datastore
+
+        store.save('reviews.yaml', [make_review('a', '2024-01-01 00:00:00')])
+        store.invalidate()
+        spy = mocker.spy(datastore.dataformat, 'load_file')
+
+        threads = [threading.Thread(target=store.index, args=('reviews.yaml',)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert spy.call_count == 1
+
+    def test_different_files_load_concurrently(self, mocker, store):
+        """서로 다른 파일은 다른 파일의 파싱이 끝나기를 기다리지 않음"""
+        import threading
+        import datastore
+
+        store.save('reviews.yaml', [make_review('a', '2024-01-01 00:00:00')])
+        store.save('columns.yaml', [])
+        store.invalidate()
+
+        started = threading.Event()
+        release = threading.Event()
+        original = datastore.dataformat.load_file
+
+        def slow_load(f):
+            if f.name.endswith('reviews.yaml'):
+                started.set()
+                release.wait(5)
+            return original(f)
+
+        mocker.patch('datastore.dataformat.load_file', side_effect=slow_load)
+        blocked = threading.Thread(target=store.load, args=('reviews.yaml',))
+        blocked.start()
+        started.wait(5)
+
+        # reviews.yaml 파싱이 진행 중인 동안에도 columns.yaml은 읽을 수 있어야 함
+        assert store.load('columns.yaml') == ([], 0)
+
+        release.set()
+        blocked.join()
+
+
+class TestResolveDateRange:
+    """기간 프리셋 변환 테스트"""
+
+    def test_all(self):
+        """전체 기간"""
+        import app
+
+        assert app.resolve_date_range("전체 기간", date(2024, 5, 15)) == (None, None)
+
+    def test_today(self):
+        """오늘"""
+        import app
+
+        assert app.resolve_date_range("오늘", date(2024, 5, 15)) == (date(2024, 5, 15), date(2024, 5, 16))
+
+    def test_this_week(self):
+        """이번 주 (월요일 시작)"""
+        import app
+
+        # 2024-05-15는 수요일
+        assert app.resolve_date_range("이번 주", date(2024, 5, 15)) == (date(2024, 5, 13), date(2024, 5, 20))
+
+    def test_this_month_december(self):
+        """이번 달 (연말)"""
+        import app
+
+        assert app.resolve_date_range("이번 달", date(2024, 12, 31)) == (date(2024, 12, 1), date(2025, 1, 1))
+
+    def test_last_month_january(self):
+        """지난달 (연초)"""
+        import app
+
+        assert app.resolve_date_range("지난달", date(2024, 1, 10)) == (date(2023, 12, 1), date(2024, 1, 1))
+
+    def test_custom_range(self):
+        """직접 선택 (종료일 포함)"""
+        import app
+
+        assert app.resolve_date_range("직접 선택", date(2024, 5, 15), (date(2024, 5, 1), date(2024, 5, 3))) == \
+            (date(2024, 5, 1), date(2024, 5, 4))
+
+    def test_custom_incomplete(self):
+        """직접 선택에서 날짜를 고르지 않은 경우"""
+        import app
+
+        assert app.resolve_date_range("직접 선택", date(2024, 5, 15), ()) == (None, None)
+
+
+class TestQueryData:
+    """기간 조회 테스트"""
+
+    def test_newest_first(self, mocker, temp_data_dir):
+        """최신순 반환"""
+        import app
+        import records
+
+        app.save_data('reviews.yaml', [
+            make_review('a', '2024-01-01 09:00:00'),
+            make_review('b', '2024-01-02 09:00:00'),
+            make_review('c', '2024-01-03 09:00:00'),
+        ])
+
+        result = app.query_data(
+            'reviews.yaml',
+            records.date_to_timestamp(date(2024, 1, 2)),
+            records.date_to_timestamp(date(2024, 1, 4))
+        )
+
+        assert [r.id for r in result] == ['c', 'b']
@@ -0,0 +1,145 @@
+"""
+중복 제출 방지 (제출 토큰) 테스트
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class TestRecentTokenStore:
+    """최근 토큰 저장소 테스트"""
+
+    def test_claim_once(self):
+        """같은 토큰은 한 번만 등록"""
+        from submissions import RecentTokenStore
+
+        store = RecentTokenStore()
+
+        assert store.claim('token-1') is True
+        assert store.claim('token-1') is False
+        assert 'token-1' in store
+
+    def test_bounded_size(self):
+        """최대 개수를 넘으면 가장 오래된 토큰부터 제거"""
+        from submissions import RecentTokenStore
+
+        store = RecentTokenStore(maxsize=3)
+        for i in range(5):
+            store.claim(f'token-{i}')
+
+        assert len(store) == 3
+        assert 'token-0' not in store
+        assert 'token-4' in store
+
+    def test_release(self):
+        """해제한 토큰은 다시 등록 가능"""
+        from submissions import RecentTokenStore
+
+        store = RecentTokenStore()
+        store.claim('token-1')
+        store.release('token-1')
+
+        assert store.claim('token-1') is True
+
+    def test_shared_between_processes(self, temp_data_dir):
+        """같은 파일을 쓰는 다른 프로세스(인스턴스)가 등록한 토큰도 중복으로 알아봄"""
+        from submissions import RecentTokenStore
+
+        path = str(temp_data_dir / 'submission_tokens.jsonl')
+        first = RecentTokenStore(path=path)
+        second = RecentTokenStore(path=path)
+
+        assert first.claim('token-1') is True
+        assert 'token-1' in second
+        assert second.claim('token-1') is False
+        second.release('token-1')
+        assert first.claim('token-1') is True
+
+    def test_compaction(self, temp_data_dir):
+        """로그가 길어지면 최근 토큰만 남도록 다시 쓰고, 다른 인스턴스도 새 로그를 읽음"""
+        from submissions import RecentTokenStore
+
+        path = str(temp_data_dir / 'submission_tokens.jsonl')
+        store = RecentTokenStore(maxsize=3, path=path)
+        other = RecentTokenStore(maxsize=3, path=path)
+        for i in range(3):
+            store.claim(f'token-{i}')
+        assert len(other) == 3
+        for i in range(3, 8):
+            store.claim(f'token-{i}')
+
+        with open(path, encoding='utf-8') as f:
+            assert len(f.readlines()) <= 7
+        assert len(other) == 3
+        assert 'token-7' in other and 'token-4' not in other
+        assert other.claim('token-7') is False
+
+
+class TestFormToken:
+    """폼 토큰 발급 테스트"""
+
+    def test_token_stable_until_rotated(self, mocker):
+        """회전 전까지는 같은 토큰 유지"""
+        import app
+
+        mocker.patch('app.st.session_state', {})
+
+        first = app.issue_form_token('inquiry_form')
+        assert app.issue_form_token('inquiry_form') == first
+
+        app.rotate_form_token('inquiry_form')
+        assert app.issue_form_token('inquiry_form') != first
+
+    def test_tokens_per_form(self, mocker):
+        """폼마다 별도의 토큰 발급"""
+        import app
+
+        mocker.patch('app.st.session_state', {})
+
+        assert app.issue_form_token('inquiry_form') != app.issue_form_token('review_form')
+
+
+class TestAppendRecord:
+    """토큰 기반 레코드 추가 테스트"""
+
+    def test_replayed_submission_dropped(self, mocker, temp_data_dir):
+        """재전송된 제출은 한 번만 저장"""
+        import app
+
+        mocker.patch('app.get_submission_tokens', return_value=app.submissions.RecentTokenStore())
+        record = app.Inquiry(
+            id='token-1', author='user1', author_name='User One',
+            title='문의', content='내용'
+        )
+
+        assert app.append_record('inquiries.yaml', record, 'token-1') is True
+        assert app.append_record('inquiries.yaml', record, 'token-1') is None
+
+        assert len(app.load_data('inquiries.yaml')) == 1
+
+    def test_replay_does_not_touch_disk(self, mocker, temp_data_dir):
+        """이미 처리된 토큰은 파일을 읽거나 쓰지 않음"""
+        import app
+
+        store = app.submissions.RecentTokenStore()
+        store.claim('token-1')
+        mocker.patch('app.get_submission_tokens', return_value=store)
+        mock_load = mocker.patch('app.load_data')
+        mock_save = mocker.patch('app.save_data')
+
+        assert app.append_record('inquiries.yaml', {'id': 'token-1'}, 'token-1') is None
+        mock_load.assert_not_called()
+        mock_save.assert_not_called()
+
+    def test_failed_save_releases_token(self, mocker, temp_data_dir):
+        """저장 실패 시 토큰을 해제해 재시도 가능"""
+        import app
+
+        store = app.submissions.RecentTokenStore()
+        mocker.patch('app.get_submission_tokens', return_value=store)
+        mocker.patch('app.save_data', return_value=False)
+
+        assert app.append_record('inquiries.yaml', {'id': 'token-1'}, 'token-1') is False
+        assert 'token-1' not in store
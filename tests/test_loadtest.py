@@ -0,0 +1,126 @@
+"""
+동시 세션 부하 테스트 도구 테스트
+"""
+import pytest
+import sys
+import os
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def write_items(path, key, items):
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.dump({key: items}, f, allow_unicode=True)
+
+
+def inquiry_dict(inquiry_id, title, answered=False):
+    return {
+        'id': inquiry_id, 'author': 'user1', 'author_name': 'User One', 'title': title,
+        'content': '내용', 'is_private': False, 'answered': answered, 'answer': '답변' if answered else None,
+        'created_at': '2024-05-06 10:00:00'
+    }
+
+
+class TestOptions:
+    """비율/백분위수 계산 테스트"""
+
+    def test_parse_mix(self):
+        """시나리오 비율을 읽고 잘못된 값은 거부하는지 확인"""
+        import loadtest
+
+        assert loadtest.parse_mix("browse=3, answer=1") == {'browse': 3.0, 'answer': 1.0}
+        for text in ("login=1", "browse=many", "browse=-1", "browse=0"):
+            with pytest.raises(ValueError):
+                loadtest.parse_mix(text)
+
+    def test_percentile(self):
+        """nearest-rank 백분위수"""
+        from loadtest import percentile
+
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7], 90) == 7
+        assert percentile([], 50) is None
+
+    def test_summarize(self):
+        """세션 결과를 단계별로 모으고 처리량을 계산하는지 확인"""
+        from loadtest import summarize
+
+        results = [
+            {'elapsed': 2.0, 'scenarios': {'browse': 2}, 'samples': [('browse.open', 0.1, True)] * 2,
+             'errors': [], 'skipped': {}, 'submitted': {'inquiry': [], 'review': [], 'answer': []}},
+            {'elapsed': 4.0, 'scenarios': {'inquiry': 2}, 'samples': [('inquiry.submit', 0.3, False)],
+             'errors': ['inquiry: ScenarioError'], 'skipped': {},
+             'submitted': {'inquiry': ['a'], 'review': [], 'answer': []}},
+        ]
+
+        summary = summarize(results)
+
+        assert summary['throughput'] == 1.0
+        assert summary['steps']['browse.open']['count'] == 2
+        assert summary['steps']['inquiry.submit']['failed'] == 1
+        assert summary['steps']['inquiry.submit']['p50'] == pytest.approx(300)
+        assert summary['submitted']['inquiry'] == ['a']
+
+
+class TestChecks:
+    """결과 파일 검사 테스트"""
+
+    def test_detects_corruption(self, temp_data_dir):
+        """파싱 실패, 중복 ID, 남은 임시 파일, 통계 불일치를 찾는지 확인"""
+        import loadtest
+
+        write_items(temp_data_dir / "inquiries.yaml", 'inquiries',
+                    [inquiry_dict('i1', 'a'), inquiry_dict('i1', 'b')])
+        (temp_data_dir / "reviews.yaml").write_text("reviews: [\n", encoding='utf-8')
+        (temp_data_dir / "inquiries.yaml.tmp").write_text("", encoding='utf-8')
+        (temp_data_dir / "stats.yaml").write_text("version: 1\ntotal_inquiries: 5\n", encoding='utf-8')
+
+        counts, problems, _ = loadtest.check_files(str(temp_data_dir))
+
+        assert counts['inquiries.yaml'] == 2
+        assert any('inquiries.yaml: 중복 ID' in p for p in problems)
+        assert any(p.startswith('reviews.yaml: 파싱 실패') for p in problems)
+        assert any('임시 파일 1개' in p for p in problems)
+        assert any(p.startswith('stats.yaml') for p in problems)
+
+    def test_lost_updates(self, temp_data_dir):
+        """등록했지만 파일에 없는 문의와 답변되지 않은 답변을 세는지 확인"""
+        import loadtest
+
+        write_items(temp_data_dir / "inquiries.yaml", 'inquiries',
+                    [inquiry_dict('i1', 'a', answered=True), inquiry_dict('i2', 'b'), inquiry_dict('i3', 'b')])
+        _, problems, loaded = loadtest.check_files(str(temp_data_dir))
+        submitted = {'inquiry': ['a', 'b', 'c'], 'review': [], 'answer': ['i1', 'i2']}
+
+        lost, duplicated = loadtest.find_lost_updates(loaded, submitted)
+
+        assert problems == []
+        assert lost == {'inquiry': 1, 'review': 0, 'answer': 1}
+        assert duplicated['inquiry'] == 1
+
+
+class TestSession:
+    """AppTest로 앱 흐름을 실행하는 세션 테스트"""
+
+    def test_inquiry_session(self, temp_data_dir):
+        """세션 하나가 로그인해 문의를 등록하고 파일 검사를 통과하는지 확인"""
+        import datastore
+        import loadtest
+
+        workdir = str(temp_data_dir.parent)
+        loadtest.prepare_workdir(workdir)
+        datastore.store.invalidate()
+        config = {'workdir': workdir, 'mix': {'inquiry': 1}, 'iterations': 1, 'seed': 1}
+
+        result = loadtest.run_session(config, 0)
+
+        assert result['errors'] == []
+        assert result['scenarios'] == {'inquiry': 1}
+        assert {name for name, _, _ in result['samples']} == {'inquiry.open', 'login', 'inquiry.submit'}
+        _, problems, loaded = loadtest.check_files(str(temp_data_dir))
+        lost, _ = loadtest.find_lost_updates(loaded, result['submitted'])
+        assert result['submitted']['inquiry'] and lost['inquiry'] == 0
+        assert problems == []
@@ -0,0 +1,156 @@
+"""
+사용자 마크다운 sanitize/렌더링 테스트
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class TestRenderMarkdown:
+    """저장 시점 마크다운 렌더링 테스트"""
+
+    def test_basic_markdown(self):
+        """기본 마크다운 문법이 HTML로 변환되는지 확인"""
+        import app
+
+        result = app.render_markdown('# 제목\n\n**굵게** _기울임_')
+
+        assert '<h1>제목</h1>' in result
+        assert '<strong>굵게</strong>' in result
+        assert '<em>기울임</em>' in result
+
+    def test_empty_text(self):
+        """빈 본문 처리"""
+        import app
+
+        assert app.render_markdown('') == ''
+        assert app.render_markdown(None) == ''
+
+    def test_table_rendering(self):
+        """표 문법 지원"""
+        import app
+
+        result = app.render_markdown('| 요일 | 시간 |\n|---|---|\n| 월 | 09:00 |')
+
+        assert '<table>' in result
+        assert '<td>09:00</td>' in result
+
+
+class TestSanitization:
+    """XSS 방지 테스트"""
+
+    @pytest.mark.security
+    def test_script_tag_removed(self):
+        """script 태그는 내용까지 제거"""
+        import app
+
+        result = app.render_markdown('안녕하세요<script>alert(1)</script>')
+
+        assert '<script' not in result
+        assert 'alert(1)' not in result
+        assert '안녕하세요' in result
+
+    @pytest.mark.security
+    def test_self_closing_drop_tag(self):
+        """자기 닫힘 script/style 태그 뒤의 내용은 유지"""
+        import app
+        import markup
+
+        result = app.render_markdown('<script/>hello **world**')
+
+        assert '<script' not in result
+        assert '<strong>world</strong>' in result
+        assert markup.sanitize_html('<style/>a<script>b</script>c') == 'ac'
+
+    @pytest.mark.security
+    def test_event_handler_attribute_removed(self):
+        """이벤트 핸들러 속성 제거"""
+        import app
+
+        result = app.render_markdown('<img src="x.png" onerror="alert(1)">')
+
+        assert 'onerror' not in result
+        assert 'src="x.png"' in result
+
+    @pytest.mark.security
+    def test_javascript_link_removed(self):
+        """javascript: 링크 제거"""
+        import app
+
+        result = app.render_markdown('[클릭](javascript:alert(1))')
+
+        assert 'javascript' not in result.lower()
+        assert '클릭' in result
+
+    @pytest.mark.security
+    def test_obfuscated_scheme_removed(self):
+        """엔티티/공백으로 우회한 스킴도 제거"""
+        import markup
+
+        result = markup.sanitize_html('<a href="jav&#x09;ascript:alert(1)">x</a>')
+
+        assert 'href' not in result
+
+    @pytest.mark.security
+    def test_safe_links_kept(self):
+        """http/https/상대 경로 링크는 유지"""
+        import app
+
+        result = app.render_markdown('[홈](https://example.com) [안내](/guide)')
+
+        assert 'href="https://example.com"' in result
+        assert 'href="/guide"' in result
+
+    @pytest.mark.security
+    def test_unknown_tags_stripped(self):
+        """허용되지 않은 태그는 제거하고 텍스트만 유지"""
+        import markup
+
+        result = markup.sanitize_html('<div style="x"><span>텍스트</span></div>')
+
+        assert result == '텍스트'
+
+    def test_code_block_escaped(self):
+        """코드 블록 안의 HTML은 이스케이프되어 보존"""
+        import app
+
+        result = app.render_markdown('```\n<b>태그</b>\n```')
+
+        assert '&lt;b&gt;' in result
+        assert '<b>' not in result
+
+
+class TestShowRendered:
+    """저장된 렌더링 결과 표시 테스트"""
+
+    def test_uses_stored_html(self, mocker):
+        """저장된 HTML이 있으면 다시 렌더링하지 않음"""
+        import app
+
+        mock_markdown = mocker.patch('app.st.markdown')
+        mock_render = mocker.patch('app.render_markdown')
+
+        app.show_rendered(app.Review(
+            id='r1', author='user1', author_name='User One', title='후기',
+            content='**원문**', content_html='<p>저장됨</p>'
+        ))
+
+        mock_render.assert_not_called()
+        mock_markdown.assert_called_once_with('<p>저장됨</p>', unsafe_allow_html=True)
+
+    def test_legacy_record_rendered_on_view(self, mocker):
+        """렌더링 결과가 없는 이전 데이터는 표시 시점에 렌더링"""
+        import app
+
+        mock_markdown = mocker.patch('app.st.markdown')
+
+        app.show_rendered(app.Review(
+            id='r1', author='user1', author_name='User One', title='후기',
+            content='<script>x</script>**원문**'
+        ))
+
+        rendered = mock_markdown.call_args[0][0]
+        assert '<strong>원문</strong>' in rendered
+        assert '<script' not in rendered
@@ -0,0 +1,107 @@
+"""
+메모리 할당 프로파일링 테스트
+"""
+import pytest
+import sys
+import os
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 재실행마다 남는 할당을 흉내 내는 전역 목록
+_retained = []
+
+
+@pytest.fixture
+def profiler(mocker):
+    """켜진 상태의 새 프로파일러 (테스트가 끝나면 추적을 멈춥니다)"""
+    import memprofile
+
+    profiler = memprofile.AllocationProfiler(frames=1, snapshot_interval=1, top=10)
+    mocker.patch('memprofile.ENABLED', True)
+    mocker.patch('memprofile.profiler', profiler)
+    yield profiler
+    profiler.stop()
+    _retained.clear()
+
+
+class TestProfiled:
+    """profiled() 데코레이터 테스트"""
+
+    def test_disabled_returns_function(self):
+        """꺼져 있으면 원래 함수를 그대로 반환하는지 확인"""
+        import memprofile
+
+        def load(filename):
+            return filename
+
+        assert memprofile.ENABLED is False
+        assert memprofile.profiled('load_data')(load) is load
+        assert not tracemalloc.is_tracing()
+
+    def test_records_calls_by_filename(self, profiler):
+        """데이터 호출은 파일 이름별로 증감을 누적하는지 확인"""
+        import memprofile
+
+        @memprofile.profiled('load_data')
+        def load(filename):
+            _retained.append(bytearray(100_000))
+            return filename
+
+        load('inquiries.yaml')
+        load('inquiries.yaml')
+        load('reviews.yaml')
+
+        calls = profiler.report()['calls']
+        assert calls['load_data(inquiries.yaml)']['calls'] == 2
+        assert calls['load_data(inquiries.yaml)']['size_diff'] >= 200_000
+        assert calls['load_data(reviews.yaml)']['calls'] == 1
+
+    def test_rerun_growth_attributed_to_line(self, profiler):
+        """재실행 사이에 남은 할당을 소스 줄 단위로 보여 주는지 확인"""
+        import memprofile
+
+        class Stop(Exception):
+            pass
+
+        @memprofile.profiled('rerun', rerun=True, gauges=lambda: {'retained': len(_retained)})
+        def rerun(stop=False):
+            _retained.append(bytearray(200_000))
+            if stop:
+                raise Stop()
+
+        rerun()
+        rerun()
+        # st.rerun()처럼 예외로 끝난 재실행도 기록합니다
+        with pytest.raises(Stop):
+            rerun(stop=True)
+
+        report = profiler.report()
+        assert report['reruns'] == 3
+        assert [entry['gauges']['retained'] for entry in report['timeline']] == [1, 2, 3]
+        top = report['growth_since_baseline'][0]
+        assert top['file'] == __file__ and 'bytearray(200_000)' in top['code']
+        assert top['size_diff'] >= 400_000
+        assert report['last_rerun_diff'][0]['line'] == top['line']
+        assert 'bytearray(200_000)' in profiler.export_text()
+
+        profiler.reset_baseline()
+        rerun()
+        assert profiler.growth() == []
+
+
+class TestGauges:
+    """재실행 지표 테스트"""
+
+    def test_cache_info(self, temp_data_dir):
+        """데이터 캐시의 파일/레코드 수를 보고하는지 확인"""
+        import datastore
+        from records import Review
+
+        store = datastore.DataStore()
+        store.save('reviews.yaml', [Review(id='r1', author='user1', author_name='User One',
+                                           title='후기', content='내용')])
+
+        assert store.cache_info() == {'files': 1, 'records': 1, 'file_locks': 1}
+        store.invalidate()
+        assert store.cache_info()['files'] == 0
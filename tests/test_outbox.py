@@ -0,0 +1,302 @@
+"""
+알림 메일 아웃박스 테스트
+"""
+import pytest
+import sys
+import os
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+from email.policy import default as default_policy
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """수신한 메일을 서버의 messages 목록에 저장하는 최소한의 SMTP 서버 핸들러"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 localhost test SMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply("250 localhost")
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                if self.server.reject and command.startswith('RCPT'):
+                    self.reply("550 mailbox unavailable")
+                else:
+                    self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = b''
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b'.\r\n', b''):
+                        break
+                    data += chunk
+                self.server.messages.append(message_from_bytes(data, policy=default_policy))
+                self.reply("250 OK queued")
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+@pytest.fixture
+def smtp_server():
+    """localhost에서 동작하는 SMTP 대역 서버"""
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.messages = []
+    server.reject = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def box(tmp_path):
+    """임시 디렉토리를 사용하는 아웃박스"""
+    import outbox
+
+    return outbox.Outbox(root=str(tmp_path / 'outbox'))
+
+
+class TestOutbox:
+    """파일 기반 큐 테스트"""
+
+    def test_enqueue_and_claim(self, box):
+        """추가한 메시지를 순서대로 가져옴"""
+        box.enqueue('a@example.com', '제목1', '본문1')
+        box.enqueue('b@example.com', '제목2', '본문2')
+
+        claimed = box.claim_due(10)
+
+        assert [m['subject'] for _, m in claimed] == ['제목1', '제목2']
+        assert box.counts() == {'pending': 0, 'sending': 2, 'failed': 0}
+
+    def test_claim_limit(self, box):
+        """한 번에 가져오는 개수 제한"""
+        for i in range(5):
+            box.enqueue('a@example.com', f'제목{i}', '본문')
+
+        assert len(box.claim_due(2)) == 2
+        assert box.counts()['pending'] == 3
+
+    def test_claimed_message_not_claimed_twice(self, box):
+        """다른 워커가 가져간 메시지는 다시 가져오지 않음"""
+        box.enqueue('a@example.com', '제목', '본문')
+
+        assert len(box.claim_due(10)) == 1
+        assert box.claim_due(10) == []
+
+    def test_retry_with_backoff(self, box):
+        """실패한 메시지는 백오프 후 다시 발송 대상이 됨"""
+        import outbox
+
+        box.enqueue('a@example.com', '제목', '본문')
+        path, message = box.claim_due(10)[0]
+        now = time.time()
+        box.retry(path, message, 'connection refused', now=now)
+
+        assert box.claim_due(10, now=now + 1) == []
+        retried = box.claim_due(10, now=now + outbox.BACKOFF_BASE + 1)
+        assert retried[0][1]['attempts'] == 1
+        assert retried[0][1]['last_error'] == 'connection refused'
+
+    def test_backoff_doubles_and_caps(self, box):
+        """재시도 간격은 두 배씩 늘어나되 상한을 넘지 않음"""
+        import outbox
+
+        box.enqueue('a@example.com', '제목', '본문')
+        far_future = time.time() + 10 ** 9
+        delays = []
+        for _ in range(outbox.MAX_ATTEMPTS - 1):
+            path, message = box.claim_due(10, now=far_future)[0]
+            box.retry(path, message, 'error', now=0.0)
+            delays.append(message['next_attempt_at'])
+
+        assert delays[0] == outbox.BACKOFF_BASE
+        assert delays[1] == outbox.BACKOFF_BASE * 2
+        assert delays == sorted(delays)
+        assert max(delays) <= outbox.BACKOFF_MAX
+
+    def test_moves_to_failed_after_max_attempts(self, box):
+        """최대 재시도 횟수를 넘으면 failed/로 이동"""
+        import outbox
+
+        box.enqueue('a@example.com', '제목', '본문')
+        for _ in range(outbox.MAX_ATTEMPTS):
+            path, message = box.claim_due(10, now=time.time() + 10 ** 9)[0]
+            box.retry(path, message, 'error')
+
+        assert box.counts() == {'pending': 0, 'sending': 0, 'failed': 1}
+
+    def test_recover_stale(self, box):
+        """중단된 워커의 발송 중 메시지를 되돌림"""
+        import outbox
+
+        box.enqueue('a@example.com', '제목', '본문')
+        box.claim_due(10)
+
+        box.recover_stale(now=time.time())
+        assert box.counts()['sending'] == 1
+
+        box.recover_stale(now=time.time() + outbox.STALE_SENDING_SECONDS + 1)
+        assert box.counts() == {'pending': 1, 'sending': 0, 'failed': 0}
+
+
+class TestOutboxWorker:
+    """SMTP 대역 서버를 이용한 워커 테스트"""
+
+    def test_batch_sent(self, box, smtp_server):
+        """대기 중인 메시지를 일괄 발송"""
+        import outbox
+
+        sender = outbox.SMTPSender('127.0.0.1', smtp_server.server_address[1], 'noreply@example.com')
+        worker = outbox.OutboxWorker(box, sender, batch_size=10)
+        box.enqueue('a@example.com', '새 문의', '문의 본문')
+        box.enqueue('b@example.com', '답변 등록', '답변 본문')
+
+        assert worker.run_once() == 2
+
+        assert [m['Subject'] for m in smtp_server.messages] == ['새 문의', '답변 등록']
+        assert smtp_server.messages[0]['To'] == 'a@example.com'
+        assert '문의 본문' in smtp_server.messages[0].get_content()
+        assert box.counts() == {'pending': 0, 'sending': 0, 'failed': 0}
+        assert worker.sent == 2
+
+    def test_rejected_recipient_retried(self, box, smtp_server):
+        """서버가 거부한 메시지는 재시도 대기열로"""
+        import outbox
+
+        smtp_server.reject = True
+        sender = outbox.SMTPSender('127.0.0.1', smtp_server.server_address[1], 'noreply@example.com')
+        worker = outbox.OutboxWorker(box, sender)
+        box.enqueue('a@example.com', '제목', '본문')
+
+        worker.run_once()
+
+        assert box.counts()['pending'] == 1
+        assert worker.failed == 1
+
+    def test_invalid_message_does_not_fail_batch(self, box, smtp_server):
+        """보낼 수 없는 메시지만 failed/로 옮기고 같은 묶음의 다른 메시지는 발송"""
+        import outbox
+
+        sender = outbox.SMTPSender('127.0.0.1', smtp_server.server_address[1], 'noreply@example.com')
+        worker = outbox.OutboxWorker(box, sender, batch_size=10)
+        box.enqueue('a@example.com', '제목1', '본문')
+        box.enqueue('b@example.com', '줄바꿈이\n들어간 제목', '본문')
+        box.enqueue('c@example.com', '제목3', '본문')
+
+        assert worker.run_once() == 3
+
+        assert [m['To'] for m in smtp_server.messages] == ['a@example.com', 'c@example.com']
+        assert box.counts() == {'pending': 0, 'sending': 0, 'failed': 1}
+        assert (worker.sent, worker.failed) == (2, 1)
+
+    def test_connection_failure_retried(self, box):
+        """서버에 연결할 수 없으면 묶음 전체를 재시도 대기열로"""
+        import outbox
+        import socket
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            closed_port = sock.getsockname()[1]
+        sender = outbox.SMTPSender('127.0.0.1', closed_port, 'noreply@example.com', timeout=1)
+        worker = outbox.OutboxWorker(box, sender)
+        box.enqueue('a@example.com', '제목1', '본문')
+        box.enqueue('b@example.com', '제목2', '본문')
+
+        worker.run_once()
+
+        assert box.counts() == {'pending': 2, 'sending': 0, 'failed': 0}
+
+    def test_background_thread(self, box, smtp_server):
+        """백그라운드 스레드가 발송"""
+        import outbox
+
+        sender = outbox.SMTPSender('127.0.0.1', smtp_server.server_address[1], 'noreply@example.com')
+        worker = outbox.OutboxWorker(box, sender, interval=0.05)
+        worker.start()
+        try:
+            box.enqueue('a@example.com', '제목', '본문')
+            deadline = time.time() + 5
+            while not smtp_server.messages and time.time() < deadline:
+                time.sleep(0.02)
+        finally:
+            worker.stop()
+            worker.join(timeout=5)
+
+        assert len(smtp_server.messages) == 1
+
+    def test_background_thread_recovers_stale(self, box, mocker):
+        """실행 중인 워커도 주기적으로 중단된 발송 메시지를 되돌림"""
+        import outbox
+
+        sender = mocker.Mock()
+        sender.send_batch.side_effect = lambda messages: [None] * len(messages)
+        recover = mocker.spy(box, 'recover_stale')
+        worker = outbox.OutboxWorker(box, sender, interval=0.02, recover_interval=0.05)
+        worker.start()
+        try:
+            deadline = time.time() + 5
+            while recover.call_count < 3 and time.time() < deadline:
+                time.sleep(0.02)
+        finally:
+            worker.stop()
+            worker.join(timeout=5)
+
+        assert recover.call_count >= 3
+
+
+class TestNotificationHandlers:
+    """핸들러의 알림 예약 테스트"""
+
+    def test_enqueue_does_not_send(self, mocker, temp_data_dir):
+        """알림 예약은 SMTP 연결 없이 아웃박스에만 기록"""
+        import app
+
+        mock_smtp = mocker.patch('outbox.smtplib.SMTP')
+
+        app.enqueue_notification('a@example.com', '제목', '본문')
+
+        mock_smtp.assert_not_called()
+        assert app.outbox.Outbox().counts()['pending'] == 1
+
+    def test_no_recipient_skipped(self, temp_data_dir):
+        """받는 사람이 없으면 예약하지 않음"""
+        import app
+
+        app.enqueue_notification(None, '제목', '본문')
+
+        assert app.outbox.Outbox().counts()['pending'] == 0
+
+    def test_notify_answer_uses_user_email(self, mocker, temp_data_dir):
+        """답변 알림은 작성자 이메일로 예약"""
+        import app
+
+        mocker.patch('app.load_users', return_value={'user1': {'email': 'user1@example.com'}})
+        mock_enqueue = mocker.patch('app.enqueue_notification')
+        inquiry = app.Inquiry(
+            id='a', author='user1', author_name='User One',
+            title='문의', content='내용', answered=True, answer='답변입니다'
+        )
+
+        app.notify_answer(inquiry)
+
+        to, subject, body = mock_enqueue.call_args[0]
+        assert to == 'user1@example.com'
+        assert subject.startswith('[블루힐 한의원] ')
+        assert '답변입니다' in body
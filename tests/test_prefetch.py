@@ -0,0 +1,102 @@
+"""
+재실행 시 데이터 미리 읽기 테스트
+"""
+import pytest
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def plan_keys(session):
+    import app
+
+    return [key for key, _, _ in app.plan_prefetch(session)]
+
+
+class TestPlanPrefetch:
+    """역할/메뉴별 미리 읽기 대상 테스트"""
+
+    def test_anonymous_default_menus(self):
+        """비로그인 사용자는 기본 메뉴 콘텐츠와 문의/후기만 읽음"""
+        keys = plan_keys({})
+
+        assert keys == [
+            os.path.join('content/public', '01_의료진.md'),
+            os.path.join('content/public', '04_통증치료.md'),
+            'inquiries.yaml',
+            'reviews.yaml'
+        ]
+
+    def test_column_menu_reads_columns(self):
+        """칼럼 메뉴가 선택되어 있으면 칼럼 데이터도 읽음"""
+        keys = plan_keys({'clinic_menu': "칼럼", 'treatment_menu': "공진단"})
+
+        assert os.path.join('content/public', '03_칼럼.md') in keys
+        assert os.path.join('content/public', '07_공진단.md') in keys
+        assert 'columns.yaml' in keys
+
+    def test_logged_in_and_admin(self):
+        """로그인 사용자는 예약 현황을, 관리자는 통계도 읽음"""
+        user_keys = plan_keys({'logged_in': True, 'role': 'user'})
+        admin_keys = plan_keys({'logged_in': True, 'role': 'admin'})
+
+        assert 'bookings' in user_keys
+        assert 'stats' not in user_keys
+        assert 'stats' in admin_keys
+
+
+class TestPrefetchRerun:
+    """미리 읽기 실행 테스트"""
+
+    @pytest.fixture
+    def pool(self, mocker):
+        """테스트마다 새 스레드 풀 사용"""
+        executor = ThreadPoolExecutor(max_workers=4)
+        mocker.patch('app.get_prefetch_pool', return_value=executor)
+        mocker.patch('app.st.session_state', {})
+        yield executor
+        executor.shutdown()
+
+    def test_reads_run_concurrently(self, mocker, pool):
+        """읽기가 동시에 실행되어 가장 느린 읽기만큼만 걸림"""
+        import app
+
+        def slow(value):
+            time.sleep(0.2)
+            return value
+
+        mocker.patch('app.plan_prefetch', return_value=[(k, slow, (k,)) for k in 'abcd'])
+
+        started = time.perf_counter()
+        result = app.prefetch_rerun()
+        elapsed = time.perf_counter() - started
+
+        assert result == {k: k for k in 'abcd'}
+        assert elapsed < 0.6
+
+    def test_failed_read_omitted(self, mocker, pool):
+        """실패한 읽기는 결과에서 빠지고 나머지는 그대로 반환"""
+        import app
+
+        def fail():
+            raise OSError("읽기 실패")
+
+        mocker.patch('app.plan_prefetch', return_value=[('ok', lambda: 1, ()), ('bad', fail, ())])
+
+        assert app.prefetch_rerun() == {'ok': 1}
+
+    def test_markdown_handed_to_display(self, mocker):
+        """미리 읽은 마크다운이 있으면 파일을 다시 읽지 않음"""
+        import app
+
+        mocker.patch('app.st')
+        load = mocker.patch('app.load_markdown_file')
+        filepath = os.path.join('content/public', '01_의료진.md')
+
+        app.display_public_content("한의원", "의료진", {filepath: "# 의료진"})
+
+        load.assert_not_called()
+        app.st.markdown.assert_called_with("# 의료진")
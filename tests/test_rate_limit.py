@@ -0,0 +1,138 @@
+"""
+요청 제한 (토큰 버킷) 테스트
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class FakeClock:
+    """수동으로 시간을 진행시키는 시계"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    """토큰 버킷 테스트"""
+
+    def test_burst_then_reject(self):
+        """버킷 크기만큼 허용 후 거부"""
+        import app
+
+        clock = FakeClock()
+        bucket = app.TokenBucket(rate=1, capacity=3, clock=clock)
+
+        assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
+
+    def test_refill_over_time(self):
+        """시간이 지나면 토큰이 충전됨"""
+        import app
+
+        clock = FakeClock()
+        bucket = app.TokenBucket(rate=0.5, capacity=1, clock=clock)
+        bucket.consume()
+
+        clock.now = 1.0
+        assert bucket.consume() is False
+        clock.now = 3.0
+        assert bucket.consume() is True
+
+    def test_refill_capped_at_capacity(self):
+        """충전량은 버킷 크기를 넘지 않음"""
+        import app
+
+        clock = FakeClock()
+        bucket = app.TokenBucket(rate=10, capacity=2, clock=clock)
+        clock.now = 100.0
+
+        assert [bucket.consume() for _ in range(3)] == [True, True, False]
+
+
+class TestRateLimiter:
+    """사용자별/전역 요청 제한 테스트"""
+
+    def test_per_user_limit_isolated(self):
+        """한 사용자가 제한에 걸려도 다른 사용자는 허용"""
+        import app
+
+        limiter = app.RateLimiter((0, 2), (0, 100), clock=FakeClock())
+
+        assert limiter.allow('user1') is True
+        assert limiter.allow('user1') is True
+        assert limiter.allow('user1') is False
+        assert limiter.allow('user2') is True
+
+    def test_global_limit(self):
+        """전역 제한은 모든 사용자에게 적용"""
+        import app
+
+        limiter = app.RateLimiter((0, 10), (0, 2), clock=FakeClock())
+
+        assert limiter.allow('user1') is True
+        assert limiter.allow('user2') is True
+        assert limiter.allow('user3') is False
+
+    def test_abusive_user_does_not_drain_global(self):
+        """사용자별 제한에 걸린 요청은 전역 토큰을 소비하지 않음"""
+        import app
+
+        limiter = app.RateLimiter((0, 1), (0, 2), clock=FakeClock())
+
+        limiter.allow('spammer')
+        for _ in range(10):
+            limiter.allow('spammer')
+
+        assert limiter.allow('user1') is True
+
+    def test_rejection_counters(self):
+        """거부 카운터 집계"""
+        import app
+
+        limiter = app.RateLimiter((0, 1), (0, 2), clock=FakeClock())
+        limiter.allow('user1')
+        limiter.allow('user1')
+        limiter.allow('user2')
+        limiter.allow('user3')
+
+        stats = limiter.stats()
+        assert stats['allowed'] == 2
+        assert stats['rejected_per_user'] == 1
+        assert stats['rejected_global'] == 1
+
+    def test_tracked_keys_bounded(self):
+        """사용자별 버킷 개수 제한"""
+        import app
+
+        limiter = app.RateLimiter((1, 1), (1000, 1000), max_keys=2, clock=FakeClock())
+        for name in ['a', 'b', 'c']:
+            limiter.allow(name)
+
+        assert limiter.stats()['tracked_keys'] == 2
+
+
+class TestRateLimitConfig:
+    """요청 제한 설정 테스트"""
+
+    def test_env_override(self, monkeypatch):
+        """환경 변수로 제한값 변경"""
+        import app
+
+        monkeypatch.setenv('BLUHILL_TEST_RATE', '2.5')
+        monkeypatch.setenv('BLUHILL_TEST_BURST', '7')
+
+        assert app._rate_limit_from_env('TEST', 1, 1) == (2.5, 7.0)
+
+    def test_defaults(self, monkeypatch):
+        """환경 변수가 없으면 기본값 사용"""
+        import app
+
+        monkeypatch.delenv('BLUHILL_TEST_RATE', raising=False)
+        monkeypatch.delenv('BLUHILL_TEST_BURST', raising=False)
+
+        assert app._rate_limit_from_env('TEST', 1, 3) == (1.0, 3.0)
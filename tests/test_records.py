@@ -0,0 +1,227 @@
+"""
+레코드 타입 (문의글/후기/칼럼) 테스트
+"""
+import pytest
+import sys
+import os
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture
+def inquiry_dict():
+    """YAML에서 읽은 형태의 문의글"""
+    return {
+        'id': 'inq-1',
+        'author': 'user1',
+        'author_name': 'User One',
+        'title': '진료 문의',
+        'content': '내용',
+        'is_private': True,
+        'answered': False,
+        'answer': None,
+        'created_at': '2024-03-05 14:30:00'
+    }
+
+
+class TestTimestamp:
+    """작성일시 변환 테스트"""
+
+    def test_roundtrip(self):
+        """문자열 → 타임스탬프 → 문자열 변환"""
+        import records
+
+        ts = records.parse_timestamp('2024-03-05 14:30:00')
+
+        assert isinstance(ts, int)
+        assert records.format_timestamp(ts) == '2024-03-05 14:30:00'
+
+    def test_datetime_from_yaml(self):
+        """YAML이 datetime으로 읽은 값도 처리"""
+        import records
+        from datetime import datetime
+
+        assert records.parse_timestamp(datetime(2024, 3, 5, 14, 30)) == \
+            records.parse_timestamp('2024-03-05 14:30:00')
+
+    def test_invalid_timestamp(self):
+        """잘못된 작성일시"""
+        import records
+
+        with pytest.raises(records.RecordValidationError):
+            records.parse_timestamp('2024/03/05')
+
+
+class TestRecordConversion:
+    """dict ↔ 레코드 변환 테스트"""
+
+    def test_from_dict(self, inquiry_dict):
+        """속성으로 필드 접근"""
+        import records
+
+        inq = records.Inquiry.from_dict(inquiry_dict)
+
+        assert inq.title == '진료 문의'
+        assert inq.is_private is True
+        assert inq.created_date == '2024-03-05'
+        assert inq.created_at == '2024-03-05 14:30:00'
+
+    def test_to_dict_roundtrip(self, inquiry_dict):
+        """저장 형식으로 그대로 복원"""
+        import records
+
+        data = records.Inquiry.from_dict(inquiry_dict).to_dict()
+
+        assert data == inquiry_dict
+
+    def test_empty_optional_fields_omitted(self, inquiry_dict):
+        """값이 없거나 기본값인 선택 필드는 저장하지 않고, 값이 있으면 저장"""
+        import records
+
+        inq = records.Inquiry.from_dict(inquiry_dict)
+        assert list(inq.to_dict()) == list(inquiry_dict)
+
+        inq.reply_count = 2
+        inq.last_reply_by = 'admin1'
+        inq.last_activity_ts = inq.created_ts + 60
+        data = inq.to_dict()
+        assert (data['reply_count'], data['last_reply_by']) == (2, 'admin1')
+        assert data['last_activity_at'] == '2024-03-05 14:31:00'
+        assert records.Inquiry.from_dict(data) == inq
+
+    def test_answered_at_parsed(self, inquiry_dict):
+        """답변일시는 타임스탬프로 보관하고 같은 형식으로 저장"""
+        import records
+
+        inquiry_dict.update(answered=True, answer='답변', answered_at='2024-03-06 09:00:00')
+        inq = records.Inquiry.from_dict(inquiry_dict)
+
+        assert inq.answered_ts - inq.created_ts == 18.5 * 3600
+        assert inq.to_dict()['answered_at'] == '2024-03-06 09:00:00'
+
+    def test_slots_no_instance_dict(self, inquiry_dict):
+        """인스턴스별 __dict__가 없음"""
+        import records
+
+        inq = records.Inquiry.from_dict(inquiry_dict)
+
+        assert not hasattr(inq, '__dict__')
+        with pytest.raises(AttributeError):
+            inq.unknown_field = 1
+
+    def test_author_interned(self, inquiry_dict):
+        """작성자 문자열 intern"""
+        import records
+
+        first = records.Inquiry.from_dict(dict(inquiry_dict, author=''.join(['us', 'er1'])))
+        second = records.Inquiry.from_dict(dict(inquiry_dict, author=''.join(['use', 'r1'])))
+
+        assert first.author is second.author
+
+    def test_unknown_fields_preserved(self, inquiry_dict):
+        """스키마에 없는 필드는 저장 시 유지"""
+        import records
+
+        inq = records.Inquiry.from_dict(dict(inquiry_dict, legacy_field='값'))
+
+        assert inq.to_dict()['legacy_field'] == '값'
+
+    def test_numeric_id_coerced(self, inquiry_dict):
+        """숫자로 읽힌 ID는 문자열로 변환"""
+        import records
+
+        inq = records.Inquiry.from_dict(dict(inquiry_dict, id=123))
+
+        assert inq.id == '123'
+
+
+class TestValidation:
+    """로드 시점 스키마 검증 테스트"""
+
+    def test_missing_required_field(self, inquiry_dict):
+        """필수 필드 누락"""
+        import records
+
+        del inquiry_dict['title']
+        with pytest.raises(records.RecordValidationError):
+            records.Inquiry.from_dict(inquiry_dict)
+
+    def test_wrong_type(self, inquiry_dict):
+        """잘못된 필드 타입"""
+        import records
+
+        inquiry_dict['is_private'] = 'yes'
+        with pytest.raises(records.RecordValidationError):
+            records.Inquiry.from_dict(inquiry_dict)
+
+    def test_load_records_skips_invalid(self, inquiry_dict):
+        """잘못된 항목은 건너뛰고 개수를 반환"""
+        import records
+
+        items = [inquiry_dict, {'id': 'broken'}, 'not a dict']
+        loaded, invalid = records.load_records(records.Inquiry, items)
+
+        assert len(loaded) == 1
+        assert invalid == 2
+
+
+class TestLoadSaveData:
+    """load_data/save_data 레코드 변환 테스트"""
+
+    def test_load_returns_records(self, mocker, temp_data_dir, inquiry_dict):
+        """문의글 파일은 레코드 객체로 로드"""
+        import app
+
+        with open(temp_data_dir / 'inquiries.yaml', 'w', encoding='utf-8') as f:
+            yaml.dump({'inquiries': [inquiry_dict]}, f, allow_unicode=True)
+
+        inquiries = app.load_data('inquiries.yaml')
+
+        assert isinstance(inquiries[0], app.Inquiry)
+        assert inquiries[0].author == 'user1'
+
+    def test_save_and_reload(self, mocker, temp_data_dir, inquiry_dict):
+        """저장 후 다시 로드해도 동일"""
+        import app
+
+        inq = app.Inquiry.from_dict(inquiry_dict)
+        assert app.save_data('inquiries.yaml', [inq]) is True
+
+        assert app.load_data('inquiries.yaml') == [inq]
+
+    def test_invalid_records_kept_on_save(self, mocker, temp_data_dir, inquiry_dict):
+        """잘못된 항목은 목록에서 빠지지만, 다른 레코드를 추가해 저장해도 파일에는 그대로 남음"""
+        import app
+        import datastore
+
+        broken = {'id': 'broken', 'title': '작성자 없음', 'created_at': '2024-05-01 09:00:00'}
+        with open(temp_data_dir / 'inquiries.yaml', 'w', encoding='utf-8') as f:
+            yaml.dump({'inquiries': [inquiry_dict, broken]}, f, allow_unicode=True)
+        datastore.store.invalidate()
+        mocker.patch('app.get_submission_tokens', return_value=app.submissions.RecentTokenStore())
+        mocker.patch('app.st.warning')
+        added = app.Inquiry.from_dict(dict(inquiry_dict, id='added'))
+
+        assert [r.id for r in app.load_data('inquiries.yaml')] == [inquiry_dict['id']]
+        assert app.append_record('inquiries.yaml', added, 'token-1') is True
+
+        with open(temp_data_dir / 'inquiries.yaml', encoding='utf-8') as f:
+            saved = yaml.safe_load(f)['inquiries']
+        assert [item['id'] for item in saved] == [inquiry_dict['id'], 'added', 'broken']
+        assert saved[-1] == broken
+        datastore.store.invalidate()
+        assert datastore.store.load('inquiries.yaml')[1] == 1
+
+    def test_invalid_records_warned(self, mocker, temp_data_dir, inquiry_dict):
+        """잘못된 항목은 경고 후 건너뜀"""
+        import app
+
+        with open(temp_data_dir / 'inquiries.yaml', 'w', encoding='utf-8') as f:
+            yaml.dump({'inquiries': [inquiry_dict, {'id': 'broken'}]}, f, allow_unicode=True)
+        mock_warning = mocker.patch('app.st.warning')
+
+        inquiries = app.load_data('inquiries.yaml')
+
+        assert len(inquiries) == 1
+        mock_warning.assert_called_once()
@@ -0,0 +1,159 @@
+"""
+서버 시작 전 미리 읽기 테스트
+"""
+import pytest
+import sys
+import os
+import importlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture
+def site(temp_data_dir, temp_users_yaml):
+    """users.yaml, content/, data/가 있는 임시 작업 디렉토리"""
+    import yaml
+
+    content_dir = temp_data_dir.parent / "content" / "public"
+    content_dir.mkdir(parents=True)
+    (content_dir / "01_의료진.md").write_text("# 의료진", encoding='utf-8')
+    (content_dir / "notes.txt").write_text("무시", encoding='utf-8')
+    with open(temp_data_dir / "reviews.yaml", 'w', encoding='utf-8') as f:
+        yaml.dump({'reviews': [{
+            'id': 'r1',
+            'author': 'user1',
+            'author_name': 'User One',
+            'title': '후기',
+            'content': '내용',
+            'created_at': '2024-05-06 10:00:00'
+        }]}, f, allow_unicode=True)
+    return temp_data_dir.parent
+
+
+class TestWarmUp:
+    """미리 읽기 테스트"""
+
+    def test_all_phases_succeed(self, site):
+        """모든 단계가 성공하고 단계별 결과가 보고되는지 확인"""
+        import serve
+
+        results = serve.warm_up()
+
+        assert [name for name, _, _, _ in results] == [name for name, _ in serve.WARMUP_PHASES]
+        assert all(ok for _, _, _, ok in results)
+        details = {name: detail for name, _, detail, _ in results}
+        assert details["데이터 파일"] == "레코드 1건"
+        assert details["사용자 정보"] == "사용자 3명"
+        assert details["마크다운 콘텐츠"] == "마크다운 1개"
+
+    def test_caches_warm_after_warm_up(self, mocker, site):
+        """미리 읽은 뒤에는 앱의 조회가 파일을 다시 파싱하지 않는지 확인"""
+        import serve
+        import app
+
+        serve.warm_up()
+        yaml_spy = mocker.spy(app.dataformat, 'safe_load')
+        read_spy = mocker.spy(app.datastore, 'read_text')
+
+        assert [r.id for r in app.query_data('reviews.yaml')] == ['r1']
+        assert 'testuser' in app.load_users()
+        assert app.load_markdown_file(os.path.join('content', 'public', '01_의료진.md')) == "# 의료진"
+
+        assert yaml_spy.call_count == 0
+        assert read_spy.call_count == 0
+
+    def test_failed_phase_does_not_stop_others(self):
+        """한 단계가 실패해도 나머지 단계를 실행하고 실패를 보고하는지 확인"""
+        import serve
+
+        def broken():
+            raise OSError("디스크 오류")
+
+        ticks = iter([0.0, 0.5, 1.0, 1.25])
+        results = serve.warm_up(
+            [("실패", broken), ("성공", lambda: "완료")],
+            clock=lambda: next(ticks)
+        )
+
+        assert results == [
+            ("실패", 0.5, "OSError: 디스크 오류", False),
+            ("성공", 0.25, "완료", True)
+        ]
+
+    def test_format_report(self):
+        """단계별 소요 시간과 합계가 출력되는지 확인"""
+        import serve
+
+        report = serve.format_report([("데이터 파일", 0.012, "레코드 3건", True), ("실패", 0.001, "오류", False)])
+
+        assert "✓ 데이터 파일" in report
+        assert "12.0 ms" in report
+        assert "✗ 실패" in report
+        assert "합계 13.0 ms" in report
+
+
+class TestEntryPoint:
+    """서버 시작 스크립트 테스트"""
+
+    def test_warmup_only_does_not_start_server(self, mocker, capsys):
+        """--warmup-only는 서버를 시작하지 않고 결과만 출력하는지 확인"""
+        import serve
+
+        mocker.patch('serve.warm_up', return_value=[("데이터 파일", 0.001, "레코드 0건", True)])
+        cli_main = mocker.patch('streamlit.web.cli.main')
+
+        assert serve.main(['--warmup-only']) == 0
+
+        cli_main.assert_not_called()
+        assert "데이터 파일" in capsys.readouterr().out
+
+    def test_passes_options_to_streamlit(self, mocker):
+        """나머지 옵션을 streamlit run에 그대로 넘기는지 확인"""
+        import serve
+
+        mocker.patch('serve.warm_up', return_value=[])
+        start_watcher = mocker.patch('serve.watcher.start_once')
+        cli_main = mocker.patch('streamlit.web.cli.main', return_value=0)
+        mocker.patch.object(sys, 'argv', ['serve.py'])
+
+        serve.main(['--server.port', '8502'])
+
+        start_watcher.assert_called_once()
+        cli_main.assert_called_once()
+        assert sys.argv == ['streamlit', 'run', 'app.py', '--server.port', '8502']
+
+
+class TestImportSideEffects:
+    """app 모듈 import 시 부수 효과 테스트"""
+
+    def test_import_has_no_page_config_or_io(self, mocker):
+        """import만으로는 페이지 설정, 세션 초기화, 파일 읽기가 일어나지 않는지 확인"""
+        import app
+        import builtins
+
+        set_page_config = mocker.patch('streamlit.set_page_config')
+        opened = mocker.spy(builtins, 'open')
+        session_state = {}
+        mocker.patch('streamlit.session_state', session_state)
+
+        importlib.reload(app)
+
+        set_page_config.assert_not_called()
+        assert session_state == {}
+        assert not [c for c in opened.call_args_list if not str(c.args[0]).endswith('.py')]
+
+    def test_init_session_state_defaults(self, mocker):
+        """세션 초기화 함수가 기본값만 채우고 기존 값은 유지하는지 확인"""
+        import app
+
+        session_state = {'logged_in': True}
+        mocker.patch('app.st.session_state', session_state)
+
+        app.init_session_state()
+
+        assert session_state == {
+            'logged_in': True,
+            'username': None,
+            'role': None,
+            'user_name': None
+        }
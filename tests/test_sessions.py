@@ -0,0 +1,258 @@
+"""
+서명된 세션 토큰 테스트
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SessionDict(dict):
+    """속성 접근과 get()을 모두 지원하는 세션 상태"""
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    __setattr__ = dict.__setitem__
+
+
+class TestSessionSigner:
+    """토큰 발급/검증 테스트"""
+
+    def test_roundtrip(self):
+        """발급한 토큰의 클레임을 그대로 검증하는지 확인"""
+        from sessions import SessionSigner
+
+        signer = SessionSigner('secret', ttl=3600, clock=FakeClock())
+
+        claims = signer.verify(signer.issue('testuser', 'user', '테스트 사용자'))
+
+        assert claims['sub'] == 'testuser'
+        assert claims['role'] == 'user'
+        assert claims['name'] == '테스트 사용자'
+        assert claims['exp'] == claims['iat'] + 3600
+
+    def test_other_replica_verifies(self):
+        """같은 비밀 키를 가진 다른 서명기(다른 레플리카)도 검증하는지 확인"""
+        from sessions import SessionSigner
+
+        token = SessionSigner('secret').issue('testuser', 'user', 'Test User')
+
+        assert SessionSigner('secret').verify(token)['sub'] == 'testuser'
+
+    @pytest.mark.parametrize('tamper', [
+        lambda t: t[:-2] + ('AA' if not t.endswith('AA') else 'BB'),
+        lambda t: 'x' + t,
+        lambda t: t.replace('.', ''),
+        lambda t: t + '.extra',
+        lambda t: '',
+    ])
+    def test_tampered_token_rejected(self, tamper):
+        """변조된 토큰을 거부하는지 확인"""
+        from sessions import SessionSigner, SessionTokenError
+
+        signer = SessionSigner('secret')
+        token = signer.issue('testuser', 'user', 'Test User')
+
+        with pytest.raises(SessionTokenError):
+            signer.verify(tamper(token))
+
+    def test_forged_role_rejected(self):
+        """클레임을 바꾸어 다시 인코딩한 토큰을 거부하는지 확인"""
+        import json
+        from sessions import SessionSigner, SessionTokenError, _b64encode, _b64decode
+
+        signer = SessionSigner('secret')
+        payload, signature = signer.issue('testuser', 'user', 'Test User').split('.')
+        claims = json.loads(_b64decode(payload))
+        claims['role'] = 'admin'
+        forged = _b64encode(json.dumps(claims).encode('utf-8')) + '.' + signature
+
+        with pytest.raises(SessionTokenError):
+            signer.verify(forged)
+
+    def test_wrong_secret_rejected(self):
+        """다른 비밀 키로 서명된 토큰을 거부하는지 확인"""
+        from sessions import SessionSigner, SessionTokenError
+
+        token = SessionSigner('other').issue('testuser', 'user', 'Test User')
+
+        with pytest.raises(SessionTokenError):
+            SessionSigner('secret').verify(token)
+
+    def test_expired_token_rejected(self):
+        """만료된 토큰을 거부하는지 확인"""
+        from sessions import SessionSigner, SessionTokenError
+
+        clock = FakeClock()
+        signer = SessionSigner('secret', ttl=60, clock=clock)
+        token = signer.issue('testuser', 'user', 'Test User')
+        clock.now += 60
+
+        with pytest.raises(SessionTokenError):
+            signer.verify(token)
+
+    def test_key_rotation(self):
+        """이전 키로 서명된 토큰도 검증하고 새 토큰은 새 키로 서명하는지 확인"""
+        from sessions import SessionSigner, SessionTokenError
+
+        old_token = SessionSigner('old').issue('testuser', 'user', 'Test User')
+        rotated = SessionSigner(['new', 'old'])
+
+        assert rotated.verify(old_token)['sub'] == 'testuser'
+        with pytest.raises(SessionTokenError):
+            SessionSigner('old').verify(rotated.issue('testuser', 'user', 'Test User'))
+
+
+class TestLoadSecrets:
+    """비밀 키 설정 테스트"""
+
+    def test_from_environment(self, monkeypatch):
+        """환경 변수의 쉼표로 구분된 키 목록을 사용하는지 확인"""
+        from sessions import load_secrets
+
+        monkeypatch.setenv('BLUHILL_SESSION_SECRET', 'new, old')
+
+        assert load_secrets() == ['new', 'old']
+
+    def test_generated_file_shared(self, temp_data_dir, monkeypatch):
+        """환경 변수가 없으면 키 파일을 한 번 만들어 다시 사용하는지 확인"""
+        from sessions import load_secrets, SECRET_FILENAME
+
+        monkeypatch.delenv('BLUHILL_SESSION_SECRET')
+
+        first = load_secrets()
+        second = load_secrets()
+
+        assert first == second
+        assert len(first[0]) >= 32
+        assert (os.stat(temp_data_dir / SECRET_FILENAME).st_mode & 0o777) == 0o600
+
+
+class TestSessionRestore:
+    """앱의 세션 복원 테스트"""
+
+    @pytest.fixture
+    def session(self, mocker, sample_users):
+        import app
+
+        mocker.patch('app.load_users', return_value=sample_users)
+        state = SessionDict(logged_in=False, username=None, role=None, user_name=None)
+        mocker.patch('app.st.session_state', state)
+        return state
+
+    def set_cookie(self, mocker, token):
+        cookies = {} if token is None else {'bluhill_session': token}
+        mocker.patch('app.st.context', mocker.Mock(cookies=cookies))
+
+    def test_login_issues_token(self, session):
+        """로그인하면 검증 가능한 세션 토큰을 발급하는지 확인"""
+        import app
+        import sessions
+
+        assert app.login('testuser', 'testpass123') is True
+
+        claims = sessions.get_signer().verify(session.pending_session_cookie)
+        assert claims['sub'] == 'testuser'
+
+    def test_restore_from_cookie(self, session, mocker):
+        """새 서버 프로세스의 새 세션에서도 쿠키로 로그인 상태를 복원하는지 확인"""
+        import app
+        import sessions
+
+        token = sessions.SessionSigner('test-session-secret').issue('adminuser', 'admin', 'Admin Test User')
+        self.set_cookie(mocker, token)
+
+        assert app.restore_session() is True
+
+        assert session.logged_in is True
+        assert session.username == 'adminuser'
+        assert session.role == 'admin'
+        assert session.user_name == 'Admin Test User'
+
+    def test_no_cookie(self, session, mocker):
+        """쿠키가 없으면 로그아웃 상태로 두는지 확인"""
+        import app
+
+        self.set_cookie(mocker, None)
+
+        assert app.restore_session() is False
+        assert session.logged_in is False
+
+    def test_invalid_cookie_cleared(self, session, mocker):
+        """잘못된 토큰은 받아들이지 않고 쿠키를 지우도록 하는지 확인"""
+        import app
+
+        self.set_cookie(mocker, 'invalid.token')
+
+        assert app.restore_session() is False
+        assert session.logged_in is False
+        assert session.pending_session_cookie == ''
+
+    def test_changed_role_rejected(self, session, mocker):
+        """토큰 발급 후 역할이 바뀐 사용자는 복원하지 않는지 확인"""
+        import app
+        import sessions
+
+        token = sessions.get_signer().issue('testuser', 'admin', 'Test User')
+        self.set_cookie(mocker, token)
+
+        assert app.restore_session() is False
+        assert session.logged_in is False
+
+    def test_checked_once_per_session(self, session, mocker):
+        """로그아웃 후에는 연결 시점의 쿠키로 다시 로그인되지 않는지 확인"""
+        import app
+        import sessions
+
+        self.set_cookie(mocker, sessions.get_signer().issue('testuser', 'user', 'Test User'))
+        assert app.restore_session() is True
+
+        app.logout()
+
+        assert app.restore_session() is False
+        assert session.logged_in is False
+        assert session.pending_session_cookie == ''
+
+    def test_cookies_unsupported(self, session, mocker):
+        """st.context에 cookies가 없는 Streamlit 버전에서는 복원과 쿠키 저장을 건너뛰는지 확인"""
+        import app
+
+        html = mocker.patch('app.st.iframe', create=True)
+        mocker.patch('app.st.context', mocker.Mock(spec=['headers']))
+
+        assert app.restore_session() is False
+        assert session.logged_in is False
+
+        session.pending_session_cookie = 'abc.def'
+        app.flush_session_cookie()
+
+        html.assert_not_called()
+        assert session.pending_session_cookie is None
+
+    def test_flush_writes_cookie_once(self, session, mocker):
+        """대기 중인 쿠키 변경을 한 번만 브라우저에 보내는지 확인"""
+        import app
+
+        html = mocker.patch('app.st.iframe', create=True)
+        self.set_cookie(mocker, None)
+        session.pending_session_cookie = 'abc.def'
+
+        app.flush_session_cookie()
+        app.flush_session_cookie()
+
+        html.assert_called_once()
+        assert 'bluhill_session=abc.def' in html.call_args[0][0]
+        assert session.pending_session_cookie is None
@@ -0,0 +1,249 @@
+"""
+데이터 스냅샷 테스트
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_review(i, title=None):
+    from records import Review
+
+    return Review.from_dict({
+        'id': f'rev-{i}',
+        'author': 'user1',
+        'author_name': '사용자',
+        'title': title or f'후기 {i}',
+        'content': f'내용 {i}',
+        'created_at': f'2024-05-01 10:{i % 60:02d}:00'
+    })
+
+
+def save_reviews(reviews):
+    import datastore
+
+    datastore.store.save('reviews.yaml', reviews)
+
+
+def load_reviews():
+    import datastore
+
+    datastore.store.invalidate()
+    return datastore.store.load('reviews.yaml')[0]
+
+
+def count_objects(root):
+    return sum(len(files) for _, _, files in os.walk(root / 'objects'))
+
+
+@pytest.fixture
+def site(temp_data_dir):
+    """후기 120건과 users.yaml이 있는 작업 디렉토리"""
+    import datastore
+
+    datastore.store.invalidate()
+    save_reviews([make_review(i) for i in range(120)])
+    (temp_data_dir.parent / 'users.yaml').write_text("users:\n  user1: {name: 사용자}\n", encoding='utf-8')
+    return temp_data_dir
+
+
+@pytest.fixture
+def store(site):
+    from snapshot import SnapshotStore
+
+    return SnapshotStore(str(site.parent / 'snapshots'))
+
+
+class TestCreate:
+    """스냅샷 만들기 테스트"""
+
+    def test_first_snapshot(self, store, site):
+        """모든 레코드와 users.yaml을 저장하는지 확인"""
+        manifest = store.create()
+
+        files = manifest['files']
+        assert files['reviews.yaml']['records'] == 120
+        assert files['../users.yaml']['object']
+        assert manifest['summary']['new_records'] == 120
+        assert store.list() == [manifest['id']]
+
+    def test_unchanged_snapshot_stores_nothing(self, store, site):
+        """바뀐 것이 없으면 새로 저장하는 객체가 없는지 확인"""
+        store.create()
+        objects = count_objects(site.parent / 'snapshots')
+
+        manifest = store.create()
+
+        assert manifest['summary'] == {'changed_files': [], 'new_records': 0, 'stored_bytes': 0}
+        assert count_objects(site.parent / 'snapshots') == objects
+
+    def test_stores_only_changes(self, store, site):
+        """레코드 하나를 지우고 하나를 고치면 바뀐 레코드와 묶음만 저장하는지 확인"""
+        store.create()
+        objects = count_objects(site.parent / 'snapshots')
+        reviews = load_reviews()
+        del reviews[50]
+        reviews[100] = make_review(100, title="고친 후기")
+        save_reviews(reviews)
+
+        manifest = store.create()
+
+        assert manifest['summary']['changed_files'] == [os.path.join('data', 'reviews.yaml')]
+        assert manifest['summary']['new_records'] == 1
+        # 고친 레코드 1개 + 지운/고친 레코드가 속한 묶음 (각 묶음은 다음 경계와 합쳐질 수 있음)
+        assert count_objects(site.parent / 'snapshots') - objects <= 5
+
+    def test_retries_when_file_replaced_while_opening(self, store, site, mocker):
+        """파일을 여는 도중 다른 프로세스가 저장하면 다시 열어 일관된 상태를 저장하는지 확인"""
+        import builtins
+        import snapshot
+
+        real_open = builtins.open
+        calls = []
+
+        def racing_open(path, *args, **kwargs):
+            f = real_open(path, *args, **kwargs)
+            if path == os.path.join('data', 'reviews.yaml') and not calls:
+                calls.append(path)
+                save_reviews([make_review(i) for i in range(121)])
+            return f
+
+        mocker.patch.object(snapshot, 'open', side_effect=racing_open, create=True)
+
+        manifest = store.create()
+
+        assert manifest['files']['reviews.yaml']['records'] == 121
+
+
+class TestRestore:
+    """복원 테스트"""
+
+    def test_restore_previous_state(self, store, site):
+        """스냅샷 시점의 레코드와 users.yaml로 되돌리는지 확인"""
+        first = store.create()
+        before = load_reviews()
+        save_reviews([make_review(i, title="바뀐 후기") for i in range(10)])
+        (site.parent / 'users.yaml').write_text("users: {}\n", encoding='utf-8')
+        store.create()
+
+        restored = store.restore(first['id'])
+
+        assert sorted(restored) == sorted([os.path.join('data', 'reviews.yaml'), 'users.yaml'])
+        assert load_reviews() == before
+        assert 'user1' in (site.parent / 'users.yaml').read_text(encoding='utf-8')
+
+    def test_unchanged_files_skipped(self, store, site):
+        """스냅샷과 같은 파일은 다시 쓰지 않는지 확인"""
+        manifest = store.create()
+        inode = os.stat(site / 'reviews.yaml').st_ino
+
+        assert store.restore(manifest['id']) == []
+        assert os.stat(site / 'reviews.yaml').st_ino == inode
+
+    def test_removes_files_created_after_snapshot(self, store, site):
+        """스냅샷 시점에 없던 파일은 지우는지 확인"""
+        from records import Column
+
+        manifest = store.create()
+        import datastore
+        datastore.store.save('columns.yaml', [Column(id='c1', author='관리자', title='칼럼', content='내용')])
+
+        store.restore(manifest['id'])
+
+        assert not os.path.exists(site / 'columns.yaml')
+
+    def test_reply_threads(self, store, site):
+        """답글 스레드 파일을 저장/복원하고, 이후에 생긴 스레드는 지우는지 확인"""
+        import datastore
+        from records import Reply, thread_filename
+
+        def reply(reply_id, inquiry_id):
+            return Reply(id=reply_id, inquiry_id=inquiry_id, author='user1', author_name='사용자', content='답글')
+
+        datastore.store.save(thread_filename('inq-1'), [reply('r1', 'inq-1')])
+        manifest = store.create()
+        assert manifest['files']['replies/inq-1.yaml']['records'] == 1
+        datastore.store.save(thread_filename('inq-1'), [reply('r1', 'inq-1'), reply('r2', 'inq-1')])
+        datastore.store.save(thread_filename('inq-2'), [reply('r3', 'inq-2')])
+
+        store.restore(manifest['id'])
+
+        datastore.store.invalidate()
+        assert [r.id for r in datastore.store.load(thread_filename('inq-1'))[0]] == ['r1']
+        assert not os.path.exists(site / 'replies' / 'inq-2.yaml')
+
+    def test_restore_invalidates_caches(self, store, site, mocker):
+        """복원 후 데이터 캐시와 통계 집계를 비우는지 확인"""
+        manifest = store.create()
+        save_reviews([])
+        invalidate = mocker.patch('snapshot.datastore.store.invalidate')
+        reset = mocker.patch('snapshot.stats.store.reset')
+
+        store.restore(manifest['id'])
+
+        invalidate.assert_called_once_with('reviews.yaml')
+        reset.assert_called_once()
+
+    def test_independent_of_working_directory(self, store, site, monkeypatch):
+        """다른 작업 디렉토리에서 실행해도 데이터 디렉토리의 파일을 복원하는지 확인"""
+        import datastore
+
+        manifest = store.create()
+        save_reviews([])
+        monkeypatch.chdir(site)
+        monkeypatch.setattr(datastore, 'DATA_DIR', os.path.abspath('.'))
+
+        restored = store.restore(manifest['id'])
+
+        assert restored == [os.path.join(str(site), 'reviews.yaml')]
+        assert len(load_reviews()) == 120
+        assert not os.path.exists(site / 'data')
+
+    def test_previous_manifest_format(self, store, site):
+        """작업 디렉토리 기준 경로로 기록한 이전 manifest도 복원하는지 확인"""
+        import json
+
+        manifest = store.create()
+        path = site.parent / 'snapshots' / 'manifests' / f"{manifest['id']}.json"
+        old = dict(manifest, files={os.path.join('data', 'reviews.yaml'): manifest['files']['reviews.yaml'],
+                                    'users.yaml': manifest['files']['../users.yaml']})
+        del old['version']
+        path.write_text(json.dumps(old), encoding='utf-8')
+        save_reviews([])
+
+        assert store.restore(manifest['id']) == [os.path.join('data', 'reviews.yaml')]
+        assert len(load_reviews()) == 120
+
+    def test_waits_for_app_write(self, store, site):
+        """앱이 데이터 파일을 고쳐 쓰는 동안에는 복원이 기다렸다가 그 뒤에 바꾸는지 확인"""
+        import threading
+        import datastore
+
+        manifest = store.create()
+        save_reviews([])
+        started = threading.Event()
+
+        def restore():
+            started.set()
+            store.restore(manifest['id'])
+
+        worker = threading.Thread(target=restore)
+        with datastore.store.locked('reviews.yaml'):
+            worker.start()
+            started.wait(5)
+            worker.join(0.3)
+            # 잠금을 잡은 동안에는 복원하지 않습니다
+            assert worker.is_alive()
+            assert load_reviews() == []
+        worker.join(5)
+
+        assert len(load_reviews()) == 120
+
+    def test_unknown_snapshot(self, store):
+        """없는 스냅샷 ID는 오류인지 확인"""
+        from snapshot import SnapshotError
+
+        with pytest.raises(SnapshotError):
+            store.restore('없음')
@@ -0,0 +1,277 @@
+"""
+관리자 통계 집계 테스트
+"""
+import pytest
+import sys
+import os
+import math
+import threading
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def ts(value):
+    """작성일시 문자열 → 타임스탬프"""
+    import records
+
+    return records.parse_timestamp(value)
+
+
+def make_inquiry(inquiry_id, created_at, is_private=False, answered_at=None):
+    """테스트용 문의글 레코드"""
+    import records
+
+    return records.Inquiry.from_dict({
+        'id': inquiry_id,
+        'author': 'user1',
+        'author_name': 'User One',
+        'title': '문의',
+        'content': '내용',
+        'is_private': is_private,
+        'answered': answered_at is not None,
+        'answer': '답변' if answered_at else None,
+        'answered_at': answered_at,
+        'created_at': created_at
+    })
+
+
+class TestDashboardStats:
+    """카운터 갱신 테스트"""
+
+    def test_inquiry_counters(self):
+        """일별 건수, 공개/비공개, 답변 대기"""
+        import stats
+
+        current = stats.DashboardStats()
+        current.add_inquiry(ts('2024-05-01 09:00:00'), is_private=True)
+        current.add_inquiry(ts('2024-05-01 10:00:00'), is_private=False)
+        current.add_inquiry(ts('2024-05-02 10:00:00'), is_private=False)
+
+        assert current.inquiries_by_day == {'2024-05-01': 2, '2024-05-02': 1}
+        assert (current.private, current.public) == (1, 2)
+        assert current.pending == 3
+
+    def test_answer_updates_pending_and_latency(self):
+        """답변 시 대기 건수 감소 및 소요 시간 기록"""
+        import stats
+
+        current = stats.DashboardStats()
+        current.add_inquiry(ts('2024-05-01 09:00:00'), is_private=False)
+        current.add_answer(ts('2024-05-01 09:00:00'), ts('2024-05-01 11:00:00'))
+
+        assert current.pending == 0
+        assert current.pending_by_day['2024-05-01'] == 0
+        assert sum(current.latency_histogram) == 1
+        assert 7200 <= current.latency_percentile(50) < 7200 * 1.5
+
+    def test_percentiles(self):
+        """중앙값과 p95"""
+        import stats
+
+        current = stats.DashboardStats()
+        base = ts('2024-05-01 00:00:00')
+        for _ in range(19):
+            current.add_answer(base, base + 300)
+        current.add_answer(base, base + 86400 * 3)
+
+        assert current.latency_percentile(50) < 600
+        assert current.latency_percentile(95) < 600
+        assert current.latency_percentile(100) >= 86400 * 3
+
+    def test_percentile_overflow_and_empty(self):
+        """데이터가 없거나 마지막 구간을 넘는 경우"""
+        import stats
+
+        current = stats.DashboardStats()
+        assert current.latency_percentile(50) is None
+
+        current.add_answer(0, 86400 * 365)
+        assert math.isinf(current.latency_percentile(50))
+        assert '초과' in stats.format_duration(current.latency_percentile(50))
+
+    def test_daily_series_carries_pending(self):
+        """변경이 없는 날은 이전 대기 건수를 이어서 표시"""
+        import stats
+
+        current = stats.DashboardStats()
+        current.add_inquiry(ts('2024-04-28 09:00:00'), is_private=False)
+        current.add_inquiry(ts('2024-05-02 09:00:00'), is_private=False)
+        current.add_review(ts('2024-05-02 10:00:00'))
+
+        series = current.daily_series(date(2024, 5, 3), 3)
+
+        assert series == [
+            ('2024-05-01', 0, 0, 1),
+            ('2024-05-02', 1, 1, 2),
+            ('2024-05-03', 0, 0, 2),
+        ]
+
+    def test_daily_series_after_restore(self):
+        """파일에서 읽은 집계도 구간 이전 마지막 대기 건수를 찾고, 늦게 들어온 이전 날짜도 반영"""
+        import stats
+
+        current = stats.DashboardStats()
+        current.add_inquiry(ts('2024-04-20 09:00:00'), is_private=False)
+        current.add_inquiry(ts('2024-05-02 09:00:00'), is_private=False)
+        restored = stats.DashboardStats.from_dict(current.to_dict())
+        restored.add_inquiry(ts('2024-04-25 09:00:00'), is_private=False)
+
+        assert [row[3] for row in restored.daily_series(date(2024, 5, 1), 2)] == [3, 3]
+        assert [row[3] for row in restored.daily_series(date(2024, 4, 22), 2)] == [1, 1]
+        assert [row[3] for row in restored.daily_series(date(2024, 4, 1), 2)] == [0, 0]
+
+    def test_roundtrip(self):
+        """저장 형식 변환"""
+        import stats
+
+        current = stats.DashboardStats()
+        current.add_inquiry(ts('2024-05-01 09:00:00'), is_private=True)
+        current.add_answer(ts('2024-05-01 09:00:00'), ts('2024-05-01 10:00:00'))
+
+        restored = stats.DashboardStats.from_dict(current.to_dict())
+
+        assert restored.to_dict() == current.to_dict()
+
+    def test_invalid_saved_stats(self):
+        """버전이 다르거나 손상된 집계는 무시"""
+        import stats
+
+        assert stats.DashboardStats.from_dict({'version': 0}) is None
+        assert stats.DashboardStats.from_dict({'version': stats.STATS_VERSION}) is None
+        assert stats.DashboardStats.from_dict(None) is None
+
+    def test_rebuild_matches_incremental(self):
+        """다시 계산한 집계가 증분 갱신과 동일"""
+        import stats
+
+        inquiries = [
+            make_inquiry('a', '2024-05-01 09:00:00', is_private=True, answered_at='2024-05-02 09:00:00'),
+            make_inquiry('b', '2024-05-01 10:00:00'),
+        ]
+
+        incremental = stats.DashboardStats()
+        incremental.add_inquiry(inquiries[0].created_ts, True)
+        incremental.add_inquiry(inquiries[1].created_ts, False)
+        incremental.add_answer(inquiries[0].created_ts, inquiries[0].answered_ts)
+
+        rebuilt = stats.DashboardStats.rebuild(inquiries, [])
+
+        assert rebuilt.to_dict() == incremental.to_dict()
+
+    def test_rating_summary(self):
+        """진료과목별 후기 수와 평균 별점 (별점이 없거나 범위 밖이면 평균에서 제외)"""
+        import stats
+
+        current = stats.DashboardStats()
+        current.add_review(ts('2024-05-01 09:00:00'), '추나요법', 5)
+        current.add_review(ts('2024-05-01 10:00:00'), '추나요법', 2)
+        current.add_review(ts('2024-05-01 11:00:00'), '추나요법', None)
+        current.add_review(ts('2024-05-01 12:00:00'), '추나요법', 9)
+        current.add_review(ts('2024-05-01 13:00:00'), None, 4)
+
+        assert current.rating_summary('추나요법') == (4, 3.5, 2)
+        assert current.rating_summary('공진단') == (0, None, 0)
+        assert current.reviews == 5
+        assert stats.DashboardStats.from_dict(current.to_dict()).to_dict() == current.to_dict()
+
+    def test_rebuild_includes_ratings(self):
+        """다시 계산한 집계에 진료과목별 별점 분포가 포함"""
+        import stats
+        import records
+
+        reviews = [records.Review(id=str(i), author='user1', author_name='User One', title='후기', content='내용',
+                                  category='공진단', rating=rating, created_ts=ts('2024-05-01 09:00:00'))
+                   for i, rating in enumerate([5, 4, 4])]
+
+        rebuilt = stats.DashboardStats.rebuild([], reviews)
+
+        assert rebuilt.rating_histograms == {'공진단': [0, 0, 0, 2, 1]}
+        assert rebuilt.rating_summary('공진단')[1] == pytest.approx(13 / 3)
+
+
+class TestStatsStore:
+    """집계 파일 저장소 테스트"""
+
+    def test_rebuilds_when_missing(self, temp_data_dir):
+        """집계 파일이 없으면 데이터에서 계산"""
+        import datastore
+        import stats
+
+        datastore.store.save('inquiries.yaml', [make_inquiry('a', '2024-05-01 09:00:00')])
+
+        current = stats.StatsStore().get()
+
+        assert current.pending == 1
+        assert (temp_data_dir / 'stats.yaml').exists()
+
+    def test_update_not_double_counted_after_rebuild(self, temp_data_dir):
+        """집계를 새로 계산한 직후의 갱신은 중복 반영하지 않음"""
+        import datastore
+        import stats
+
+        inquiry = make_inquiry('a', '2024-05-01 09:00:00')
+        datastore.store.save('inquiries.yaml', [inquiry])
+
+        store = stats.StatsStore()
+        store.update(lambda current: current.add_inquiry(inquiry.created_ts, False))
+
+        assert store.get().total_inquiries == 1
+
+    def test_update_persisted(self, temp_data_dir):
+        """갱신된 집계는 다른 저장소 인스턴스(프로세스)에서도 보임"""
+        import stats
+
+        stats.StatsStore().get()
+        stats.StatsStore().update(lambda current: current.add_review(ts('2024-05-01 09:00:00')))
+
+        assert stats.StatsStore().get().reviews == 1
+
+    def test_concurrent_updates_not_lost(self, temp_data_dir):
+        """여러 저장소 인스턴스(프로세스)가 동시에 갱신해도 모든 갱신이 남고 임시 파일이 남지 않음"""
+        import stats
+
+        stats.StatsStore().get()
+        stores = [stats.StatsStore() for _ in range(4)]
+
+        def work(store):
+            for _ in range(25):
+                store.update(lambda current: current.add_review(ts('2024-05-01 09:00:00')))
+
+        threads = [threading.Thread(target=work, args=(store,)) for store in stores]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert stats.StatsStore().get().reviews == 100
+        assert not [name for name in os.listdir(temp_data_dir) if name.endswith('.tmp')]
+
+
+class TestAppendRecordStats:
+    """레코드 추가 시 집계 갱신 테스트"""
+
+    def test_append_updates_stats(self, mocker, temp_data_dir):
+        """문의글 추가 시 집계 반영"""
+        import app
+
+        mocker.patch('app.get_submission_tokens', return_value=app.submissions.RecentTokenStore())
+        mocker.patch('app.stats.store', app.stats.StatsStore())
+
+        app.append_record('inquiries.yaml', make_inquiry('a', '2024-05-01 09:00:00'), 'a')
+        app.append_record('inquiries.yaml', make_inquiry('b', '2024-05-01 10:00:00', is_private=True), 'b')
+
+        current = app.stats.store.get()
+        assert current.total_inquiries == 2
+        assert current.private == 1
+
+    def test_stats_failure_does_not_fail_write(self, mocker, temp_data_dir):
+        """집계 갱신 실패는 저장 결과에 영향 없음"""
+        import app
+
+        mocker.patch('app.get_submission_tokens', return_value=app.submissions.RecentTokenStore())
+        mock_store = mocker.patch('app.stats.store')
+        mock_store.update.side_effect = OSError('disk full')
+
+        assert app.append_record('inquiries.yaml', make_inquiry('a', '2024-05-01 09:00:00'), 'a') is True
+        mock_store.reset.assert_called_once()
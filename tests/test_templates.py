@@ -0,0 +1,157 @@
+"""
+관리자 답변 템플릿 테스트
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_template(template_id, name, body, retired=False):
+    from records import AnswerTemplate
+
+    return AnswerTemplate(id=template_id, name=name, body=body, author='admin1', retired=retired)
+
+
+def make_inquiry(inquiry_id, **fields):
+    from records import Inquiry
+
+    return Inquiry.from_dict(dict({
+        'id': inquiry_id, 'author': 'user1', 'author_name': 'User One', 'title': '진료시간 문의',
+        'content': '내용', 'created_at': '2024-05-01 09:00:00'
+    }, **fields))
+
+
+class TestPrefixIndex:
+    """접두어 트라이 테스트"""
+
+    def test_search(self):
+        """접두어로 찾고, 추가한 순서와 개수 제한을 지키며, 대소문자를 구분하지 않음"""
+        from templates import PrefixIndex
+
+        index = PrefixIndex()
+        index.add('진료시간', 1)
+        index.add('진료비', 2)
+        index.add('주차', 3)
+        index.add('Parking', 3)
+
+        assert index.search('진료') == [1, 2]
+        assert index.search('진료', limit=1) == [1]
+        assert index.search('') == [1, 2, 3]
+        assert index.search('park') == [3]
+        assert index.search('위치') == []
+
+
+class TestRender:
+    """변수 채우기 테스트"""
+
+    def test_variables(self):
+        """문의글에서 채우는 변수와 직접 입력하는 변수를 구분하고, 값이 없는 변수는 그대로 둠"""
+        import templates
+
+        body = "{작성자}님, 예약일은 {날짜}입니다. {날짜} {시간}에 뵙겠습니다."
+        inquiry = make_inquiry('a')
+
+        assert templates.variables(body) == ['작성자', '날짜', '시간']
+        assert templates.input_variables(body) == ['날짜', '시간']
+        assert templates.render(body, {'날짜': '5월 3일'}, inquiry) == \
+            "User One님, 예약일은 5월 3일입니다. 5월 3일 {시간}에 뵙겠습니다."
+
+    def test_reference_is_compact(self):
+        """템플릿 답변은 본문 대신 참조와 변수만 저장하고, 직접 작성한 답변에는 빈 필드를 쓰지 않음"""
+        free = make_inquiry('a', answered=True, answer='진료시간은 평일 9시부터 18시까지입니다. ' * 5)
+        templated = make_inquiry('b', answered=True, answer_template='t1', answer_vars={'요일': '토요일'})
+
+        assert 'answer_template' not in free.to_dict()
+        assert 'answer_vars' not in free.to_dict()
+        assert templated.to_dict()['answer'] is None
+        assert len(str(templated.to_dict())) < len(str(free.to_dict()))
+
+
+class TestLibrary:
+    """템플릿 목록 테스트"""
+
+    @pytest.fixture
+    def store(self, temp_data_dir):
+        import datastore
+
+        datastore.store.invalidate()
+        return datastore.store
+
+    def test_search_and_rebuild(self, store):
+        """이름의 단어로도 찾고, 보관한 템플릿은 검색되지 않으며, 파일이 바뀌면 다시 만듦"""
+        import templates
+
+        library = templates.TemplateLibrary()
+        store.save(templates.TEMPLATES_FILENAME, [
+            make_template('t1', '진료시간 안내', '평일 9시~18시'),
+            make_template('t2', '공진단 가격', '{개수}환 기준 문의 바랍니다'),
+            make_template('t3', '진료비 안내', '이전 안내', retired=True),
+        ])
+
+        assert [t.id for t in library.search('진료')] == ['t1']
+        assert [t.id for t in library.search('가격')] == ['t2']
+        assert library.get('t3').retired is True
+
+        store.save(templates.TEMPLATES_FILENAME, store.load(templates.TEMPLATES_FILENAME)[0] + [
+            make_template('t4', '진료비 안내', '초진 2만원'),
+        ])
+        assert [t.name for t in library.search('진료')] == ['진료비 안내', '진료시간 안내']
+
+    def test_answer_text(self, store):
+        """보관한 템플릿으로 저장한 답변도 표시하고, 템플릿이 없으면 안내를 표시"""
+        import templates
+
+        store.save(templates.TEMPLATES_FILENAME, [
+            make_template('t1', '예약 확인', '{작성자}님, {날짜}에 예약되었습니다.', retired=True),
+        ])
+        answered = make_inquiry('a', answered=True, answer_template='t1', answer_vars={'날짜': '5월 3일'})
+
+        assert templates.answer_text(answered) == "User One님, 5월 3일에 예약되었습니다."
+        assert templates.answer_text(make_inquiry('b', answered=True, answer='직접 답변')) == "직접 답변"
+        assert templates.answer_text(make_inquiry('c', answered=True, answer_template='없음')).startswith("⚠️")
+
+    def test_save_templated_answer(self, store, mocker, mock_session_state):
+        """템플릿으로 답변하면 참조와 변수만 저장하고, 알림에는 완성한 본문을 보냄"""
+        import app
+        import templates
+
+        mocker.patch('app.st.session_state', mock_session_state)
+        notify = mocker.patch('app.enqueue_notification')
+        mocker.patch('app.audit.trail')
+        mocker.patch('app.load_users', return_value={'user1': {'email': 'user1@example.com'}})
+        mock_session_state.username = 'admin1'
+        mock_session_state.user_name = '관리자'
+        store.save(templates.TEMPLATES_FILENAME, [make_template('t1', '예약 확인', '{날짜}에 예약되었습니다.')])
+        store.save('inquiries.yaml', [make_inquiry('a')])
+
+        assert app.save_answer('a', None, 't1', {'날짜': '5월 3일'}) is True
+
+        saved = store.load('inquiries.yaml')[0][0]
+        assert saved.answer is None
+        assert (saved.answer_template, saved.answer_vars) == ('t1', {'날짜': '5월 3일'})
+        assert notify.call_args[0][2].endswith("5월 3일에 예약되었습니다.")
+
+    def test_retire_audited(self, store, mocker, mock_session_state, tmp_path):
+        """템플릿을 보관하면 감사 로그에 보관 전/후의 바뀐 필드가 남는지 확인"""
+        import app
+        import templates
+        from audit import AuditLog
+
+        trail = AuditLog(root=str(tmp_path / 'audit'))
+        mocker.patch('app.audit.trail', trail)
+        mocker.patch('app.st.session_state', mock_session_state)
+        mock_session_state.username = 'admin1'
+        mock_session_state.user_name = '관리자'
+        store.save(templates.TEMPLATES_FILENAME, [make_template('t1', '예약 확인', '예약되었습니다.')])
+        # 화면의 목록과 같은 캐시 레코드를 먼저 읽어 둡니다
+        assert templates.library.active()[0].id == 't1'
+
+        assert app.retire_template('t1') is True
+        trail.flush()
+
+        assert store.load(templates.TEMPLATES_FILENAME)[0][0].retired is True
+        event = trail.history('t1')[-1]
+        assert event['action'] == 'retire_template'
+        assert (event['before'], event['after']) == ({'retired': False}, {'retired': True})
@@ -0,0 +1,284 @@
+"""
+지점(테넌트)별 데이터 분리 테스트
+"""
+import pytest
+import sys
+import os
+import contextvars
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+TENANTS_YAML = """
+tenants:
+  gangnam:
+    name: 블루힐 한의원 강남점
+    hosts: [gangnam.bluhill.example]
+  jamsil:
+    hosts: [Jamsil.Bluhill.Example]
+    practitioners: [박한의 원장]
+    hours:
+      5: [["09:00", "10:00"]]
+"""
+
+
+class SessionDict(dict):
+    """속성 접근과 get()을 모두 지원하는 세션 상태"""
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    __setattr__ = dict.__setitem__
+
+
+def make_review(review_id):
+    from records import Review
+
+    return Review(id=review_id, author='user1', author_name='User One', title='후기', content='내용')
+
+
+@pytest.fixture
+def registry(temp_data_dir, mocker):
+    """기본 지점과 gangnam, jamsil 지점이 있는 지점 목록 (지점별 캐시는 비운 상태)"""
+    import datastore
+    import tenants
+
+    (temp_data_dir.parent / "tenants.yaml").write_text(TENANTS_YAML, encoding='utf-8')
+    registry = tenants.TenantRegistry(str(temp_data_dir.parent / "tenants.yaml"))
+    mocker.patch('tenants.registry', registry)
+    for tenant in registry.tenants():
+        datastore.store.instance_for(tenant).invalidate()
+    return registry
+
+
+class TestRegistry:
+    """지점 목록과 지점 선택 테스트"""
+
+    def test_default_only_without_config(self, temp_data_dir):
+        """설정 파일이 없으면 작업 디렉토리를 쓰는 기본 지점만 있는지 확인"""
+        import tenants
+
+        registry = tenants.TenantRegistry(str(temp_data_dir.parent / "없음.yaml"))
+
+        assert [t.id for t in registry.tenants()] == ['default']
+        assert registry.resolve(host='anything.example').root == ''
+
+    def test_resolve(self, registry):
+        """URL 파라미터, 호스트 이름(포트/대소문자 무시) 순으로 지점을 정하는지 확인"""
+        assert registry.resolve(param='jamsil', host='gangnam.bluhill.example').id == 'jamsil'
+        assert registry.resolve(host='gangnam.bluhill.example:8501').id == 'gangnam'
+        assert registry.resolve(host='JAMSIL.bluhill.example').id == 'jamsil'
+        assert registry.resolve(param='없는지점', host='other.example').id == 'default'
+        gangnam = registry.get('gangnam')
+        assert gangnam.name == '블루힐 한의원 강남점'
+        assert gangnam.path('data') == os.path.join('tenants', 'gangnam', 'data')
+
+    @pytest.mark.parametrize('config', [
+        "tenants:\n  ../etc: {}\n",
+        "tenants:\n  a: {hosts: [x.example]}\n  b: {hosts: [x.example]}\n",
+        "tenants:\n  a: {practitioners: 김한의 원장}\n",
+        "tenants:\n  a: {hours: {7: [['09:00', '12:00']]}}\n",
+        "tenants:\n  a: {hours: {0: [['12:00', '09:00']]}}\n",
+    ])
+    def test_invalid_config(self, temp_data_dir, config):
+        """잘못된 지점 ID, 중복된 호스트, 잘못된 원장 목록/진료 시간은 오류인지 확인"""
+        import tenants
+
+        path = temp_data_dir.parent / "tenants.yaml"
+        path.write_text(config, encoding='utf-8')
+
+        with pytest.raises(tenants.TenantError):
+            tenants.TenantRegistry(str(path)).tenants()
+
+    def test_current_from_env(self, registry, monkeypatch):
+        """활성화하지 않았으면 BLUHILL_TENANT 지점을 사용하는지 확인"""
+        import tenants
+
+        monkeypatch.setenv('BLUHILL_TENANT', 'gangnam')
+        assert tenants.current().id == 'gangnam'
+        with tenants.activated(registry.get('jamsil')):
+            assert tenants.current().id == 'jamsil'
+        assert tenants.current().id == 'gangnam'
+
+        monkeypatch.setenv('BLUHILL_TENANT', '없는지점')
+        with pytest.raises(tenants.TenantError):
+            tenants.current()
+
+
+class TestTenantLocal:
+    """지점별 객체 프록시 테스트"""
+
+    def test_instance_per_tenant(self, registry):
+        """지점마다 따로 객체를 만들고, 속성 설정은 모든 지점에 적용하는지 확인"""
+        import tenants
+        from datastore import FileCache
+
+        local = tenants.TenantLocal(FileCache)
+        default = local.instance_for()
+        with tenants.activated(registry.get('gangnam')):
+            gangnam = local.instance_for()
+
+        assert default is not gangnam
+        local.verify = False
+        assert default.verify is False and gangnam.verify is False
+        # 나중에 만드는 지점의 객체에도 적용됩니다
+        assert local.instance_for(registry.get('jamsil')).verify is False
+
+
+class TestPartitionedData:
+    """지점별 데이터/캐시 분리 테스트"""
+
+    def test_data_isolated(self, registry):
+        """지점마다 다른 데이터 파일에 저장하고 읽는지 확인"""
+        import datastore
+        import tenants
+
+        datastore.store.save('reviews.yaml', [make_review('default-1')])
+        with tenants.activated(registry.get('gangnam')):
+            assert datastore.store.load('reviews.yaml')[0] == []
+            datastore.store.save('reviews.yaml', [make_review('gangnam-1')])
+
+        assert [r.id for r in datastore.store.load('reviews.yaml')[0]] == ['default-1']
+        assert os.path.exists(os.path.join('tenants', 'gangnam', 'data', 'reviews.yaml'))
+
+    def test_cache_bounded_per_tenant(self, registry, mocker):
+        """한 지점의 캐시가 한도를 넘어도 다른 지점의 캐시는 그대로인지 확인"""
+        import datastore
+        import tenants
+
+        busy = registry.get('gangnam')
+        datastore.store.save('reviews.yaml', [make_review('default-1')])
+        with tenants.activated(busy):
+            store = datastore.store.instance_for()
+            mocker.patch.object(store, 'max_records', 4)
+            for i in range(2):
+                datastore.store.save(f'replies/t{i}.yaml', [make_review(f'r{i}a'), make_review(f'r{i}b')])
+            # 다시 읽은 파일은 최근 사용으로 남고, 가장 오래 사용하지 않은 파일부터 버립니다
+            datastore.store.load('replies/t0.yaml')
+            datastore.store.save('replies/t2.yaml', [make_review('r2a'), make_review('r2b')])
+            assert [os.path.basename(path) for path in store._files] == ['t0.yaml', 't2.yaml']
+            assert store._records == 4
+
+        assert len(datastore.store.instance_for()._files) == 1
+
+    def test_file_cache_bounded(self, temp_data_dir):
+        """사용자 정보/콘텐츠 캐시는 파일 수 한도를 넘으면 오래된 파일부터 버리는지 확인"""
+        import datastore
+
+        cache = datastore.FileCache(max_files=2)
+        for name in ('a', 'b', 'c'):
+            (temp_data_dir / f"{name}.md").write_text(name, encoding='utf-8')
+        cache.get(str(temp_data_dir / "a.md"), datastore.read_text)
+        cache.get(str(temp_data_dir / "b.md"), datastore.read_text)
+        cache.get(str(temp_data_dir / "a.md"), datastore.read_text)
+        cache.get(str(temp_data_dir / "c.md"), datastore.read_text)
+
+        assert sorted(os.path.basename(path) for path in cache._files) == ['a.md', 'c.md']
+
+    def test_watcher_invalidates_owning_tenant(self, registry, mocker):
+        """바뀐 파일이 속한 지점의 캐시만 비우는지 확인"""
+        import datastore
+        import tenants
+        import watcher
+
+        datastore.store.save('reviews.yaml', [make_review('default-1')])
+        with tenants.activated(registry.get('gangnam')):
+            datastore.store.save('reviews.yaml', [make_review('gangnam-1')])
+        gangnam_store = datastore.store.instance_for(registry.get('gangnam'))
+        default_store = datastore.store.instance_for()
+
+        assert watcher.invalidate_path(os.path.join('tenants', 'gangnam', 'data', 'reviews.yaml')) is True
+
+        assert len(gangnam_store._files) == 0
+        assert len(default_store._files) == 1
+
+
+    def test_rate_limits_per_tenant(self, registry, mocker):
+        """한 지점이 요청 한도를 다 써도 다른 지점의 요청은 허용하는지 확인"""
+        import app
+        import tenants
+
+        mocker.patch.dict(app.RATE_LIMITS, {'write': {'per_user': (0, 10), 'global': (0, 2)}})
+        app.get_rate_limiters.clear()
+        try:
+            with tenants.activated(registry.get('gangnam')):
+                assert [app.check_rate_limit('write', f'user{i}') for i in range(3)] == [True, True, False]
+                assert app.get_rate_limit_stats()['write']['rejected_global'] == 1
+
+            assert app.check_rate_limit('write', 'user0') is True
+            assert app.get_rate_limit_stats()['write']['rejected_global'] == 0
+        finally:
+            app.get_rate_limiters.clear()
+
+    def test_notification_subject_uses_clinic_name(self, registry, mocker):
+        """알림 메일 제목에 현재 지점의 이름을 쓰는지 확인"""
+        import app
+        import tenants
+
+        mocker.patch('app.load_users', return_value={'user1': {'email': 'user1@example.com'}})
+        enqueue = mocker.patch('app.enqueue_notification')
+        inquiry = app.Inquiry(id='a', author='user1', author_name='User One',
+                              title='문의', content='내용', answered=True, answer='답변')
+
+        with tenants.activated(registry.get('gangnam')):
+            app.notify_answer(inquiry)
+
+        assert enqueue.call_args[0][1].startswith('[블루힐 한의원 강남점] ')
+
+    def test_booking_config_per_tenant(self, registry):
+        """지점마다 tenants.yaml의 원장 목록과 진료 시간으로 예약하는지 확인"""
+        from datetime import date
+        import booking
+        import tenants
+
+        # 다른 테스트가 만든 예약 엔진을 쓰지 않도록 새 프록시를 만듭니다
+        engine = tenants.TenantLocal(booking._tenant_engine)
+        saturday = date(2024, 5, 11)
+        jamsil = engine.instance_for(registry.get('jamsil'))
+        assert jamsil.practitioners == ['박한의 원장']
+        assert jamsil.weekday_slots[saturday.weekday()] == ['09:00', '09:30']
+        assert jamsil.weekday_slots[0] == []
+
+        default = engine.instance_for(registry.get('default'))
+        assert default.practitioners == booking.PRACTITIONERS
+        with tenants.activated(registry.get('gangnam')):
+            assert engine.weekday_slots == default.weekday_slots
+
+
+class TestTenantSessions:
+    """지점별 로그인 세션 테스트"""
+
+    def test_token_bound_to_tenant(self, registry):
+        """다른 지점에서 발급한 세션 토큰은 받아들이지 않는지 확인"""
+        import sessions
+        import tenants
+
+        with tenants.activated(registry.get('gangnam')):
+            token = sessions.get_signer().issue('admin1', 'admin', '관리자')
+            assert sessions.cookie_name() == 'bluhill_session_gangnam'
+            assert sessions.get_signer().verify(token)['tid'] == 'gangnam'
+
+        assert sessions.cookie_name() == 'bluhill_session'
+        with pytest.raises(sessions.SessionTokenError):
+            sessions.get_signer().verify(token)
+
+    def test_switching_tenant_logs_out(self, registry, mocker):
+        """세션이 다른 지점으로 옮겨 가면 로그인 상태를 비우는지 확인"""
+        import app
+
+        session = SessionDict(logged_in=True, username='admin1', role='admin', user_name='관리자',
+                              tenant_id='default', session_restore_checked=True)
+        mocker.patch('app.st.session_state', session)
+        mocker.patch('app.st.query_params', {'clinic': 'gangnam'})
+
+        # 테스트 스레드의 현재 지점이 바뀌지 않도록 복사한 컨텍스트에서 실행합니다
+        tenant = contextvars.copy_context().run(app.select_tenant)
+
+        assert tenant.id == 'gangnam'
+        assert session.logged_in is False and session.username is None
+        assert session.tenant_id == 'gangnam'
+        assert session.session_restore_checked is False
+        assert app.clinic_name(tenant) == '블루힐 한의원 강남점'
@@ -0,0 +1,179 @@
+"""
+문의글 답글 스레드 테스트
+"""
+import pytest
+import sys
+import os
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def write_inquiries(data_dir, inquiries):
+    with open(data_dir / "inquiries.yaml", 'w', encoding='utf-8') as f:
+        yaml.dump({'inquiries': inquiries}, f, allow_unicode=True)
+
+
+def inquiry_dict(inquiry_id='inq-1', **fields):
+    return dict({
+        'id': inquiry_id,
+        'author': 'user1',
+        'author_name': 'User One',
+        'title': '문의',
+        'content': '내용',
+        'is_private': False,
+        'answered': True,
+        'answer': '답변',
+        'created_at': '2024-05-06 10:00:00'
+    }, **fields)
+
+
+@pytest.fixture
+def replier(mocker, mock_session_state, temp_data_dir):
+    """답글을 작성하는 로그인 사용자 (제출 토큰/알림/감사 로그는 테스트용으로 대체)"""
+    import app
+    import datastore
+
+    datastore.store.invalidate()
+    mocker.patch('app.get_submission_tokens', return_value=app.submissions.RecentTokenStore())
+    mocker.patch('app.st.session_state', mock_session_state)
+    mock_session_state.logged_in = True
+    mock_session_state.username = 'user1'
+    mock_session_state.user_name = 'User One'
+    mock_session_state.role = 'user'
+    return mock_session_state
+
+
+class TestThreadFiles:
+    """스레드 파일 이름과 저장 테스트"""
+
+    def test_thread_filename(self):
+        """문의글 ID별 파일, 파일 이름에 쓸 수 없는 ID는 해시 사용"""
+        import records
+
+        assert records.thread_filename('abc-123') == 'replies/abc-123.yaml'
+        unsafe = records.thread_filename('../inquiries')
+        assert unsafe.startswith('replies/') and '..' not in unsafe
+        assert records.record_type_for('replies/abc-123.yaml') is records.Reply
+        assert records.record_key('replies/abc-123.yaml') == 'replies'
+        assert records.record_type_for('inquiries.yaml') is records.Inquiry
+        assert records.record_type_for('stats.yaml') is None
+
+    def test_save_and_load_replies(self, temp_data_dir):
+        """답글 파일을 저장하고 Reply 레코드로 다시 읽는지 확인"""
+        import datastore
+        from records import Reply, thread_filename
+
+        filename = thread_filename('inq-1')
+        reply = Reply(id='r1', inquiry_id='inq-1', author='user1', author_name='User One',
+                      author_role='user', content='추가 문의')
+
+        datastore.store.save(filename, [reply])
+        datastore.store.invalidate()
+        loaded, _ = datastore.store.load(filename)
+
+        assert (temp_data_dir / "replies" / "inq-1.yaml").exists()
+        assert [(r.id, r.content) for r in loaded] == [('r1', '추가 문의')]
+        assert isinstance(loaded[0], Reply)
+
+    def test_watcher_invalidates_thread(self, temp_data_dir, mocker):
+        """스레드 파일 변경이 해당 캐시 키로 전달되는지 확인"""
+        import watcher
+
+        store = mocker.patch('watcher.datastore.store')
+
+        assert watcher.invalidate_path(os.path.join('data', 'replies', 'inq-1.yaml')) is True
+        store.invalidate.assert_called_once_with('replies/inq-1.yaml')
+
+
+class TestPostReply:
+    """답글 등록 테스트"""
+
+    def test_updates_parent_metadata(self, replier, temp_data_dir, mocker):
+        """답글 수, 마지막 작성자, 최근 활동 시각을 부모 문의글에 기록"""
+        import app
+
+        notify = mocker.patch('app.enqueue_notification')
+        write_inquiries(temp_data_dir, [inquiry_dict(), inquiry_dict('inq-2')])
+        inquiry = app.load_data('inquiries.yaml')[0]
+
+        assert app.post_reply(inquiry, '추가 문의', 'token-1') is True
+        assert app.post_reply(inquiry, '또 문의', 'token-2') is True
+
+        parent, other = app.load_data('inquiries.yaml')
+        replies = app.load_data('replies/inq-1.yaml')
+        assert [r.content for r in replies] == ['추가 문의', '또 문의']
+        assert parent.reply_count == 2
+        assert parent.last_reply_by == 'user1'
+        assert parent.last_activity_ts == replies[-1].created_ts
+        assert app.awaiting_follow_up(parent)
+        assert other.reply_count == 0 and not os.path.exists(temp_data_dir / "replies" / "inq-2.yaml")
+        assert notify.call_args[0][0] == app.ADMIN_NOTIFY_EMAIL
+
+    def test_replayed_reply_dropped(self, replier, temp_data_dir, mocker):
+        """같은 토큰의 답글은 한 번만 저장"""
+        import app
+
+        mocker.patch('app.enqueue_notification')
+        write_inquiries(temp_data_dir, [inquiry_dict()])
+        inquiry = app.load_data('inquiries.yaml')[0]
+
+        app.post_reply(inquiry, '추가 문의', 'token-1')
+
+        assert app.post_reply(inquiry, '추가 문의', 'token-1') is None
+        assert app.load_data('inquiries.yaml')[0].reply_count == 1
+
+    def test_admin_reply_audited(self, replier, temp_data_dir, mocker):
+        """관리자 답글은 감사 로그에 남고 대기 상태가 풀리는지 확인"""
+        import app
+
+        mocker.patch('app.enqueue_notification')
+        trail = mocker.patch('app.audit.trail')
+        write_inquiries(temp_data_dir, [inquiry_dict(reply_count=1, last_reply_by='user1')])
+        replier.username, replier.user_name, replier.role = 'admin1', 'Admin', 'admin'
+        inquiry = app.load_data('inquiries.yaml')[0]
+
+        app.post_reply(inquiry, '확인했습니다', 'token-1')
+
+        parent = app.load_data('inquiries.yaml')[0]
+        assert not app.awaiting_follow_up(parent)
+        action, dataset, record_id = trail.record.call_args[0][2:5]
+        assert (action, dataset, record_id) == ('reply', 'replies/inq-1.yaml', 'inq-1')
+
+
+class TestLazyThread:
+    """펼친 문의글만 스레드를 읽는지 확인"""
+
+    def test_thread_loaded_when_opened(self, temp_data_dir):
+        """닫힌 문의글은 목록 요약만 표시하고, 펼치면 답글을 표시"""
+        from streamlit.testing.v1 import AppTest
+        import datastore
+
+        write_inquiries(temp_data_dir, [inquiry_dict(reply_count=1, last_reply_by='user1',
+                                                     last_activity_at='2024-05-07 09:30:00')])
+        (temp_data_dir / "replies").mkdir()
+        with open(temp_data_dir / "replies" / "inq-1.yaml", 'w', encoding='utf-8') as f:
+            yaml.dump({'replies': [{
+                'id': 'r1', 'inquiry_id': 'inq-1', 'author': 'user1', 'author_name': 'User One',
+                'author_role': 'user', 'content': '스레드 답글', 'created_at': '2024-05-07 09:30:00'
+            }]}, f, allow_unicode=True)
+        datastore.store.invalidate()
+
+        def script():
+            import streamlit as st
+            import app
+
+            st.session_state.update(logged_in=True, username='user2', user_name='User Two', role='user')
+            app.show_inquiry_list()
+
+        at = AppTest.from_function(script).run()
+        assert not at.exception
+        assert '💬 1 · 2024-05-07 09:30' in at.expander[0].label
+        assert not any('스레드 답글' in m.value for m in at.markdown)
+
+        at.session_state['inquiry_thread_inq-1'] = True
+        at.run()
+
+        assert any('스레드 답글' in m.value for m in at.markdown)
+        # 작성자가 아니면 답글 입력란이 없습니다
+        assert not any(t.label == "답글 작성" for t in at.text_area)
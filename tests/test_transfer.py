@@ -0,0 +1,310 @@
+"""
+대량 내보내기/가져오기 테스트
+"""
+import pytest
+import sys
+import os
+import io
+import json
+import threading
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_inquiry(i, **fields):
+    from markup import render_markdown
+
+    data = {
+        'id': f'inq-{i}',
+        'author': 'user1' if i % 2 else 'user2',
+        'author_name': '사용자',
+        'title': f'문의 {i}',
+        'content': f'첫 줄 "{i}"\n둘째 줄, 쉼표',
+        'is_private': bool(i % 3 == 0),
+        'answered': bool(i % 2),
+        'answer': '답변' if i % 2 else None,
+        'attachments': [f'{i:064x}'] if i == 1 else None,
+        'created_at': f'2024-05-{i + 1:02d} 10:00:00'
+    }
+    data['content_html'] = render_markdown(data['content'])
+    data.update(fields)
+    return data
+
+
+@pytest.fixture
+def inquiries(temp_data_dir):
+    """문의글 5건이 저장된 데이터 디렉토리"""
+    import datastore
+    from records import Inquiry
+
+    datastore.store.invalidate()
+    datastore.store.save('inquiries.yaml', [Inquiry.from_dict(make_inquiry(i)) for i in range(5)])
+    return temp_data_dir
+
+
+def write_jsonl(path, items):
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write((item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)) + '\n')
+    return str(path)
+
+
+def load_ids(filename='inquiries.yaml'):
+    import datastore
+
+    datastore.store.invalidate()
+    records, invalid = datastore.store.load(filename)
+    assert invalid == 0
+    return [r.id for r in records]
+
+
+class TestIterItems:
+    """데이터 파일 스트리밍 읽기 테스트"""
+
+    def test_streams_without_loading_file(self, inquiries, mocker):
+        """파일 전체를 safe_load하지 않고 항목을 하나씩 읽는지 확인"""
+        import transfer
+
+        spy = mocker.spy(transfer.yaml, 'safe_load')
+
+        items = transfer.iter_items('inquiries.yaml')
+        first = next(items)
+
+        assert first['id'] == 'inq-0'
+        assert [item['id'] for item in items] == [f'inq-{i}' for i in range(1, 5)]
+        assert spy.call_count == 0
+
+    def test_missing_or_empty_file(self, temp_data_dir):
+        """파일이 없거나 빈 목록이면 아무것도 반환하지 않는지 확인"""
+        import transfer
+
+        assert list(transfer.iter_items('reviews.yaml')) == []
+        (temp_data_dir / 'reviews.yaml').write_text("# 후기\nreviews: []\n", encoding='utf-8')
+        assert list(transfer.iter_items('reviews.yaml')) == []
+
+
+class TestExport:
+    """내보내기 테스트"""
+
+    def test_jsonl(self, inquiries):
+        """모든 레코드를 한 줄에 하나씩 내보내는지 확인"""
+        import transfer
+
+        out = io.StringIO()
+        counts = transfer.export_records('inquiries', out)
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert counts == {'exported': 5, 'filtered': 0, 'invalid': 0}
+        assert lines[1]['attachments'] == [f'{1:064x}']
+        assert lines[0]['content'] == make_inquiry(0)['content']
+
+    def test_filters(self, inquiries):
+        """작성일 범위, 답변 여부, 작성자 필터를 적용하는지 확인"""
+        import transfer
+
+        out = io.StringIO()
+        record_filter = transfer.RecordFilter(since=date(2024, 5, 2), until=date(2024, 5, 4),
+                                              answered=True, author='user1')
+        counts = transfer.export_records('inquiries', out, record_filter=record_filter)
+
+        assert [json.loads(line)['id'] for line in out.getvalue().splitlines()] == ['inq-1', 'inq-3']
+        assert counts['filtered'] == 3
+
+    def test_answered_filter_requires_inquiries(self, temp_data_dir):
+        """후기에 답변 여부 필터를 쓰면 오류인지 확인"""
+        import transfer
+
+        with pytest.raises(transfer.TransferError):
+            transfer.export_records('reviews', io.StringIO(), record_filter=transfer.RecordFilter(answered=True))
+
+
+class TestImport:
+    """가져오기 테스트"""
+
+    def test_csv_roundtrip(self, inquiries, tmp_path):
+        """CSV로 내보낸 레코드를 그대로 다시 가져오는지 확인"""
+        import datastore
+        import transfer
+
+        before, _ = datastore.store.load('inquiries.yaml')
+        csv_path = tmp_path / 'inquiries.csv'
+        with open(csv_path, 'w', encoding='utf-8', newline='') as out:
+            transfer.export_records('inquiries', out, 'csv')
+        os.remove(inquiries / 'inquiries.yaml')
+
+        result = transfer.import_records('inquiries', str(csv_path))
+
+        datastore.store.invalidate()
+        after, _ = datastore.store.load('inquiries.yaml')
+        assert result['imported'] == 5
+        assert after == before
+
+    def test_duplicates_and_invalid(self, inquiries, tmp_path):
+        """이미 있는 ID는 건너뛰고 형식 오류는 줄 번호와 함께 기록하는지 확인"""
+        import transfer
+
+        path = write_jsonl(tmp_path / 'in.jsonl', [
+            make_inquiry(0),
+            make_inquiry(10),
+            '{잘못된 JSON',
+            {'id': 'no-author', 'created_at': '2024-05-01 10:00:00'},
+            make_inquiry(11),
+        ])
+
+        result = transfer.import_records('inquiries', path)
+
+        assert result == {'imported': 2, 'duplicates': 1, 'filtered': 0, 'invalid': 2, 'total': 7}
+        assert load_ids()[-2:] == ['inq-10', 'inq-11']
+        job = transfer.ImportJob('inquiries')
+        with open(job.rejects_path, encoding='utf-8') as f:
+            assert [json.loads(line)['line'] for line in f] == [3, 4]
+        assert not os.path.exists(job.staging_path)
+        assert not os.path.exists(job.state_path)
+
+    def test_filter_applies(self, temp_data_dir, tmp_path):
+        """가져오기에도 필터를 적용하는지 확인"""
+        import transfer
+
+        path = write_jsonl(tmp_path / 'in.jsonl', [make_inquiry(i) for i in range(4)])
+
+        result = transfer.import_records('inquiries', path, record_filter=transfer.RecordFilter(author='user2'))
+
+        assert result['imported'] == 2
+        assert load_ids() == ['inq-0', 'inq-2']
+
+    def test_resume_after_interruption(self, inquiries, tmp_path):
+        """중단된 가져오기를 이어서 진행하면 빠짐없이 한 번씩만 가져오는지 확인"""
+        import transfer
+
+        path = write_jsonl(tmp_path / 'in.jsonl', [make_inquiry(i) for i in range(10, 30)])
+
+        class Crash(Exception):
+            pass
+
+        class CrashAfter13(transfer.RecordFilter):
+            seen = 0
+
+            def __call__(self, record):
+                self.seen += 1
+                if self.seen == 13:
+                    raise Crash()
+                return True
+
+        with pytest.raises(Crash):
+            transfer.import_records('inquiries', path, record_filter=CrashAfter13(), checkpoint_every=5)
+        with pytest.raises(transfer.TransferError):
+            transfer.import_records('inquiries', path)
+        assert load_ids() == [f'inq-{i}' for i in range(5)]
+
+        result = transfer.import_records('inquiries', path, resume=True, checkpoint_every=5)
+
+        assert load_ids() == [f'inq-{i}' for i in range(5)] + [f'inq-{i}' for i in range(10, 30)]
+        assert result['total'] == 25
+        assert result['duplicates'] == 0
+
+    def test_restart_discards_progress(self, temp_data_dir, tmp_path):
+        """--restart는 중단된 진행 상태를 버리고 처음부터 가져오는지 확인"""
+        import transfer
+
+        path = write_jsonl(tmp_path / 'in.jsonl', [make_inquiry(i) for i in range(3)])
+
+        class Interrupt(transfer.RecordFilter):
+            def __call__(self, record):
+                raise KeyboardInterrupt()
+
+        with pytest.raises(KeyboardInterrupt):
+            transfer.import_records('inquiries', path, record_filter=Interrupt(), checkpoint_every=1)
+
+        result = transfer.import_records('inquiries', path, restart=True)
+
+        assert result['imported'] == 3
+
+    @pytest.mark.security
+    def test_rendered_html_not_trusted(self, temp_data_dir, tmp_path):
+        """입력 파일의 렌더링된 본문은 버리고 원문에서 sanitize하여 다시 렌더링하는지 확인"""
+        import datastore
+        import transfer
+
+        path = write_jsonl(tmp_path / 'in.jsonl', [
+            make_inquiry(0, content='**굵게**<script>alert(1)</script>',
+                         content_html='<img src=x onerror="alert(1)">'),
+            make_inquiry(1, content='평문', content_html='<script>alert(2)</script>'),
+        ])
+
+        transfer.import_records('inquiries', path)
+
+        datastore.store.invalidate()
+        first, second = datastore.store.load('inquiries.yaml')[0]
+        assert first.content_html == '<p><strong>굵게</strong></p>'
+        assert second.content_html == '<p>평문</p>'
+
+    def test_merge_waits_for_app_write(self, inquiries, tmp_path, mocker):
+        """앱이 파일 잠금을 잡고 저장하는 동안 합치기를 기다려, 앱이 추가한 레코드를 잃지 않는지 확인"""
+        import datastore
+        import transfer
+        from records import Inquiry
+
+        merging = threading.Event()
+        merge = transfer.ImportJob.merge
+
+        def signal_merge(job):
+            merging.set()
+            return merge(job)
+
+        mocker.patch('transfer.ImportJob.merge', signal_merge)
+        path = write_jsonl(tmp_path / 'in.jsonl', [make_inquiry(9)])
+        worker = threading.Thread(target=transfer.import_records, args=('inquiries', path))
+
+        with datastore.store.locked('inquiries.yaml'):
+            worker.start()
+            assert merging.wait(5)
+            records, _ = datastore.store.load('inquiries.yaml')
+            datastore.store.save('inquiries.yaml', records + [Inquiry.from_dict(make_inquiry(7))])
+        worker.join(5)
+
+        assert load_ids() == [f'inq-{i}' for i in range(5)] + ['inq-7', 'inq-9']
+
+    def test_keeps_configured_data_format(self, inquiries, tmp_path, mocker):
+        """바이너리 형식으로 설정했으면 합친 데이터 파일도 바이너리로 쓰는지 확인"""
+        import dataformat
+        import transfer
+
+        mocker.patch('dataformat.DATA_FORMAT', 'binary')
+
+        result = transfer.import_records('inquiries', write_jsonl(tmp_path / 'in.jsonl', [make_inquiry(9)]))
+
+        assert result['total'] == 6
+        assert (inquiries / 'inquiries.yaml').read_bytes().startswith(dataformat.MAGIC)
+        assert load_ids() == [f'inq-{i}' for i in range(5)] + ['inq-9']
+
+    def test_resets_stats(self, inquiries, tmp_path, mocker):
+        """문의글을 가져오면 통계 집계를 다시 계산하게 하는지 확인"""
+        import transfer
+
+        reset = mocker.patch('transfer.stats.store.reset')
+
+        transfer.import_records('inquiries', write_jsonl(tmp_path / 'in.jsonl', [make_inquiry(9)]))
+
+        reset.assert_called_once()
+
+
+class TestMain:
+    """명령줄 테스트"""
+
+    def test_export_to_stdout(self, inquiries, capsys):
+        """표준 출력으로 내보내고 요약은 표준 오류로 출력하는지 확인"""
+        import transfer
+
+        assert transfer.main(['export', 'inquiries', '--answered', 'no']) == 0
+
+        captured = capsys.readouterr()
+        assert [json.loads(line)['id'] for line in captured.out.splitlines()] == ['inq-0', 'inq-2', 'inq-4']
+        assert '내보내기: 3건' in captured.err
+
+    def test_import_error_reported(self, temp_data_dir, tmp_path, capsys):
+        """입력 파일이 없으면 오류 메시지와 함께 1을 반환하는지 확인"""
+        import transfer
+
+        assert transfer.main(['import', 'reviews', str(tmp_path / 'missing.jsonl')]) == 1
+        assert '오류' in capsys.readouterr().err
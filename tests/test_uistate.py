@@ -0,0 +1,121 @@
+"""
+레코드별 UI 상태 관리 테스트
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def render(session, record_ids, editing=()):
+    """관리자 문의글 관리 화면이 한 번 실행될 때처럼 키를 사용합니다."""
+    from uistate import RecordUIState
+
+    ui = RecordUIState(session, 'admin_inquiry')
+    for record_id in record_ids:
+        if record_id in editing:
+            ui.set('editing', record_id, True)
+        if ui.get('editing', record_id, False):
+            session.setdefault(ui.key('answer_edit', record_id), "수정 중")
+        else:
+            session.setdefault(ui.key('answer', record_id), "")
+    return ui.evict_stale()
+
+
+class TestRecordUIState:
+    """레코드별 세션 키 관리 테스트"""
+
+    def test_key_format(self):
+        """기존과 같은 prefix_id 형식의 키를 발급하는지 확인"""
+        from uistate import RecordUIState
+
+        ui = RecordUIState({}, 'admin_inquiry')
+
+        assert ui.key('editing', 'abc') == 'editing_abc'
+        assert ui.key('answer_edit', 'abc') == 'answer_edit_abc'
+
+    def test_keys_for_visible_records_kept(self):
+        """화면에 표시된 레코드의 키는 유지되는지 확인"""
+        session = {}
+
+        render(session, ['a', 'b'], editing=['a'])
+        render(session, ['a', 'b'])
+
+        assert session['editing_a'] is True
+        assert session['answer_edit_a'] == "수정 중"
+        assert 'answer_b' in session
+
+    def test_keys_for_hidden_records_evicted(self):
+        """더 이상 표시되지 않는 레코드의 키는 지워지는지 확인"""
+        session = {}
+
+        render(session, ['a', 'b', 'c'], editing=['b'])
+        evicted = render(session, ['a'])
+
+        assert evicted == 3
+        assert 'answer_a' in session
+        assert 'editing_b' not in session
+        assert 'answer_edit_b' not in session
+        assert 'answer_c' not in session
+
+    def test_state_bounded_by_visible_records(self):
+        """여러 번 실행해도 세션 키 수가 표시된 레코드 수를 넘지 않는지 확인"""
+        session = {}
+
+        for page in range(50):
+            render(session, [f'{page}-{i}' for i in range(5)])
+
+        ui_keys = [k for k in session if not k.startswith('_ui_keys_')]
+        assert len(ui_keys) == 5
+
+    def test_other_keys_untouched(self):
+        """발급하지 않은 세션 키(로그인 상태, 폼 토큰 등)는 건드리지 않는지 확인"""
+        session = {'logged_in': True, 'form_token_inquiry_form': 'token', 'answer_manual': 'x'}
+
+        render(session, ['a'])
+        render(session, [])
+
+        assert session['logged_in'] is True
+        assert session['form_token_inquiry_form'] == 'token'
+        assert session['answer_manual'] == 'x'
+
+    def test_scopes_independent(self):
+        """다른 화면(scope)의 키는 서로 지우지 않는지 확인"""
+        from uistate import RecordUIState
+
+        session = {}
+        other = RecordUIState(session, 'other')
+        other.set('editing', 'x', True)
+        other.evict_stale()
+
+        render(session, [])
+
+        assert session['editing_x'] is True
+
+
+class TestSessionFootprint:
+    """세션 상태 크기 보고 테스트"""
+
+    def test_counts_and_orders_by_size(self):
+        """키 수와 크기 합계, 큰 순서 목록을 반환하는지 확인"""
+        from uistate import session_footprint
+
+        session = {'small': 1, 'large': 'x' * 10000}
+
+        count, total, sizes = session_footprint(session)
+
+        assert count == 2
+        assert sizes[0][0] == 'large'
+        assert sizes[0][1] > 10000
+        assert total == sum(size for _, size in sizes)
+
+    def test_unpicklable_value(self):
+        """pickle할 수 없는 값도 크기를 근사하여 보고하는지 확인"""
+        import threading
+        from uistate import session_footprint
+
+        count, total, _ = session_footprint({'lock': threading.Lock()})
+
+        assert count == 1
+        assert total > 0
@@ -0,0 +1,208 @@
+"""
+파일 변경 감시에 따른 캐시 무효화 테스트
+"""
+import pytest
+import sys
+import os
+import time
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def write_reviews(data_dir, ids):
+    """다른 프로세스가 저장한 것처럼 reviews.yaml을 직접 씁니다."""
+    tmp_path = data_dir / "reviews.yaml.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        yaml.dump({'reviews': [{
+            'id': review_id,
+            'author': 'user1',
+            'author_name': 'User One',
+            'title': '후기',
+            'content': '내용',
+            'created_at': '2024-05-06 10:00:00'
+        } for review_id in ids]}, f, allow_unicode=True)
+    os.replace(tmp_path, data_dir / "reviews.yaml")
+
+
+def wait_until(condition, timeout=5.0):
+    """condition()이 참이 될 때까지 기다리고 걸린 시간(초)을 반환합니다."""
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > timeout:
+            raise AssertionError("시간 안에 조건을 만족하지 않았습니다")
+        time.sleep(0.01)
+    return time.perf_counter() - started
+
+
+@pytest.fixture
+def site(temp_data_dir):
+    """data/, content/, users.yaml이 있는 임시 작업 디렉토리 (캐시는 비운 상태)"""
+    import datastore
+    import stats
+
+    (temp_data_dir.parent / "content" / "public").mkdir(parents=True)
+    (temp_data_dir.parent / "content" / "public" / "01_의료진.md").write_text("# 이전", encoding='utf-8')
+    (temp_data_dir.parent / "users.yaml").write_text("users: {}\n", encoding='utf-8')
+    datastore.store.invalidate()
+    datastore.files.invalidate()
+    stats.store.invalidate()
+    return temp_data_dir
+
+
+@pytest.fixture
+def running():
+    """테스트가 시작한 감시기를 끝날 때 멈춥니다."""
+    watchers = []
+    yield watchers.append
+    for w in watchers:
+        w.stop()
+
+
+class TestInvalidatePath:
+    """변경 파일별 캐시 무효화 테스트"""
+
+    def test_routes_to_caches(self, site, mocker):
+        """파일 종류에 맞는 캐시를 무효화하는지 확인"""
+        import watcher
+
+        store = mocker.patch('watcher.datastore.store')
+        files = mocker.patch('watcher.datastore.files')
+        stats_store = mocker.patch('watcher.stats.store')
+
+        assert watcher.invalidate_path(os.path.join('data', 'reviews.yaml')) is True
+        store.invalidate.assert_called_once_with('reviews.yaml')
+
+        assert watcher.invalidate_path(os.path.join('data', 'stats.yaml')) is True
+        stats_store.invalidate.assert_called_once()
+
+        assert watcher.invalidate_path(os.path.join('content', 'public', '01_의료진.md')) is True
+        assert watcher.invalidate_path('users.yaml') is True
+        assert files.invalidate.call_count == 2
+
+    def test_ignores_other_files(self, site, mocker):
+        """임시 파일, 첨부, 아웃박스 등은 무시하는지 확인"""
+        import watcher
+
+        store = mocker.patch('watcher.datastore.store')
+        files = mocker.patch('watcher.datastore.files')
+
+        assert watcher.invalidate_path(os.path.join('data', 'reviews.yaml.123.tmp')) is False
+        assert watcher.invalidate_path(os.path.join('data', 'outbox', 'pending', 'x.json')) is False
+        assert watcher.invalidate_path(os.path.join('content', 'public', 'notes.txt')) is False
+        assert watcher.invalidate_path('app.py') is False
+        store.invalidate.assert_not_called()
+        files.invalidate.assert_not_called()
+
+
+class TestCacheWatcher:
+    """감시기 테스트"""
+
+    @pytest.mark.parametrize('use_notify', [True, False])
+    def test_sibling_write_visible(self, site, running, use_notify):
+        """다른 프로세스가 저장한 데이터가 곧바로 반영되는지 확인"""
+        import datastore
+        import watcher
+
+        write_reviews(site, ['a'])
+        w = watcher.CacheWatcher(poll_interval=0.02, use_notify=use_notify).start()
+        running(w)
+        assert w.mode == ('notify' if use_notify else 'polling')
+        assert [r.id for r in datastore.store.load('reviews.yaml')[0]] == ['a']
+
+        write_reviews(site, ['a', 'b'])
+
+        wait_until(lambda: len(datastore.store.load('reviews.yaml')[0]) == 2)
+
+    @pytest.mark.parametrize('use_notify', [True, False])
+    def test_content_and_users_invalidated(self, site, running, use_notify):
+        """마크다운과 users.yaml 변경도 반영되는지 확인"""
+        import datastore
+        import watcher
+
+        w = watcher.CacheWatcher(poll_interval=0.02, use_notify=use_notify).start()
+        running(w)
+        path = os.path.join('content', 'public', '01_의료진.md')
+        assert datastore.files.get(path, datastore.read_text) == "# 이전"
+        assert datastore.files.get('users.yaml', yaml.safe_load) == {'users': {}}
+
+        (site.parent / "content" / "public" / "01_의료진.md").write_text("# 새 내용", encoding='utf-8')
+        (site.parent / "users.yaml").write_text("users:\n  user1: {}\n", encoding='utf-8')
+
+        wait_until(lambda: datastore.files.get(path, datastore.read_text) == "# 새 내용")
+        wait_until(lambda: 'user1' in datastore.files.get('users.yaml', yaml.safe_load)['users'])
+
+    def test_cached_reads_skip_stat_while_watching(self, site, running, mocker):
+        """감시 중에는 캐시 조회가 파일 상태를 확인하지 않는지 확인"""
+        import datastore
+        import watcher
+
+        write_reviews(site, ['a'])
+        w = watcher.CacheWatcher(use_notify=False, poll_interval=60).start()
+        running(w)
+        datastore.store.load('reviews.yaml')
+        spy = mocker.spy(datastore, '_signature')
+
+        datastore.store.load('reviews.yaml')
+        datastore.store.query('reviews.yaml')
+
+        assert spy.call_count == 0
+
+    def test_stop_restores_verification(self, site):
+        """감시를 멈추면 캐시가 다시 파일 상태를 확인하는지 확인"""
+        import datastore
+        import stats
+        import watcher
+
+        w = watcher.CacheWatcher(use_notify=False, poll_interval=60).start()
+        assert datastore.store.verify is False
+
+        w.stop()
+
+        assert datastore.store.verify is True
+        assert datastore.files.verify is True
+        assert stats.store.verify is True
+        assert w.mode is None
+
+    def test_falls_back_to_polling(self, site, running, mocker):
+        """변경 알림을 시작할 수 없으면 주기적 확인으로 전환하는지 확인"""
+        import watcher
+
+        mocker.patch.object(watcher.CacheWatcher, '_start_observer', side_effect=OSError("inotify 한도 초과"))
+
+        w = watcher.CacheWatcher(poll_interval=60).start()
+        running(w)
+
+        assert w.mode == 'polling'
+
+    def test_start_once_disabled(self, mocker):
+        """BLUHILL_WATCH=0이면 감시기를 시작하지 않는지 확인"""
+        import watcher
+
+        mocker.patch('watcher.WATCH_ENABLED', False)
+        start = mocker.patch.object(watcher.CacheWatcher, 'start')
+
+        assert watcher.start_once() is None
+        start.assert_not_called()
+
+
+class TestFileCacheGeneration:
+    """파싱 중 무효화 테스트"""
+
+    def test_invalidated_during_parse_not_cached(self, site):
+        """파싱 도중 무효화되면 이전 내용을 캐시에 넣지 않는지 확인"""
+        import datastore
+
+        cache = datastore.FileCache()
+        path = os.path.join('content', 'public', '01_의료진.md')
+
+        def parse_then_invalidate(f):
+            value = f.read()
+            cache.invalidate(path)
+            return value
+
+        cache.get(path, parse_then_invalidate)
+        (site.parent / "content" / "public" / "01_의료진.md").write_text("# 새 내용", encoding='utf-8')
+        cache.verify = False
+
+        assert cache.get(path, datastore.read_text) == "# 새 내용"
@@ -0,0 +1,220 @@
+"""
+관리자 작업 대기열 테스트
+"""
+import pytest
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+HOUR = 3600
+
+
+class Clock:
+    """테스트에서 시각을 직접 옮기는 시계"""
+
+    def __init__(self, now=100000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def queue_path(temp_data_dir):
+    return str(temp_data_dir / "workqueue.jsonl")
+
+
+def make_queue(path, clock, lease_seconds=600):
+    import workqueue
+
+    return workqueue.WorkQueue(path, lease_seconds=lease_seconds, clock=clock)
+
+
+def make_inquiry(inquiry_id, created_at, **fields):
+    from records import Inquiry
+
+    return Inquiry.from_dict(dict({
+        'id': inquiry_id, 'author': 'user1', 'author_name': 'User One', 'title': '문의',
+        'content': '내용', 'created_at': created_at
+    }, **fields))
+
+
+class TestOrdering:
+    """처리 기한순 정렬 테스트"""
+
+    def test_due_order(self, queue_path, clock):
+        """긴급 문의가 앞서지만, 기한이 더 이른 오래된 보통 문의가 먼저"""
+        queue = make_queue(queue_path, clock)
+        queue.enqueue('old', 0)
+        queue.enqueue('normal', 10 * HOUR)
+        queue.enqueue('urgent', 12 * HOUR, priority='high')
+
+        assert [item['id'] for item in queue.upcoming(3)] == ['urgent', 'old', 'normal']
+        assert [queue.claim(f'admin{i}', '관리자')[0]['id'] for i in range(3)] == ['urgent', 'old', 'normal']
+        assert queue.claim('admin9', '관리자') is None
+
+    def test_set_priority_and_complete(self, queue_path, clock):
+        """우선순위를 바꾸면 순서가 바뀌고, 완료한 문의는 다시 나오지 않음"""
+        import workqueue
+
+        queue = make_queue(queue_path, clock)
+        queue.enqueue('a', 0)
+        queue.enqueue('b', HOUR)
+
+        assert queue.set_priority('b', 'high') is True
+        assert queue.complete('b') is True
+        assert queue.complete('b') is False
+        assert queue.set_priority('b', 'low') is False
+        assert queue.claim('admin1', '관리자')[0]['id'] == 'a'
+        with pytest.raises(workqueue.WorkQueueError):
+            queue.enqueue('c', 0, priority='긴급')
+
+
+class TestLeases:
+    """맡김(lease) 테스트"""
+
+    def test_claim_exclusive_across_instances(self, queue_path, clock):
+        """다른 프로세스(인스턴스)가 이미 가져간 문의는 받지 않고, 같은 관리자는 맡은 문의를 다시 받음"""
+        first = make_queue(queue_path, clock)
+        second = make_queue(queue_path, clock)
+        first.enqueue('a', 0)
+        first.enqueue('b', HOUR)
+
+        item, lease = first.claim('admin1', '관리자1')
+        assert item['id'] == 'a' and lease['until'] == clock.now + 600
+        assert second.claim('admin2', '관리자2')[0]['id'] == 'b'
+        clock.now += 300
+        assert second.claim('admin1', '관리자1')[1]['until'] == clock.now + 600
+        assert first.counts() == (0, 2)
+        assert first.leases()['b']['admin_name'] == '관리자2'
+
+    def test_expired_lease_returns(self, queue_path, clock):
+        """맡긴 시간이 지나면 대기열로 돌아가고, 반납은 맡은 관리자만 가능"""
+        queue = make_queue(queue_path, clock)
+        queue.enqueue('a', 0)
+        queue.claim('admin1', '관리자1')
+
+        assert queue.release('a', 'admin2') is False
+        clock.now += 601
+        assert queue.held_by('admin1') is None
+        assert queue.claim('admin2', '관리자2')[0]['id'] == 'a'
+        assert queue.release('a', 'admin2') is True
+        assert queue.counts() == (1, 0)
+
+    def test_concurrent_claims(self, queue_path, clock):
+        """여러 세션이 동시에 가져가도 같은 문의를 두 번 맡기지 않음"""
+        make_queue(queue_path, clock).sync([(f'i{n}', n, n, 'normal') for n in range(40)])
+        claimed = []
+
+        def work(worker):
+            queue = make_queue(queue_path, clock)
+            for _ in range(10):
+                item, _ = queue.claim(f'admin{worker}', '관리자')
+                claimed.append(item['id'])
+                queue.complete(item['id'])
+
+        threads = [threading.Thread(target=work, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(claimed) == sorted(f'i{n}' for n in range(40))
+        assert make_queue(queue_path, clock).counts() == (0, 0)
+
+
+class TestLog:
+    """이벤트 로그 테스트"""
+
+    def test_compaction(self, queue_path, clock, mocker):
+        """로그를 다시 써도 현재 상태와 맡김이 유지되고, 다른 인스턴스도 새 로그를 읽음"""
+        mocker.patch('workqueue.COMPACT_MIN_EVENTS', 10)
+        queue = make_queue(queue_path, clock)
+        other = make_queue(queue_path, clock)
+        for n in range(12):
+            queue.enqueue(f'i{n}', n)
+        other.counts()
+        queue.claim('admin1', '관리자1')
+        for n in range(1, 10):
+            queue.complete(f'i{n}')
+
+        with open(queue_path, encoding='utf-8') as f:
+            assert len(f.readlines()) < 10
+        assert other.counts() == (2, 1)
+        assert other.held_by('admin1')[0]['id'] == 'i0'
+
+    def test_sync(self, queue_path, clock):
+        """데이터에 맞춰 빠진 문의는 넣고, 답변된 문의는 빼며, 바꾼 우선순위는 유지"""
+        queue = make_queue(queue_path, clock)
+        queue.enqueue('a', 0)
+        queue.enqueue('done', 0)
+        queue.set_priority('a', 'low')
+
+        assert queue.sync([('a', 0, 0, 'normal'), ('b', 5, 5, 'normal')]) == (1, 1)
+        assert queue.item('a')['priority'] == 'low'
+        assert queue.item('done') is None
+
+
+class TestAppQueue:
+    """문의 등록/답변/답글과 대기열 연동 테스트"""
+
+    @pytest.fixture
+    def admin(self, mocker, mock_session_state, temp_data_dir):
+        import app
+        import datastore
+
+        datastore.store.invalidate()
+        mocker.patch('app.get_submission_tokens', return_value=app.submissions.RecentTokenStore())
+        mocker.patch('app.st.session_state', mock_session_state)
+        mocker.patch('app.enqueue_notification')
+        mocker.patch('app.audit.trail')
+        mock_session_state.username = 'admin1'
+        mock_session_state.user_name = '관리자'
+        mock_session_state.role = 'admin'
+        return mock_session_state
+
+    def test_seed_enqueue_and_answer(self, admin, temp_data_dir):
+        """첫 등록 시 기존 대기 문의로 대기열을 채우고, 답변하면 대기열에서 빠짐"""
+        import app
+        import datastore
+        import workqueue
+
+        datastore.store.save('inquiries.yaml', [
+            make_inquiry('old', '2024-05-01 09:00:00'),
+            make_inquiry('answered', '2024-05-01 10:00:00', answered=True, answer='답변'),
+        ])
+        app.append_record('inquiries.yaml', make_inquiry('new', '2024-05-02 09:00:00'), 'new')
+
+        queue = workqueue.engine.instance_for()
+        assert queue.counts() == (2, 0)
+        item, _ = queue.claim('admin1', '관리자')
+        assert app.find_inquiry(item['id'], item['created']).id == 'old'
+
+        assert app.save_answer('old', '답변입니다') is True
+        assert queue.held_by('admin1') is None
+        assert [i['id'] for i in queue.upcoming(5)] == ['new']
+
+    def test_follow_up_requeued(self, admin, temp_data_dir):
+        """답변 후 작성자의 답글은 긴급으로 다시 넣고, 관리자의 답글로 빠짐"""
+        import app
+        import workqueue
+
+        app.save_data('inquiries.yaml', [make_inquiry('a', '2024-05-01 09:00:00', answered=True, answer='답변')])
+        app.sync_work_queue()
+        inquiry = app.load_data('inquiries.yaml')[0]
+        admin.username, admin.role = 'user1', 'user'
+
+        app.post_reply(inquiry, '추가 문의', 'token-1')
+
+        item = workqueue.engine.item('a')
+        assert item['priority'] == 'high' and item['since'] > item['created']
+        admin.username, admin.role = 'admin1', 'admin'
+        app.post_reply(inquiry, '추가 답변', 'token-2')
+        assert workqueue.engine.item('a') is None
@@ -0,0 +1,565 @@
+"""
+문의글/후기/칼럼 대량 내보내기/가져오기
+
+데이터 파일 전체를 yaml.safe_load로 읽지 않고 YAML 이벤트를 따라가며 레코드를 하나씩
+처리하므로, 레코드 수와 관계없이 레코드 하나 분량의 메모리로 내보내고 가져옵니다.
+바이너리 형식(dataformat.py)의 데이터 파일은 한 번에 읽고, 가져온 결과도 설정한 저장 형식
+(BLUHILL_DATA_FORMAT)으로 씁니다. 바이너리 형식이면 합친 레코드를 한 번에 씁니다.
+
+- 형식: JSONL(한 줄에 레코드 하나, 모든 필드 보존), CSV(스키마 필드만, 목록은 JSON 문자열)
+- 필터: 작성일 범위, 답변 여부(문의글), 작성자
+- 가져오기는 레코드를 검증하여 data/<파일>.import.jsonl에 모은 뒤 마지막에 기존 데이터와
+  합쳐 저장합니다. 진행 위치를 주기적으로 기록하므로 중단되면 --resume으로 이어서 진행합니다
+- 이미 있는 ID는 건너뜁니다 (중복 확인을 위해 ID 집합만 메모리에 유지합니다)
+- 입력 파일의 렌더링된 본문(`<필드>_html`)은 쓰지 않고 원문 마크다운에서 다시 렌더링합니다
+- 합칠 때는 앱과 같은 파일 잠금(datastore.store.locked)을 잡으므로 그동안의 앱 저장과 겹치지 않습니다
+- 검증에 실패한 레코드는 data/<파일>.import.rejects.jsonl에 줄 번호, 사유와 함께 기록합니다
+
+사용법:
+    python transfer.py export inquiries -o inquiries.jsonl --since 2024-01-01 --answered no
+    python transfer.py export reviews --format csv --author user1 > reviews.csv
+    python transfer.py import inquiries backup.jsonl [--resume | --restart]
+"""
+import io
+import os
+import csv
+import sys
+import json
+import argparse
+from datetime import datetime, timedelta
+
+import yaml
+
+import dataformat
+import datastore
+import markup
+import stats
+import workqueue
+from records import RECORD_TYPES, RecordValidationError, date_to_timestamp
+
+# 데이터셋 이름 → 데이터 파일 이름
+DATASETS = {filename[:-len('.yaml')]: filename for filename in RECORD_TYPES}
+FORMATS = ('jsonl', 'csv')
+# 가져오기 진행 위치를 기록하는 간격 (처리한 레코드 수)
+CHECKPOINT_EVERY = 1000
+
+_TRUE = {'true', '1', 'yes', 'y'}
+_FALSE = {'false', '0', 'no', 'n'}
+
+
+class TransferError(Exception):
+    """내보내기/가져오기를 진행할 수 없는 경우"""
+    pass
+
+
+def dataset_filename(dataset):
+    """데이터셋 이름(inquiries 등)의 데이터 파일 이름을 반환합니다."""
+    if dataset not in DATASETS:
+        raise TransferError(f"알 수 없는 데이터셋입니다: {dataset} (가능한 값: {', '.join(DATASETS)})")
+    return DATASETS[dataset]
+
+
+def detect_format(path, fmt=None):
+    """지정한 형식 또는 파일 확장자로 형식을 정합니다."""
+    if fmt is None and path:
+        fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise TransferError(f"형식을 알 수 없습니다: {fmt} (가능한 값: {', '.join(FORMATS)})")
+    return fmt
+
+
+def iter_stream_items(stream, key):
+    """YAML 스트림에서 최상위 key 목록의 항목을 하나씩 반환합니다."""
+    loader = yaml.SafeLoader(stream)
+    try:
+        loader.get_event()  # StreamStart
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStart
+        if not loader.check_event(yaml.MappingStartEvent):
+            return
+        loader.get_event()
+        while not loader.check_event(yaml.MappingEndEvent):
+            name = loader.construct_object(loader.compose_node(None, None))
+            if name != key or not loader.check_event(yaml.SequenceStartEvent):
+                loader.compose_node(None, None)
+                continue
+            loader.get_event()
+            while not loader.check_event(yaml.SequenceEndEvent):
+                item = loader.construct_object(loader.compose_node(None, None), deep=True)
+                # 생성한 객체를 들고 있지 않도록 비웁니다
+                loader.constructed_objects.clear()
+                yield item
+            loader.get_event()
+    finally:
+        loader.dispose()
+
+
+def iter_file_items(f, key):
+    """바이너리 모드로 연 데이터 파일에서 최상위 key 목록의 항목을 하나씩 반환합니다.
+
+    YAML 파일은 이벤트를 따라가며 읽고, 바이너리 형식 파일은 한 번에 읽습니다.
+    """
+    if dataformat.is_binary(f):
+        yield from dataformat.load_file(f).get(key) or []
+        return
+    stream = io.TextIOWrapper(f, encoding='utf-8')
+    try:
+        yield from iter_stream_items(stream, key)
+    finally:
+        # 파일은 호출한 쪽에서 닫습니다
+        stream.detach()
+
+
+def iter_items(filename):
+    """데이터 파일의 항목(dict)을 하나씩 반환합니다. YAML 파일은 전체를 메모리에 올리지 않습니다."""
+    filepath = datastore.data_path(filename)
+    if not os.path.exists(filepath):
+        return
+    with open(filepath, 'rb') as f:
+        yield from iter_file_items(f, filename[:-len('.yaml')])
+
+
+def dump_item(item):
+    """항목 하나를 DataStore.save()의 YAML 형식과 같은 목록 항목 텍스트로 변환합니다."""
+    return dataformat.dump([item])
+
+
+def csv_columns(record_type):
+    """레코드 타입의 CSV 열 이름 목록"""
+    columns = [name for name, _, _, _ in record_type.SCHEMA]
+    columns.extend(key for _, key in record_type.TIMESTAMP_FIELDS)
+    columns.append('created_at')
+    return columns
+
+
+def to_csv_row(data, columns):
+    """to_dict() 결과를 CSV 행으로 변환합니다."""
+    row = []
+    for column in columns:
+        value = data.get(column)
+        if value is None:
+            row.append('')
+        elif isinstance(value, bool):
+            row.append('true' if value else 'false')
+        elif isinstance(value, (list, dict)):
+            row.append(json.dumps(value, ensure_ascii=False))
+        else:
+            row.append(str(value))
+    return row
+
+
+def from_csv_row(record_type, row):
+    """CSV 행(열 이름 → 문자열)을 from_dict()에 넘길 dict로 변환합니다."""
+    types = {name: field_type for name, field_type, _, _ in record_type.SCHEMA}
+    data = {}
+    for column, text in row.items():
+        if text == '':
+            data[column] = None
+            continue
+        field_type = types.get(column)
+        if field_type is bool:
+            lowered = text.strip().lower()
+            data[column] = True if lowered in _TRUE else False if lowered in _FALSE else text
+        elif field_type is int:
+            try:
+                data[column] = int(text)
+            except ValueError:
+                raise RecordValidationError(f"{column} 필드는 정수여야 합니다")
+        elif field_type in (list, dict):
+            try:
+                data[column] = json.loads(text)
+            except ValueError:
+                raise RecordValidationError(f"{column} 필드를 JSON으로 읽을 수 없습니다")
+        else:
+            data[column] = text
+    return data
+
+
+class RecordFilter:
+    """내보내기/가져오기 레코드 필터
+
+    since/until은 작성일 범위(date, 양 끝 포함), answered는 답변 여부, author는 작성자 ID입니다.
+    """
+
+    def __init__(self, since=None, until=None, answered=None, author=None):
+        self.start_ts = None if since is None else date_to_timestamp(since)
+        self.end_ts = None if until is None else date_to_timestamp(until + timedelta(days=1))
+        self.answered = answered
+        self.author = author
+
+    def check(self, record_type):
+        """필터를 이 레코드 타입에 적용할 수 있는지 확인합니다."""
+        if self.answered is not None and 'answered' not in record_type.__slots__:
+            raise TransferError(f"{record_type.__name__}에는 답변 여부 필터를 사용할 수 없습니다")
+
+    def __call__(self, record):
+        if self.start_ts is not None and record.created_ts < self.start_ts:
+            return False
+        if self.end_ts is not None and record.created_ts >= self.end_ts:
+            return False
+        if self.answered is not None and bool(record.answered) != self.answered:
+            return False
+        if self.author is not None and record.author != self.author:
+            return False
+        return True
+
+
+def _json_line(data):
+    return json.dumps(data, ensure_ascii=False, default=str) + '\n'
+
+
+def export_records(dataset, out, fmt='jsonl', record_filter=None):
+    """데이터셋의 레코드를 out(텍스트 스트림)에 하나씩 씁니다.
+
+    Returns:
+        {'exported': 내보낸 수, 'filtered': 필터로 제외한 수, 'invalid': 검증에 실패한 수}
+    """
+    filename = dataset_filename(dataset)
+    record_type = RECORD_TYPES[filename]
+    record_filter = record_filter or RecordFilter()
+    record_filter.check(record_type)
+    counts = {'exported': 0, 'filtered': 0, 'invalid': 0}
+    writer = None
+    if fmt == 'csv':
+        columns = csv_columns(record_type)
+        writer = csv.writer(out)
+        writer.writerow(columns)
+    for item in iter_items(filename):
+        try:
+            record = record_type.from_dict(item)
+        except RecordValidationError:
+            counts['invalid'] += 1
+            continue
+        if not record_filter(record):
+            counts['filtered'] += 1
+            continue
+        if writer is not None:
+            writer.writerow(to_csv_row(record.to_dict(), columns))
+        else:
+            out.write(_json_line(record.to_dict()))
+        counts['exported'] += 1
+    return counts
+
+
+def _complete_csv_record(text):
+    # 따옴표 안의 줄바꿈이 끝났는지: 표준 CSV에서 따옴표는 항상 짝수 개로 닫힙니다
+    return text.count('"') % 2 == 0
+
+
+def iter_input(f, fmt, offset=0):
+    """입력 파일(바이너리)에서 (다음 레코드 시작 위치, 줄 번호, dict 또는 오류 메시지)를 하나씩 반환합니다.
+
+    CSV는 첫 레코드의 열 이름을 읽은 뒤 offset부터 읽습니다. 줄 번호는 offset 이후의 줄 수이며,
+    처음부터 읽는 CSV는 열 이름 줄을 포함하여 셉니다.
+    """
+    header = None
+    line_no = 0
+    if fmt == 'csv':
+        f.seek(0)
+        text = ''
+        header_lines = 0
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            header_lines += 1
+            text += line.decode('utf-8-sig' if not text else 'utf-8')
+            if _complete_csv_record(text):
+                break
+        header = next(csv.reader(io.StringIO(text)))
+        if offset <= f.tell():
+            offset, line_no = f.tell(), header_lines
+    f.seek(offset)
+    pending = ''
+    while True:
+        line = f.readline()
+        if not line:
+            if pending:
+                yield offset, line_no, "레코드가 끝나지 않았습니다"
+            return
+        offset += len(line)
+        line_no += 1
+        try:
+            text = line.decode('utf-8')
+        except UnicodeDecodeError:
+            pending = ''
+            yield offset, line_no, "UTF-8로 읽을 수 없습니다"
+            continue
+        if fmt == 'csv':
+            pending += text
+            if not _complete_csv_record(pending):
+                continue
+            text, pending = pending, ''
+        if not text.strip():
+            continue
+        if fmt == 'csv':
+            values = next(csv.reader(io.StringIO(text)))
+            if len(values) != len(header):
+                yield offset, line_no, f"열 수가 맞지 않습니다 ({len(values)}/{len(header)})"
+                continue
+            yield offset, line_no, dict(zip(header, values))
+        else:
+            try:
+                data = json.loads(text)
+            except ValueError as e:
+                yield offset, line_no, f"JSON으로 읽을 수 없습니다: {e}"
+                continue
+            yield offset, line_no, data
+
+
+class ImportJob:
+    """가져오기 작업의 임시 파일과 진행 상태"""
+
+    def __init__(self, dataset):
+        self.filename = dataset_filename(dataset)
+        self.record_type = RECORD_TYPES[self.filename]
+        base = datastore.data_path(self.filename)
+        self.staging_path = f"{base}.import.jsonl"
+        self.state_path = f"{base}.import.json"
+        self.rejects_path = f"{base}.import.rejects.jsonl"
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def discard(self):
+        """진행 상태와 임시 파일을 지웁니다."""
+        for path in (self.state_path, self.staging_path, self.rejects_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def staged_ids(self, size):
+        """임시 파일을 기록된 크기로 되돌리고 이미 모은 레코드의 ID를 반환합니다."""
+        ids = set()
+        if not os.path.exists(self.staging_path):
+            return ids
+        with open(self.staging_path, 'r+b') as f:
+            f.truncate(size)
+            for line in f:
+                ids.add(json.loads(line)['id'])
+        return ids
+
+    def truncate_rejects(self, size):
+        """마지막 진행 기록 이후에 쓴 오류 기록을 지웁니다."""
+        if os.path.exists(self.rejects_path):
+            with open(self.rejects_path, 'r+b') as f:
+                f.truncate(size)
+
+    def _merged_items(self):
+        """기존 데이터 파일의 항목에 이어 모은 레코드를 하나씩 반환합니다."""
+        yield from iter_items(self.filename)
+        if os.path.exists(self.staging_path):
+            with open(self.staging_path, 'r', encoding='utf-8') as staged:
+                for line in staged:
+                    yield json.loads(line)
+
+    def merge(self):
+        """기존 데이터와 모은 레코드를 합쳐 데이터 파일을 바꿔 넣습니다."""
+        filepath = datastore.data_path(self.filename)
+        key = self.filename[:-len('.yaml')]
+        tmp_path = f"{filepath}.{os.getpid()}.import.tmp"
+        count = 0
+        # 읽은 뒤 바꿔 넣기 전까지 앱이 저장한 내용을 잃지 않도록 앱과 같은 잠금을 잡습니다
+        with datastore.store.locked(self.filename):
+            try:
+                with open(tmp_path, 'wb') as out:
+                    if dataformat.DATA_FORMAT == 'yaml':
+                        # YAML은 항목을 하나씩 써서 전체를 메모리에 올리지 않습니다
+                        for item in self._merged_items():
+                            if count == 0:
+                                out.write(f"{key}:\n".encode('utf-8'))
+                            out.write(dump_item(item).encode('utf-8'))
+                            count += 1
+                        if count == 0:
+                            out.write(f"{key}: []\n".encode('utf-8'))
+                    else:
+                        # 바이너리 형식은 파일 전체를 한 번에 쓰므로 설정한 형식 그대로 저장합니다
+                        items = list(self._merged_items())
+                        count = len(items)
+                        dataformat.dump_file({key: items}, out)
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(tmp_path, filepath)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            datastore.store.invalidate(self.filename)
+        if self.filename in ('inquiries.yaml', 'reviews.yaml'):
+            # 집계는 다음 조회 시 전체 데이터로 다시 계산합니다
+            stats.store.reset()
+        if self.filename == 'inquiries.yaml':
+            # 작업 대기열은 다음 사용 시 문의글 데이터로 다시 채웁니다
+            workqueue.engine.reset()
+        return count
+
+
+def import_records(dataset, input_path, fmt=None, record_filter=None, resume=False, restart=False,
+                   checkpoint_every=CHECKPOINT_EVERY):
+    """입력 파일의 레코드를 검증하여 데이터셋에 추가합니다.
+
+    중단된 가져오기가 있으면 resume=True로 이어서 진행하거나 restart=True로 처음부터 다시 합니다.
+
+    Returns:
+        {'imported', 'duplicates', 'filtered', 'invalid', 'total'} 건수 dict
+        (total은 가져온 뒤 데이터 파일의 전체 항목 수)
+    """
+    fmt = detect_format(input_path, fmt)
+    job = ImportJob(dataset)
+    record_type = job.record_type
+    record_filter = record_filter or RecordFilter()
+    record_filter.check(record_type)
+    input_key = os.path.abspath(input_path)
+
+    state = job.load_state()
+    if state is not None and restart:
+        job.discard()
+        state = None
+    if state is not None and not resume:
+        raise TransferError(
+            "끝나지 않은 가져오기가 있습니다. --resume으로 이어서 하거나 --restart로 처음부터 다시 시작하세요"
+        )
+    if state is not None and (state['input'] != input_key or state['format'] != fmt):
+        raise TransferError(f"중단된 가져오기의 입력 파일과 다릅니다: {state['input']} ({state['format']})")
+    if state is None:
+        job.discard()
+        state = {'input': input_key, 'format': fmt, 'offset': 0, 'line': 0, 'staged_size': 0, 'rejects_size': 0,
+                 'imported': 0, 'duplicates': 0, 'filtered': 0, 'invalid': 0}
+
+    ids = job.staged_ids(state['staged_size'])
+    job.truncate_rejects(state['rejects_size'])
+    ids.update(str(item.get('id')) for item in iter_items(job.filename) if isinstance(item, dict))
+
+    os.makedirs(datastore.data_dir(), exist_ok=True)
+    with open(input_path, 'rb') as f, \
+            open(job.staging_path, 'a', encoding='utf-8') as staging, \
+            open(job.rejects_path, 'a', encoding='utf-8') as rejects:
+
+        def checkpoint():
+            staging.flush()
+            os.fsync(staging.fileno())
+            rejects.flush()
+            state['staged_size'] = staging.tell()
+            state['rejects_size'] = rejects.tell()
+            job.save_state(state)
+
+        processed = 0
+        base_line = state['line']
+        for offset, line_no, data in iter_input(f, fmt, state['offset']):
+            line = base_line + line_no
+            try:
+                if isinstance(data, str):
+                    raise RecordValidationError(data)
+                if fmt == 'csv':
+                    data = from_csv_row(record_type, data)
+                record = record_type.from_dict(data)
+            except RecordValidationError as e:
+                rejects.write(_json_line({'line': line, 'error': str(e)}))
+                state['invalid'] += 1
+            else:
+                if not record_filter(record):
+                    state['filtered'] += 1
+                elif record.id in ids:
+                    state['duplicates'] += 1
+                else:
+                    # 화면에 그대로 표시되는 HTML이므로 입력 파일의 값은 믿지 않습니다
+                    markup.render_fields(record)
+                    staging.write(_json_line(record.to_dict()))
+                    ids.add(record.id)
+                    state['imported'] += 1
+            state['offset'], state['line'] = offset, line
+            processed += 1
+            if processed % checkpoint_every == 0:
+                checkpoint()
+        checkpoint()
+
+    total = job.merge()
+    result = {name: state[name] for name in ('imported', 'duplicates', 'filtered', 'invalid')}
+    result['total'] = total
+    for path in (job.state_path, job.staging_path):
+        os.remove(path)
+    if not state['invalid']:
+        os.remove(job.rejects_path)
+    return result
+
+
+def _parse_date(text):
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"날짜 형식은 YYYY-MM-DD입니다: {text}")
+
+
+def _parse_answered(text):
+    lowered = text.lower()
+    if lowered in _TRUE:
+        return True
+    if lowered in _FALSE:
+        return False
+    raise argparse.ArgumentTypeError(f"yes 또는 no로 지정하세요: {text}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="문의글/후기/칼럼 대량 내보내기/가져오기")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument('--since', type=_parse_date, help="이 날짜 이후 작성 (YYYY-MM-DD, 포함)")
+    filters.add_argument('--until', type=_parse_date, help="이 날짜 이전 작성 (YYYY-MM-DD, 포함)")
+    filters.add_argument('--answered', type=_parse_answered, help="답변 여부 (yes/no, 문의글만)")
+    filters.add_argument('--author', help="작성자 ID")
+    filters.add_argument('--format', choices=FORMATS, help="jsonl 또는 csv (기본값: 파일 확장자, 없으면 jsonl)")
+
+    export = commands.add_parser('export', parents=[filters], help="레코드 내보내기")
+    export.add_argument('dataset', choices=list(DATASETS))
+    export.add_argument('-o', '--output', help="출력 파일 (기본값: 표준 출력)")
+
+    imp = commands.add_parser('import', parents=[filters], help="레코드 가져오기")
+    imp.add_argument('dataset', choices=list(DATASETS))
+    imp.add_argument('input', help="입력 파일")
+    resume = imp.add_mutually_exclusive_group()
+    resume.add_argument('--resume', action='store_true', help="중단된 가져오기를 이어서 진행")
+    resume.add_argument('--restart', action='store_true', help="중단된 가져오기를 버리고 처음부터 진행")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    record_filter = RecordFilter(args.since, args.until, args.answered, args.author)
+    try:
+        if args.command == 'export':
+            fmt = args.format or (detect_format(args.output) if args.output else 'jsonl')
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8', newline='') as out:
+                    counts = export_records(args.dataset, out, fmt, record_filter)
+            else:
+                counts = export_records(args.dataset, sys.stdout, fmt, record_filter)
+            print(f"내보내기: {counts['exported']}건 (필터 제외 {counts['filtered']}건, "
+                  f"형식 오류 {counts['invalid']}건)", file=sys.stderr)
+        else:
+            result = import_records(args.dataset, args.input, args.format, record_filter,
+                                    resume=args.resume, restart=args.restart)
+            print(f"가져오기: {result['imported']}건 (중복 {result['duplicates']}건, "
+                  f"필터 제외 {result['filtered']}건, 형식 오류 {result['invalid']}건), "
+                  f"전체 {result['total']}건", file=sys.stderr)
+            if result['invalid']:
+                print(f"형식 오류 목록: {ImportJob(args.dataset).rejects_path}", file=sys.stderr)
+    except (TransferError, OSError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+레코드별 UI 상태 관리
+
+관리자 화면은 문의글마다 editing_<id>, answer_<id>, answer_edit_<id> 같은 세션 키를 만듭니다.
+이 키를 그대로 두면 오래 열어 둔 세션의 상태가 문의글 수에 비례해 늘어나므로,
+RecordUIState로 키를 발급하고 이번 실행에서 화면에 표시되지 않은 레코드의 키는 지웁니다.
+"""
+import sys
+import pickle
+
+# 세션에 저장하는 발급 키 목록의 이름 접두사
+REGISTRY_PREFIX = '_ui_keys_'
+
+
+class RecordUIState:
+    """한 화면(scope)에서 레코드별로 만드는 세션 키를 추적합니다.
+
+    key()로 발급한 키만 관리하며, evict_stale()은 이번 실행에서 key()가 호출되지 않은
+    키를 세션에서 지웁니다. 화면을 그린 뒤에 evict_stale()을 호출합니다.
+    """
+
+    def __init__(self, session, scope):
+        self.session = session
+        self.registry_key = f"{REGISTRY_PREFIX}{scope}"
+        self._used = set()
+
+    def key(self, prefix, record_id):
+        """레코드의 세션 키 (prefix_id)를 발급합니다."""
+        key = f"{prefix}_{record_id}"
+        self._used.add(key)
+        return key
+
+    def get(self, prefix, record_id, default=None):
+        return self.session.get(self.key(prefix, record_id), default)
+
+    def set(self, prefix, record_id, value):
+        self.session[self.key(prefix, record_id)] = value
+
+    def evict_stale(self):
+        """이번 실행에서 사용하지 않은 키를 지우고 지운 키 수를 반환합니다."""
+        registry = self.session.get(self.registry_key, set())
+        evicted = 0
+        for key in registry - self._used:
+            if key in self.session:
+                del self.session[key]
+                evicted += 1
+        self.session[self.registry_key] = set(self._used)
+        return evicted
+
+
+def _value_size(value):
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        # pickle할 수 없는 객체는 객체 자체 크기로 근사합니다
+        return sys.getsizeof(value)
+
+
+def session_footprint(session):
+    """세션 상태의 (키 수, 직렬화 기준 대략적인 크기(바이트), 큰 순서의 (키, 크기) 목록)을 반환합니다."""
+    sizes = sorted(
+        ((str(key), _value_size(session[key])) for key in list(session.keys())),
+        key=lambda item: item[1],
+        reverse=True
+    )
+    return len(sizes), sum(size for _, size in sizes), sizes
@@ -0,0 +1,237 @@
+"""
+파일 변경 감시에 따른 캐시 무효화
+
+같은 호스트에서 여러 Streamlit 서버 프로세스가 data/를 공유할 때, 다른 프로세스가 저장한
+내용을 곧바로 반영하기 위해 data/, content/, users.yaml의 변경을 감시하여 이 프로세스의
+데이터/콘텐츠/사용자 캐시를 무효화합니다.
+
+- watchdog이 설치되어 있으면 운영체제의 변경 알림(Linux에서는 inotify)을 사용합니다
+- watchdog이 없거나 알림을 시작할 수 없으면 파일의 수정 시각/크기를 주기적으로 확인합니다
+- 감시 중에는 캐시가 조회마다 파일 상태를 확인하지 않고, 무효화될 때만 다시 읽습니다
+- 지점(tenants.py)이 여러 개면 모든 지점의 파일을 감시하고, 바뀐 파일이 속한 지점의 캐시만 비웁니다
+"""
+import os
+import logging
+import threading
+
+import datastore
+import stats
+import tenants
+from records import CHILD_RECORD_TYPES
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # pragma: no cover - watchdog이 없으면 주기적 확인만 사용
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+# 주기적 확인 간격 (초)
+POLL_INTERVAL = float(os.environ.get('BLUHILL_WATCH_POLL_INTERVAL', '0.5'))
+# 0이면 감시하지 않고 캐시가 조회마다 파일 상태를 확인합니다
+WATCH_ENABLED = os.environ.get('BLUHILL_WATCH', '1') != '0'
+
+
+def _caches():
+    return (datastore.store, datastore.files, stats.store)
+
+
+def invalidate_path(path):
+    """변경된 파일에 해당하는 지점의 캐시를 비웁니다. 캐시 대상 파일이면 True를 반환합니다."""
+    abspath = os.path.abspath(path)
+    for tenant in tenants.registry.tenants():
+        with tenants.activated(tenant):
+            if _invalidate_tenant_path(abspath):
+                return True
+    return False
+
+
+def _invalidate_tenant_path(abspath):
+    """현재 지점의 파일이면 해당 캐시를 비우고 True를 반환합니다."""
+    data_dir = os.path.abspath(datastore.data_dir())
+    if os.path.dirname(abspath) == data_dir:
+        filename = os.path.basename(abspath)
+        if filename == stats.STATS_FILENAME:
+            stats.store.invalidate()
+            return True
+        if filename.endswith('.yaml'):
+            datastore.store.invalidate(filename)
+            return True
+        return False
+    directory = os.path.dirname(abspath)
+    if os.path.dirname(directory) == data_dir and \
+            os.path.basename(directory) in CHILD_RECORD_TYPES and abspath.endswith('.yaml'):
+        # 답글 스레드 등 data/<디렉토리>/<부모 ID>.yaml 파일
+        datastore.store.invalidate(f"{os.path.basename(directory)}/{os.path.basename(abspath)}")
+        return True
+    content_dir = os.path.abspath(datastore.content_dir())
+    if abspath == os.path.abspath(datastore.users_file()) or (
+        abspath.startswith(content_dir + os.sep) and abspath.endswith('.md')
+    ):
+        datastore.files.invalidate(abspath)
+        return True
+    return False
+
+
+def _tenant_files():
+    """현재 지점의 감시 대상 파일 경로 목록"""
+    data_dir = datastore.data_dir()
+    paths = [datastore.users_file()]
+    if os.path.isdir(data_dir):
+        paths.extend(os.path.join(data_dir, name) for name in os.listdir(data_dir) if name.endswith('.yaml'))
+    for dirname in CHILD_RECORD_TYPES:
+        child_dir = os.path.join(data_dir, dirname)
+        if os.path.isdir(child_dir):
+            paths.extend(os.path.join(child_dir, name) for name in os.listdir(child_dir) if name.endswith('.yaml'))
+    for root, _, filenames in os.walk(datastore.content_dir()):
+        paths.extend(os.path.join(root, name) for name in filenames if name.endswith('.md'))
+    return paths
+
+
+def watched_files():
+    """모든 지점의 주기적 확인 대상 파일의 {경로: (수정 시각, 크기)}를 반환합니다."""
+    paths = []
+    for tenant in tenants.registry.tenants():
+        with tenants.activated(tenant):
+            paths.extend(_tenant_files())
+    signatures = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signatures[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size)
+    return signatures
+
+
+class _EventHandler(FileSystemEventHandler):
+    """watchdog 이벤트를 캐시 무효화로 전달합니다."""
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        invalidate_path(event.src_path)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            invalidate_path(dest_path)
+
+
+class _Poller(threading.Thread):
+    """파일 상태를 주기적으로 비교하여 바뀐 파일의 캐시를 비웁니다."""
+
+    def __init__(self, interval):
+        super().__init__(name='cache-watcher', daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._signatures = watched_files()
+
+    def check(self):
+        """한 번 비교하고 무효화한 파일 수를 반환합니다."""
+        current = watched_files()
+        changed = {
+            path for path in set(current) | set(self._signatures)
+            if current.get(path) != self._signatures.get(path)
+        }
+        self._signatures = current
+        for path in changed:
+            invalidate_path(path)
+        return len(changed)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("파일 변경 확인 중 오류 발생")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class CacheWatcher:
+    """data/, content/, users.yaml을 감시하여 캐시를 무효화합니다.
+
+    mode는 시작 후 'notify'(운영체제 변경 알림) 또는 'polling'(주기적 확인)입니다.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL, use_notify=True):
+        self.poll_interval = poll_interval
+        self.use_notify = use_notify
+        self.mode = None
+        self._observer = None
+        self._poller = None
+
+    def _start_observer(self):
+        handler = _EventHandler()
+        observer = Observer()
+        for tenant in tenants.registry.tenants():
+            with tenants.activated(tenant):
+                data_dir = datastore.data_dir()
+                os.makedirs(data_dir, exist_ok=True)
+                observer.schedule(handler, data_dir, recursive=False)
+                for dirname in CHILD_RECORD_TYPES:
+                    child_dir = os.path.join(data_dir, dirname)
+                    os.makedirs(child_dir, exist_ok=True)
+                    observer.schedule(handler, child_dir, recursive=False)
+                if os.path.isdir(datastore.content_dir()):
+                    observer.schedule(handler, datastore.content_dir(), recursive=True)
+                # users.yaml은 편집기가 새 파일로 바꿔 넣는 경우가 있어 파일이 있는 디렉토리를 감시합니다
+                observer.schedule(handler, os.path.dirname(os.path.abspath(datastore.users_file())), recursive=False)
+        observer.start()
+        return observer
+
+    def start(self):
+        """감시를 시작하고, 감시 중에는 캐시가 파일 상태를 매번 확인하지 않게 합니다."""
+        if self.use_notify and Observer is not None:
+            try:
+                self._observer = self._start_observer()
+                self.mode = 'notify'
+            except OSError as e:
+                # inotify 감시 개수 한도 초과 등
+                logger.warning("파일 변경 알림을 사용할 수 없어 주기적 확인으로 전환합니다: %s", e)
+                self._observer = None
+        if self._observer is None:
+            self._poller = _Poller(self.poll_interval)
+            self._poller.start()
+            self.mode = 'polling'
+        # 감시 시작 전에 채워진 캐시는 최신인지 알 수 없으므로 모든 지점의 캐시를 비웁니다
+        for tenant in tenants.registry.tenants():
+            with tenants.activated(tenant):
+                datastore.store.invalidate()
+                datastore.files.invalidate()
+                stats.store.invalidate()
+        for cache in _caches():
+            cache.verify = False
+        return self
+
+    def stop(self):
+        """감시를 멈추고 캐시가 다시 조회마다 파일 상태를 확인하게 합니다."""
+        for cache in _caches():
+            cache.verify = True
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._poller is not None:
+            self._poller.stop()
+            self._poller.join()
+            self._poller = None
+        self.mode = None
+
+
+# 프로세스 전체에서 하나만 실행하는 감시기
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def start_once():
+    """프로세스의 감시기를 한 번만 시작하고 반환합니다. 감시를 끈 경우 None을 반환합니다."""
+    global _watcher
+    if not WATCH_ENABLED:
+        return None
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = CacheWatcher().start()
+        return _watcher
@@ -0,0 +1,385 @@
+"""
+관리자 문의 작업 대기열
+
+여러 관리자가 같은 문의글에 답변하지 않도록 답변 대기 문의글을 대기열로 관리합니다. 관리자가 다음 문의글을
+가져가면(claim) 정해진 시간 동안 그 관리자에게 맡기고(lease), 다른 관리자는 그다음 문의글을 받습니다.
+
+- 우선순위마다 처리 기한(SLA)이 있으며, 대기열은 "접수 시각 + 우선순위별 기한"이 이른 순서입니다.
+  기한은 접수 시각으로 정해지므로 오래 기다린 보통 문의는 나중에 들어온 긴급 문의보다 앞설 수 있습니다
+- 대기열과 맡긴 문의의 만료 시각을 각각 힙으로 보관하므로 가져가기/완료는 대기 건수 n에 대해 O(log n)입니다.
+  완료되었거나 우선순위가 바뀐 항목은 힙에서 바로 지우지 않고 꺼낼 때 건너뜁니다
+- 맡긴 시간(BLUHILL_QUEUE_LEASE_SECONDS, 기본 15분) 안에 완료하지 않으면 대기열로 돌아갑니다
+- 변경은 data/workqueue.jsonl에 한 줄씩 추가하는 이벤트 로그로 저장하며, booking.py와 같이 파일 잠금 안에서
+  "다른 프로세스가 추가한 줄 반영 → 확인 → 기록" 순서로 처리하므로 두 세션이 같은 문의를 가져갈 수 없습니다
+- 로그가 현재 항목 수에 비해 길어지면 현재 상태만 남도록 다시 씁니다
+"""
+import os
+import json
+import time
+import uuid
+import heapq
+import threading
+from contextlib import contextmanager
+
+import datastore
+import tenants
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+QUEUE_FILENAME = 'workqueue.jsonl'
+LEASE_SECONDS = int(os.environ.get('BLUHILL_QUEUE_LEASE_SECONDS', '900'))
+
+# 우선순위별 처리 기한 (초)
+PRIORITY_SLA = {
+    'high': 4 * 3600,
+    'normal': 24 * 3600,
+    'low': 72 * 3600
+}
+PRIORITY_LABELS = {'high': "긴급", 'normal': "보통", 'low': "낮음"}
+DEFAULT_PRIORITY = 'normal'
+
+# 로그 줄 수가 이 값과 현재 항목 수의 4배를 모두 넘으면 로그를 다시 씁니다
+COMPACT_MIN_EVENTS = 1000
+
+
+class WorkQueueError(Exception):
+    """대기열 변경을 처리할 수 없을 때 발생합니다."""
+
+
+class _FileLock:
+    """프로세스 간 배타 잠금 (fcntl이 없으면 아무것도 하지 않음)"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+
+class WorkQueue:
+    """답변 대기 문의글의 처리 기한순 대기열과 관리자별 맡김(lease)을 관리합니다."""
+
+    def __init__(self, path=None, lease_seconds=None, clock=time.time):
+        self.path = path
+        self.lease_seconds = LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        # 문의글 ID → 항목 {'id', 'created', 'since', 'priority', 'due', 'seq'}
+        self._items = {}
+        # (처리 기한, 순번, 문의글 ID): 순번이 항목의 현재 순번과 다르면 지난 항목입니다
+        self._heap = []
+        # 문의글 ID → 맡김 {'id', 'admin', 'admin_name', 'until'}, 관리자 → 문의글 ID
+        self._leases = {}
+        self._by_admin = {}
+        # (만료 시각, 문의글 ID)
+        self._lease_heap = []
+        self._seq = 0
+        self._events = 0
+        self._offset = 0
+        self._loaded = None
+
+    def _path(self):
+        return self.path or datastore.data_path(QUEUE_FILENAME)
+
+    # 이벤트 로그
+    def _push(self, item):
+        self._seq += 1
+        item['seq'] = self._seq
+        heapq.heappush(self._heap, (item['due'], item['seq'], item['id']))
+
+    def _drop_lease(self, inquiry_id):
+        lease = self._leases.pop(inquiry_id, None)
+        if lease is not None and self._by_admin.get(lease['admin']) == inquiry_id:
+            del self._by_admin[lease['admin']]
+        return lease
+
+    def _apply(self, event):
+        op = event.get('op')
+        inquiry_id = event['id']
+        if op == 'enqueue':
+            priority = event.get('priority', DEFAULT_PRIORITY)
+            since = event.get('since', event['created'])
+            item = {
+                'id': inquiry_id,
+                'created': event['created'],
+                'since': since,
+                'priority': priority,
+                'due': since + PRIORITY_SLA.get(priority, PRIORITY_SLA[DEFAULT_PRIORITY])
+            }
+            self._items[inquiry_id] = item
+            # 맡겨진 문의는 반납되거나 만료될 때 대기열로 돌아갑니다
+            if inquiry_id not in self._leases:
+                self._push(item)
+        elif op == 'claim':
+            if inquiry_id not in self._items:
+                return
+            self._drop_lease(inquiry_id)
+            previous = self._by_admin.get(event['admin'])
+            if previous is not None and previous != inquiry_id:
+                self._drop_lease(previous)
+                self._push(self._items[previous])
+            lease = {k: event[k] for k in ('id', 'admin', 'admin_name', 'until')}
+            self._leases[inquiry_id] = lease
+            self._by_admin[lease['admin']] = inquiry_id
+            heapq.heappush(self._lease_heap, (lease['until'], inquiry_id))
+        elif op == 'release':
+            if self._drop_lease(inquiry_id) is not None and inquiry_id in self._items:
+                self._push(self._items[inquiry_id])
+        elif op == 'complete':
+            self._items.pop(inquiry_id, None)
+            self._drop_lease(inquiry_id)
+
+    def _expire(self, now):
+        """만료된 맡김을 대기열로 돌려보냅니다."""
+        while self._lease_heap and self._lease_heap[0][0] <= now:
+            until, inquiry_id = heapq.heappop(self._lease_heap)
+            lease = self._leases.get(inquiry_id)
+            if lease is None or lease['until'] != until:
+                continue
+            self._drop_lease(inquiry_id)
+            if inquiry_id in self._items:
+                self._push(self._items[inquiry_id])
+
+    def _refresh(self):
+        """마지막으로 읽은 위치 이후에 추가된 이벤트를 반영합니다. 로그가 다시 쓰였으면 처음부터 읽습니다."""
+        path = self._path()
+        if not os.path.exists(path):
+            if self._loaded is not None:
+                self._reset()
+            return
+        with open(path, 'rb') as f:
+            # 다시 쓴 로그는 첫 줄(compacted 이벤트)이 달라지므로 inode가 재사용되어도 구분됩니다
+            stat = os.fstat(f.fileno())
+            loaded = (os.path.abspath(path), stat.st_ino, f.readline(256))
+            if loaded != self._loaded or stat.st_size < self._offset:
+                self._reset()
+                self._loaded = loaded
+            f.seek(self._offset)
+            data = f.read()
+        # 아직 다 쓰이지 않은 마지막 줄은 다음에 읽습니다
+        complete = data[:data.rfind(b'\n') + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    continue
+                self._events += 1
+        self._offset += len(complete)
+
+    def _sync_state(self):
+        self._refresh()
+        self._expire(self.clock())
+
+    @contextmanager
+    def _transaction(self):
+        """파일 잠금 안에서 다른 프로세스의 변경을 반영한 뒤, 본문이 목록에 넣은 이벤트를 기록합니다."""
+        path = self._path()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._lock, open(f"{path}.lock", 'ab') as lock_file, _FileLock(lock_file):
+            try:
+                self._sync_state()
+                events = []
+                yield events
+                if events:
+                    with open(path, 'ab') as f:
+                        for event in events:
+                            f.write((json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    # 잠금을 쥐고 있으므로 마지막으로 읽은 위치 이후는 방금 기록한 이벤트뿐입니다
+                    self._refresh()
+                    self._maybe_compact()
+            except Exception:
+                # 본문이 힙을 바꾼 뒤 실패했을 수 있으므로 다음 조회 때 로그에서 다시 만듭니다
+                self._reset()
+                raise
+
+    def _maybe_compact(self):
+        live = len(self._items) + len(self._leases)
+        if self._events <= max(COMPACT_MIN_EVENTS, 4 * live):
+            return
+        path = self._path()
+        events = [{'op': 'compacted', 'id': str(uuid.uuid4()), 'at': self.clock()}]
+        events.extend(
+            {'op': 'enqueue', 'id': item['id'], 'created': item['created'],
+             'since': item['since'], 'priority': item['priority']}
+            for item in sorted(self._items.values(), key=lambda item: item['seq'])
+        )
+        events.extend({'op': 'claim', **lease} for lease in self._leases.values())
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                for event in events:
+                    f.write((json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._reset()
+        self._refresh()
+
+    # 조회
+    def exists(self):
+        """대기열 로그가 있는지 여부 (없으면 문의글 데이터로 채워야 합니다)"""
+        return os.path.exists(self._path())
+
+    def refresh(self):
+        """다른 프로세스의 변경과 만료된 맡김을 반영합니다."""
+        with self._lock:
+            self._sync_state()
+
+    def counts(self):
+        """(대기 건수, 맡겨진 건수)"""
+        with self._lock:
+            self._sync_state()
+            return len(self._items) - len(self._leases), len(self._leases)
+
+    def item(self, inquiry_id):
+        """대기열 항목 (완료되었거나 없으면 None)"""
+        with self._lock:
+            self._sync_state()
+            item = self._items.get(inquiry_id)
+            return dict(item) if item is not None else None
+
+    def lease_for(self, inquiry_id):
+        """문의글을 맡은 관리자 정보 (맡겨지지 않았으면 None)"""
+        with self._lock:
+            self._sync_state()
+            lease = self._leases.get(inquiry_id)
+            return dict(lease) if lease is not None else None
+
+    def leases(self):
+        """문의글 ID → 맡김 (목록 화면에서 다른 관리자가 처리 중인 문의를 표시할 때)"""
+        with self._lock:
+            self._sync_state()
+            return {inquiry_id: dict(lease) for inquiry_id, lease in self._leases.items()}
+
+    def held_by(self, admin):
+        """관리자가 맡고 있는 (항목, 맡김) (없으면 None)"""
+        with self._lock:
+            self._sync_state()
+            inquiry_id = self._by_admin.get(admin)
+            if inquiry_id is None:
+                return None
+            return dict(self._items[inquiry_id]), dict(self._leases[inquiry_id])
+
+    def upcoming(self, limit):
+        """맡겨지지 않은 항목 중 처리 기한이 이른 limit개"""
+        with self._lock:
+            self._sync_state()
+            entries = heapq.nsmallest(limit, (
+                entry for entry in self._heap
+                if entry[2] not in self._leases and self._items.get(entry[2], {}).get('seq') == entry[1]
+            ))
+            return [dict(self._items[inquiry_id]) for _, _, inquiry_id in entries]
+
+    # 변경
+    def enqueue(self, inquiry_id, created, since=None, priority=DEFAULT_PRIORITY):
+        """문의글을 대기열에 넣습니다. 이미 있으면 접수 시각과 우선순위를 바꿉니다.
+
+        since는 처리 기한의 기준 시각이며, 답변 후 작성자가 다시 답글을 단 경우 그 답글의 작성일시입니다.
+        """
+        if priority not in PRIORITY_SLA:
+            raise WorkQueueError(f"알 수 없는 우선순위입니다: {priority}")
+        event = {'op': 'enqueue', 'id': inquiry_id, 'created': created,
+                 'since': created if since is None else since, 'priority': priority}
+        with self._transaction() as events:
+            events.append(event)
+
+    def set_priority(self, inquiry_id, priority):
+        """대기 중인 문의글의 우선순위를 바꿉니다. 대기열에 없으면 False를 반환합니다."""
+        if priority not in PRIORITY_SLA:
+            raise WorkQueueError(f"알 수 없는 우선순위입니다: {priority}")
+        with self._transaction() as events:
+            item = self._items.get(inquiry_id)
+            if item is None:
+                return False
+            if item['priority'] != priority:
+                events.append({'op': 'enqueue', 'id': inquiry_id, 'created': item['created'],
+                               'since': item['since'], 'priority': priority})
+            return True
+
+    def claim(self, admin, admin_name):
+        """처리 기한이 가장 이른 문의글을 관리자에게 맡기고 (항목, 맡김)을 반환합니다.
+
+        이미 맡은 문의글이 있으면 새로 가져가지 않고 그 문의글의 맡긴 시간을 연장합니다.
+        대기 중인 문의글이 없으면 None을 반환합니다.
+        """
+        with self._transaction() as events:
+            inquiry_id = self._by_admin.get(admin)
+            while inquiry_id is None and self._heap:
+                _, seq, candidate = heapq.heappop(self._heap)
+                item = self._items.get(candidate)
+                if item is not None and item['seq'] == seq and candidate not in self._leases:
+                    inquiry_id = candidate
+            if inquiry_id is None:
+                return None
+            lease = {'id': inquiry_id, 'admin': admin, 'admin_name': admin_name,
+                     'until': self.clock() + self.lease_seconds}
+            events.append({'op': 'claim', **lease})
+        return dict(self._items[inquiry_id]), lease
+
+    def release(self, inquiry_id, admin=None):
+        """맡은 문의글을 대기열로 돌려보냅니다. admin을 주면 그 관리자가 맡은 경우에만 돌려보냅니다."""
+        with self._transaction() as events:
+            lease = self._leases.get(inquiry_id)
+            if lease is None or (admin is not None and lease['admin'] != admin):
+                return False
+            events.append({'op': 'release', 'id': inquiry_id})
+            return True
+
+    def complete(self, inquiry_id):
+        """답변이 끝난 문의글을 대기열에서 뺍니다. 대기열에 없었으면 False를 반환합니다."""
+        with self._transaction() as events:
+            if inquiry_id not in self._items:
+                return False
+            events.append({'op': 'complete', 'id': inquiry_id})
+            return True
+
+    def reset(self):
+        """대기열 로그를 지워 다음 사용 시 문의글 데이터로 다시 채우게 합니다 (데이터를 가져오거나 복원한 뒤)."""
+        path = self._path()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._lock, open(f"{path}.lock", 'ab') as lock_file, _FileLock(lock_file):
+            if os.path.exists(path):
+                os.remove(path)
+            self._reset()
+
+    def sync(self, entries):
+        """대기열을 답변 대기 문의글 목록에 맞춥니다 (대기열 로그가 없거나 데이터를 가져온 뒤).
+
+        entries는 (문의글 ID, 작성일시, 기준 시각, 우선순위) 목록입니다. 목록에 없는 항목은 완료 처리하고,
+        이미 있는 항목은 우선순위를 그대로 둡니다. (추가한 수, 뺀 수)를 반환합니다.
+        """
+        with self._transaction() as events:
+            pending = set()
+            for inquiry_id, created, since, priority in entries:
+                pending.add(inquiry_id)
+                item = self._items.get(inquiry_id)
+                if item is None or item['since'] != since:
+                    events.append({'op': 'enqueue', 'id': inquiry_id, 'created': created, 'since': since,
+                                   'priority': item['priority'] if item else priority})
+            added = len(events)
+            for inquiry_id in self._items:
+                if inquiry_id not in pending:
+                    events.append({'op': 'complete', 'id': inquiry_id})
+            return added, len(events) - added
+
+
+# 프로세스 전체에서 공유하는 지점별 대기열
+engine = tenants.TenantLocal(WorkQueue)